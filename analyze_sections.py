@@ -0,0 +1,100 @@
+"""
+analyze_sections.py – Analyze only selected pages or sections of a contract.
+
+Usage:
+    python analyze_sections.py msa.pdf --index                      # pages, bookmarks, headings
+    python analyze_sections.py msa.pdf --pages "120-134, 410"
+    python analyze_sections.py msa.pdf --section liability --section termination
+    python analyze_sections.py msa.pdf --section liability --background   # + full job
+    python analyze_sections.py msa.pdf --pages 1-20 --output pages.json
+
+Builds the document's page index in one pass (no scoring), then segments
+and scores just the selected pages. Sections are matched by title against
+the PDF bookmarks, or against detected headings when there are none.
+--background also queues the whole document as a job for job_worker.py
+(or the app's in-app worker); its results open in the app with ?job=<id>.
+"""
+import argparse
+import json
+import os
+import sys
+
+from utils.clause_table import as_dicts
+from utils.job_queue import JobQueue
+from utils.model_registry import ModelRegistry
+from utils.page_index import analyze_selection, build_page_index, format_ranges, parse_page_ranges
+
+
+def print_index(page_index) -> None:
+    summary = page_index.summary()
+    print(f"{summary['name']}: {summary['pages']} pages, {summary['characters']:,} characters, "
+          f"{summary['outline_entries']} bookmarks, {summary['headings']} headings\n")
+    for section in summary["sections"]:
+        pages = format_ranges([(section["first_page"], section["last_page"])])
+        print(f"  pp. {pages:<10} {section['title']}  [{section['source']}]")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Analyze selected pages or sections of a contract")
+    parser.add_argument("path", help="Contract file (.pdf or .txt)")
+    parser.add_argument("--index", action="store_true", help="Print the page index and exit")
+    parser.add_argument("--pages", help='Page ranges, e.g. "1-5, 12, 40-"')
+    parser.add_argument("--section", action="append", default=[],
+                        help="Section title (substring, case-insensitive); repeatable")
+    parser.add_argument("--scoring", choices=["model", "cascade"], default=None,
+                        help="Score with the current published model (default: keyword rules)")
+    parser.add_argument("--background", action="store_true",
+                        help="Also queue the full document as a background job")
+    parser.add_argument("--output", help="Write the selection's clauses and stats as JSON")
+    args = parser.parse_args()
+
+    with open(args.path, "rb") as f:
+        raw_bytes = f.read()
+    name = os.path.basename(args.path)
+    page_index = build_page_index(name, raw_bytes)
+
+    if args.index or not (args.pages or args.section):
+        print_index(page_index)
+        return
+
+    ranges = []
+    if args.pages:
+        ranges += parse_page_ranges(args.pages, page_index.n_pages)
+    if args.section:
+        section_ranges = page_index.section_pages(args.section)
+        if not section_ranges:
+            sys.exit(f"No section matches {', '.join(args.section)} (see --index)")
+        ranges += section_ranges
+
+    if args.background:
+        with JobQueue() as queue:
+            job_id = queue.submit(name, raw_bytes, {"scoring": args.scoring})
+        print(f"Queued full analysis as job {job_id}")
+
+    model = None
+    if args.scoring:
+        model = ModelRegistry().load()
+        if model is None:
+            sys.exit("No learned model has been published yet.")
+
+    result = analyze_selection(page_index, ranges, model=model, cascade=args.scoring == "cascade")
+    stats = result["stats"]
+    print(f"Pages {format_ranges(result['pages'])} of {page_index.n_pages}: {stats['total']} clauses, "
+          f"{stats['risky_count']} risky ({stats['risk_percentage']}%)")
+    for clause in result["analyzed"]:
+        if clause["label"] == "Risky":
+            keywords = ", ".join(clause["matched_keywords"])
+            print(f"  p. {clause['page']:<5} #{clause['id']:<5} {keywords}")
+
+    if args.output:
+        out_dir = os.path.dirname(args.output)
+        if out_dir:
+            os.makedirs(out_dir, exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"name": name, "pages": result["pages"], "stats": stats,
+                       "routing": result["routing"], "clauses": as_dicts(result["analyzed"])}, f, indent=2)
+        print(f"\nSaved results → {args.output}")
+
+
+if __name__ == "__main__":
+    main()
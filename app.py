@@ -11,23 +11,67 @@ Usage:
     streamlit run app.py
 """
 
+import hashlib
+import json
+import os
 import time
+from collections import Counter
+from contextlib import nullcontext
+from datetime import datetime, time as dt_time
+from functools import partial
 import streamlit as st
+from streamlit.errors import StreamlitAPIException
 
 from app_config import (
     APP_TITLE,
     APP_SUBTITLE,
+    ANALYSIS_STORE_PATH,
+    ADMIN_ENV_VAR,
+    ASYNC_SIZE_THRESHOLD_MB,
+    FEEDBACK_BACKGROUND_UPDATES,
+    JOB_IN_APP_WORKER,
+    JOB_POLL_INTERVAL,
+    JOB_QUEUE_DIR,
+    PAGE_SCOPE_MIN_PAGES,
+    PRECEDENT_APPROXIMATE,
+    PROFILE_TOP_N,
     COLOUR,
     SIDEBAR_HOW_TO,
     SIDEBAR_DISCLAIMER,
 )
 from utils.file_handler import extract_text_from_upload, get_file_metadata
 from utils.clause_segmenter import segment_document
-from utils.risk_predictor import analyze_clauses, compute_summary_stats
+from utils.stats_aggregator import SummaryAggregator
+from utils.batch_analyzer import (
+    build_document_pipeline,
+    rank_portfolio,
+    resolve_workers,
+    run_document_pipeline,
+)
+from utils.version_diff import reanalyze_revision, summarize_diff
+from utils.analysis_store import AnalysisStore
+from utils.search_index import SearchIndex
+from utils.report_exporter import EXPORT_FORMATS, export_to_buffer, parquet_available
+from utils.cascade import analyze_clauses_cascade, format_routing, load_thresholds, thresholds_tuned
+from utils.feedback_log import FeedbackLog
+from utils.feedback_updater import FeedbackUpdater
+from utils.job_queue import FINISHED_STATUSES, JobQueue, JobWorker
+from utils.model_registry import ModelRegistry
+from utils.page_index import analyze_selection, build_page_index, format_ranges, parse_page_ranges
+from utils.profiler import PROFILE_MODES, PipelineProfiler, maybe_stage
+from utils.precedent_matcher import PrecedentLibrary, load_precedents, match_risky_clauses
+from utils.risk_predictor import (
+    analyze_clauses,
+    build_clause_index,
+    select_clauses,
+)
 from components.result_display import (
     inject_card_styles,
     render_summary_metrics,
+    render_category_breakdown,
     render_clause_list,
+    render_portfolio_table,
+    render_version_diff,
 )
 
 # ---------------------------------------------------------------------------
@@ -172,8 +216,8 @@ def _inject_global_styles() -> None:
 # ---------------------------------------------------------------------------
 # Sidebar
 # ---------------------------------------------------------------------------
-def _render_sidebar() -> bool:
-    """Renders the sidebar and returns the show_safe_clauses toggle value."""
+def _render_sidebar():
+    """Renders the sidebar and returns the (show_safe, compare_versions, save_history) toggles."""
     with st.sidebar:
         st.markdown(
             f"""
@@ -196,6 +240,19 @@ def _render_sidebar() -> bool:
 
         st.markdown("### ⚙️ Display Options")
         show_safe = st.checkbox("Show safe clauses", value=True)
+        compare_versions = st.checkbox(
+            "Compare with previous version",
+            value=False,
+            help="Treat each new upload as a revision of the previously analyzed "
+                 "document: only changed clauses are re-scored and a redline of "
+                 "risk changes is shown.",
+        )
+        save_history = st.checkbox(
+            "Save analyses to history",
+            value=False,
+            help="Persist each analysis to the local history database so it "
+                 "can be searched later without re-uploading the file.",
+        )
 
         st.markdown("---")
 
@@ -219,7 +276,97 @@ def _render_sidebar() -> bool:
         st.markdown("---")
         st.markdown(SIDEBAR_DISCLAIMER)
 
-    return show_safe
+    return show_safe, compare_versions, save_history
+
+
+@st.cache_resource
+def _get_model_registry():
+    return ModelRegistry()
+
+
+@st.cache_resource
+def _get_feedback_updater():
+    """One background updater per server process (None when disabled)."""
+    if not FEEDBACK_BACKGROUND_UPDATES:
+        return None
+    return FeedbackUpdater(registry=_get_model_registry()).start()
+
+
+@st.cache_resource
+def _get_job_worker():
+    """One background job worker node per server process (None when disabled)."""
+    if not JOB_IN_APP_WORKER or ASYNC_SIZE_THRESHOLD_MB is None:
+        return None
+    return JobWorker().start()
+
+
+_SCORING_MODES = {
+    "Keyword rules": None,
+    "Learned model": "model",
+    "Cascade (rules → model)": "cascade",
+}
+
+
+def _render_model_options():
+    """
+    Sidebar choice of scoring mode, shown once a model version has been
+    published. Returns (PublishedModel or None, mode) where mode is None,
+    "model" or "cascade".
+    """
+    registry = _get_model_registry()
+    version = registry.current_version()
+    if version is None:
+        return None, None
+    with st.sidebar:
+        st.markdown(f"### 🧠 Learned Model ({version})")
+        choice = st.radio(
+            "Scoring",
+            list(_SCORING_MODES),
+            help="Learned model: labels every clause with the model trained on "
+                 "reviewer feedback. Cascade: the keyword engine settles clear "
+                 "cases and only ambiguous clauses go to the model. New model "
+                 "versions are picked up automatically.",
+        )
+    mode = _SCORING_MODES[choice]
+    if not mode:
+        return None, None
+    model = registry.load()
+    if mode == "cascade" and not thresholds_tuned(model):
+        st.sidebar.caption("⚠️ The cascade thresholds have not been tuned since the last full "
+                           "retrain; the defaults are in use. Run `tune_cascade.py` on held-out data.")
+    return model, mode
+
+
+def _admin_enabled() -> bool:
+    if os.environ.get(ADMIN_ENV_VAR) == "1":
+        return True
+    try:
+        return st.query_params.get("admin") == "1"
+    except AttributeError:
+        return False
+
+
+def _render_admin_options():
+    """
+    Hidden admin section (RCA_ADMIN=1 or ?admin=1). Returns the profiling
+    mode for the next single-document analysis, or None. The memory
+    tracing toggle is kept in st.session_state["profile_memory"].
+    """
+    if not _admin_enabled():
+        return None
+    with st.sidebar:
+        st.markdown("### 🛠️ Admin")
+        if not st.checkbox("Profile analysis", value=False,
+                           help="Run the next analysis under the profiler: per-stage "
+                                "timings, hotspots and a flamegraph file."):
+            return None
+        mode = st.radio("Profiler", PROFILE_MODES, horizontal=True,
+                        help="deterministic = cProfile (exact, slower); "
+                             "sampling = stack samples (low overhead)")
+        st.checkbox("Trace memory", value=False, key="profile_memory",
+                    help="Allocation peaks and top allocating lines per stage. "
+                         "Several times slower; timings are not representative.")
+        return mode
 
 
 # ---------------------------------------------------------------------------
@@ -241,27 +388,22 @@ def _render_hero() -> None:
 # File upload section
 # ---------------------------------------------------------------------------
 def _render_upload_section():
-    st.markdown('<div class="section-title">📄 Upload Contract Document</div>', unsafe_allow_html=True)
-    uploaded_file = st.file_uploader(
-        label="Drag & drop your contract here, or click to browse",
+    st.markdown('<div class="section-title">📄 Upload Contract Documents</div>', unsafe_allow_html=True)
+    uploaded_files = st.file_uploader(
+        label="Drag & drop one or more contracts here, or click to browse",
         type=["pdf", "txt"],
-        help="Supported formats: PDF (.pdf) and plain text (.txt)",
+        accept_multiple_files=True,
+        help="Supported formats: PDF (.pdf) and plain text (.txt). "
+             "Upload several files to analyze them as a portfolio.",
         label_visibility="visible",
     )
-    return uploaded_file
+    return uploaded_files or []
 
 
 # ---------------------------------------------------------------------------
 # Analysis pipeline
 # ---------------------------------------------------------------------------
-def _run_pipeline(uploaded_file):
-    """
-    Runs the full analysis pipeline with a progress bar.
-    Returns (analyzed_clauses, stats, metadata) or (None, None, None) on error.
-    """
-    meta = get_file_metadata(uploaded_file)
-
-    # Show file info
+def _render_file_chip(meta: dict) -> None:
     st.markdown(
         f"""
         <div class="file-chip">
@@ -273,55 +415,379 @@ def _run_pipeline(uploaded_file):
         unsafe_allow_html=True,
     )
 
+
+def _run_pipeline(uploaded_file, previous_analyzed=None, profiler=None, model=None, cascade=False,
+                  text=None):
+    """
+    Runs the full analysis pipeline with a progress bar.
+
+    text skips extraction when the document's text is already known (from
+    its page index).
+
+    When previous_analyzed is given, the upload is treated as a revision of
+    that document and only inserted or modified clauses are re-scored. When
+    a PipelineProfiler is given, each step runs as one profiled stage. When
+    a PublishedModel is given it labels the clauses, or only the ambiguous
+    ones with cascade=True.
+
+    Returns (analyzed_clauses, stats, index, diff, routing) or all Nones on
+    error; diff is None outside version-aware mode and routing (clauses
+    per cascade tier) is None outside cascade mode.
+    """
     progress_bar = st.progress(0, text="Starting analysis…")
 
     try:
         # Step 1: Extract text
         progress_bar.progress(20, text="📖 Extracting text from document…")
         time.sleep(0.3)
-        text = extract_text_from_upload(uploaded_file)
+        with maybe_stage(profiler, "extraction"):
+            if text is None:
+                text = extract_text_from_upload(uploaded_file)
 
         if not text or not text.strip():
             st.error("⚠️ Could not extract any text from the document. Please try a different file.")
             progress_bar.empty()
-            return None, None, None
+            return None, None, None, None, None
 
         # Step 2: Segment clauses
         progress_bar.progress(50, text="✂️ Segmenting document into clauses…")
         time.sleep(0.3)
-        clauses = segment_document(text)
+        with maybe_stage(profiler, "segmentation"):
+            clauses = segment_document(text)
 
         if not clauses:
             st.warning("No clauses could be extracted from this document. Try a more structured contract.")
             progress_bar.empty()
-            return None, None, None
+            return None, None, None, None, None
 
         # Step 3: Predict risk
         progress_bar.progress(80, text="🔍 Running risk analysis on each clause…")
         time.sleep(0.3)
-        analyzed = analyze_clauses(clauses)
-        stats = compute_summary_stats(analyzed)
+        aggregator = SummaryAggregator()
+        diff = routing = None
+        with maybe_stage(profiler, "scoring"):
+            if previous_analyzed is not None:
+                analyzed, diff = reanalyze_revision(clauses, previous_analyzed,
+                                                    aggregator=aggregator, model=model)
+            elif cascade and model is not None:
+                analyzed, routing = analyze_clauses_cascade(
+                    clauses, model, load_thresholds(model), aggregator=aggregator
+                )
+            else:
+                analyzed = analyze_clauses(clauses, aggregator=aggregator, model=model)
+        with maybe_stage(profiler, "summary"):
+            stats = aggregator.summary()
+            index = build_clause_index(analyzed)
 
         progress_bar.progress(100, text="✅ Analysis complete!")
         time.sleep(0.4)
         progress_bar.empty()
 
-        return analyzed, stats, meta
+        return analyzed, stats, index, diff, routing
 
     except ValueError as e:
         st.error(f"❌ File Error: {e}")
         progress_bar.empty()
-        return None, None, None
+        return None, None, None, None, None
     except Exception as e:
         st.error(f"❌ Unexpected error during analysis: {e}")
         progress_bar.empty()
-        return None, None, None
+        return None, None, None, None, None
+
+
+# ---------------------------------------------------------------------------
+# Background jobs (very large uploads)
+# ---------------------------------------------------------------------------
+def _runs_as_job(uploaded_file) -> bool:
+    return ASYNC_SIZE_THRESHOLD_MB is not None and uploaded_file.size >= ASYNC_SIZE_THRESHOLD_MB * 1024 ** 2
+
+
+def _job_param():
+    try:
+        return st.query_params.get("job")
+    except AttributeError:
+        return None
+
+
+def _set_job_param(job_id) -> None:
+    """Keeps the job id in the URL so a reload reopens the job."""
+    try:
+        if job_id is None:
+            st.query_params.pop("job", None)
+        else:
+            st.query_params["job"] = job_id
+    except AttributeError:
+        pass
+
+
+def _render_job_lookup():
+    """Sidebar lookup of a background job's results by id."""
+    if not os.path.exists(os.path.join(JOB_QUEUE_DIR, "jobs.sqlite3")):
+        return None
+    with st.sidebar:
+        st.markdown("### ⏳ Background Jobs")
+        job_id = st.text_input("Open results by job id", value="",
+                               help="Large uploads are analyzed in the background; "
+                                    "paste a job id to reopen its results.")
+    return job_id.strip() or None
+
+
+def _render_job_status(job_id) -> None:
+    """Job progress, refreshed every JOB_POLL_INTERVAL seconds; reruns the app when done."""
+    with JobQueue() as queue:
+        job = queue.get(job_id)
+    if job is None:
+        return
+    if job["status"] in FINISHED_STATUSES:
+        st.rerun()
+    stage = job["stage"] or "waiting for a worker"
+    st.progress(job["progress"], text=f"⏳ Analyzing {job['name']} in the background — {stage}…")
+    st.caption(f"Job `{job_id}` · attempt {job['attempts']}/{job['max_attempts']} · "
+               "you can reload or leave this page and come back to it.")
+    if job["error"]:
+        st.caption(f"Retrying after: {job['error']}")
+    col1, col2, _ = st.columns([1, 1, 4])
+    with col1:
+        if st.button("Cancel job", key=f"cancel_{job_id}", use_container_width=True):
+            with JobQueue() as queue:
+                queue.cancel(job_id)
+            st.rerun()
+    with col2:
+        if not hasattr(st, "fragment"):
+            st.button("Refresh", key=f"refresh_{job_id}", use_container_width=True)
+
+
+if hasattr(st, "fragment"):
+    _render_job_status = st.fragment(run_every=JOB_POLL_INTERVAL)(_render_job_status)
+
+
+def _load_job_analysis(job_id, cache_key=None, save_history=False, identity=None, scoring=None):
+    """
+    Returns the cached-analysis dict of a finished job, or None after
+    showing its progress (still running) or error. identity and scoring
+    are recorded as in main().
+    """
+    cached = st.session_state.get("analysis")
+    if cached is not None and cached.get("job_id") == job_id:
+        return cached
+    with JobQueue() as queue:
+        job = queue.get(job_id)
+        result = queue.result(job_id) if job is not None and job["status"] == "done" else None
+    if job is None:
+        st.error(f"❌ No background job with id `{job_id}`.")
+        return None
+    if job["status"] in ("failed", "cancelled"):
+        st.error(f"❌ Background analysis of {job['name']} {job['status']}"
+                 + (f": {job['error']}" if job["error"] else "."))
+        return None
+    if result is None:
+        _render_job_status(job_id)
+        return None
+
+    analyzed = result["analyzed"]
+    cached = {
+        "key": cache_key or f"job:{job_id}",
+        "job_id": job_id,
+        "file": identity,
+        "scoring": scoring,
+        "name": job["name"],
+        "analyzed": analyzed,
+        "stats": result["stats"],
+        "index": result["index"],
+        "diff": None,
+        "routing": result["routing"],
+        "previous_name": None,
+        "precedents": _match_precedents(analyzed),
+    }
+    st.session_state["analysis"] = cached
+    if save_history:
+        _save_to_history([(job["name"], analyzed, result["stats"], None)])
+    return cached
+
+
+def _submit_job(cache_key, meta, uploaded_file, scoring_mode) -> str:
+    """Submits the whole upload as a background job once per cache key."""
+    jobs = st.session_state.setdefault("jobs", {})
+    if cache_key not in jobs:
+        with JobQueue() as queue:
+            jobs[cache_key] = queue.submit(meta["name"], uploaded_file.getvalue(),
+                                           {"scoring": scoring_mode})
+    return jobs[cache_key]
+
+
+# ---------------------------------------------------------------------------
+# Page index (analyze selected pages / sections)
+# ---------------------------------------------------------------------------
+def _get_page_index(uploaded_file):
+    """Page index of the upload, built once per file (None if unreadable)."""
+    key = f"{uploaded_file.name}:{uploaded_file.size}"
+    cached = st.session_state.get("page_index")
+    if cached is None or cached[0] != key:
+        try:
+            with st.spinner("Indexing pages…"):
+                page_index = build_page_index(uploaded_file.name, uploaded_file.getvalue())
+        except ValueError:
+            page_index = None  # the pipeline reports the file error
+        cached = (key, page_index)
+        st.session_state["page_index"] = cached
+    return cached[1]
+
+
+def _render_scope_picker(uploaded_file, page_index):
+    """
+    Page / section picker for long documents.
+
+    page_index is None for uploads routed to a background job: indexing
+    extracts the whole file, so it only runs once Sections or Pages is
+    chosen.
+
+    Returns (ranges, background): the selected page ranges (None for the
+    whole document) and whether to analyze the full document as a
+    background job as well.
+    """
+    deferred = page_index is None and _runs_as_job(uploaded_file)
+    if not deferred and (page_index is None or page_index.n_pages < PAGE_SCOPE_MIN_PAGES):
+        return None, False
+    title = "📑 Scope" if deferred else \
+        f"📑 Scope — {page_index.n_pages} pages, {len(page_index.sections())} sections"
+    with st.expander(title):
+        scope = st.radio("Analyze", ["Whole document", "Sections", "Pages"],
+                         horizontal=True, key="scope_mode")
+        ranges = None
+        if scope != "Whole document" and page_index is None:
+            page_index = _get_page_index(uploaded_file)
+            if page_index is None:
+                st.warning("Could not read the pages of this document.")
+                return None, False
+        sections = page_index.sections() if page_index is not None else []
+        if scope == "Sections":
+            if not sections:
+                st.caption("No bookmarks or section headings were found; select pages instead.")
+            picked = st.multiselect(
+                "Sections", list(range(len(sections))), key="scope_sections",
+                format_func=lambda i: f"{sections[i]['title']} (pp. {sections[i]['first_page']}"
+                                      f"–{sections[i]['last_page']})",
+            )
+            if picked:
+                ranges = [(sections[i]["first_page"], sections[i]["last_page"]) for i in picked]
+        elif scope == "Pages":
+            spec = st.text_input("Pages", placeholder="e.g. 1-5, 12, 40-", key="scope_pages")
+            if spec.strip():
+                try:
+                    ranges = parse_page_ranges(spec, page_index.n_pages)
+                except ValueError as e:
+                    st.warning(str(e))
+        background = ranges is not None and st.checkbox(
+            "Also analyze the full document in the background", key="scope_background",
+            help="Switch back to Whole document to open it once it finishes.",
+        )
+    return ranges, background
+
+
+def _run_selection(page_index, ranges, model=None, cascade=False):
+    """Analyzes only the selected pages; returns analyze_selection()'s dict or None."""
+    try:
+        with st.spinner(f"🔍 Analyzing pages {format_ranges(ranges)}…"):
+            return analyze_selection(page_index, ranges, model=model, cascade=cascade)
+    except ValueError as e:
+        st.warning(str(e))
+        return None
+
+
+# ---------------------------------------------------------------------------
+# Precedent library
+# ---------------------------------------------------------------------------
+@st.cache_resource(show_spinner="Loading precedent library…")
+def _get_precedent_library():
+    """Vectorizes the precedent library once per server process."""
+    precedents = load_precedents()
+    if not precedents:
+        return None
+    return PrecedentLibrary(precedents, approximate=PRECEDENT_APPROXIMATE)
+
+
+def _match_precedents(analyzed_clauses) -> dict:
+    """Matches all risky clauses of a document against the library in one batch."""
+    library = _get_precedent_library()
+    if library is None:
+        return {}
+    try:
+        return match_risky_clauses(library, analyzed_clauses)
+    except Exception as e:
+        st.warning(f"Precedent matching failed: {e}")
+        return {}
 
 
 # ---------------------------------------------------------------------------
 # Results section
 # ---------------------------------------------------------------------------
-def _render_results(analyzed_clauses, stats, show_safe: bool) -> None:
+def _render_export(analyzed_clauses, stats, document_name=None) -> None:
+    """
+    Download buttons for the clause results and summary stats. Reports are
+    streamed into a spooled temp file only when a button is clicked.
+    """
+    base = os.path.splitext(document_name or "contract")[0]
+    formats = [("JSON Lines", "jsonl"), ("CSV", "csv"), ("Summary CSV", "summary_csv"),
+               ("HTML report", "html")]
+    if parquet_available():
+        formats.append(("Parquet", "parquet"))
+
+    with st.expander("⬇️ Export results"):
+        for col, (label, fmt) in zip(st.columns(len(formats)), formats):
+            info = EXPORT_FORMATS.get(fmt, EXPORT_FORMATS["csv"])
+            suffix = ".summary.csv" if fmt == "summary_csv" else info["extension"]
+            make_data = partial(export_to_buffer, fmt, analyzed_clauses, stats,
+                                document_name, document_name)
+            kwargs = dict(file_name=base + suffix, mime=info["mime"],
+                          key=f"export_{fmt}_{base}", use_container_width=True)
+            with col:
+                try:
+                    st.download_button(label, data=make_data, **kwargs)
+                except (StreamlitAPIException, RuntimeError, TypeError):
+                    # Older Streamlit releases need the file contents up front
+                    st.download_button(label, data=make_data().read(), **kwargs)
+
+
+def _render_profile(profile, document_name=None) -> None:
+    """Admin view of a profiled run: stage table, hotspots, downloads."""
+    report = profile["report"]
+    base = os.path.splitext(document_name or "contract")[0]
+    with st.expander(f"🛠️ Profile ({report['mode']}, {report['total_s']:.2f}s)", expanded=True):
+        st.dataframe(
+            [{k: s[k] for k in ("stage", "wall_s", "cpu_s", "samples", "peak_alloc_mb", "net_alloc_mb")}
+             for s in report["stages"]],
+            use_container_width=True, hide_index=True,
+        )
+        for s in report["stages"]:
+            st.markdown(f"**{s['stage']}** — top hotspots")
+            st.dataframe(s["hotspots"][:PROFILE_TOP_N], use_container_width=True, hide_index=True)
+            if s["allocations"]:
+                st.caption("Largest allocations: " + ", ".join(
+                    f"{a['location']} ({a['size_kb']:.0f} KB)" for a in s["allocations"][:5]))
+        col1, col2 = st.columns(2)
+        with col1:
+            st.download_button("Flamegraph stacks (.collapsed)", data=profile["collapsed"],
+                               file_name=base + ".collapsed", mime="text/plain",
+                               use_container_width=True)
+        with col2:
+            st.download_button("Profile report (.json)", data=json.dumps(report, indent=2),
+                               file_name=base + ".profile.json", mime="application/json",
+                               use_container_width=True)
+
+
+def _record_feedback(document_name, clause, corrected) -> None:
+    """Button callback: logs a label correction and wakes the updater."""
+    FeedbackLog().record(clause["text"], clause["label"], corrected,
+                         document=document_name, clause_id=clause["id"])
+    given = st.session_state.setdefault("feedback_given", {})
+    given.setdefault(document_name, {})[clause["id"]] = corrected
+    updater = _get_feedback_updater()
+    if updater is not None:
+        updater.poke()
+
+
+def _render_results(analyzed_clauses, stats, index, show_safe: bool,
+                    precedent_matches=None, document_name=None) -> None:
     st.markdown("---")
 
     # KPI summary tiles
@@ -356,34 +822,249 @@ def _render_results(analyzed_clauses, stats, show_safe: bool) -> None:
         unsafe_allow_html=True,
     )
 
+    render_category_breakdown(stats)
+    _render_export(analyzed_clauses, stats, document_name)
+
     # Clause list with filter tabs
     st.markdown('<div class="section-title">📋 Clause Analysis</div>', unsafe_allow_html=True)
 
     risky_count = stats["risky_count"]
     safe_count  = stats["safe_count"]
 
-    tab_all, tab_risky, tab_safe = st.tabs([
-        f"All ({stats['total']})",
-        f"⚠️ Risky ({risky_count})",
-        f"✅ Safe ({safe_count})",
-    ])
+    # Only the selected view is rendered; st.tabs would execute every tab
+    view_labels = {
+        f"All ({stats['total']})":       None,
+        f"⚠️ Risky ({risky_count})":    "Risky",
+        f"✅ Safe ({safe_count})":      "Safe",
+    }
+    view = st.radio(
+        "Clause view",
+        list(view_labels),
+        horizontal=True,
+        label_visibility="collapsed",
+        key="clause_view",
+    )
+    label = view_labels[view]
 
-    with tab_all:
-        render_clause_list(analyzed_clauses, show_safe=show_safe)
+    col_cat, col_kw = st.columns(2)
+    with col_cat:
+        categories = st.multiselect(
+            "Filter by risk category",
+            sorted(index["by_category"]),
+            key="filter_categories",
+        )
+    with col_kw:
+        keywords = st.multiselect(
+            "Filter by matched keyword",
+            sorted(index["by_keyword"]),
+            key="filter_keywords",
+        )
 
-    with tab_risky:
-        risky_clauses = [c for c in analyzed_clauses if c["label"] == "Risky"]
-        if risky_clauses:
-            render_clause_list(risky_clauses, show_safe=False)
-        else:
-            st.success("🎉 No risky clauses were found in this document!")
+    selected = select_clauses(
+        analyzed_clauses, index,
+        label=label, categories=categories, keywords=keywords,
+    )
 
-    with tab_safe:
-        safe_clauses = [c for c in analyzed_clauses if c["label"] == "Safe"]
-        if safe_clauses:
-            render_clause_list(safe_clauses, show_safe=True)
+    if selected:
+        render_clause_list(
+            selected,
+            show_safe=show_safe or label == "Safe",
+            precedent_matches=precedent_matches,
+            on_feedback=partial(_record_feedback, document_name),
+            feedback_given=st.session_state.get("feedback_given", {}).get(document_name),
+            feedback_key=f"feedback_{document_name}",
+        )
+    elif label == "Risky" and not (categories or keywords):
+        st.success("🎉 No risky clauses were found in this document!")
+    elif label == "Safe" and not (categories or keywords):
+        st.warning("All clauses were flagged as risky.")
+    else:
+        st.info("No clauses match the selected filters.")
+
+
+# ---------------------------------------------------------------------------
+# Version comparison section
+# ---------------------------------------------------------------------------
+def _render_version_changes(diff, previous_name: str) -> None:
+    st.markdown("---")
+    st.markdown(
+        f'<div class="section-title">🔁 Changes since {previous_name}</div>',
+        unsafe_allow_html=True,
+    )
+    render_version_diff(diff, summarize_diff(diff))
+
+
+# ---------------------------------------------------------------------------
+# Portfolio (multi-document) section
+# ---------------------------------------------------------------------------
+def _run_portfolio(uploaded_files, model=None, scoring_mode=None):
+    """
+    Analyzes several uploads on the staged pipeline with per-document
+    progress, scored the same way as a single upload (see _run_pipeline).
+    Returns the list of batch_analyzer.analyze_document() results.
+    """
+    total = len(uploaded_files)
+    workers = min(resolve_workers(), total)
+    pipeline = build_document_pipeline({"extraction": workers, "scoring": workers},
+                                       model=model, scoring=scoring_mode)
+    progress_bar = st.progress(0, text=f"Analyzing {total} documents on {workers} workers…")
+
+    # Keyed by upload position: several uploads may share a file name
+    status_lines = []
+    with st.expander("Per-document progress", expanded=True):
+        for f in uploaded_files:
+            status_lines.append(st.empty())
+            status_lines[-1].markdown(f"⏳ `{f.name}` — queued")
+
+    def _on_progress(done, total, name, result):
+        line = status_lines[result["upload"]]
+        if result.get("error"):
+            line.markdown(f"❌ `{name}` — {result['error']}")
         else:
-            st.warning("All clauses were flagged as risky.")
+            line.markdown(
+                f"✅ `{name}` — {result['stats']['total']} clauses, "
+                f"{result['stats']['risk_percentage']}% risky ({result['elapsed']}s)"
+            )
+        progress_bar.progress(int(done / total * 100), text=f"Analyzed {done} of {total} documents…")
+
+    # A rerun (new upload, widget change) interrupts the script inside
+    # _on_progress; closing the pipeline generator then cancels the run
+    documents = [{"name": f.name, "raw_bytes": f.getvalue(), "compact": True, "upload": i}
+                 for i, f in enumerate(uploaded_files)]
+    results = run_document_pipeline(pipeline, documents, on_progress=_on_progress)
+    progress_bar.empty()
+    return results
+
+
+def _render_portfolio(results, show_safe: bool) -> None:
+    st.markdown("---")
+    st.markdown('<div class="section-title">🗂️ Portfolio Risk Ranking</div>', unsafe_allow_html=True)
+
+    rows = rank_portfolio(results)
+    render_portfolio_table(rows)
+
+    ranked = [row["index"] for row in rows if row["error"] is None]
+    if not ranked:
+        st.error("None of the uploaded documents could be analyzed.")
+        return
+
+    # Results are picked by position: several uploads may share a file name
+    name_counts = Counter(r["name"] for r in results)
+
+    def _label(i):
+        name = results[i]["name"]
+        return f"{name} (upload {results[i]['upload'] + 1})" if name_counts[name] > 1 else name
+
+    st.markdown('<div class="section-title">🔎 Document Drill-down</div>', unsafe_allow_html=True)
+    selected = st.selectbox("Document", ranked, format_func=_label, key="portfolio_doc")
+    doc = results[selected]
+    if "precedents" not in doc:
+        doc["precedents"] = _match_precedents(doc["analyzed"])
+    _render_results(doc["analyzed"], doc["stats"], doc["index"], show_safe,
+                    precedent_matches=doc["precedents"], document_name=doc["name"])
+
+
+# ---------------------------------------------------------------------------
+# Analysis history
+# ---------------------------------------------------------------------------
+def _save_to_history(documents) -> None:
+    """Persists analyzed documents to the history store in one transaction."""
+    try:
+        with AnalysisStore() as store:
+            store.save_documents(documents)
+            SearchIndex().update_from_store(store)
+        st.toast(f"Saved {len(documents)} document(s) to history")
+    except Exception as e:
+        st.warning(f"Could not save analysis to history: {e}")
+
+
+def _render_clause_search() -> None:
+    query = st.text_area(
+        "Find similar clauses across past documents",
+        placeholder="Paste a clause or type keywords, e.g. “indemnify and hold harmless the vendor”",
+        key="search_query",
+    )
+    col_label, col_cat = st.columns(2)
+    with col_label:
+        label = st.selectbox("Label", ["Any", "Risky", "Safe"], key="search_label")
+    with col_cat:
+        with AnalysisStore() as store:
+            category = st.selectbox("Category", ["Any"] + store.categories(), key="search_category")
+
+    if not query.strip():
+        return
+
+    with AnalysisStore() as store:
+        index = SearchIndex()
+        try:
+            index.update_from_store(store)
+        except Exception as e:
+            # Search what is already indexed; the next search catches up
+            st.caption(f"Could not index the latest analyses: {e}")
+        hits = index.search(
+            query,
+            k=20,
+            label=None if label == "Any" else label,
+            category=None if category == "Any" else category,
+        )
+        clauses = store.get_clauses([h["store_id"] for h in hits])
+
+    scores = {h["store_id"]: h["score"] for h in hits}
+    st.caption(f"{len(clauses)} best matches")
+    for c in clauses:
+        st.markdown(
+            f"**{c['document_name']}** · clause #{c['id']} · {c['label']} · "
+            f"score {scores[c['store_id']]}  \n{c['text']}"
+        )
+
+
+def _render_history() -> None:
+    with st.expander("📚 Analysis History"):
+        _render_clause_search()
+
+        st.markdown("**Browse stored clauses**")
+        with AnalysisStore() as store:
+            col_label, col_cat, col_kw, col_dates = st.columns(4)
+            with col_label:
+                label = st.selectbox("Label", ["Risky", "Safe", "Any"], key="hist_label")
+            with col_cat:
+                category = st.selectbox("Category", ["Any"] + store.categories(), key="hist_category")
+            with col_kw:
+                keyword = st.selectbox("Keyword", ["Any"] + store.keywords(), key="hist_keyword")
+            with col_dates:
+                dates = st.date_input("Analyzed between", value=(), key="hist_dates")
+
+            since = until = None
+            if len(dates) == 2:
+                since = datetime.combine(dates[0], dt_time.min).timestamp()
+                until = datetime.combine(dates[1], dt_time.max).timestamp()
+
+            clauses = store.query_clauses(
+                label=None if label == "Any" else label,
+                category=None if category == "Any" else category,
+                keyword=None if keyword == "Any" else keyword,
+                since=since,
+                until=until,
+                limit=500,
+            )
+
+        st.caption(f"{len(clauses)} matching clauses (showing at most 500)")
+        if clauses:
+            st.dataframe(
+                [
+                    {
+                        "Analyzed": datetime.fromtimestamp(c["analyzed_at"]).strftime("%Y-%m-%d %H:%M"),
+                        "Document": c["document_name"],
+                        "Clause": c["id"],
+                        "Label": c["label"],
+                        "Categories": ", ".join(c["categories"]),
+                        "Text": c["text"],
+                    }
+                    for c in clauses
+                ],
+                hide_index=True,
+                use_container_width=True,
+            )
 
 
 # ---------------------------------------------------------------------------
@@ -407,6 +1088,43 @@ def _render_empty_state() -> None:
     )
 
 
+def _render_analysis(cached, show_safe: bool, profile_mode) -> None:
+    """Renders a cached single-document analysis (see main)."""
+    if profile_mode is not None and cached.get("profile"):
+        _render_profile(cached["profile"], cached["name"])
+    if cached.get("routing"):
+        st.caption(f"🧮 Cascade routing: {format_routing(cached['routing'])}")
+    if cached["diff"] is not None:
+        _render_version_changes(cached["diff"], cached["previous_name"])
+    _render_results(
+        cached["analyzed"], cached["stats"], cached["index"], show_safe,
+        precedent_matches=cached["precedents"], document_name=cached["name"],
+    )
+
+
+def _file_identity(uploaded_file) -> tuple:
+    """(name, size, content digest) of an upload, hashed once per upload."""
+    upload_id = (getattr(uploaded_file, "file_id", None), uploaded_file.name, uploaded_file.size)
+    memo = st.session_state.get("file_identity")
+    if memo is None or memo[0] != upload_id or upload_id[0] is None:
+        digest = hashlib.sha1(uploaded_file.getvalue()).hexdigest()
+        memo = (upload_id, (uploaded_file.name, uploaded_file.size, digest))
+        st.session_state["file_identity"] = memo
+    return memo[1]
+
+
+def _upload_key(uploaded_file) -> tuple:
+    """
+    (name, size, upload id) of an upload. Streamlit gives every upload a
+    new file_id, so a revised file with the same name and size still gets
+    a new key; without one, the content digest stands in.
+    """
+    upload_id = getattr(uploaded_file, "file_id", None)
+    if upload_id is None:
+        upload_id = hashlib.sha1(uploaded_file.getvalue()).hexdigest()
+    return uploaded_file.name, uploaded_file.size, upload_id
+
+
 # ---------------------------------------------------------------------------
 # Main entry point
 # ---------------------------------------------------------------------------
@@ -414,18 +1132,147 @@ def main() -> None:
     _inject_global_styles()
     inject_card_styles()
 
-    show_safe = _render_sidebar()
+    show_safe, compare_versions, save_history = _render_sidebar()
+    model, scoring_mode = _render_model_options()
+    profile_mode = _render_admin_options()
+    job_lookup = _render_job_lookup()
+    _get_feedback_updater()
+    _get_job_worker()
     _render_hero()
 
-    uploaded_file = _render_upload_section()
+    uploaded_files = _render_upload_section()
+
+    if len(uploaded_files) > 1:
+        cache_key = (tuple(_upload_key(f) for f in uploaded_files),
+                     scoring_mode, model.version if model else None)
+        cached = st.session_state.get("portfolio")
+        if cached is None or cached[0] != cache_key:
+            results = _run_portfolio(uploaded_files, model=model, scoring_mode=scoring_mode)
+            st.session_state["portfolio"] = (cache_key, results)
+            if save_history:
+                _save_to_history([(r["name"], r["analyzed"], r["stats"], None)
+                                  for r in results if not r.get("error")])
+        else:
+            results = cached[1]
+        _render_portfolio(results, show_safe)
+    elif uploaded_files:
+        uploaded_file = uploaded_files[0]
+        meta = get_file_metadata(uploaded_file)
+        _render_file_chip(meta)
+        # Job-routed uploads are extracted on the worker; index them lazily
+        page_index = None if _runs_as_job(uploaded_file) else _get_page_index(uploaded_file)
+        ranges, background = _render_scope_picker(uploaded_file, page_index)
+        if ranges is not None:
+            page_index = _get_page_index(uploaded_file)
 
-    if uploaded_file is not None:
-        analyzed_clauses, stats, meta = _run_pipeline(uploaded_file)
-        if analyzed_clauses is not None:
-            _render_results(analyzed_clauses, stats, show_safe)
+        # Filter and view changes rerun the script; reuse the analysis
+        identity = _file_identity(uploaded_file)
+        scoring = (scoring_mode, model.version if model else None)
+        full_key = f"{meta['name']}:{uploaded_file.size}:{identity[2][:16]}:{scoring_mode}:{scoring[1] or ''}"
+        cache_key = full_key if ranges is None else f"{full_key}:pages={format_ranges(ranges)}"
+        cached = st.session_state.get("analysis")
+        new_upload = cached is None or cached["key"] != cache_key
+        needs_profile = profile_mode is not None and cached is not None and not new_upload \
+            and ranges is None \
+            and (cached.get("profile", {}).get("report", {}).get("mode"),
+                 cached.get("profile", {}).get("report", {}).get("memory", False)) \
+            != (profile_mode, st.session_state.get("profile_memory", False))
+        # Only a different file scored the same way is a revision; a scoring
+        # mode or model change re-scores the same file in full
+        previous = cached if compare_versions and cached is not None and new_upload \
+            and cached.get("file") != identity and cached.get("scoring") == scoring \
+            and ranges is None and not cached.get("pages") else None
+        if background:
+            job_id = _submit_job(full_key, meta, uploaded_file, scoring_mode)
+            _set_job_param(job_id)
+            st.caption(f"⏳ The full document is being analyzed in the background (job `{job_id}`).")
+        if ranges is not None:
+            if new_upload:
+                if not background:
+                    _set_job_param(None)
+                result = _run_selection(page_index, ranges, model=model,
+                                        cascade=scoring_mode == "cascade")
+                cached = None
+                if result is not None:
+                    cached = {
+                        "key": cache_key,
+                        "file": identity,
+                        "scoring": scoring,
+                        "name": meta["name"],
+                        "analyzed": result["analyzed"],
+                        "stats": result["stats"],
+                        "index": result["index"],
+                        "diff": None,
+                        "routing": result["routing"],
+                        "previous_name": None,
+                        "pages": result["pages"],
+                        "precedents": _match_precedents(result["analyzed"]),
+                    }
+                    st.session_state["analysis"] = cached
+                    if save_history:
+                        _save_to_history([(f"{meta['name']} (pp. {format_ranges(ranges)})",
+                                           result["analyzed"], result["stats"], None)])
+            if cached is not None:
+                st.caption(f"📑 Pages {format_ranges(cached['pages'])} of {page_index.n_pages}")
+        elif new_upload and previous is None and profile_mode is None \
+                and (_runs_as_job(uploaded_file) or full_key in st.session_state.get("jobs", {})):
+            # Too large for the script thread (or already queued): analyze on a job worker
+            job_id = _submit_job(full_key, meta, uploaded_file, scoring_mode)
+            _set_job_param(job_id)
+            cached = _load_job_analysis(job_id, cache_key, save_history, identity, scoring)
+        elif new_upload or needs_profile:
+            _set_job_param(None)
+            profiler = PipelineProfiler(profile_mode, top_n=PROFILE_TOP_N,
+                                        memory=st.session_state.get("profile_memory", False)) \
+                if profile_mode else None
+            with profiler if profiler is not None else nullcontext():
+                analyzed_clauses, stats, index, diff, routing = _run_pipeline(
+                    uploaded_file, previous_analyzed=previous["analyzed"] if previous else None,
+                    profiler=profiler, model=model, cascade=scoring_mode == "cascade",
+                    text=page_index.text if page_index is not None and profiler is None else None,
+                )
+            if not new_upload:
+                # Re-run only to profile: keep the redline of the original run
+                diff, previous = cached["diff"], {"name": cached["previous_name"]}
+            if analyzed_clauses is not None:
+                cached = {
+                    "key": cache_key,
+                    "file": identity,
+                    "scoring": scoring,
+                    "name": meta["name"],
+                    "analyzed": analyzed_clauses,
+                    "stats": stats,
+                    "index": index,
+                    "diff": diff,
+                    "routing": routing,
+                    "previous_name": previous["name"] if previous else None,
+                    "precedents": _match_precedents(analyzed_clauses),
+                }
+                if profiler is not None:
+                    cached["profile"] = {"report": profiler.report(),
+                                         "collapsed": profiler.collapsed_stacks()}
+                st.session_state["analysis"] = cached
+                if save_history and new_upload:
+                    _save_to_history([(meta["name"], analyzed_clauses, stats, None)])
+            else:
+                cached = None
+
+        if cached is not None:
+            _render_analysis(cached, show_safe, profile_mode)
+    elif job_lookup or _job_param():
+        # Reopened job (reload, bookmark or sidebar lookup)
+        job_id = job_lookup or _job_param()
+        _set_job_param(job_id)
+        cached = _load_job_analysis(job_id)
+        if cached is not None:
+            st.caption(f"📎 {cached['name']} — background job `{job_id}`")
+            _render_analysis(cached, show_safe, profile_mode)
     else:
         _render_empty_state()
 
+    if os.path.exists(ANALYSIS_STORE_PATH):
+        _render_history()
+
     # Footer
     st.markdown(
         f"""
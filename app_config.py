@@ -5,6 +5,8 @@ Central configuration for the Legal Contract Risk Analyzer Streamlit app.
 Contains UI constants, risk keyword lists, and colour palette definitions.
 """
 
+import os
+
 # ---------------------------------------------------------------------------
 # App metadata
 # ---------------------------------------------------------------------------
@@ -47,6 +49,132 @@ RISK_KEYWORD_THRESHOLD = 1
 BASE_RISKY_CONFIDENCE = 0.85     # base score when keywords found
 SAFE_CONFIDENCE = 0.92           # score for safe clauses
 
+# ---------------------------------------------------------------------------
+# Clause segmentation
+# ---------------------------------------------------------------------------
+# "regex" (numbering / blank-line rules), "spacy" (sentence boundaries for
+# unnumbered prose, see utils/spacy_segmenter.py) or "auto": spaCy when it is
+# installed, at most SEGMENTATION_MAX_NUMBERED_RATIO of the paragraphs are
+# numbered and unnumbered prose holds at least SEGMENTATION_PROSE_RATIO of
+# the words
+SEGMENTATION_BACKEND = "auto"
+SEGMENTATION_PROSE_RATIO = 0.5
+SEGMENTATION_MAX_NUMBERED_RATIO = 0.2
+PROSE_PARAGRAPH_MIN_WORDS = 40     # shorter unnumbered paragraphs stay whole
+
+SPACY_MODEL = "en_core_web_sm"     # falls back to spaCy's rule-based sentencizer
+SPACY_BATCH_SIZE = 64              # paragraphs per nlp.pipe batch
+SPACY_N_PROCESS = 1                # >1 forks spaCy workers (keep 1 inside pools)
+SPACY_MIN_CLAUSE_WORDS = 8         # shorter sentences are merged into a neighbour
+
+# ---------------------------------------------------------------------------
+# Batch / portfolio analysis
+# ---------------------------------------------------------------------------
+# Worker processes used for multi-document analysis (None = CPU count)
+BATCH_MAX_WORKERS = None
+
+# Staged pipeline (see utils/pipeline.py): workers per stage (None = CPU
+# count) and the capacity of the bounded queue in front of each stage
+PIPELINE_STAGE_WORKERS = {
+    "extraction":   None,   # process pool – PDF parsing is CPU-bound
+    "segmentation": 1,      # threads – cheap
+    "scoring":      None,   # process pool
+    "persistence":  1,      # threads – single SQLite writer
+}
+PIPELINE_QUEUE_SIZE = 8
+
+# Intra-document parallelism (see utils/parallel_analyzer.py): extracted
+# text at least this long is cut at paragraph breaks into chunks of about
+# DOCUMENT_CHUNK_CHARS that are segmented and scored on a process pool
+# of DOCUMENT_MAX_WORKERS processes (None = CPU count)
+DOCUMENT_PARALLEL_MIN_CHARS = 4_000_000
+DOCUMENT_CHUNK_CHARS = 1_000_000
+DOCUMENT_MAX_WORKERS = None
+
+# Sharded runs over a shared directory (see utils/shard_runner.py)
+SHARD_COUNT = 16                   # shards per run (units of work claimed)
+SHARD_LEASE_SECONDS = 120          # a shard is taken over if its worker stops renewing
+
+# ---------------------------------------------------------------------------
+# Background jobs for very large documents (see utils/job_queue.py)
+# ---------------------------------------------------------------------------
+# Single uploads at least this large are analyzed as background jobs; the
+# page polls their progress and results survive reloads (?job=<id>).
+# None keeps every analysis on the script thread.
+ASYNC_SIZE_THRESHOLD_MB = 5
+JOB_QUEUE_DIR = os.path.join(os.path.dirname(__file__), "data", "jobs")
+JOB_IN_APP_WORKER = True           # run a worker node inside the app process
+JOB_MAX_CONCURRENCY = 2            # jobs run at once per worker node
+JOB_TIMEOUT = 30 * 60              # seconds before a running job is killed
+JOB_MAX_ATTEMPTS = 3               # tries per job (timeouts, crashes, errors)
+JOB_RETRY_BACKOFF = 10             # seconds before the 1st retry, doubling after
+JOB_LEASE_SECONDS = 60             # a job is re-queued if its worker stops renewing
+JOB_PROGRESS_CHUNK = 2000          # clauses scored between progress updates
+JOB_POLL_INTERVAL = 2              # seconds between status refreshes in the UI
+
+# ---------------------------------------------------------------------------
+# Page index: analyze selected pages / sections (see utils/page_index.py)
+# ---------------------------------------------------------------------------
+PAGE_SCOPE_MIN_PAGES = 10          # documents this long offer a page / section picker
+PAGE_INDEX_MAX_HEADING_WORDS = 12  # longer lines are never treated as headings
+TXT_PAGE_CHARS = 3000              # virtual page size for TXT files without form feeds
+
+# ---------------------------------------------------------------------------
+# Reviewer feedback and the learned model
+# ---------------------------------------------------------------------------
+# Label corrections from the clause cards (append-only JSON lines)
+FEEDBACK_LOG_PATH = os.path.join(os.path.dirname(__file__), "data", "feedback_log.jsonl")
+
+# Published model versions (versions/vNNNNNN/ + a CURRENT pointer file)
+MODEL_REGISTRY_DIR = os.path.join(os.path.dirname(__file__), "models", "registry")
+MODEL_VERSIONS_KEPT = 5            # older version directories are pruned
+
+# Optional labelled base set (clause_text, is_risky) for full retrains: a CSV
+# or a directory of part-*.csv chunks (demo_data_prep.py --weak-labels)
+TRAINING_DATA_PATH = os.path.join(os.path.dirname(__file__), "data", "training_clauses.csv")
+
+FEEDBACK_BACKGROUND_UPDATES = True # run the updater thread inside the app
+FEEDBACK_POLL_INTERVAL = 30        # seconds between feedback log checks
+FEEDBACK_RETRAIN_EVERY = 200       # corrections before a full retrain
+FEEDBACK_RETRAIN_INTERVAL = 24 * 3600  # or seconds since the last full retrain
+FEEDBACK_SAMPLE_WEIGHT = 3.0       # weight of a correction vs a base example
+
+# Cascaded inference (utils/cascade.py): the keyword engine settles clear
+# cases and only ambiguous clauses are scored by the learned model.
+#   safe_max_words     : no keyword hits and at most this many words → Safe
+#   risky_min_keywords : at least this many keyword hits → Risky
+# Either tier is disabled with None. tune_cascade.py fits these on held-out
+# data and stores them with the live model version; incremental versions
+# inherit them, full retrains re-tune on CASCADE_HELDOUT_PATH if it is set.
+CASCADE_THRESHOLDS = {"safe_max_words": 30, "risky_min_keywords": 3}
+CASCADE_TOLERANCE = 0.01           # max accuracy drop vs the model-only path
+CASCADE_HELDOUT_PATH = None        # clause_text,is_risky CSV for re-tuning on full retrains
+
+# ---------------------------------------------------------------------------
+# Admin / diagnostics
+# ---------------------------------------------------------------------------
+# The sidebar "Admin" section (pipeline profiling) is shown when this env var
+# is "1" or the app is opened with ?admin=1
+ADMIN_ENV_VAR = "RCA_ADMIN"
+PROFILE_TOP_N = 15                 # hotspots shown per stage
+
+# ---------------------------------------------------------------------------
+# Analysis history store
+# ---------------------------------------------------------------------------
+# SQLite file holding past analyses (see utils/analysis_store.py)
+ANALYSIS_STORE_PATH = os.path.join(os.path.dirname(__file__), "data", "analysis_store.sqlite3")
+
+# Directory of the BM25 clause search index (see utils/search_index.py)
+SEARCH_INDEX_DIR = os.path.join(os.path.dirname(__file__), "data", "search_index")
+
+# ---------------------------------------------------------------------------
+# Precedent library (approved fallback clauses, see utils/precedent_matcher.py)
+# ---------------------------------------------------------------------------
+PRECEDENT_LIBRARY_PATH = os.path.join(os.path.dirname(__file__), "data", "precedent_library.csv")
+PRECEDENT_TOP_K = 3                # matches shown under each risky clause
+PRECEDENT_MIN_SIMILARITY = 0.10    # cosine similarity cut-off
+PRECEDENT_APPROXIMATE = False      # LSH candidate search for very large libraries
+
 # ---------------------------------------------------------------------------
 # UI colour palette (hex strings injected via st.markdown CSS)
 # ---------------------------------------------------------------------------
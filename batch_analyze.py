@@ -0,0 +1,281 @@
+"""
+batch_analyze.py – Analyze a portfolio of contracts from the command line.
+
+Usage:
+    python batch_analyze.py data/ --workers 8 --output results.json
+
+Accepts .txt / .pdf files and directories (searched recursively). Documents
+are analyzed concurrently on a bounded process pool and ranked by risk.
+
+Version-aware mode:
+    python batch_analyze.py contracts_v2/ --previous results_v1.json
+
+Each document is aligned against the document at the same relative path (or,
+failing that, with the same unique file name) in a previous --output file;
+only inserted or modified clauses are re-scored. When both runs contain
+exactly one document it is compared regardless of name.
+
+Export:
+    python batch_analyze.py data/ --export report.jsonl --export report.html
+
+Streams every clause of every document into each report as documents
+finish (.jsonl, .csv, .html or .parquet), followed by portfolio summary
+stats, in constant memory.
+
+Staged mode:
+    python batch_analyze.py data/ --pipeline --stage-workers extraction=4,scoring=8
+
+Runs extraction, segmentation, scoring and (with --store) persistence as
+separate stages with their own worker counts and bounded queues between
+them, and prints per-stage utilization at the end. Ctrl+C stops gracefully.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+from utils.batch_analyzer import (
+    analyze_paths,
+    build_document_pipeline,
+    document_keys,
+    rank_portfolio,
+    resolve_workers,
+    run_document_pipeline,
+)
+from utils.pipeline import format_metrics
+from utils.report_exporter import format_for_path, open_report
+from utils.stats_aggregator import SummaryAggregator
+from utils.clause_table import as_dicts
+from utils.analysis_store import AnalysisStore
+from utils.search_index import SearchIndex, index_dir_for
+from app_config import ANALYSIS_STORE_PATH, PIPELINE_QUEUE_SIZE
+
+SUPPORTED_EXTENSIONS = (".txt", ".pdf")
+
+
+def collect_paths(inputs) -> list:
+    """Expand files and directories into a sorted list of contract paths."""
+    paths = []
+    for item in inputs:
+        if os.path.isdir(item):
+            for root, _, files in os.walk(item):
+                for name in files:
+                    if name.lower().endswith(SUPPORTED_EXTENSIONS):
+                        paths.append(os.path.join(root, name))
+        elif os.path.isfile(item):
+            paths.append(item)
+        else:
+            print(f"Skipping missing path: {item}", file=sys.stderr)
+    return sorted(paths)
+
+
+def load_previous(previous_path: str, paths: list) -> dict:
+    """
+    Map each path to the analyzed clauses of its previous version in an
+    earlier --output file.
+
+    Documents are matched by their path relative to the run's common
+    directory (contracts_v1/acme/msa.pdf ↔ contracts_v2/acme/msa.pdf), then
+    by file name where that name is unique in both runs.
+    """
+    with open(previous_path, "r", encoding="utf-8") as f:
+        payload = json.load(f)
+    docs = [doc for doc in payload.get("documents", []) if not doc.get("error")]
+    if len(docs) == 1 and len(paths) == 1:
+        return {paths[0]: docs[0]["clauses"]}
+
+    by_key = {}
+    if all(doc.get("path") for doc in docs):
+        by_key = dict(zip(document_keys([doc["path"] for doc in docs]), docs))
+    by_name = {}
+    for doc in docs:
+        by_name.setdefault(doc["name"], []).append(doc)
+    name_counts = Counter(os.path.basename(p) for p in paths)
+
+    previous = {}
+    for path, key in zip(paths, document_keys(paths)):
+        name = os.path.basename(path)
+        doc = by_key.get(key)
+        if doc is None and name_counts[name] == 1 and len(by_name.get(name, [])) == 1:
+            doc = by_name[name][0]
+        if doc is not None:
+            previous[path] = doc["clauses"]
+    return previous
+
+
+def write_results(results: list, rows: list, portfolio: SummaryAggregator, output_path: str) -> None:
+    """Write per-document clauses, the ranking and portfolio stats as JSON."""
+    payload = {
+        "portfolio": portfolio.summary(),
+        "ranking": rows,
+        "documents": [
+            {
+                "name": r["name"],
+                "path": r.get("path"),
+                "error": r.get("error"),
+                "elapsed": r.get("elapsed"),
+                "stats": r.get("stats"),
+                "diff_summary": r.get("diff_summary"),
+                "diff": r.get("diff"),
+                "clauses": as_dicts(r.get("analyzed")),
+            }
+            for r in results
+        ],
+    }
+    out_dir = os.path.dirname(output_path)
+    if out_dir:
+        os.makedirs(out_dir, exist_ok=True)
+    with open(output_path, "w", encoding="utf-8") as f:
+        json.dump(payload, f, indent=2)
+    print(f"\nSaved results → {output_path}")
+
+
+def parse_stage_workers(spec: str) -> dict:
+    """Parse "extraction=4,scoring=8" into {"extraction": 4, "scoring": 8}."""
+    workers = {}
+    for part in filter(None, (p.strip() for p in spec.split(","))):
+        name, _, count = part.partition("=")
+        if not count.isdigit():
+            raise argparse.ArgumentTypeError(f"Expected stage=count, got {part!r}")
+        workers[name.strip()] = int(count)
+    return workers
+
+
+def print_risk_changes(result: dict) -> None:
+    """Print a plain-text redline of clauses whose risk changed."""
+    changes = [e for e in result["diff"] if e["risk_change"] != "none"]
+    if not changes:
+        return
+    print(f"\nRisk changes in {result['name']}:")
+    for e in changes:
+        clause = e["new"] or e["old"]
+        marker = {"inserted": "+", "deleted": "-", "modified": "~"}[e["op"]]
+        print(f"  {marker} #{clause['id']} {e['risk_change']}: "
+              f"{clause['text'][:100]}{'...' if len(clause['text']) > 100 else ''}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Batch contract risk analysis")
+    parser.add_argument("inputs", nargs="+", help="Contract files or directories")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Worker processes (default: CPU count)")
+    parser.add_argument("--output", type=str, default=None,
+                        help="Write full results to this JSON file")
+    parser.add_argument("--previous", type=str, default=None,
+                        help="Earlier --output file to diff against (version-aware mode)")
+    parser.add_argument("--store", type=str, nargs="?", const=ANALYSIS_STORE_PATH, default=None,
+                        help="Persist results to the SQLite history store "
+                             "(default path when given without a value)")
+    parser.add_argument("--export", action="append", default=[], metavar="PATH",
+                        help="Stream clause results to a .jsonl/.csv/.html/.parquet report "
+                             "(repeatable)")
+    parser.add_argument("--pipeline", action="store_true",
+                        help="Run as a staged pipeline with per-stage workers and metrics")
+    parser.add_argument("--stage-workers", type=parse_stage_workers, default={},
+                        help="Per-stage worker counts for --pipeline, e.g. extraction=4,scoring=8")
+    parser.add_argument("--queue-size", type=int, default=PIPELINE_QUEUE_SIZE,
+                        help="Bounded queue capacity between pipeline stages")
+    args = parser.parse_args()
+
+    paths = collect_paths(args.inputs)
+    if not paths:
+        print("No .txt or .pdf files found.", file=sys.stderr)
+        sys.exit(1)
+
+    for path in args.export:
+        try:
+            format_for_path(path)
+        except ValueError as e:
+            parser.error(str(e))
+
+    previous_by_path = load_previous(args.previous, paths) if args.previous else None
+
+    workers = min(resolve_workers(args.workers), len(paths))
+    print(f"Analyzing {len(paths)} documents on {workers} workers...\n")
+
+    def on_progress(done, total, name, result):
+        status = f"ERROR: {result['error']}" if result.get("error") else (
+            f"{result['stats']['total']} clauses, {result['stats']['risk_percentage']}% risky"
+        )
+        if result.get("diff_summary"):
+            d = result["diff_summary"]
+            status += (f"; {d['modified']} modified, {d['inserted']} inserted, "
+                       f"{d['deleted']} deleted, {d['rescored']} re-scored")
+        print(f"[{done}/{total}] {name}: {status} ({result.get('elapsed', 0)}s)")
+        if not result.get("error"):
+            for report in reports:
+                report.write_document(result["analyzed"], document=name)
+
+    reports = []
+    with ExitStack() as stack:
+        for path in args.export:
+            reports.append(stack.enter_context(
+                open_report(path, title=f"Contract risk report – {len(paths)} documents")
+            ))
+
+        start = time.perf_counter()
+        pipeline = None
+        if args.pipeline:
+            stage_workers = {"extraction": workers, "scoring": workers, **args.stage_workers}
+            pipeline = build_document_pipeline(stage_workers, store_path=args.store,
+                                               queue_size=args.queue_size)
+            documents = [
+                {"name": os.path.basename(p), "path": p, "compact": True,
+                 "previous": (previous_by_path or {}).get(p)}
+                for p in paths
+            ]
+            try:
+                results = run_document_pipeline(pipeline, documents, on_progress=on_progress)
+            except KeyboardInterrupt:
+                print("\nInterrupted – pipeline cancelled.", file=sys.stderr)
+                print(format_metrics(pipeline.metrics()), file=sys.stderr)
+                sys.exit(130)
+        else:
+            results = analyze_paths(paths, max_workers=workers, on_progress=on_progress,
+                                    previous_by_path=previous_by_path, compact=True)
+    elapsed = time.perf_counter() - start
+
+    portfolio = SummaryAggregator()
+    for r in results:
+        if not r.get("error"):
+            portfolio.merge(r["aggregator"])
+
+    rows = rank_portfolio(results)
+    print(f"\n{'Rank':>4}  {'Risk %':>6}  {'Risky':>5}  {'Total':>5}  Document")
+    for row in rows:
+        print(f"{row['rank']:>4}  {row['risk_percentage']:>6}  {row['risky_count']:>5}  "
+              f"{row['total']:>5}  {row['name']}{'  (' + row['error'] + ')' if row['error'] else ''}")
+
+    summary = portfolio.summary()
+    print(f"\nPortfolio: {summary['total']} clauses, {summary['risky_count']} risky "
+          f"({summary['risk_percentage']}%) in {elapsed:.2f}s")
+
+    for r in results:
+        if r.get("diff"):
+            print_risk_changes(r)
+
+    for path in args.export:
+        print(f"Exported report → {path}")
+
+    if pipeline is not None:
+        print("\n" + format_metrics(pipeline.metrics()))
+
+    if args.output:
+        write_results(results, rows, portfolio, args.output)
+
+    if args.store:
+        ok = [r for r in results if not r.get("error")]
+        with AnalysisStore(args.store) as store:
+            if pipeline is None:
+                # The pipeline's persistence stage has already saved them
+                store.save_documents((r["name"], r["analyzed"], r["stats"], None) for r in ok)
+            indexed = SearchIndex(index_dir_for(args.store)).update_from_store(store)
+        print(f"Stored {len(ok)} documents → {args.store}")
+        print(f"Indexed {indexed} new clauses for search")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,464 @@
+"""
+Load test: how many concurrent reviewers one app node supports.
+
+Replays a mix of contracts against an analysis front end with a rising
+number of virtual users. Each user is a closed loop: pick a document,
+analyze it, wait --think-time, repeat. Each concurrency step runs for
+--duration seconds and records:
+
+    latency      p50 / p95 / p99 / max of successful requests
+    throughput   requests/s and MB/s completed
+    errors       failed requests (exceptions, app errors, non-2xx)
+    server       peak RSS and CPU utilisation of the serving process
+
+Targets:
+    pipeline   utils.batch_analyzer.analyze_document in this process, one
+               thread per user (Streamlit runs each session's script on
+               its own thread, so this shares the GIL the same way)
+    streamlit  the full app.py main() per request through Streamlit's
+               AppTest client, one new session per request, with the
+               upload injected in place of the file uploader
+    http       POST the raw document bytes to --url (X-Filename header
+               carries the name); server figures need --server-pid.
+               --serve starts a reference endpoint on the pipeline here.
+
+Ramping stops early once p95 exceeds --slo-p95 or the error rate exceeds
+--max-error-rate; the highest step within both is reported as capacity.
+The corpus is a directory of .pdf / .txt contracts, or synthetic
+contracts of --sizes generated into a temp dir. Nothing external is
+needed.
+
+Usage:
+    python -m benchmarks.load_test --concurrency 1,2,4,8 --duration 20
+    python -m benchmarks.load_test --target streamlit --corpus data/ --slo-p95 10
+    python -m benchmarks.load_test --target http --serve --concurrency 1,4,16
+    python -m benchmarks.load_test --target http --url http://host:8000/analyze --server-pid 1234
+"""
+import argparse
+import json
+import math
+import multiprocessing as mp
+import os
+import platform
+import random
+import resource
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional, Tuple
+
+from benchmarks.synthetic_contracts import parse_size, write_pdf, write_txt
+from utils.batch_analyzer import analyze_document
+
+TARGETS = ["pipeline", "streamlit", "http"]
+SUPPORTED_EXTENSIONS = (".txt", ".pdf")
+
+# Runs app.main() with the file uploader replaced by the upload this
+# session was given (the same patch for every session, so no races)
+STREAMLIT_DRIVER = """
+import io
+import streamlit as st
+import app
+
+
+class _Upload(io.BytesIO):
+    def __init__(self, name, data):
+        super().__init__(data)
+        self.name, self.size = name, len(data)
+        self.type = "application/pdf" if name.lower().endswith(".pdf") else "text/plain"
+
+
+app._render_upload_section = lambda: [_Upload(*st.session_state["_load_test_upload"])]
+app.main()
+"""
+
+Document = Tuple[str, bytes]
+
+
+# ---------------------------------------------------------------------------
+# Corpus
+# ---------------------------------------------------------------------------
+def load_corpus(corpus: Optional[str], sizes: List[str], formats: List[str], seed: int = 42) -> List[Document]:
+    """(name, bytes) of every contract in corpus, or of generated ones."""
+    if corpus:
+        paths = [os.path.join(root, f) for root, _, files in os.walk(corpus) for f in sorted(files)
+                 if f.lower().endswith(SUPPORTED_EXTENSIONS)]
+    else:
+        workdir = tempfile.mkdtemp(prefix="rca_load_")
+        paths = []
+        for i, size in enumerate(sizes):
+            for fmt in formats:
+                path = os.path.join(workdir, f"contract_{size}_{seed + i}.{fmt}")
+                (write_pdf if fmt == "pdf" else write_txt)(path, parse_size(size), seed=seed + i)
+                paths.append(path)
+    documents = []
+    for path in sorted(paths):
+        with open(path, "rb") as f:
+            documents.append((os.path.basename(path), f.read()))
+    return documents
+
+
+# ---------------------------------------------------------------------------
+# Targets: (name, bytes) → None, raising on failure
+# ---------------------------------------------------------------------------
+def pipeline_request(document: Document) -> None:
+    result = analyze_document(*document)
+    if result["error"]:
+        raise RuntimeError(result["error"])
+
+
+def streamlit_request(document: Document, timeout: float) -> None:
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_string(STREAMLIT_DRIVER, default_timeout=timeout)
+    at.session_state["_load_test_upload"] = document
+    at.run()
+    if at.exception:
+        raise RuntimeError(at.exception[0].message)
+    if at.error:
+        raise RuntimeError(at.error[0].value)
+
+
+def http_request(document: Document, url: str, timeout: float) -> None:
+    name, data = document
+    request = urllib.request.Request(url, data=data, method="POST", headers={
+        "Content-Type": "application/octet-stream",
+        "X-Filename": name,
+    })
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            response.read()
+    except urllib.error.HTTPError as e:
+        raise RuntimeError(f"HTTP {e.code}: {e.read()[:200].decode('utf-8', 'replace')}") from e
+
+
+class _AnalyzeHandler(BaseHTTPRequestHandler):
+    """Reference HTTP front end: POST a document, get its summary stats."""
+
+    def do_POST(self):
+        data = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        result = analyze_document(self.headers.get("X-Filename", "upload.txt"), data)
+        status = 200 if not result["error"] else 422
+        body = json.dumps({"error": result["error"], "stats": result.get("stats")}).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def serve_pipeline(port: int) -> None:
+    """Serves POST /analyze on the pipeline until killed (one thread per request)."""
+    ThreadingHTTPServer(("127.0.0.1", port), _AnalyzeHandler).serve_forever()
+
+
+def start_reference_server(port: int) -> mp.Process:
+    process = mp.get_context("spawn").Process(target=serve_pipeline, args=(port,), daemon=True)
+    process.start()
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            urllib.request.urlopen(f"http://127.0.0.1:{port}/", timeout=1)
+        except urllib.error.HTTPError:
+            return process  # listening (GET is not implemented)
+        except OSError:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError(f"Reference server did not start on port {port}")
+
+
+# ---------------------------------------------------------------------------
+# Server resource sampling
+# ---------------------------------------------------------------------------
+def read_process_usage(pid: int) -> Dict[str, float]:
+    """CPU seconds (user + system) and RSS in MB of a process."""
+    try:
+        with open(f"/proc/{pid}/stat", encoding="ascii") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+        cpu = (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+        with open(f"/proc/{pid}/status", encoding="ascii") as f:
+            rss_kb = next(int(line.split()[1]) for line in f if line.startswith("VmRSS:"))
+        return {"cpu_s": cpu, "rss_mb": rss_kb / 1024}
+    except (OSError, StopIteration):
+        if pid != os.getpid():
+            raise
+        # No /proc (non-Linux): CPU time and peak RSS of this process
+        times = os.times()
+        return {"cpu_s": times.user + times.system,
+                "rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024}
+
+
+class ResourceSampler:
+    """Samples a process's RSS every interval seconds while running."""
+
+    def __init__(self, pid: int, interval: float = 0.2) -> None:
+        self.pid = pid
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = None
+        self.start_usage = self.peak_rss = None
+        self.started = self.stopped = None
+        self.end_usage = None
+
+    def __enter__(self) -> "ResourceSampler":
+        self.start_usage = read_process_usage(self.pid)
+        self.peak_rss = self.start_usage["rss_mb"]
+        self.started = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.peak_rss = max(self.peak_rss, read_process_usage(self.pid)["rss_mb"])
+
+    def __exit__(self, *exc) -> None:
+        self._stop.set()
+        self._thread.join()
+        self.end_usage = read_process_usage(self.pid)
+        self.stopped = time.perf_counter()
+        self.peak_rss = max(self.peak_rss, self.end_usage["rss_mb"])
+
+    def summary(self) -> Dict:
+        wall = max(self.stopped - self.started, 1e-9)
+        cpu = self.end_usage["cpu_s"] - self.start_usage["cpu_s"]
+        return {
+            "rss_start_mb": round(self.start_usage["rss_mb"], 1),
+            "rss_peak_mb": round(self.peak_rss, 1),
+            "cpu_s": round(cpu, 2),
+            # 100% = one core busy for the whole step
+            "cpu_percent": round(100 * cpu / wall, 1),
+        }
+
+
+# ---------------------------------------------------------------------------
+# Load generation
+# ---------------------------------------------------------------------------
+def percentile(sorted_values: List[float], q: float) -> Optional[float]:
+    """Nearest-rank percentile (q in 0-100) of an ascending list."""
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(q / 100 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def run_step(request: Callable[[Document], None], documents: List[Document], users: int,
+             duration: float, think_time: float, server_pid: int, seed: int) -> Dict:
+    """Runs `users` closed-loop virtual users for `duration` seconds."""
+    samples: List[Tuple[float, bool, int]] = []
+    errors: Dict[str, int] = {}
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def user(index: int) -> None:
+        rng = random.Random(seed * 1000 + index)
+        while time.perf_counter() < deadline:
+            document = rng.choice(documents)
+            start = time.perf_counter()
+            ok = True
+            try:
+                request(document)
+            except Exception as e:
+                ok = False
+                message = f"{type(e).__name__}: {e}"[:200]
+                with lock:
+                    errors[message] = errors.get(message, 0) + 1
+            with lock:
+                samples.append((time.perf_counter() - start, ok, len(document[1])))
+            if think_time:
+                time.sleep(rng.expovariate(1 / think_time))
+
+    threads = [threading.Thread(target=user, args=(i,), daemon=True) for i in range(users)]
+    with ResourceSampler(server_pid) as sampler:
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+    latencies = sorted(s[0] for s in samples if s[1])
+    completed = len(samples)
+    failed = sum(1 for s in samples if not s[1])
+    round_ms = lambda v: None if v is None else round(v * 1000, 1)
+    return {
+        "users": users,
+        "elapsed_s": round(elapsed, 2),
+        "requests": completed,
+        "errors": failed,
+        "error_rate": round(failed / completed, 4) if completed else 0.0,
+        "throughput_rps": round(completed / elapsed, 3),
+        "throughput_mb_s": round(sum(s[2] for s in samples if s[1]) / 1024 ** 2 / elapsed, 3),
+        "latency_ms": {
+            "p50": round_ms(percentile(latencies, 50)),
+            "p95": round_ms(percentile(latencies, 95)),
+            "p99": round_ms(percentile(latencies, 99)),
+            "max": round_ms(latencies[-1] if latencies else None),
+        },
+        "server": sampler.summary(),
+        "error_messages": errors,
+    }
+
+
+def run_ramp(request: Callable[[Document], None], documents: List[Document], steps: List[int],
+             duration: float, think_time: float, server_pid: int, slo_p95: Optional[float],
+             max_error_rate: float, seed: int = 42) -> Tuple[List[Dict], Optional[int]]:
+    """
+    Runs each concurrency step in turn, stopping once a step breaks the
+    SLO. Returns the step results and the capacity (highest step within
+    the SLO and error budget; None if even the first step breaks them).
+    """
+    results, capacity = [], None
+    for users in steps:
+        step = run_step(request, documents, users, duration, think_time, server_pid, seed)
+        p95 = step["latency_ms"]["p95"]
+        step["within_slo"] = step["error_rate"] <= max_error_rate and step["requests"] > step["errors"] \
+            and (slo_p95 is None or (p95 is not None and p95 <= slo_p95 * 1000))
+        results.append(step)
+        print(format_step(step), flush=True)
+        if not step["within_slo"]:
+            break
+        capacity = users
+    return results, capacity
+
+
+def format_step(step: Dict) -> str:
+    lat, server = step["latency_ms"], step["server"]
+    return (f"{step['users']:>4} users  {step['requests']:>6} req  {step['errors']:>4} err  "
+            f"{step['throughput_rps']:>8.2f} req/s  p50 {lat['p50'] or 0:>8.0f}  p95 {lat['p95'] or 0:>8.0f}  "
+            f"p99 {lat['p99'] or 0:>8.0f} ms  CPU {server['cpu_percent']:>6.1f}%  "
+            f"RSS {server['rss_peak_mb']:>7.1f} MB" + ("" if step["within_slo"] else "  ✗ SLO"))
+
+
+def format_report(payload: Dict) -> str:
+    """Markdown capacity-planning report of a run."""
+    meta = payload["meta"]
+    lines = [
+        f"# Load test: {meta['target']}",
+        "",
+        f"- {meta['timestamp']}, {meta['platform']}, {meta['cpu_count']} CPUs, Python {meta['python']}",
+        f"- Corpus: {meta['documents']} documents, {meta['corpus_mb']} MB "
+        f"({', '.join(meta['document_names'][:5])}{', …' if meta['documents'] > 5 else ''})",
+        f"- {meta['duration_s']} s per step, think time {meta['think_time_s']} s, "
+        + (f"SLO p95 ≤ {meta['slo_p95_s']} s, " if meta["slo_p95_s"] else "no latency SLO, ")
+        + f"error rate ≤ {meta['max_error_rate']:.1%}",
+        "",
+        "| Users | Requests | Errors | req/s | MB/s | p50 ms | p95 ms | p99 ms | CPU % | Peak RSS MB | SLO |",
+        "|---|---|---|---|---|---|---|---|---|---|---|",
+    ]
+    for s in payload["steps"]:
+        lat, server = s["latency_ms"], s["server"]
+        lines.append(f"| {s['users']} | {s['requests']} | {s['errors']} | {s['throughput_rps']} | "
+                     f"{s['throughput_mb_s']} | {lat['p50']} | {lat['p95']} | {lat['p99']} | "
+                     f"{server['cpu_percent']} | {server['rss_peak_mb']} | {'✓' if s['within_slo'] else '✗'} |")
+    capacity = payload["capacity_users"]
+    lines += ["", f"**Capacity:** {capacity} concurrent users within the SLO." if capacity
+              else "**Capacity:** no step met the SLO."]
+    errors = {}
+    for s in payload["steps"]:
+        for message, count in s["error_messages"].items():
+            errors[message] = errors.get(message, 0) + count
+    if errors:
+        lines += ["", "## Errors", ""] + [f"- {count}× {message}" for message, count in
+                                          sorted(errors.items(), key=lambda kv: -kv[1])]
+    return "\n".join(lines) + "\n"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ramp concurrent analyses against a front end")
+    parser.add_argument("--target", choices=TARGETS, default="pipeline")
+    parser.add_argument("--corpus", default=None, help="Directory of .pdf/.txt contracts (default: synthetic)")
+    parser.add_argument("--sizes", default="20KB,100KB,500KB", help="Synthetic contract sizes")
+    parser.add_argument("--formats", default="txt,pdf", help="Synthetic contract formats")
+    parser.add_argument("--concurrency", default="1,2,4,8", help="Comma-separated virtual user steps")
+    parser.add_argument("--duration", type=float, default=20.0, help="Seconds per step")
+    parser.add_argument("--think-time", type=float, default=0.0,
+                        help="Mean pause between a user's requests (exponential), seconds")
+    parser.add_argument("--slo-p95", type=float, default=None, help="Stop ramping above this p95, seconds")
+    parser.add_argument("--max-error-rate", type=float, default=0.01)
+    parser.add_argument("--timeout", type=float, default=300.0, help="Per-request timeout, seconds")
+    parser.add_argument("--url", default=None, help="HTTP target: analysis endpoint")
+    parser.add_argument("--server-pid", type=int, default=None,
+                        help="HTTP target: PID of the server process to sample")
+    parser.add_argument("--serve", action="store_true",
+                        help="HTTP target: start the reference endpoint locally")
+    parser.add_argument("--port", type=int, default=8765, help="Port for --serve")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default="load_report.json")
+    parser.add_argument("--report", default=None, help="Also write a Markdown report here")
+    args = parser.parse_args()
+
+    steps = [int(n) for n in args.concurrency.split(",") if n]
+    documents = load_corpus(args.corpus, [s for s in args.sizes.split(",") if s],
+                            [f for f in args.formats.split(",") if f], seed=args.seed)
+    if not documents:
+        parser.error(f"No .pdf/.txt contracts found in {args.corpus}")
+
+    server = None
+    server_pid = os.getpid()
+    if args.target == "pipeline":
+        request = pipeline_request
+    elif args.target == "streamlit":
+        request = lambda document: streamlit_request(document, args.timeout)
+    else:
+        if args.serve:
+            server = start_reference_server(args.port)
+            url, server_pid = f"http://127.0.0.1:{args.port}/analyze", server.pid
+        elif args.url and args.server_pid:
+            url, server_pid = args.url, args.server_pid
+        else:
+            parser.error("--target http needs --serve, or --url and --server-pid")
+        request = lambda document: http_request(document, url, args.timeout)
+
+    try:
+        # Warm-up (imports, model and precedent caches) is not measured
+        for document in documents:
+            try:
+                request(document)
+            except Exception as e:
+                print(f"Warm-up request for {document[0]} failed: {e}", file=sys.stderr)
+        print(f"{args.target}: {len(documents)} documents, steps {steps}, {args.duration:g} s each\n")
+        results, capacity = run_ramp(request, documents, steps, args.duration, args.think_time,
+                                     server_pid, args.slo_p95, args.max_error_rate, seed=args.seed)
+    finally:
+        if server is not None:
+            server.terminate()
+
+    payload = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "target": args.target,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "documents": len(documents),
+            "document_names": [name for name, _ in documents],
+            "corpus_mb": round(sum(len(data) for _, data in documents) / 1024 ** 2, 2),
+            "duration_s": args.duration,
+            "think_time_s": args.think_time,
+            "slo_p95_s": args.slo_p95,
+            "max_error_rate": args.max_error_rate,
+            "seed": args.seed,
+        },
+        "steps": results,
+        "capacity_users": capacity,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(payload, f, indent=2)
+    print(f"\nSaved results → {args.output}")
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            f.write(format_report(payload))
+        print(f"Saved report → {args.report}")
+    print(f"Capacity: {capacity} concurrent users" if capacity else "Capacity: no step met the SLO")
+
+
+if __name__ == "__main__":
+    main()
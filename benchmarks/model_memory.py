@@ -0,0 +1,140 @@
+"""
+Per-worker memory of loading a published model, with and without mmap.
+
+Publishes a synthetic wide model (TF-IDF vocabulary of --features terms, an
+SGD risk classifier and a CategoryModel with --categories columns) to a
+temporary registry, or uses the live registry with --live. Then, for each
+load mode, starts --workers processes that load the model, score a batch
+of clauses and wait for each other, and reads every worker's memory from
+/proc/self/smaps_rollup while all of them are alive:
+
+    RSS      resident pages, counting shared pages in full
+    PSS      resident pages with shared pages split between sharers
+    Private  pages only this worker maps
+
+"copy" loads every array into each worker (the old behaviour); "mmap"
+maps them read-only from the artifact files, so the arrays, including
+the vocabulary's term array, are counted once across workers.
+
+Usage:
+    python -m benchmarks.model_memory --workers 4
+    python -m benchmarks.model_memory --workers 8 --features 200000 --categories 64
+    python -m benchmarks.model_memory --live --start-method spawn
+"""
+import argparse
+import multiprocessing as mp
+import random
+import resource
+import tempfile
+from typing import Dict, List
+
+import numpy as np
+
+from benchmarks.synthetic_contracts import generate_contract_text
+from src.model_training.category_model import CategoryModel
+from src.model_training.feature_extractor import build_vectorizer
+from src.model_training.incremental import build_incremental_model
+from utils.clause_segmenter import segment_document
+from utils.model_registry import ModelRegistry
+
+LOAD_MODES = {"copy": None, "mmap": "r"}
+
+
+def process_memory() -> Dict[str, float]:
+    """RSS / PSS / private / shared memory of this process in MB."""
+    fields = {}
+    try:
+        with open("/proc/self/smaps_rollup", encoding="ascii") as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) >= 2 and parts[0].endswith(":"):
+                    fields[parts[0][:-1]] = int(parts[1])
+    except OSError:
+        # No smaps (non-Linux): peak RSS is the best available figure
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return {"rss_mb": round(rss / 1024, 1), "pss_mb": None, "private_mb": None}
+    mb = lambda *keys: round(sum(fields.get(k, 0) for k in keys) / 1024, 1)
+    return {
+        "rss_mb": mb("Rss"),
+        "pss_mb": mb("Pss"),
+        "private_mb": mb("Private_Clean", "Private_Dirty"),
+    }
+
+
+def _worker(root: str, mmap_mode, texts: List[str], barrier, results) -> None:
+    before = process_memory()
+    model = ModelRegistry(root, mmap_mode=mmap_mode).load()
+    model.score(texts)
+    barrier.wait()
+    after = process_memory()
+    results.put({"before": before, "after": after})
+    barrier.wait()  # stay alive until every worker has measured
+
+
+def build_wide_model(root: str, features: int, categories: int, seed: int = 42) -> str:
+    """Publishes a synthetic model of the requested width; returns its version."""
+    rng = random.Random(seed)
+    terms = [f"term{i}" for i in range(features)]
+    corpus = [" ".join(rng.choice(terms) for _ in range(60)) for _ in range(max(2000, features // 20))]
+    vectorizer = build_vectorizer()
+    vectorizer.set_params(max_features=features)
+    X = vectorizer.fit_transform(corpus)
+    y = np.array([i % 2 for i in range(len(corpus))])
+    model = build_incremental_model().fit(X, y)
+    n_features = X.shape[1]
+    rs = np.random.RandomState(seed)
+    category_model = CategoryModel([f"Category {j}" for j in range(categories)],
+                                   rs.randn(n_features, categories) * 0.01, np.zeros(categories))
+    return ModelRegistry(root).publish(model, vectorizer, {"kind": "synthetic"}, category_model=category_model)
+
+
+def measure(root: str, mode: str, workers: int, texts: List[str], start_method: str) -> List[Dict]:
+    ctx = mp.get_context(start_method)
+    barrier, results = ctx.Barrier(workers), ctx.Queue()
+    procs = [ctx.Process(target=_worker, args=(root, LOAD_MODES[mode], texts, barrier, results))
+             for _ in range(workers)]
+    for p in procs:
+        p.start()
+    rows = [results.get() for _ in procs]
+    for p in procs:
+        p.join()
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-worker model memory: copy vs mmap")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--features", type=int, default=100_000, help="Synthetic vocabulary size")
+    parser.add_argument("--categories", type=int, default=32, help="Synthetic category columns")
+    parser.add_argument("--live", action="store_true", help="Measure the live registry's model instead")
+    parser.add_argument("--start-method", choices=mp.get_all_start_methods(), default="spawn")
+    args = parser.parse_args()
+
+    root = None if args.live else tempfile.mkdtemp(prefix="rca_model_mem_")
+    if root is not None:
+        print(f"Publishing synthetic model ({args.features} features × {args.categories} categories)...")
+        build_wide_model(root, args.features, args.categories)
+    elif ModelRegistry().current_version() is None:
+        parser.error("No model has been published to the live registry.")
+    root = root or ModelRegistry().root
+    texts = [c["text"] for c in segment_document(generate_contract_text(200_000))]
+
+    totals = {}
+    for mode in LOAD_MODES:
+        rows = measure(root, mode, args.workers, texts, args.start_method)
+        print(f"\n[{mode}] {args.workers} workers ({args.start_method})")
+        print(f"{'Worker':>6} {'RSS before':>11} {'RSS after':>10} {'PSS after':>10} {'Private':>8}  (MB)")
+        for i, r in enumerate(rows, 1):
+            b, a = r["before"], r["after"]
+            print(f"{i:>6} {b['rss_mb']:>11} {a['rss_mb']:>10} {a['pss_mb']!s:>10} {a['private_mb']!s:>8}")
+        if rows[0]["after"]["pss_mb"] is not None:
+            totals[mode] = sum(r["after"]["pss_mb"] for r in rows)
+            print(f"{'Total PSS':>18}: {totals[mode]:.1f} MB")
+
+    if len(totals) == len(LOAD_MODES):
+        print(f"\nmmap saves {totals['copy'] - totals['mmap']:.1f} MB across {args.workers} workers "
+              f"({1 - totals['mmap'] / totals['copy']:.0%} of total PSS)")
+
+
+if __name__ == "__main__":
+    main()
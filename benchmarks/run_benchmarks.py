@@ -0,0 +1,246 @@
+"""
+Scaling benchmark suite for the analysis pipeline.
+
+Generates synthetic contracts (see benchmarks/synthetic_contracts.py) at each
+requested size and format, then measures every pipeline stage:
+
+    extraction    utils.file_handler.extract_text_from_bytes
+    segmentation  utils.clause_segmenter.segment_document
+    analysis      utils.risk_predictor.analyze_clauses
+    summary       utils.risk_predictor.compute_summary_stats
+    training      vectorizer fit + train_models on the analyzed clauses
+
+For each stage it records latency (min / median / p95 over --repeats runs),
+throughput (MB/s and items/s) and peak traced memory (tracemalloc, measured in
+a separate untimed run). Results are written as JSON and can be compared with
+a stored baseline; any metric worse than --threshold fails the run.
+
+Usage:
+    python -m benchmarks.run_benchmarks --sizes 100KB,1MB,10MB --output bench.json
+    python -m benchmarks.run_benchmarks --baseline benchmarks/baseline.json --threshold 0.2
+    python -m benchmarks.run_benchmarks --sizes 1MB --save-baseline benchmarks/baseline.json
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, Dict, List
+
+import pandas as pd
+
+from benchmarks.synthetic_contracts import parse_size, write_pdf, write_txt
+from utils.file_handler import extract_text_from_bytes
+from utils.clause_segmenter import segment_document
+from utils.risk_predictor import analyze_clauses, compute_summary_stats
+from src.model_training.data_loader import load_and_split
+from src.model_training.feature_extractor import build_vectorizer, fit_and_transform
+from src.model_training.trainer import train_models
+
+ALL_STAGES = ["extraction", "segmentation", "analysis", "summary", "training"]
+
+# Cap the clauses fed to training so the largest sizes stay tractable
+MAX_TRAINING_CLAUSES = 50_000
+
+
+def _train(analyzed: List[Dict]) -> None:
+    rows = analyzed[:MAX_TRAINING_CLAUSES]
+    df = pd.DataFrame({
+        "clause_text": [c["text"] for c in rows],
+        "is_risky": [int(c["label"] == "Risky") for c in rows],
+    })
+    with contextlib.redirect_stdout(io.StringIO()):
+        X_train, X_test, y_train, y_test = load_and_split(df)
+        vectorizer = build_vectorizer()
+        X_train_vec, _ = fit_and_transform(vectorizer, X_train, X_test)
+        train_models(X_train_vec, y_train)
+
+
+def _measure(fn: Callable[[], object], repeats: int) -> Dict:
+    """Times fn `repeats` times, then runs it once more under tracemalloc."""
+    timings = []
+    result = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    timings.sort()
+    p95_idx = min(len(timings) - 1, int(round(0.95 * (len(timings) - 1))))
+    return {
+        "result": result,
+        "latency_s": {
+            "min": round(timings[0], 6),
+            "median": round(statistics.median(timings), 6),
+            "p95": round(timings[p95_idx], 6),
+        },
+        "peak_mem_mb": round(peak / 1024 ** 2, 3),
+    }
+
+
+def _record(stage: str, fmt: str, size_label: str, input_bytes: int,
+            items: int, measured: Dict) -> Dict:
+    median = measured["latency_s"]["median"] or 1e-9
+    return {
+        "stage": stage,
+        "format": fmt,
+        "size": size_label,
+        "input_bytes": input_bytes,
+        "items": items,
+        "latency_s": measured["latency_s"],
+        "throughput_mb_s": round(input_bytes / 1024 ** 2 / median, 3),
+        "items_per_s": round(items / median, 1),
+        "peak_mem_mb": measured["peak_mem_mb"],
+    }
+
+
+def run_suite(sizes: List[str], formats: List[str], stages: List[str],
+              repeats: int, workdir: str, seed: int = 42) -> List[Dict]:
+    """Runs the requested stages for every size / format combination."""
+    records = []
+    for size_label in sizes:
+        target = parse_size(size_label)
+        for fmt in formats:
+            path = os.path.join(workdir, f"contract_{size_label}_{seed}.{fmt}")
+            if not os.path.exists(path):
+                (write_pdf if fmt == "pdf" else write_txt)(path, target, seed=seed)
+            with open(path, "rb") as f:
+                raw = f.read()
+            name = os.path.basename(path)
+            print(f"[{size_label} {fmt}] {len(raw) / 1024:.0f} KB on disk")
+            first = len(records)
+
+            m = _measure(lambda: extract_text_from_bytes(name, raw), repeats)
+            text = m["result"]
+            if "extraction" in stages:
+                records.append(_record("extraction", fmt, size_label, len(raw), 1, m))
+
+            m = _measure(lambda: segment_document(text), repeats)
+            clauses = m["result"]
+            if "segmentation" in stages:
+                records.append(_record("segmentation", fmt, size_label, len(text), len(clauses), m))
+
+            m = _measure(lambda: analyze_clauses(clauses), repeats)
+            analyzed = m["result"]
+            if "analysis" in stages:
+                records.append(_record("analysis", fmt, size_label, len(text), len(analyzed), m))
+
+            if "summary" in stages:
+                m = _measure(lambda: compute_summary_stats(analyzed), repeats)
+                records.append(_record("summary", fmt, size_label, len(text), len(analyzed), m))
+
+            # Training depends only on the text, so run it for one format
+            if "training" in stages and fmt == formats[0]:
+                n = min(len(analyzed), MAX_TRAINING_CLAUSES)
+                m = _measure(lambda: _train(analyzed), max(1, repeats // 2))
+                records.append(_record("training", fmt, size_label, len(text), n, m))
+
+            for r in records[first:]:
+                print(f"    {r['stage']:<13} median {r['latency_s']['median']:>9.4f}s  "
+                      f"{r['throughput_mb_s']:>9.2f} MB/s  {r['items_per_s']:>11.1f} items/s  "
+                      f"peak {r['peak_mem_mb']:>8.2f} MB")
+    return records
+
+
+def compare_to_baseline(records: List[Dict], baseline: Dict, threshold: float) -> List[str]:
+    """
+    Returns a message for every metric that regressed by more than threshold
+    (a fraction, e.g. 0.2 = 20%) relative to the baseline run.
+    """
+    base = {(r["stage"], r["format"], r["size"]): r for r in baseline.get("results", [])}
+    regressions = []
+    for r in records:
+        key = (r["stage"], r["format"], r["size"])
+        b = base.get(key)
+        if b is None:
+            continue
+        checks = [
+            ("median latency", r["latency_s"]["median"], b["latency_s"]["median"]),
+            ("peak memory", r["peak_mem_mb"], b["peak_mem_mb"]),
+        ]
+        for metric, current, previous in checks:
+            if previous > 0 and current > previous * (1 + threshold):
+                regressions.append(
+                    f"{'/'.join(key)} {metric}: {previous} → {current} "
+                    f"(+{(current / previous - 1) * 100:.1f}%)"
+                )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pipeline scaling benchmarks")
+    parser.add_argument("--sizes", default="100KB,1MB",
+                        help="Comma-separated target sizes, e.g. 10KB,1MB,100MB")
+    parser.add_argument("--formats", default="txt,pdf", help="Comma-separated: txt,pdf")
+    parser.add_argument("--stages", default=",".join(ALL_STAGES),
+                        help=f"Comma-separated subset of: {','.join(ALL_STAGES)}")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--workdir", default=None,
+                        help="Where generated contracts are cached (default: temp dir)")
+    parser.add_argument("--output", default="bench_results.json")
+    parser.add_argument("--baseline", default=None, help="Baseline JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="Allowed regression as a fraction (default 0.2 = 20%%)")
+    parser.add_argument("--save-baseline", default=None,
+                        help="Also write this run as a baseline file")
+    args = parser.parse_args()
+
+    stages = [s for s in args.stages.split(",") if s]
+    unknown = set(stages) - set(ALL_STAGES)
+    if unknown:
+        parser.error(f"Unknown stages: {', '.join(sorted(unknown))}")
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix="rca_bench_")
+    os.makedirs(workdir, exist_ok=True)
+
+    records = run_suite(
+        sizes=[s for s in args.sizes.split(",") if s],
+        formats=[f for f in args.formats.split(",") if f],
+        stages=stages,
+        repeats=max(1, args.repeats),
+        workdir=workdir,
+        seed=args.seed,
+    )
+
+    payload = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "repeats": args.repeats,
+            "seed": args.seed,
+        },
+        "results": records,
+    }
+    for path in filter(None, [args.output, args.save_baseline]):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(payload, f, indent=2)
+        print(f"\nSaved results → {path}")
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare_to_baseline(records, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) beyond {args.threshold:.0%}:")
+            for msg in regressions:
+                print(f"  - {msg}")
+            sys.exit(1)
+        print(f"\nNo regressions beyond {args.threshold:.0%} against {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
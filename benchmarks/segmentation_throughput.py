@@ -0,0 +1,111 @@
+"""
+Segmentation throughput benchmark: regex vs spaCy backends.
+
+Runs utils.clause_segmenter.segment_document with each backend on two
+synthetic documents per size — the usual numbered contract and an
+unnumbered prose contract — and reports latency, MB/s, clauses/s and the
+clause count, plus which backend "auto" picks for each document. spaCy
+rows are measured for every --batch-sizes × --n-process combination and
+skipped when spaCy is not installed.
+
+Usage:
+    python -m benchmarks.segmentation_throughput --sizes 100KB,1MB
+    python -m benchmarks.segmentation_throughput --sizes 1MB --batch-sizes 16,64,256 --n-process 1,4
+"""
+import argparse
+import json
+import statistics
+import time
+from typing import Callable, Dict, List
+
+from benchmarks.synthetic_contracts import generate_contract_text, generate_prose_text, parse_size
+from utils.clause_segmenter import choose_backend, segment_document, spacy_segment
+from utils.spacy_segmenter import load_sentence_pipeline, spacy_available
+
+DOCUMENT_STYLES = {"numbered": generate_contract_text, "prose": generate_prose_text}
+
+
+def _time(fn: Callable[[], List], repeats: int) -> Dict:
+    timings, result = [], None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - start)
+    return {"result": result, "median_s": statistics.median(timings), "min_s": min(timings)}
+
+
+def _record(style: str, size: str, backend: str, text: str, measured: Dict, **extra) -> Dict:
+    median = measured["median_s"] or 1e-9
+    clauses = len(measured["result"])
+    return {
+        "document": style,
+        "size": size,
+        "backend": backend,
+        **extra,
+        "clauses": clauses,
+        "median_s": round(measured["median_s"], 6),
+        "min_s": round(measured["min_s"], 6),
+        "throughput_mb_s": round(len(text) / 1024 ** 2 / median, 3),
+        "clauses_per_s": round(clauses / median, 1),
+    }
+
+
+def run_benchmark(sizes: List[str], batch_sizes: List[int], n_process: List[int],
+                  repeats: int, seed: int = 42) -> List[Dict]:
+    has_spacy = spacy_available()
+    if has_spacy:
+        load_sentence_pipeline()  # keep model loading out of the timings
+    else:
+        print("spaCy is not installed; measuring the regex backend only.")
+
+    records = []
+    for size in sizes:
+        for style, generate in DOCUMENT_STYLES.items():
+            text = generate(parse_size(size), seed=seed)
+            auto = choose_backend(text)
+            print(f"[{size} {style}] {len(text) / 1024:.0f} KB, auto → {auto}")
+            first = len(records)
+
+            m = _time(lambda: segment_document(text, backend="regex"), repeats)
+            records.append(_record(style, size, "regex", text, m, auto_choice=auto))
+
+            if has_spacy:
+                for batch in batch_sizes:
+                    for procs in n_process:
+                        m = _time(lambda: spacy_segment(text, batch_size=batch, n_process=procs), repeats)
+                        records.append(_record(style, size, "spacy", text, m, auto_choice=auto,
+                                               batch_size=batch, n_process=procs))
+
+            for r in records[first:]:
+                opts = f" batch={r['batch_size']} n_process={r['n_process']}" if "batch_size" in r else ""
+                print(f"    {r['backend'] + opts:<32} median {r['median_s']:>8.4f}s  "
+                      f"{r['throughput_mb_s']:>8.2f} MB/s  {r['clauses_per_s']:>10.1f} clauses/s  "
+                      f"{r['clauses']:>7} clauses")
+    return records
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Regex vs spaCy segmentation throughput")
+    parser.add_argument("--sizes", default="100KB,1MB", help="Comma-separated target sizes")
+    parser.add_argument("--batch-sizes", default="64", help="Comma-separated nlp.pipe batch sizes")
+    parser.add_argument("--n-process", default="1", help="Comma-separated spaCy process counts")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default=None, help="Also write the results as JSON")
+    args = parser.parse_args()
+
+    records = run_benchmark(
+        sizes=[s for s in args.sizes.split(",") if s],
+        batch_sizes=[int(b) for b in args.batch_sizes.split(",") if b],
+        n_process=[int(n) for n in args.n_process.split(",") if n],
+        repeats=max(1, args.repeats),
+        seed=args.seed,
+    )
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"results": records}, f, indent=2)
+        print(f"Saved {len(records)} results → {args.output}")
+
+
+if __name__ == "__main__":
+    main()
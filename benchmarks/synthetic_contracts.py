@@ -0,0 +1,235 @@
+"""
+Synthetic contract generator for benchmarks.
+
+Produces realistic clause structures — mixed numbering styles ("1.", "1.1",
+"a)", "iv."), article headings, multi-sentence paragraphs and a tunable
+density of risk keywords — at any target size from kilobytes to hundreds of
+megabytes. Output can be plain text or PDF; both are written streaming so
+generating a very large file needs constant memory.
+
+Usage:
+    python -m benchmarks.synthetic_contracts out.txt --size 5MB
+    python -m benchmarks.synthetic_contracts out.pdf --size 20MB --keyword-density 0.4
+"""
+import argparse
+import random
+import re
+from typing import Iterator, List
+
+from app_config import RISK_KEYWORDS
+
+_PARTIES = ["the Client", "the Vendor", "the Supplier", "the Contractor",
+            "the Licensee", "the Licensor", "each party", "the Company"]
+_SUBJECTS = ["the Services", "the Deliverables", "this Agreement", "the Software",
+             "any Statement of Work", "the Confidential Information", "the Fees",
+             "the Intellectual Property", "the Equipment", "the Personal Data"]
+_VERBS = ["shall provide", "shall maintain", "shall deliver", "may review",
+          "shall comply with", "shall not disclose", "shall use reasonable efforts to protect",
+          "shall promptly notify the other party of", "shall keep accurate records of"]
+_TAILS = ["in accordance with the Specifications.",
+          "within thirty (30) days of the Effective Date.",
+          "as set out in Schedule 2.",
+          "in a professional and workmanlike manner.",
+          "subject to the terms of this Agreement.",
+          "at its own cost and expense.",
+          "during the Term and for twelve (12) months thereafter."]
+_HEADINGS = ["DEFINITIONS", "SERVICES", "PAYMENT TERMS", "TERM AND TERMINATION",
+             "CONFIDENTIALITY", "INTELLECTUAL PROPERTY", "LIABILITY", "INDEMNITY",
+             "DISPUTE RESOLUTION", "GENERAL"]
+_ROMAN = ["i", "ii", "iii", "iv", "v", "vi", "vii", "viii", "ix", "x"]
+
+SIZE_UNITS = {"B": 1, "KB": 1024, "MB": 1024 ** 2, "GB": 1024 ** 3}
+
+
+def parse_size(text: str) -> int:
+    """Parses sizes like '512KB', '10MB' or '2048' into bytes."""
+    match = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([KMG]?B)?\s*", text.upper())
+    if not match:
+        raise ValueError(f"Invalid size: {text}")
+    return int(float(match.group(1)) * SIZE_UNITS[match.group(2) or "B"])
+
+
+def _sentence(rng: random.Random, keyword_density: float) -> str:
+    party = rng.choice(_PARTIES)
+    sentence = (f"{party[0].upper()}{party[1:]} {rng.choice(_VERBS)} "
+                f"{rng.choice(_SUBJECTS)} {rng.choice(_TAILS)}")
+    if rng.random() < keyword_density:
+        keyword = rng.choice(RISK_KEYWORDS)
+        sentence = sentence[:-1] + f", including any {keyword} obligations arising therefrom."
+    return sentence
+
+
+def _clause_body(rng: random.Random, keyword_density: float) -> str:
+    return " ".join(_sentence(rng, keyword_density) for _ in range(rng.randint(1, 4)))
+
+
+def iter_contract_blocks(
+    target_bytes: int,
+    seed: int = 42,
+    keyword_density: float = 0.3,
+) -> Iterator[str]:
+    """
+    Yields paragraph blocks (each ending in a blank line) until roughly
+    target_bytes of text have been produced.
+    """
+    rng = random.Random(seed)
+    produced = 0
+    article = 0
+    header = "MASTER SERVICES AGREEMENT\n\nThis Agreement is entered into between the parties named below.\n\n"
+    yield header
+    produced += len(header)
+
+    while produced < target_bytes:
+        article += 1
+        heading = f"ARTICLE {article} - {_HEADINGS[(article - 1) % len(_HEADINGS)]}\n\n"
+        yield heading
+        produced += len(heading)
+
+        for section in range(1, rng.randint(3, 8) + 1):
+            style = rng.random()
+            if style < 0.4:
+                block = f"{article}.{section} {_clause_body(rng, keyword_density)}\n\n"
+            elif style < 0.6:
+                items = "\n".join(
+                    f"{chr(ord('a') + i)}) {_clause_body(rng, keyword_density)}"
+                    for i in range(rng.randint(2, 4))
+                )
+                block = f"{article}.{section} The following terms apply:\n{items}\n\n"
+            elif style < 0.75:
+                items = "\n".join(
+                    f"{_ROMAN[i]}. {_clause_body(rng, keyword_density)}"
+                    for i in range(rng.randint(2, 4))
+                )
+                block = f"{items}\n\n"
+            else:
+                # Unnumbered prose paragraph
+                block = f"{_clause_body(rng, keyword_density)} {_clause_body(rng, keyword_density)}\n\n"
+            yield block
+            produced += len(block)
+            if produced >= target_bytes:
+                return
+
+
+def generate_contract_text(target_bytes: int, seed: int = 42, keyword_density: float = 0.3) -> str:
+    """Returns a synthetic contract of roughly target_bytes characters."""
+    return "".join(iter_contract_blocks(target_bytes, seed, keyword_density))
+
+
+def generate_prose_text(target_bytes: int, seed: int = 42, keyword_density: float = 0.3) -> str:
+    """
+    Returns an unnumbered prose contract (no headings or list markers) of
+    roughly target_bytes characters, wrapped like extracted PDF text.
+    """
+    rng = random.Random(seed)
+    blocks = []
+    produced = 0
+    while produced < target_bytes:
+        body = " ".join(_clause_body(rng, keyword_density) for _ in range(rng.randint(2, 5)))
+        block = "\n".join(_wrap(body)) + "\n\n"
+        blocks.append(block)
+        produced += len(block)
+    return "".join(blocks)
+
+
+def write_txt(path: str, target_bytes: int, seed: int = 42, keyword_density: float = 0.3) -> None:
+    """Streams a synthetic contract to a .txt file."""
+    with open(path, "w", encoding="utf-8") as f:
+        for block in iter_contract_blocks(target_bytes, seed, keyword_density):
+            f.write(block)
+
+
+def _wrap(text: str, width: int = 95) -> List[str]:
+    lines = []
+    for raw in text.split("\n"):
+        while len(raw) > width:
+            cut = raw.rfind(" ", 0, width)
+            cut = width if cut <= 0 else cut
+            lines.append(raw[:cut])
+            raw = raw[cut:].lstrip()
+        lines.append(raw)
+    return lines
+
+
+def _pdf_escape(line: str) -> str:
+    line = line.encode("latin-1", errors="replace").decode("latin-1")
+    return line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def write_pdf(path: str, target_bytes: int, seed: int = 42, keyword_density: float = 0.3,
+              lines_per_page: int = 60) -> None:
+    """
+    Streams a synthetic contract to a text-based PDF.
+
+    target_bytes bounds the amount of contract text, not the file size; PDF
+    framing adds roughly 15-25% on top.
+    """
+    offsets = {}
+
+    with open(path, "wb") as f:
+        def write_obj(num: int, body: bytes) -> None:
+            offsets[num] = f.tell()
+            f.write(b"%d 0 obj\n" % num + body + b"\nendobj\n")
+
+        f.write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+        # 1 = catalog, 2 = page tree (written last), 3 = font
+        write_obj(1, b"<< /Type /Catalog /Pages 2 0 R >>")
+        write_obj(3, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>")
+
+        next_obj = 4
+        page_objs = []
+        pending: List[str] = []
+
+        def flush_page(lines: List[str]) -> None:
+            nonlocal next_obj
+            content = ["BT", "/F1 9 Tf", "11 TL", "40 800 Td"]
+            content += [f"({_pdf_escape(line)}) '" for line in lines]
+            content.append("ET")
+            stream = "\n".join(content).encode("latin-1")
+            content_num, page_num = next_obj, next_obj + 1
+            next_obj += 2
+            write_obj(content_num, b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+            write_obj(page_num, (
+                "<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+                f"/Resources << /Font << /F1 3 0 R >> >> /Contents {content_num} 0 R >>"
+            ).encode("latin-1"))
+            page_objs.append(page_num)
+
+        for block in iter_contract_blocks(target_bytes, seed, keyword_density):
+            pending.extend(_wrap(block.rstrip("\n")))
+            pending.append("")
+            while len(pending) >= lines_per_page:
+                flush_page(pending[:lines_per_page])
+                pending = pending[lines_per_page:]
+        if pending:
+            flush_page(pending)
+
+        kids = " ".join(f"{n} 0 R" for n in page_objs)
+        write_obj(2, f"<< /Type /Pages /Kids [{kids}] /Count {len(page_objs)} >>".encode("latin-1"))
+
+        xref_at = f.tell()
+        f.write(b"xref\n0 %d\n" % next_obj)
+        f.write(b"0000000000 65535 f \n")
+        for num in range(1, next_obj):
+            f.write(b"%010d 00000 n \n" % offsets[num])
+        f.write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (next_obj, xref_at))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic contract")
+    parser.add_argument("output", help="Output path (.txt or .pdf)")
+    parser.add_argument("--size", default="100KB", help="Target text size, e.g. 500KB, 50MB")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--keyword-density", type=float, default=0.3,
+                        help="Probability that a sentence contains a risk keyword")
+    args = parser.parse_args()
+
+    size = parse_size(args.size)
+    if args.output.lower().endswith(".pdf"):
+        write_pdf(args.output, size, args.seed, args.keyword_density)
+    else:
+        write_txt(args.output, size, args.seed, args.keyword_density)
+    print(f"Wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,8 +5,10 @@ Streamlit rendering functions for displaying clause analysis results.
 Provides styled cards for risky/safe clauses and summary KPI tiles.
 """
 
+import difflib
+import html
 import streamlit as st
-from typing import Dict, List
+from typing import Callable, Dict, List, Optional
 from app_config import COLOUR
 
 
@@ -14,10 +16,9 @@ from app_config import COLOUR
 # CSS helper
 # ---------------------------------------------------------------------------
 
-def inject_card_styles() -> None:
-    """Inject custom CSS for clause cards, badges, and KPI tiles."""
-    st.markdown(
-        f"""
+def card_styles_css() -> str:
+    """Returns the <style> block for clause cards, badges, and KPI tiles."""
+    return f"""
         <style>
         /* ---- Risky clause card ---- */
         .risky-card {{
@@ -131,9 +132,12 @@ def inject_card_styles() -> None:
             border-radius: 4px;
         }}
         </style>
-        """,
-        unsafe_allow_html=True,
-    )
+        """
+
+
+def inject_card_styles() -> None:
+    """Inject custom CSS for clause cards, badges, and KPI tiles."""
+    st.markdown(card_styles_css(), unsafe_allow_html=True)
 
 
 # ---------------------------------------------------------------------------
@@ -169,17 +173,38 @@ def render_summary_metrics(stats: Dict) -> None:
             )
 
 
-# ---------------------------------------------------------------------------
-# Individual clause renderers
-# ---------------------------------------------------------------------------
-
-def render_risky_clause(clause: Dict) -> None:
+def render_category_breakdown(stats: Dict) -> None:
     """
-    Renders a single risky clause as a styled red card.
+    Renders per-category clause counts as a row of chips.
 
     Args:
-        clause: An analyzed clause dict from risk_predictor.analyze_clauses()
+        stats: dict from SummaryAggregator.summary()
     """
+    by_category = stats.get("by_category") or {}
+    if not by_category:
+        return
+
+    chips_html = "".join(
+        f'<span class="cat-chip" style="font-size:12px;padding:4px 10px;">{cat} · {count}</span>'
+        for cat, count in by_category.items()
+    )
+    st.markdown(
+        f"""
+        <div style="margin-bottom:24px;">
+            <div class="kpi-label" style="margin-bottom:6px;">Clauses by risk category</div>
+            {chips_html}
+        </div>
+        """,
+        unsafe_allow_html=True,
+    )
+
+
+# ---------------------------------------------------------------------------
+# Individual clause renderers
+# ---------------------------------------------------------------------------
+
+def risky_clause_html(clause: Dict) -> str:
+    """Returns the HTML of a risky clause card (needs card_styles_css())."""
     conf_pct = int(clause["confidence"] * 100)
     keywords_html = "".join(
         f'<span class="keyword-tag">🔑 {kw}</span>'
@@ -189,13 +214,13 @@ def render_risky_clause(clause: Dict) -> None:
         f'<span class="cat-chip">{cat}</span>'
         for cat in clause["categories"]
     )
+    page_ref = f" · PAGE {clause['page']}" if clause.get("page") else ""
 
-    st.markdown(
-        f"""
+    return f"""
         <div class="risky-card">
             <div class="clause-header">
                 <span style="color:{COLOUR['text_secondary']};font-size:12px;font-weight:600;">
-                    CLAUSE #{clause['id']}
+                    CLAUSE #{clause['id']}{page_ref}
                 </span>
                 <span class="badge-risky">⚠ RISKY</span>
                 <span style="font-size:12px;color:{COLOUR['text_secondary']};margin-left:auto;">
@@ -213,26 +238,52 @@ def render_risky_clause(clause: Dict) -> None:
                 <div class="conf-bar-fill" style="width:{conf_pct}%; background:{COLOUR['border_risky']};"></div>
             </div>
         </div>
-        """,
-        unsafe_allow_html=True,
-    )
+        """
 
 
-def render_safe_clause(clause: Dict) -> None:
+def render_risky_clause(clause: Dict, matches: Optional[List[Dict]] = None) -> None:
     """
-    Renders a single safe clause as a subtle green card.
+    Renders a single risky clause as a styled red card.
 
     Args:
         clause: An analyzed clause dict from risk_predictor.analyze_clauses()
+        matches: Optional precedent matches from precedent_matcher, shown
+            as approved fallback clauses under the card.
     """
+    st.markdown(risky_clause_html(clause), unsafe_allow_html=True)
+
+    if matches:
+        with st.expander(f"📚 {len(matches)} approved fallback clause(s) for #{clause['id']}"):
+            for m in matches:
+                st.markdown(
+                    f"""
+                    <div class="safe-card" style="padding:12px 16px;">
+                        <div class="clause-header">
+                            <span style="color:{COLOUR['text_secondary']};font-size:12px;font-weight:600;">
+                                {html.escape(m.get('title') or 'Precedent')}
+                            </span>
+                            <span class="cat-chip">{html.escape(m.get('category') or '')}</span>
+                            <span style="font-size:12px;color:{COLOUR['text_secondary']};margin-left:auto;">
+                                {int(m['similarity'] * 100)}% similar
+                            </span>
+                        </div>
+                        <p class="clause-text">{html.escape(m['text'])}</p>
+                    </div>
+                    """,
+                    unsafe_allow_html=True,
+                )
+
+
+def safe_clause_html(clause: Dict) -> str:
+    """Returns the HTML of a safe clause card (needs card_styles_css())."""
     conf_pct = int(clause["confidence"] * 100)
+    page_ref = f" · PAGE {clause['page']}" if clause.get("page") else ""
 
-    st.markdown(
-        f"""
+    return f"""
         <div class="safe-card">
             <div class="clause-header">
                 <span style="color:{COLOUR['text_secondary']};font-size:12px;font-weight:600;">
-                    CLAUSE #{clause['id']}
+                    CLAUSE #{clause['id']}{page_ref}
                 </span>
                 <span class="badge-safe">✔ SAFE</span>
                 <span style="font-size:12px;color:{COLOUR['text_secondary']};margin-left:auto;">
@@ -244,21 +295,222 @@ def render_safe_clause(clause: Dict) -> None:
                 <div class="conf-bar-fill" style="width:{conf_pct}%; background:{COLOUR['border_safe']};"></div>
             </div>
         </div>
-        """,
-        unsafe_allow_html=True,
+        """
+
+
+def render_safe_clause(clause: Dict) -> None:
+    """
+    Renders a single safe clause as a subtle green card.
+
+    Args:
+        clause: An analyzed clause dict from risk_predictor.analyze_clauses()
+    """
+    st.markdown(safe_clause_html(clause), unsafe_allow_html=True)
+
+
+def render_feedback_control(
+    clause: Dict,
+    on_feedback: Callable[[Dict, str], None],
+    recorded: Optional[str] = None,
+    key_prefix: str = "feedback",
+) -> None:
+    """
+    Renders a "should be Safe / Risky" button under a clause card.
+
+    Args:
+        clause: The analyzed clause shown in the card above.
+        on_feedback: Called with (clause, corrected_label) when clicked.
+        recorded: Label the reviewer already gave this clause, if any.
+        key_prefix: Widget key prefix, unique per document.
+    """
+    if recorded:
+        st.caption(f"✓ Marked as {recorded} — the model will learn from this.")
+        return
+    corrected = "Safe" if clause["label"] == "Risky" else "Risky"
+    st.button(
+        f"👎 Should be {corrected}",
+        key=f"{key_prefix}_{clause['id']}",
+        on_click=on_feedback,
+        args=(clause, corrected),
+        help="Disagree with this label? Your correction is logged and used to update the model.",
     )
 
 
-def render_clause_list(analyzed_clauses: List[Dict], show_safe: bool = True) -> None:
+def render_clause_list(
+    analyzed_clauses: List[Dict],
+    show_safe: bool = True,
+    precedent_matches: Optional[Dict[int, List[Dict]]] = None,
+    on_feedback: Optional[Callable[[Dict, str], None]] = None,
+    feedback_given: Optional[Dict[int, str]] = None,
+    feedback_key: str = "feedback",
+) -> None:
     """
     Renders all clauses in order, using the appropriate card for each.
 
     Args:
         analyzed_clauses: Full list from risk_predictor.analyze_clauses()
         show_safe: Whether to render safe clauses (default True)
+        precedent_matches: Optional clause id -> precedent matches, from
+            precedent_matcher.match_risky_clauses()
+        on_feedback: Optional callback for label corrections; when given,
+            each card gets a feedback button (see render_feedback_control)
+        feedback_given: Clause id -> label already recorded this session
+        feedback_key: Widget key prefix for the feedback buttons
     """
+    precedent_matches = precedent_matches or {}
+    feedback_given = feedback_given or {}
     for clause in analyzed_clauses:
         if clause["label"] == "Risky":
-            render_risky_clause(clause)
+            render_risky_clause(clause, precedent_matches.get(clause["id"]))
         elif show_safe:
             render_safe_clause(clause)
+        else:
+            continue
+        if on_feedback is not None:
+            render_feedback_control(clause, on_feedback, feedback_given.get(clause["id"]), feedback_key)
+
+
+# ---------------------------------------------------------------------------
+# Version diff (redline) view
+# ---------------------------------------------------------------------------
+
+_RISK_CHANGE_BADGES = {
+    "added_risk":      ("＋ NEW RISK",       COLOUR["border_risky"]),
+    "newly_risky":     ("▲ NOW RISKY",       COLOUR["border_risky"]),
+    "risk_changed":    ("● RISK CHANGED",    "#F5A623"),
+    "no_longer_risky": ("▼ NO LONGER RISKY", COLOUR["border_safe"]),
+    "removed_risk":    ("－ RISK REMOVED",   COLOUR["border_safe"]),
+}
+
+
+def _redline_html(old_text: str, new_text: str) -> str:
+    """Word-level redline of two clause texts as HTML."""
+    old_words, new_words = old_text.split(), new_text.split()
+    parts = []
+    matcher = difflib.SequenceMatcher(None, old_words, new_words, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            parts.append(html.escape(" ".join(old_words[i1:i2])))
+            continue
+        if i2 > i1:
+            parts.append(
+                f'<del style="color:{COLOUR["border_risky"]};">'
+                f'{html.escape(" ".join(old_words[i1:i2]))}</del>'
+            )
+        if j2 > j1:
+            parts.append(
+                f'<ins style="color:{COLOUR["border_safe"]};">'
+                f'{html.escape(" ".join(new_words[j1:j2]))}</ins>'
+            )
+    return " ".join(parts)
+
+
+def render_version_diff(diff: List[Dict], summary: Dict) -> None:
+    """
+    Renders a redline of changed clauses between two contract versions.
+
+    Args:
+        diff: Entries from version_diff.reanalyze_revision()
+        summary: Counts from version_diff.summarize_diff()
+    """
+    st.markdown(
+        f"""
+        <div class="kpi-label" style="margin-bottom:10px;">
+            {summary['unchanged']} unchanged · {summary['modified']} modified ·
+            {summary['inserted']} inserted · {summary['deleted']} deleted ·
+            {summary['rescored']} clauses re-scored
+        </div>
+        """,
+        unsafe_allow_html=True,
+    )
+
+    changed = [e for e in diff if e["op"] != "unchanged"]
+    if not changed:
+        st.success("No clause changes compared with the previous version.")
+        return
+
+    for entry in changed:
+        old, new = entry["old"], entry["new"]
+        if entry["op"] == "modified":
+            body = _redline_html(old["text"], new["text"])
+        elif entry["op"] == "inserted":
+            body = f'<ins style="color:{COLOUR["border_safe"]};">{html.escape(new["text"])}</ins>'
+        else:
+            body = f'<del style="color:{COLOUR["border_risky"]};">{html.escape(old["text"])}</del>'
+
+        badge_html = ""
+        if entry["risk_change"] in _RISK_CHANGE_BADGES:
+            text, colour = _RISK_CHANGE_BADGES[entry["risk_change"]]
+            badge_html = (
+                f'<span style="font-size:11px;font-weight:700;color:{colour};'
+                f'margin-left:auto;">{text}</span>'
+            )
+        current = new or old
+        card_class = "risky-card" if current["label"] == "Risky" else "safe-card"
+        categories_html = "".join(
+            f'<span class="cat-chip">{cat}</span>' for cat in current["categories"]
+        )
+        clause_ref = f"CLAUSE #{new['id']}" if new else f"WAS CLAUSE #{old['id']}"
+
+        st.markdown(
+            f"""
+            <div class="{card_class}">
+                <div class="clause-header">
+                    <span style="color:{COLOUR['text_secondary']};font-size:12px;font-weight:600;">
+                        {clause_ref} · {entry['op'].upper()}
+                    </span>
+                    {badge_html}
+                </div>
+                <p class="clause-text">{body}</p>
+                <div style="margin-top:6px;">{categories_html}</div>
+            </div>
+            """,
+            unsafe_allow_html=True,
+        )
+
+
+# ---------------------------------------------------------------------------
+# Portfolio (multi-document) views
+# ---------------------------------------------------------------------------
+
+def render_portfolio_table(rows: List[Dict]) -> None:
+    """
+    Renders the ranked portfolio table and a category exposure matrix.
+
+    Args:
+        rows: Ranked rows from batch_analyzer.rank_portfolio()
+    """
+    st.dataframe(
+        [
+            {
+                "Rank": row["rank"],
+                "Document": row["name"],
+                "Clauses": row["total"],
+                "Risky": row["risky_count"],
+                "Risk %": row["risk_percentage"],
+                "Categories": row["category_count"],
+                "Top categories": row["top_categories"] or row["error"] or "—",
+            }
+            for row in rows
+        ],
+        hide_index=True,
+        use_container_width=True,
+    )
+
+    categories = sorted({cat for row in rows for cat in row["by_category"]})
+    if not categories:
+        return
+
+    st.markdown(
+        '<div class="kpi-label" style="margin:12px 0 6px;">Category exposure (clauses per document)</div>',
+        unsafe_allow_html=True,
+    )
+    st.dataframe(
+        [
+            {"Document": row["name"], **{cat: row["by_category"].get(cat, 0) for cat in categories}}
+            for row in rows
+            if row["error"] is None
+        ],
+        hide_index=True,
+        use_container_width=True,
+    )
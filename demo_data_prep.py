@@ -1,15 +1,270 @@
 import argparse
+import csv
+import hashlib
+import json
+import os
 import sys
+import time
+
+import numpy as np
+
 from src.data_preprocessing.document_loader import load_text_from_file
 from src.data_preprocessing.text_cleaner import clean_text
 from src.data_preprocessing.segmenter import segment_into_clauses
+from src.data_preprocessing.weak_labeling import (
+    ABSTAIN,
+    LABELING_FUNCTIONS,
+    LabelModel,
+    apply_labeling_functions,
+    summarize_labeling_functions,
+)
+from utils.clause_segmenter import segment_document
+from utils.pipeline import Pipeline, Stage, format_metrics
+
+SUPPORTED_EXTENSIONS = (".txt", ".pdf")
+
+# Clauses per weak-label output file (part-00000.csv, ...)
+DEFAULT_CHUNK_ROWS = 100_000
+
+
+def _load_stage(filepath):
+    return {"source": filepath, "text": load_text_from_file(filepath)}
+
+
+def _segment_stage(doc):
+    clauses = segment_into_clauses(doc.pop("text"))
+    doc["rows"] = [(clause, clean_text(clause)) for clause in clauses]
+    return doc
+
+
+class _CsvWriterStage:
+    """Appends each document's clauses to one CSV (single writer thread)."""
+
+    def __init__(self, writer):
+        self.writer = writer
+
+    def __call__(self, doc):
+        for clause_id, (clause, cleaned) in enumerate(doc.pop("rows"), start=1):
+            self.writer.writerow([doc["source"], clause_id, clause, cleaned])
+            doc["clauses"] = clause_id
+        return doc
+
+
+# ---------------------------------------------------------------------------
+# Weak labelling: vote → fit label model → write training chunks
+# ---------------------------------------------------------------------------
+def _vote_stage(doc):
+    # Same segmentation as the app, so training clauses look like scored ones
+    texts = [c["text"] for c in segment_document(doc.pop("text"))]
+    doc["rows"] = (texts, apply_labeling_functions(texts))
+    return doc
+
+
+class _VoteWriterStage:
+    """
+    Appends clauses to staging CSV chunks of chunk_rows rows and keeps
+    their LF votes (int8) in memory for fitting the label model.
+    Exact duplicate clauses (boilerplate shared across contracts) are
+    written once when dedupe is set.
+    """
+
+    def __init__(self, directory, chunk_rows, dedupe=True):
+        self.directory = directory
+        self.chunk_rows = chunk_rows
+        self.seen = set() if dedupe else None
+        self.parts, self.votes = [], []
+        self.duplicates = 0
+        self._file = self._writer = None
+        self._pending = []
+
+    def __call__(self, doc):
+        texts, votes = doc.pop("rows")
+        written = 0
+        for clause_id, (text, row) in enumerate(zip(texts, votes), start=1):
+            if self.seen is not None:
+                digest = hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest()
+                if digest in self.seen:
+                    self.duplicates += 1
+                    continue
+                self.seen.add(digest)
+            if self._writer is None or len(self._pending) >= self.chunk_rows:
+                self._roll()
+            self._writer.writerow([text, doc["source"], clause_id])
+            self._pending.append(row)
+            written += 1
+        doc["clauses"] = written
+        return doc
+
+    def _roll(self):
+        self.close()
+        path = os.path.join(self.directory, f"votes-{len(self.parts):05d}.csv")
+        self._file = open(path, "w", encoding="utf-8", newline="")
+        self._writer = csv.writer(self._file)
+        self.parts.append(path)
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self.votes.append(np.array(self._pending, dtype=np.int8).reshape(-1, len(LABELING_FUNCTIONS)))
+            self._file = self._writer = None
+            self._pending = []
+
+
+def prepare_weak_labels(files, output_dir, workers=None, queue_size=8,
+                        chunk_rows=DEFAULT_CHUNK_ROWS, min_confidence=0.6, dedupe=True):
+    """
+    Builds a training set from unlabelled contracts with weak supervision.
+
+    Documents are loaded, segmented and run through every labelling
+    function on a staged pipeline. The label model is then fitted on all
+    votes, and each chunk is written to output_dir/part-NNNNN.csv
+    (columns: clause_text, is_risky, risk_probability, source, clause_id).
+    Clauses no LF voted on, or whose probability is within min_confidence
+    of a coin flip, are left out. A labeling_report.json with LF coverage,
+    conflicts and learned accuracies is written alongside.
+
+    Point TRAINING_DATA_PATH at output_dir to use it for full retrains.
+    """
+    start = time.perf_counter()
+    staging = os.path.join(output_dir, "_votes")
+    os.makedirs(staging, exist_ok=True)
+    writer = _VoteWriterStage(staging, chunk_rows, dedupe=dedupe)
+    pipeline = Pipeline([
+        Stage("extraction", _load_stage, workers, kind="process"),
+        Stage("labelling", _vote_stage, workers, kind="process"),
+        Stage("persistence", writer, 1),
+    ], queue_size=queue_size)
+
+    errors = 0
+    for item in pipeline.run(files):
+        if item.error:
+            errors += 1
+            print(f"Error in {item.failed_stage} for {files[item.seq]}: {item.error}", file=sys.stderr)
+    writer.close()
+    print(format_metrics(pipeline.metrics()))
+
+    votes = np.concatenate(writer.votes) if writer.votes else np.empty((0, len(LABELING_FUNCTIONS)), np.int8)
+    model = LabelModel().fit(votes)
+
+    kept = risky = 0
+    for k, (part, part_votes) in enumerate(zip(writer.parts, writer.votes)):
+        probabilities = model.predict_proba(part_votes)
+        covered = (part_votes != ABSTAIN).any(axis=1)
+        out_path = os.path.join(output_dir, f"part-{k:05d}.csv")
+        with open(part, encoding="utf-8", newline="") as src, \
+                open(out_path, "w", encoding="utf-8", newline="") as dst:
+            out = csv.writer(dst)
+            out.writerow(["clause_text", "is_risky", "risk_probability", "source", "clause_id"])
+            for (text, source, clause_id), p, is_covered in zip(csv.reader(src), probabilities, covered):
+                if not is_covered or max(p, 1.0 - p) < min_confidence:
+                    continue
+                out.writerow([text, int(p >= 0.5), round(float(p), 4), source, clause_id])
+                kept += 1
+                risky += int(p >= 0.5)
+        os.remove(part)
+    os.rmdir(staging)
+
+    elapsed = time.perf_counter() - start
+    report = {
+        "documents": len(files),
+        "errors": errors,
+        "clauses": int(len(votes)),
+        "duplicates_skipped": writer.duplicates,
+        "written": kept,
+        "risky": risky,
+        "min_confidence": min_confidence,
+        "label_model": model.to_dict(),
+        "labeling_functions": summarize_labeling_functions(votes, model),
+        "elapsed_s": round(elapsed, 1),
+        "documents_per_minute": round(len(files) / elapsed * 60, 1) if elapsed > 0 else None,
+    }
+    with open(os.path.join(output_dir, "labeling_report.json"), "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+    print(f"\n{'Labelling function':<28} {'Coverage':>9} {'Overlap':>8} {'Conflict':>9} {'Accuracy':>9}")
+    for row in report["labeling_functions"]:
+        print(f"{row['lf']:<28} {row['coverage']:>9.1%} {row['overlap']:>8.1%} "
+              f"{row['conflict']:>9.1%} {row['accuracy']:>9.2f}")
+    print(f"\nWrote {kept} of {len(votes)} clauses ({risky} risky) from {len(files)} documents "
+          f"→ {output_dir} in {elapsed:.1f}s ({report['documents_per_minute']} documents/min)")
+    return report
+
+
+def collect_files(inputs):
+    files = []
+    for item in inputs:
+        if os.path.isdir(item):
+            for root, _, names in os.walk(item):
+                files.extend(os.path.join(root, n) for n in names
+                             if n.lower().endswith(SUPPORTED_EXTENSIONS))
+        else:
+            files.append(item)
+    return sorted(files)
+
+
+def prepare_corpus(files, output_path, workers=None, queue_size=8):
+    """
+    Loads, segments and cleans many contracts on a staged pipeline and writes
+    every clause to output_path (columns: source, clause_id, clause_text,
+    clean_text).
+    """
+    with open(output_path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["source", "clause_id", "clause_text", "clean_text"])
+        pipeline = Pipeline([
+            Stage("extraction", _load_stage, workers, kind="process"),
+            Stage("segmentation", _segment_stage, workers, kind="process"),
+            Stage("persistence", _CsvWriterStage(writer), 1),
+        ], queue_size=queue_size)
+
+        total_clauses = 0
+        for item in pipeline.run(files):
+            if item.error:
+                print(f"Error in {item.failed_stage} for {files[item.seq]}: {item.error}", file=sys.stderr)
+            else:
+                total_clauses += item.value.get("clauses", 0)
+
+    print(f"Wrote {total_clauses} clauses from {len(files)} documents → {output_path}")
+    print(format_metrics(pipeline.metrics()))
+
 
 def main():
     parser = argparse.ArgumentParser(description="Test Data Preprocessing Pipeline")
-    parser.add_argument('filepath', type=str, help="Path to a .txt or .pdf file containing a contract")
-    
+    parser.add_argument('filepath', type=str, nargs="+",
+                        help="Path(s) to .txt or .pdf contracts, or directories of them")
+    parser.add_argument('--output', type=str, default=None,
+                        help="Write every clause (raw and cleaned) to this CSV using the staged pipeline")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="Workers for the load and segment stages (default: CPU count)")
+    parser.add_argument('--weak-labels', metavar="OUTPUT_DIR", default=None,
+                        help="Weakly label every clause and write clause_text/is_risky chunks here")
+    parser.add_argument('--chunk-rows', type=int, default=DEFAULT_CHUNK_ROWS,
+                        help="Clauses per output chunk with --weak-labels")
+    parser.add_argument('--min-confidence', type=float, default=0.6,
+                        help="Drop weak labels whose probability is closer to 0.5 than this")
+    parser.add_argument('--keep-duplicates', action="store_true",
+                        help="Keep repeated identical clauses with --weak-labels")
+
     args = parser.parse_args()
-    filepath = args.filepath
+
+    if args.weak_labels:
+        files = collect_files(args.filepath)
+        if not files:
+            print("No .txt or .pdf files found.", file=sys.stderr)
+            sys.exit(1)
+        prepare_weak_labels(files, args.weak_labels, workers=args.workers, chunk_rows=args.chunk_rows,
+                            min_confidence=args.min_confidence, dedupe=not args.keep_duplicates)
+        return
+
+    if args.output or len(args.filepath) > 1 or os.path.isdir(args.filepath[0]):
+        files = collect_files(args.filepath)
+        if not files:
+            print("No .txt or .pdf files found.", file=sys.stderr)
+            sys.exit(1)
+        prepare_corpus(files, args.output or "prepared_clauses.csv", workers=args.workers)
+        return
+
+    filepath = args.filepath[0]
     
     print(f"Loading document from: {filepath}...")
     try:
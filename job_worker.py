@@ -0,0 +1,70 @@
+"""
+job_worker.py – Run a background job worker node.
+
+Usage:
+    python job_worker.py                    # process jobs until Ctrl+C
+    python job_worker.py --concurrency 4    # run up to 4 jobs at once
+    python job_worker.py --drain            # exit once the queue is empty
+    python job_worker.py --list             # show recent jobs
+    python job_worker.py --status JOB_ID    # show one job
+    python job_worker.py --cancel JOB_ID
+
+Claims jobs submitted by the app (uploads above ASYNC_SIZE_THRESHOLD_MB)
+from JOB_QUEUE_DIR and runs each in its own process, with JOB_TIMEOUT
+and JOB_MAX_ATTEMPTS applied. Several nodes can share one queue
+directory; set JOB_IN_APP_WORKER = False to leave all jobs to them.
+"""
+import argparse
+import time
+from datetime import datetime
+
+from app_config import JOB_MAX_CONCURRENCY, JOB_TIMEOUT
+from utils.job_queue import JobQueue, JobWorker
+
+
+def _format_job(job) -> str:
+    created = datetime.fromtimestamp(job["created_at"]).strftime("%Y-%m-%d %H:%M:%S")
+    line = (f"{job['id']}  {job['status']:<9} {job['progress']:>4.0%}  "
+            f"attempt {job['attempts']}/{job['max_attempts']}  {created}  {job['name']}")
+    if job["error"]:
+        line += f"\n    {job['error']}"
+    return line
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Background job worker for large documents")
+    parser.add_argument("--concurrency", type=int, default=JOB_MAX_CONCURRENCY,
+                        help="Jobs run at once on this node")
+    parser.add_argument("--timeout", type=float, default=JOB_TIMEOUT,
+                        help="Seconds before a running job is killed and retried")
+    parser.add_argument("--queue-dir", default=None, help="Queue directory (default: JOB_QUEUE_DIR)")
+    parser.add_argument("--drain", action="store_true", help="Exit once no jobs are left")
+    parser.add_argument("--list", action="store_true", help="List recent jobs and exit")
+    parser.add_argument("--status", metavar="JOB_ID", help="Show one job and exit")
+    parser.add_argument("--cancel", metavar="JOB_ID", help="Cancel a queued or running job")
+    args = parser.parse_args()
+
+    if args.list or args.status or args.cancel:
+        with JobQueue(args.queue_dir) as queue:
+            if args.cancel:
+                print("Cancelled." if queue.cancel(args.cancel) else "Job is not queued or running.")
+            elif args.status:
+                job = queue.get(args.status)
+                print(_format_job(job) if job else f"Unknown job id: {args.status}")
+            else:
+                for job in queue.list_jobs():
+                    print(_format_job(job))
+        return
+
+    worker = JobWorker(args.queue_dir, concurrency=args.concurrency, timeout=args.timeout)
+    print(f"Worker {worker.worker_id}: up to {worker.concurrency} job(s) at once")
+    start = time.perf_counter()
+    try:
+        worker.run(drain=args.drain)
+    except KeyboardInterrupt:
+        pass
+    print(f"Stopped after {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
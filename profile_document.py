@@ -0,0 +1,80 @@
+"""
+profile_document.py – Profile the analysis pipeline on one contract.
+
+Usage:
+    python profile_document.py contract.pdf
+    python profile_document.py contract.pdf --mode sampling --top 15 --output-dir profiles/
+    python profile_document.py contract.pdf --memory   # + allocation peaks and sites (slower)
+
+Runs extraction → segmentation → scoring → summary under a profiler,
+prints per-stage timings and the top-N hotspots (and, with --memory,
+tracemalloc allocation peaks and the lines that allocated the most), and
+writes:
+
+    <output-dir>/<name>.collapsed      collapsed stacks for flamegraph.pl /
+                                       speedscope / inferno
+    <output-dir>/<name>.profile.json   full per-stage report
+
+Render a flamegraph with e.g.
+    flamegraph.pl profiles/contract.collapsed > contract.svg
+"""
+import argparse
+import json
+import os
+import sys
+
+from utils.profiler import (
+    DEFAULT_SAMPLE_INTERVAL,
+    PROFILE_MODES,
+    format_report,
+    profile_document,
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Profile the pipeline on a single contract")
+    parser.add_argument("filepath", help="Path to a .txt or .pdf contract")
+    parser.add_argument("--mode", choices=PROFILE_MODES, default="deterministic",
+                        help="Hotspot source: cProfile (deterministic) or stack sampling")
+    parser.add_argument("--top", type=int, default=20, help="Hotspots / allocation sites per stage")
+    parser.add_argument("--interval", type=float, default=DEFAULT_SAMPLE_INTERVAL,
+                        help="Stack sampling interval in seconds")
+    parser.add_argument("--memory", action="store_true",
+                        help="Trace allocations: per-stage peaks and top allocating lines "
+                             "(several times slower; timings are then not representative)")
+    parser.add_argument("--output-dir", default="profiles", help="Where to write the profile files")
+    args = parser.parse_args()
+
+    try:
+        with open(args.filepath, "rb") as f:
+            raw_bytes = f.read()
+    except OSError as e:
+        print(f"Error reading file: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    name = os.path.basename(args.filepath)
+    print(f"Profiling {name} ({len(raw_bytes) / 1024:.0f} KB, {args.mode} mode)...\n")
+    try:
+        profiler, result = profile_document(name, raw_bytes, mode=args.mode,
+                                            top_n=args.top, interval=args.interval,
+                                            memory=args.memory)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    report = profiler.report()
+    report["file"] = name
+    report["clauses"] = len(result["analyzed"])
+    print(format_report(report, top_n=args.top))
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    stem = os.path.join(args.output_dir, os.path.splitext(name)[0])
+    profiler.write_collapsed(stem + ".collapsed")
+    with open(stem + ".profile.json", "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nSaved collapsed stacks → {stem}.collapsed")
+    print(f"Saved profile report  → {stem}.profile.json")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+search_clauses.py – Search past analyses for clauses similar to a query.
+
+Usage:
+    python search_clauses.py "indemnify and hold harmless" --label Risky --category Indemnity
+    python search_clauses.py --rebuild
+
+The BM25 index is brought up to date with the history store before every
+query, so newly stored documents are always searchable.
+"""
+import argparse
+import sys
+import time
+
+from app_config import ANALYSIS_STORE_PATH
+from utils.analysis_store import AnalysisStore
+from utils.search_index import IndexBusyError, SearchIndex, index_dir_for
+
+
+def main():
+    parser = argparse.ArgumentParser(description="BM25 search over stored clauses")
+    parser.add_argument("query", nargs="?", default=None, help="Query text")
+    parser.add_argument("-k", type=int, default=10, help="Number of results")
+    parser.add_argument("--label", choices=["Risky", "Safe"], default=None)
+    parser.add_argument("--category", type=str, default=None)
+    parser.add_argument("--store", type=str, default=ANALYSIS_STORE_PATH,
+                        help="History store file")
+    parser.add_argument("--rebuild", action="store_true",
+                        help="Rebuild the index from scratch")
+    args = parser.parse_args()
+
+    with AnalysisStore(args.store) as store:
+        index = SearchIndex(index_dir_for(args.store))
+        start = time.perf_counter()
+        if args.rebuild:
+            try:
+                added = index.rebuild_from_store(store)
+            except IndexBusyError as e:
+                sys.exit(str(e))
+        else:
+            added = index.update_from_store(store)
+        if added:
+            print(f"Indexed {added} clauses in {time.perf_counter() - start:.2f}s "
+                  f"({index.num_docs} total, {len(index.segments)} segments)")
+
+        if not args.query:
+            if not args.rebuild:
+                parser.print_usage(sys.stderr)
+            return
+
+        start = time.perf_counter()
+        hits = index.search(args.query, k=args.k, label=args.label, category=args.category)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        clauses = store.get_clauses([h["store_id"] for h in hits])
+
+    scores = {h["store_id"]: h["score"] for h in hits}
+    print(f"{len(clauses)} results in {elapsed_ms:.1f} ms\n")
+    for rank, c in enumerate(clauses, start=1):
+        print(f"{rank:>2}. [{scores[c['store_id']]:.3f}] {c['document_name']} #{c['id']} "
+              f"({c['label']}; {', '.join(c['categories']) or 'no category'})")
+        print(f"    {c['text'][:160]}{'...' if len(c['text']) > 160 else ''}")
+
+
+if __name__ == "__main__":
+    main()
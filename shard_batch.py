@@ -0,0 +1,119 @@
+"""
+shard_batch.py – Sharded batch analysis across machines sharing a directory.
+
+Usage:
+    python shard_batch.py plan /mnt/archive/contracts --run /mnt/runs/nightly --shards 64
+    python shard_batch.py work --run /mnt/runs/nightly                 # on every node
+    python shard_batch.py work --run /mnt/runs/nightly --processes 4   # 4 workers on this node
+    python shard_batch.py status --run /mnt/runs/nightly
+    python shard_batch.py merge --run /mnt/runs/nightly --output results.json
+
+plan assigns every document to one of --shards shards by a hash of its
+path and writes the run's manifest. Workers claim shards through lease
+files in the run directory; a shard whose worker dies is taken over once
+its lease expires (--lease-seconds), resuming after the documents already
+written. merge combines the shard outputs and portfolio stats into the
+same JSON as batch_analyze.py --output (usable as its --previous).
+
+To try it on one machine, plan a run and start several local workers:
+    python shard_batch.py work --run runs/test --processes 4 --lease-seconds 10
+"""
+import argparse
+import multiprocessing as mp
+import sys
+import time
+
+from app_config import SHARD_COUNT, SHARD_LEASE_SECONDS
+from batch_analyze import collect_paths, write_results
+from utils.batch_analyzer import rank_portfolio
+from utils.shard_runner import ShardWorker, merge_run, plan_run, run_status
+
+
+def _print_document(shard, record) -> None:
+    status = f"ERROR: {record['error']}" if record["error"] else (
+        f"{record['stats']['total']} clauses, {record['stats']['risk_percentage']}% risky"
+    )
+    print(f"[shard {shard}] {record['key']}: {status} ({record['elapsed']}s)", flush=True)
+
+
+def _work(run_dir: str, lease_seconds: float, wait: bool) -> None:
+    worker = ShardWorker(run_dir, lease_seconds=lease_seconds)
+    print(f"Worker {worker.worker_id} started", flush=True)
+    finished = worker.run(wait=wait, on_document=_print_document)
+    print(f"Worker {worker.worker_id} finished shards {finished or 'none'}", flush=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sharded batch contract risk analysis")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    plan = sub.add_parser("plan", help="Assign documents to shards and create the run")
+    plan.add_argument("inputs", nargs="+", help="Contract files or directories")
+    plan.add_argument("--shards", type=int, default=SHARD_COUNT, help="Number of shards")
+
+    work = sub.add_parser("work", help="Claim and analyze shards until all are done")
+    work.add_argument("--processes", type=int, default=1, help="Worker processes on this node")
+    work.add_argument("--lease-seconds", type=float, default=SHARD_LEASE_SECONDS,
+                      help="Seconds before a silent worker's shard is taken over")
+    work.add_argument("--no-wait", action="store_true",
+                      help="Exit when nothing is left to claim, without waiting for other workers")
+
+    status = sub.add_parser("status", help="Show the state of each shard")
+
+    merge = sub.add_parser("merge", help="Combine shard outputs into one results file")
+    merge.add_argument("--output", required=True, help="Results JSON (batch_analyze.py format)")
+    merge.add_argument("--partial", action="store_true", help="Merge even if shards are missing")
+
+    for p in (plan, work, status, merge):
+        p.add_argument("--run", required=True, help="Run directory shared by all workers")
+    args = parser.parse_args()
+
+    if args.command == "plan":
+        paths = collect_paths(args.inputs)
+        if not paths:
+            print("No .txt or .pdf files found.", file=sys.stderr)
+            sys.exit(1)
+        try:
+            manifest = plan_run(args.run, paths, n_shards=args.shards)
+        except FileExistsError as e:
+            sys.exit(str(e))
+        print(f"Planned {len(manifest['documents'])} documents in {args.shards} shards → {args.run}")
+
+    elif args.command == "work":
+        start = time.perf_counter()
+        if args.processes <= 1:
+            _work(args.run, args.lease_seconds, not args.no_wait)
+        else:
+            ctx = mp.get_context("spawn")
+            procs = [ctx.Process(target=_work, args=(args.run, args.lease_seconds, not args.no_wait))
+                     for _ in range(args.processes)]
+            for proc in procs:
+                proc.start()
+            for proc in procs:
+                proc.join()
+        print(f"Done in {time.perf_counter() - start:.1f}s")
+
+    elif args.command == "status":
+        rows = run_status(args.run)
+        for row in rows:
+            owner = f"  {row['owner']}" if row["owner"] else ""
+            print(f"shard {row['shard']:>4}  {row['state']:<8} {row['finished']:>5}/{row['documents']:<5}{owner}")
+        done = sum(row["state"] == "done" for row in rows)
+        print(f"\n{done}/{len(rows)} shards done")
+
+    else:
+        try:
+            merged = merge_run(args.run, allow_partial=args.partial)
+        except ValueError as e:
+            sys.exit(str(e))
+        results, portfolio = merged["results"], merged["portfolio"]
+        summary = portfolio.summary()
+        print(f"Merged {len(results)} documents: {summary['total']} clauses, "
+              f"{summary['risky_count']} risky ({summary['risk_percentage']}%)")
+        if merged["missing"]:
+            print(f"Missing shards: {', '.join(map(str, merged['missing']))}")
+        write_results(results, rank_portfolio(results), portfolio, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,10 @@
 import re
 from typing import List
 
+# Clauses of this many words or fewer are dropped
+MIN_CLAUSE_WORDS = 3
+
+
 def segment_into_clauses(text: str) -> List[str]:
     """
     Segments a full contract text into individual clauses.
@@ -13,6 +17,15 @@ def segment_into_clauses(text: str) -> List[str]:
     Returns:
         List[str]: A list of segmented clauses.
     """
+    # Filter out very short strings that are likely not real clauses
+    return [c for c in split_into_clauses(text) if len(c.split()) > MIN_CLAUSE_WORDS]
+
+
+def split_into_clauses(text: str) -> List[str]:
+    """
+    The splitting step of segment_into_clauses(), without the filter on
+    short clauses (for callers that count words themselves).
+    """
     if not text:
         return []
 
@@ -52,7 +65,4 @@ def segment_into_clauses(text: str) -> List[str]:
         if current_clause:
             clauses.append(current_clause.strip())
 
-    # Filter out very short strings that are likely not real clauses
-    final_clauses = [c for c in clauses if len(c.split()) > 3]
-    
-    return final_clauses
+    return clauses
@@ -1,57 +1,53 @@
 import re
+from functools import lru_cache
+from typing import Union
+
 import nltk
 from nltk.corpus import stopwords
-from nltk.tokenize import word_tokenize
+
+from utils.tokenizer import TokenizedClause, tokens_of
 
 # Setup NLTK resources
 try:
     nltk.data.find('corpora/stopwords')
 except LookupError:
     nltk.download('stopwords')
-    
-try:
-    nltk.data.find('tokenizers/punkt')
-except LookupError:
-    nltk.download('punkt')
-# Ensure punkt_tab is downloaded if needed by newer nltk versions
-try:
-    nltk.data.find('tokenizers/punkt_tab')
-except LookupError:
-    nltk.download('punkt_tab')
 
-def clean_text(text: str) -> str:
+_NON_ALPHANUMERIC = re.compile(r'[^a-z0-9]')
+
+
+@lru_cache(maxsize=1)
+def _stop_words() -> frozenset:
+    return frozenset(stopwords.words('english'))
+
+
+def clean_text(text: Union[str, TokenizedClause]) -> str:
     """
     Cleans the input text by:
     - Lowercasing
     - Removing special characters, punctuation, and extra whitespace
     - Removing stopwords
 
+    Words are the clause's shared tokens (utils/tokenizer.py), so a
+    TokenizedClause from segment_document() is not tokenized again.
+
     Args:
-        text (str): The raw text to clean.
+        text (str or TokenizedClause): The raw text to clean.
 
     Returns:
         str: The cleaned text.
     """
     if not text:
         return ""
-    
-    # Lowercase the text
-    text = text.lower()
-    
-    # Remove special characters and punctuation (keep alphanumeric and spaces)
-    text = re.sub(r'[^a-zA-Z0-9\s]', '', text)
-    
-    # Tokenize the text
-    tokens = word_tokenize(text)
-    
-    # Remove stopwords
-    stop_words = set(stopwords.words('english'))
-    cleaned_tokens = [word for word in tokens if word not in stop_words]
-    
+
+    stop_words = _stop_words()
+    cleaned_tokens = []
+    for token in tokens_of(text).tokens:
+        # Keep ASCII letters and digits only (drops "_" and non-Latin letters)
+        if not token.isascii() or '_' in token:
+            token = _NON_ALPHANUMERIC.sub('', token)
+        if token and token not in stop_words:
+            cleaned_tokens.append(token)
+
     # Join tokens back into a single string
-    cleaned_text = ' '.join(cleaned_tokens)
-    
-    # Remove extra spaces that might be left
-    cleaned_text = re.sub(r'\s+', ' ', cleaned_text).strip()
-    
-    return cleaned_text
+    return ' '.join(cleaned_tokens)
@@ -0,0 +1,240 @@
+"""
+Weak supervision for bootstrapping risk labels from unlabelled contracts.
+
+Each labelling function (LF) looks at one clause and votes RISKY, SAFE or
+ABSTAIN. LabelModel combines the votes into a probability that the clause
+is risky: every LF's accuracy is estimated from its agreement with the
+other LFs (a few EM rounds), and the votes are then summed as weighted
+log-odds, so accurate LFs count for more and conflicting LFs cancel out.
+
+The first LF is the app's keyword engine (utils/risk_predictor). Most
+others are phrase rules that do not read RISK_KEYWORDS, so their
+agreement with the keyword engine is independent evidence: one-sided
+terms, automatic renewal, exclusivity and unilateral changes on the risky
+side; boilerplate, notice periods, definitions and payment terms on the
+safe side. (Two LFs derived from the same keyword matches would agree by
+construction and inflate each other's estimated accuracy.)
+
+The exception is lf_short_without_keywords, which votes SAFE only when
+the keyword engine finds no keyword at all. It never votes on a clause
+lf_risk_keywords votes on, so the two never agree or conflict with each
+other. Its estimated accuracy comes only from the phrase rules. It is not
+independent of the keyword engine, though: it is wrong wherever the
+keyword list misses a risk.
+"""
+import re
+from functools import lru_cache
+from typing import Callable, Dict, List, Sequence
+
+import numpy as np
+
+from app_config import RISK_KEYWORD_THRESHOLD
+from utils.risk_predictor import match_keywords
+from utils.tokenizer import TokenizedClause, tokenize
+
+ABSTAIN, SAFE, RISKY = -1, 0, 1
+
+_ONE_SIDED = re.compile(
+    r"\b(sole(?:ly)? (?:and absolute )?discretion|at any time(?: and)? for any reason|without (?:prior )?notice"
+    r"|in no event shall|shall not be (?:liable|responsible)|exclusive remedy|unilateral(?:ly)?"
+    r"|as is\b|without limitation|consequential damages)\b"
+)
+_BOILERPLATE = re.compile(
+    r"\b(headings? (?:are|is) for convenience|counterparts?|entire agreement|severab(?:le|ility)"
+    r"|shall be deemed an original|this agreement is (?:made|entered into)|in witness whereof)\b"
+)
+_NOTICE = re.compile(r"\b(\d+|thirty|sixty|ninety) \(?\d*\)? ?days'? (?:prior )?written notice\b")
+_AUTO_RENEWAL = re.compile(r"\b(automatic(?:ally)? renew(?:s|ed|al)?|auto-?renew\w*|evergreen)\b")
+_EXCLUSIVITY = re.compile(
+    r"\bexclusiv(?:e|ity) (?:supplier|provider|rights?|licen[cs]e|dealing|arrangement|basis)\b"
+)
+_UNILATERAL_CHANGE = re.compile(
+    r"\bmay (?:at any time )?(?:amend|modify|change|revise|update|increase) "
+    r"(?:this agreement|these terms|the terms|the (?:fees|prices|pricing|rates))\b"
+)
+_PAYMENT_TERMS = re.compile(
+    r"\b(?:within|net) \(?\d+\)? (?:calendar |business )?days (?:of|after|from) (?:the )?"
+    r"(?:receipt of |date of )?(?:the |an |each )?(?:invoice|receipt)\b"
+)
+_DEFINITION = re.compile(r"^\W*(?:\d+(?:\.\d+)*\.?\s*)?[\"“][^\"”]{1,60}[\"”] (?:means|shall mean|refers to)\b")
+
+
+@lru_cache(maxsize=1)
+def _tokenized(text: str) -> TokenizedClause:
+    # LFs run back to back on the same clause; tokenize it once
+    return tokenize(text)
+
+
+@lru_cache(maxsize=1)
+def _keywords(text: str) -> tuple:
+    return tuple(match_keywords(_tokenized(text)))
+
+
+# ---------------------------------------------------------------------------
+# Labelling functions: clause text → RISKY / SAFE / ABSTAIN
+# ---------------------------------------------------------------------------
+def lf_risk_keywords(text: str) -> int:
+    """The keyword engine: enough risk keywords means risky."""
+    return RISKY if len(_keywords(text)) >= RISK_KEYWORD_THRESHOLD else ABSTAIN
+
+
+def lf_one_sided_terms(text: str) -> int:
+    """Discretionary, no-notice and liability-excluding language."""
+    return RISKY if _ONE_SIDED.search(_tokenized(text).lower) else ABSTAIN
+
+
+def lf_auto_renewal(text: str) -> int:
+    """Terms that renew automatically."""
+    return RISKY if _AUTO_RENEWAL.search(_tokenized(text).lower) else ABSTAIN
+
+
+def lf_exclusivity(text: str) -> int:
+    """Exclusive supply, licence or dealing obligations."""
+    return RISKY if _EXCLUSIVITY.search(_tokenized(text).lower) else ABSTAIN
+
+
+def lf_unilateral_change(text: str) -> int:
+    """One party may change the terms or prices."""
+    return RISKY if _UNILATERAL_CHANGE.search(_tokenized(text).lower) else ABSTAIN
+
+
+def lf_boilerplate(text: str) -> int:
+    """Execution, counterpart and entire-agreement boilerplate."""
+    return SAFE if _BOILERPLATE.search(_tokenized(text).lower) else ABSTAIN
+
+
+def lf_notice_period(text: str) -> int:
+    """Obligations that come with a written notice period."""
+    lower = _tokenized(text).lower
+    return SAFE if _NOTICE.search(lower) and not _ONE_SIDED.search(lower) else ABSTAIN
+
+
+def lf_definition(text: str) -> int:
+    """Defined-term clauses ("X" means ...)."""
+    return SAFE if _DEFINITION.search(text) else ABSTAIN
+
+
+def lf_payment_terms(text: str) -> int:
+    """Ordinary invoice payment terms (within / net N days)."""
+    return SAFE if _PAYMENT_TERMS.search(_tokenized(text).lower) else ABSTAIN
+
+
+def lf_short_without_keywords(text: str) -> int:
+    """Short clauses with no risk keyword."""
+    return SAFE if _tokenized(text).word_count < 25 and not _keywords(text) else ABSTAIN
+
+
+LABELING_FUNCTIONS: List[Callable[[str], int]] = [
+    lf_risk_keywords,
+    lf_one_sided_terms,
+    lf_auto_renewal,
+    lf_exclusivity,
+    lf_unilateral_change,
+    lf_boilerplate,
+    lf_notice_period,
+    lf_definition,
+    lf_payment_terms,
+    lf_short_without_keywords,
+]
+
+
+def apply_labeling_functions(texts: Sequence[str],
+                             lfs: Sequence[Callable[[str], int]] = LABELING_FUNCTIONS) -> np.ndarray:
+    """Vote matrix (n_clauses × n_lfs, int8) of every LF on every clause."""
+    votes = np.full((len(texts), len(lfs)), ABSTAIN, dtype=np.int8)
+    for i, text in enumerate(texts):
+        for j, lf in enumerate(lfs):
+            votes[i, j] = lf(text)
+    return votes
+
+
+# ---------------------------------------------------------------------------
+# Combining votes
+# ---------------------------------------------------------------------------
+class LabelModel:
+    """
+    Weighted vote of labelling functions with accuracies learned by EM.
+
+    Each LF's accuracy is how often it agrees with the weighted majority
+    of the *other* LFs on the clauses where they outvote each other, so an
+    LF cannot vouch for itself. Estimates are smoothed towards
+    default_accuracy, so LFs that rarely overlap with others keep close
+    to it.
+
+    Args:
+        n_iter: EM rounds.
+        prior: Share of risky clauses assumed before any vote.
+        default_accuracy: Accuracy of an LF with no overlap.
+        smoothing: Pseudo-votes at default_accuracy added to each estimate.
+        min_accuracy, max_accuracy: Bounds on each LF's estimated accuracy,
+            which keep any single LF from dominating or being inverted.
+    """
+
+    def __init__(self, n_iter: int = 5, prior: float = 0.5, default_accuracy: float = 0.7,
+                 smoothing: float = 20.0, min_accuracy: float = 0.55, max_accuracy: float = 0.95):
+        self.n_iter = n_iter
+        self.prior_ = prior
+        self.default_accuracy = default_accuracy
+        self.smoothing = smoothing
+        self.min_accuracy = min_accuracy
+        self.max_accuracy = max_accuracy
+        self.accuracy_ = None
+
+    def fit(self, votes: np.ndarray) -> "LabelModel":
+        signs = _signs(np.asarray(votes))
+        self.accuracy_ = np.full(signs.shape[1], self.default_accuracy)
+        for _ in range(self.n_iter):
+            weights = self._weights()
+            total = signs @ weights
+            accuracy = self.accuracy_.copy()
+            for j in range(signs.shape[1]):
+                others = total - signs[:, j] * weights[j]
+                # Clauses where LF j voted and the other LFs lean one way
+                rows = (signs[:, j] != 0) & (np.abs(others) > 1e-9)
+                agree = (np.sign(others[rows]) == signs[rows, j]).sum()
+                estimate = (agree + self.smoothing * self.default_accuracy) / (rows.sum() + self.smoothing)
+                accuracy[j] = np.clip(estimate, self.min_accuracy, self.max_accuracy)
+            self.accuracy_ = accuracy
+        return self
+
+    def _weights(self) -> np.ndarray:
+        return np.log(self.accuracy_ / (1.0 - self.accuracy_))
+
+    def predict_proba(self, votes: np.ndarray) -> np.ndarray:
+        """Probability that each clause is risky (the prior for clauses no LF covers)."""
+        log_odds = np.log(self.prior_ / (1.0 - self.prior_)) + _signs(np.asarray(votes)) @ self._weights()
+        return _sigmoid(log_odds)
+
+    def to_dict(self) -> Dict:
+        return {"prior": round(self.prior_, 4),
+                "accuracy": [round(float(a), 4) for a in self.accuracy_]}
+
+
+def _signs(votes: np.ndarray) -> np.ndarray:
+    return np.where(votes == RISKY, 1.0, np.where(votes == SAFE, -1.0, 0.0))
+
+
+def _sigmoid(x: np.ndarray) -> np.ndarray:
+    return 1.0 / (1.0 + np.exp(-x))
+
+
+def summarize_labeling_functions(votes: np.ndarray, model: LabelModel,
+                                 lfs: Sequence[Callable[[str], int]] = LABELING_FUNCTIONS) -> List[Dict]:
+    """Per-LF coverage, overlap / conflict with other LFs and learned accuracy."""
+    votes = np.asarray(votes)
+    n = max(len(votes), 1)
+    fired = votes != ABSTAIN
+    n_fired = fired.sum(axis=1)
+    has_risky = (votes == RISKY).any(axis=1)
+    has_safe = (votes == SAFE).any(axis=1)
+    rows = []
+    for j, lf in enumerate(lfs):
+        col = fired[:, j]
+        rows.append({
+            "lf": lf.__name__,
+            "coverage": round(col.sum() / n, 4),
+            "overlap": round((col & (n_fired > 1)).sum() / n, 4),
+            "conflict": round((col & has_risky & has_safe).sum() / n, 4),
+            "accuracy": round(float(model.accuracy_[j]), 4),
+        })
+    return rows
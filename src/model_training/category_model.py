@@ -0,0 +1,93 @@
+"""
+Multi-label risk category classifier over the shared TF-IDF features.
+
+One logistic regression is fitted per category, then the coefficients are
+stacked into a single (n_features × n_categories) matrix. Scoring a whole
+document is one sparse-times-dense product against the TF-IDF matrix the
+risk classifier already computed, so extra categories add columns to one
+product instead of extra passes over the text.
+"""
+import numpy as np
+from sklearn.linear_model import LogisticRegression
+from sklearn.preprocessing import MultiLabelBinarizer
+
+from src.model_training.config import RANDOM_STATE
+
+# Categories need this many positive training clauses to get a column
+MIN_CATEGORY_EXAMPLES = 2
+
+
+class CategoryModel:
+    """
+    Stacked one-vs-rest category scorer.
+
+    Attributes:
+        categories: Category names, one per column.
+        coef_: float32 array of shape (n_features, n_categories).
+        intercept_: float32 array of shape (n_categories,).
+        threshold: Probability above which a category is assigned.
+    """
+
+    def __init__(self, categories, coef, intercept, threshold: float = 0.5) -> None:
+        self.categories = list(categories)
+        self.coef_ = np.ascontiguousarray(coef, dtype=np.float32)
+        self.intercept_ = np.asarray(intercept, dtype=np.float32)
+        self.threshold = threshold
+
+    def predict_proba(self, X_vec) -> np.ndarray:
+        """Category probabilities, shape (n_clauses, n_categories)."""
+        scores = X_vec @ self.coef_ + self.intercept_
+        return 1.0 / (1.0 + np.exp(-np.asarray(scores)))
+
+    def predict(self, X_vec) -> np.ndarray:
+        """Binary indicator matrix, shape (n_clauses, n_categories)."""
+        return (self.predict_proba(X_vec) >= self.threshold).astype(int)
+
+    def decode(self, probabilities: np.ndarray) -> list:
+        """Per clause, the assigned categories ordered by probability."""
+        decoded = []
+        for row, hits in zip(probabilities, probabilities >= self.threshold):
+            idx = np.flatnonzero(hits)
+            decoded.append([self.categories[i] for i in idx[np.argsort(-row[idx])]])
+        return decoded
+
+
+def binarize_categories(category_lists):
+    """
+    Fit a MultiLabelBinarizer on per-clause category lists.
+
+    Returns:
+        Tuple of (indicator matrix, binarizer).
+    """
+    binarizer = MultiLabelBinarizer()
+    return binarizer.fit_transform(category_lists), binarizer
+
+
+def train_category_model(X_train_vec, category_lists, threshold: float = 0.5) -> CategoryModel:
+    """
+    Train one logistic regression per category and stack them.
+
+    Args:
+        X_train_vec: Sparse TF-IDF matrix for the training clauses.
+        category_lists: One list of category names per training clause.
+        threshold: Assignment probability threshold.
+
+    Returns:
+        A CategoryModel (categories with fewer than MIN_CATEGORY_EXAMPLES
+        positives, or no negatives, are left out).
+    """
+    Y, binarizer = binarize_categories(category_lists)
+    n_features = X_train_vec.shape[1]
+    names, columns, intercepts = [], [], []
+    for j, name in enumerate(binarizer.classes_):
+        y = Y[:, j]
+        if y.sum() < MIN_CATEGORY_EXAMPLES or y.sum() == len(y):
+            continue
+        clf = LogisticRegression(max_iter=1000, random_state=RANDOM_STATE, class_weight="balanced")
+        clf.fit(X_train_vec, y)
+        names.append(name)
+        columns.append(clf.coef_[0])
+        intercepts.append(clf.intercept_[0])
+
+    coef = np.column_stack(columns) if columns else np.zeros((n_features, 0))
+    return CategoryModel(names, coef, intercepts, threshold)
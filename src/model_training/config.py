@@ -13,3 +13,12 @@ MODELS_DIR = os.path.join(os.path.dirname(__file__), "..", "..", "models")
 # Output filenames
 BEST_MODEL_FILENAME = "best_model.joblib"
 VECTORIZER_FILENAME = "vectorizer.joblib"
+CATEGORY_MODEL_FILENAME = "category_model.joblib"
+
+# Memory-budgeted TF-IDF (feature_extractor.build_budgeted_vectorizer).
+# With a budget set, training picks the vocabulary so that the float32
+# training matrix plus vocabulary fit in it; None keeps build_vectorizer().
+VECTORIZER_MEMORY_BUDGET_MB = None
+VECTORIZER_MIN_DF = 2           # terms in fewer documents are never kept
+VECTORIZER_MAX_DF = 0.95        # terms in a larger share of documents are dropped
+VOCAB_PRUNE_AT = 2_000_000      # distinct n-grams held while counting before pruning
@@ -1,6 +1,7 @@
 """
 Evaluate trained classifiers and report precision, recall, and F1-score.
 """
+import numpy as np
 from sklearn.metrics import classification_report, f1_score
 
 
@@ -32,3 +33,37 @@ def evaluate_models(models: dict, X_test_vec, y_test) -> str:
 
     print(f"\nBest model: {best_name}  (macro F1 = {best_f1:.4f})")
     return best_name
+
+
+def evaluate_categories(category_model, X_test_vec, test_category_lists) -> dict:
+    """
+    Print per-category precision, recall and F1 for a CategoryModel and
+    return them.
+
+    Args:
+        category_model: Fitted CategoryModel.
+        X_test_vec: Sparse TF-IDF matrix for the test split.
+        test_category_lists: True category names per test clause.
+
+    Returns:
+        Dict mapping category name (plus "micro avg" / "macro avg") to its
+        precision, recall, f1-score and support.
+    """
+    names = category_model.categories
+    if not names:
+        print("\nNo categories had enough training examples to evaluate.")
+        return {}
+    index = {name: j for j, name in enumerate(names)}
+    Y_true = np.zeros((X_test_vec.shape[0], len(names)), dtype=int)
+    for i, cats in enumerate(test_category_lists):
+        for cat in cats:
+            if cat in index:
+                Y_true[i, index[cat]] = 1
+    Y_pred = category_model.predict(X_test_vec)
+
+    print(f"\n{'='*50}")
+    print("  Risk categories (multi-label)")
+    print('='*50)
+    print(classification_report(Y_true, Y_pred, target_names=names, zero_division=0))
+    return classification_report(Y_true, Y_pred, target_names=names, zero_division=0,
+                                 output_dict=True)
@@ -1,17 +1,52 @@
 """
 TF-IDF feature extraction for contract clause classification.
+
+build_vectorizer() is the fixed configuration (10k features, float64).
+build_budgeted_vectorizer() sizes the vocabulary for a memory budget
+instead: it counts document frequencies in one streaming pass, pruning
+rare n-grams whenever the count table grows past VOCAB_PRUNE_AT, picks
+the most frequent terms (within min_df / max_df) whose float32 CSR
+matrix and vocabulary fit the budget, and returns a vectorizer with
+that vocabulary fixed, so fitting never holds the full n-gram table.
+
+mappable_vectorizer() converts a fitted vectorizer's vocabulary dict to a
+TermArray (sorted term and column arrays) before it is saved, so the
+vocabulary is memory-mapped on load like the model's other arrays.
 """
+from collections import Counter
+from collections.abc import Mapping
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import scipy.sparse as sp
 from sklearn.feature_extraction.text import TfidfVectorizer
 
+from src.model_training.config import (
+    VECTORIZER_MAX_DF,
+    VECTORIZER_MIN_DF,
+    VOCAB_PRUNE_AT,
+)
+from utils.tokenizer import vectorizer_features
+
+# Bytes per stored value in a float32 CSR matrix (value + int32 column index)
+BYTES_PER_NONZERO = 8
 
-def build_vectorizer() -> TfidfVectorizer:
-    """Return a configured TfidfVectorizer."""
+# Approximate memory of one vocabulary entry (dict slot, str and int objects)
+BYTES_PER_TERM = 120
+
+
+def build_vectorizer(dtype=np.float64, vocabulary=None) -> TfidfVectorizer:
+    """
+    Return a configured TfidfVectorizer: accent-stripped word unigrams and
+    bigrams from the shared clause tokens (utils/tokenizer.py), so it takes
+    TokenizedClauses as well as plain text.
+    """
     return TfidfVectorizer(
-        strip_accents="unicode",
-        analyzer="word",
-        max_features=10_000,
-        ngram_range=(1, 2),
+        analyzer=vectorizer_features,
+        max_features=None if vocabulary is not None else 10_000,
         sublinear_tf=True,
+        dtype=dtype,
+        vocabulary=vocabulary,
     )
 
 
@@ -25,3 +60,234 @@ def fit_and_transform(vectorizer: TfidfVectorizer, X_train, X_test):
     X_train_vec = vectorizer.fit_transform(X_train)
     X_test_vec = vectorizer.transform(X_test)
     return X_train_vec, X_test_vec
+
+
+# ---------------------------------------------------------------------------
+# Memory-budgeted vocabulary
+# ---------------------------------------------------------------------------
+def count_document_frequencies(texts: Iterable[str], prune_at: int = VOCAB_PRUNE_AT):
+    """
+    Document frequency of every n-gram build_vectorizer() would extract.
+
+    Whenever more than prune_at distinct n-grams are held, those seen in
+    no more documents than the current floor are dropped and the floor
+    rises by one, so memory stays bounded on any corpus. Counts of terms
+    that survive are lower bounds after a prune.
+
+    Returns:
+        Tuple of (df Counter, number of documents, prune floor reached).
+    """
+    analyze = build_vectorizer().build_analyzer()
+    df: Counter = Counter()
+    n_docs, floor = 0, 0
+    for text in texts:
+        df.update(set(analyze(text)))
+        n_docs += 1
+        if len(df) > prune_at:
+            floor += 1
+            for term in [t for t, n in df.items() if n <= floor]:
+                del df[term]
+    return df, n_docs, floor
+
+
+def plan_vocabulary(
+    df: Counter,
+    n_docs: int,
+    budget_bytes: int,
+    min_df: int = VECTORIZER_MIN_DF,
+    max_df: float = VECTORIZER_MAX_DF,
+    max_features: Optional[int] = None,
+) -> Tuple[List[str], Dict]:
+    """
+    Picks the largest set of most document-frequent terms whose training
+    matrix (one stored value per document-term pair) and vocabulary fit
+    in budget_bytes.
+
+    Returns:
+        Tuple of (vocabulary terms, plan dict with the chosen min_df,
+        max_df, max_features and the estimated sizes).
+    """
+    max_count = max_df * n_docs if isinstance(max_df, float) else max_df
+    candidates = sorted(((n, t) for t, n in df.items() if min_df <= n <= max_count),
+                        key=lambda p: (-p[0], p[1]))
+    # indptr is fixed; each term adds its postings plus its vocabulary entry
+    used = (n_docs + 1) * 8
+    kept = 0
+    for n, term in candidates:
+        cost = n * BYTES_PER_NONZERO + BYTES_PER_TERM + len(term)
+        if used + cost > budget_bytes or (max_features is not None and kept >= max_features):
+            break
+        used += cost
+        kept += 1
+    vocabulary = [t for _, t in candidates[:kept]]
+    nnz = sum(n for n, _ in candidates[:kept])
+    return vocabulary, {
+        "documents": n_docs,
+        "candidate_terms": len(candidates),
+        "min_df": candidates[kept - 1][0] if kept else min_df,
+        "max_df": max_df,
+        "max_features": kept,
+        "estimated_nnz": nnz,
+        "estimated_matrix_mb": round(((n_docs + 1) * 8 + nnz * BYTES_PER_NONZERO) / 1024 ** 2, 2),
+        "estimated_vocabulary_mb": round(sum(BYTES_PER_TERM + len(t) for t in vocabulary) / 1024 ** 2, 2),
+        "budget_mb": round(budget_bytes / 1024 ** 2, 2),
+    }
+
+
+def build_budgeted_vectorizer(
+    texts: Iterable[str],
+    budget_mb: float,
+    min_df: int = VECTORIZER_MIN_DF,
+    max_df: float = VECTORIZER_MAX_DF,
+    max_features: Optional[int] = None,
+    prune_at: int = VOCAB_PRUNE_AT,
+) -> Tuple[TfidfVectorizer, Dict]:
+    """
+    Return an unfitted float32 TfidfVectorizer whose fixed vocabulary is
+    sized so that fitting it on texts stays within budget_mb, plus the
+    plan (see plan_vocabulary; also pruned_below, the counting floor).
+
+    texts is read once here and again by fit / fit_transform, so pass a
+    list, Series or other re-iterable collection.
+    """
+    df, n_docs, floor = count_document_frequencies(texts, prune_at=prune_at)
+    vocabulary, plan = plan_vocabulary(df, n_docs, int(budget_mb * 1024 ** 2),
+                                       min_df=max(min_df, floor + 1), max_df=max_df,
+                                       max_features=max_features)
+    del df
+    if not vocabulary:
+        raise ValueError(f"No terms fit a {budget_mb} MB budget (min_df={min_df}, max_df={max_df}).")
+    plan["pruned_below"] = floor
+    return build_vectorizer(dtype=np.float32, vocabulary=vocabulary), plan
+
+
+def describe_features(vectorizer: TfidfVectorizer, X) -> Dict:
+    """Vocabulary and matrix sizes actually produced by a fitted vectorizer."""
+    nbytes = X.data.nbytes + X.indices.nbytes + X.indptr.nbytes
+    return {
+        "vocabulary_size": len(vectorizer.vocabulary_),
+        "shape": list(X.shape),
+        "nnz": int(X.nnz),
+        "dtype": str(X.dtype),
+        "matrix_mb": round(nbytes / 1024 ** 2, 2),
+    }
+
+
+def format_feature_report(plan: Optional[Dict], actual: Dict) -> str:
+    """Two-line summary of a budget plan and the features produced."""
+    lines = []
+    if plan is not None:
+        lines.append(f"Budget {plan['budget_mb']} MB → min_df={plan['min_df']}, max_df={plan['max_df']}, "
+                     f"max_features={plan['max_features']} of {plan['candidate_terms']} candidate terms "
+                     f"(est. matrix {plan['estimated_matrix_mb']} MB, vocabulary "
+                     f"{plan['estimated_vocabulary_mb']} MB)")
+    lines.append(f"Features: {actual['vocabulary_size']} terms, matrix {actual['shape'][0]}×{actual['shape'][1]} "
+                 f"{actual['dtype']}, nnz {actual['nnz']}, {actual['matrix_mb']} MB")
+    return "\n".join(lines)
+
+
+# ---------------------------------------------------------------------------
+# Memory-mappable vocabulary
+# ---------------------------------------------------------------------------
+# Terms up to this many characters go in the sorted array; the few longer
+# ones stay in a small dict so one outlier does not widen every entry
+TERM_ARRAY_WIDTH = 32
+
+
+class TermArray(Mapping):
+    """
+    Read-only term → column mapping stored as numpy arrays: the terms
+    sorted in a fixed-width unicode array plus each term's column. The
+    arrays are saved and memory-mapped like any other model array, so
+    processes loading the same artifact share one copy instead of each
+    unpickling a vocabulary dict.
+    """
+
+    def __init__(self, vocabulary: Dict[str, int], width: int = TERM_ARRAY_WIDTH) -> None:
+        short = [t for t in vocabulary if len(t) <= width]
+        terms = np.array(short, dtype=f"<U{max(1, max(map(len, short), default=1))}")
+        order = np.argsort(terms)
+        self.terms = terms[order]
+        self.columns = np.array([vocabulary[t] for t in short], dtype=np.int32)[order]
+        self.width = width
+        self.long_terms = {t: i for t, i in vocabulary.items() if len(t) > width}
+
+    def lookup(self, features: List[str]) -> np.ndarray:
+        """Column of each feature, -1 for terms not in the vocabulary."""
+        if not features:
+            return np.empty(0, dtype=np.int64)
+        queries = np.asarray(features, dtype=str)
+        columns = np.full(len(queries), -1, dtype=np.int64)
+        if len(self.terms):
+            pos = np.minimum(np.searchsorted(self.terms, queries), len(self.terms) - 1)
+            found = self.terms[pos] == queries
+            columns[found] = self.columns[pos[found]]
+        if self.long_terms:
+            for i in np.flatnonzero(np.char.str_len(queries) > self.width):
+                columns[i] = self.long_terms.get(features[i], -1)
+        return columns
+
+    def __getitem__(self, term: str) -> int:
+        column = int(self.lookup([term])[0])
+        if column < 0:
+            raise KeyError(term)
+        return column
+
+    def __iter__(self):
+        yield from (str(t) for t in self.terms)
+        yield from self.long_terms
+
+    def __len__(self) -> int:
+        return len(self.terms) + len(self.long_terms)
+
+
+class MappedTfidfVectorizer(TfidfVectorizer):
+    """
+    TfidfVectorizer whose fitted vocabulary_ may be a TermArray: transform
+    then looks up every feature of the batch in one np.searchsorted call
+    instead of one dict lookup per feature. Fitting works as usual (and
+    leaves a dict vocabulary_).
+    """
+
+    def _count_vocab(self, raw_documents, fixed_vocab):
+        if not (fixed_vocab and isinstance(self.vocabulary_, TermArray)):
+            return super()._count_vocab(raw_documents, fixed_vocab)
+        analyze = self.build_analyzer()
+        features, indptr = [], [0]
+        for doc in raw_documents:
+            features.extend(analyze(doc))
+            indptr.append(len(features))
+        columns = self.vocabulary_.lookup(features)
+        n_docs, n_features = len(indptr) - 1, len(self.vocabulary_)
+        rows = np.repeat(np.arange(n_docs, dtype=np.int64), np.diff(indptr))
+        found = columns >= 0
+        # Integer term counts per (document, column), sorted by document and
+        # then column, cast to self.dtype only when the matrix is built: the
+        # same values CountVectorizer produces
+        pairs, counts = np.unique(rows[found] * n_features + columns[found], return_counts=True)
+        indices_dtype = np.int64 if len(pairs) > np.iinfo(np.int32).max else np.int32
+        row_ptr = np.zeros(n_docs + 1, dtype=indices_dtype)
+        np.cumsum(np.bincount(pairs // n_features, minlength=n_docs), out=row_ptr[1:])
+        X = sp.csr_matrix(
+            (counts.astype(np.intc), (pairs % n_features).astype(indices_dtype), row_ptr),
+            shape=(n_docs, n_features),
+            dtype=self.dtype,
+        )
+        X.sort_indices()
+        return self.vocabulary_, X
+
+
+def mappable_vectorizer(vectorizer: TfidfVectorizer) -> TfidfVectorizer:
+    """
+    Copy of a fitted vectorizer with its vocabulary as a TermArray (also
+    replacing a fixed vocabulary parameter, which would otherwise be saved
+    as a second dict). Unfitted vectorizers are returned unchanged.
+    """
+    if not isinstance(getattr(vectorizer, "vocabulary_", None), dict):
+        return vectorizer
+    mapped = MappedTfidfVectorizer(**vectorizer.get_params())
+    mapped.__dict__.update(vectorizer.__dict__)
+    mapped.vocabulary_ = TermArray(vectorizer.vocabulary_)
+    if mapped.vocabulary is not None:
+        mapped.vocabulary = mapped.vocabulary_
+    return mapped
@@ -0,0 +1,78 @@
+"""
+Incremental (partial_fit) training for feedback-driven model updates.
+
+The classifier is an SGD logistic regression over the standard TF-IDF
+features. Reviewer corrections are applied with partial_fit against the
+published vectorizer; a periodic full retrain refits the vectorizer,
+classifier and multi-label category model on the base data plus every
+correction so far.
+"""
+import copy
+
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import SGDClassifier
+
+from src.model_training.category_model import train_category_model
+from src.model_training.config import RANDOM_STATE, VECTORIZER_MEMORY_BUDGET_MB
+from src.model_training.feature_extractor import build_budgeted_vectorizer, build_vectorizer
+
+CLASSES = np.array([0, 1])
+
+
+def build_incremental_model() -> SGDClassifier:
+    """Return a partial_fit-capable classifier with probability outputs."""
+    return SGDClassifier(loss="log_loss", alpha=1e-4, max_iter=50, tol=1e-4,
+                         random_state=RANDOM_STATE)
+
+
+def full_retrain(base_df: pd.DataFrame, corrections: dict, feedback_weight: float = 1.0,
+                 categories: dict = None):
+    """
+    Fit a new vectorizer and classifier from scratch.
+
+    Args:
+        base_df: DataFrame with 'clause_text' and 'is_risky' columns (may be empty).
+        corrections: Clause text -> corrected label ("Risky" / "Safe");
+            overrides any base row with the same text.
+        feedback_weight: Sample weight of corrected rows.
+        categories: Optional clause text -> category names; when given, a
+            CategoryModel is trained on the same TF-IDF matrix.
+
+    Returns:
+        Tuple of (vectorizer, model, category_model or None, training_rows).
+    """
+    labels = dict(zip(base_df["clause_text"].astype(str), base_df["is_risky"].astype(int)))
+    weights = dict.fromkeys(labels, 1.0)
+    for text, label in corrections.items():
+        labels[text] = int(label == "Risky")
+        weights[text] = feedback_weight
+
+    texts = list(labels)
+    y = np.array([labels[t] for t in texts])
+    if len(set(y)) < 2:
+        raise ValueError("A full retrain needs both Risky and Safe examples.")
+
+    if VECTORIZER_MEMORY_BUDGET_MB is not None:
+        vectorizer, _ = build_budgeted_vectorizer(texts, VECTORIZER_MEMORY_BUDGET_MB)
+    else:
+        vectorizer = build_vectorizer()
+    X = vectorizer.fit_transform(texts)
+    model = build_incremental_model()
+    model.fit(X, y, sample_weight=np.array([weights[t] for t in texts]))
+    category_model = None
+    if categories is not None:
+        category_model = train_category_model(X, [categories.get(t, []) for t in texts])
+    return vectorizer, model, category_model, len(texts)
+
+
+def partial_update(model, vectorizer, texts: list, labels: list, weight: float = 1.0):
+    """
+    Return a copy of model updated with one partial_fit pass over the
+    corrections (the vectorizer is left as published).
+    """
+    updated = copy.deepcopy(model)
+    y = np.array([int(label == "Risky") for label in labels])
+    updated.partial_fit(vectorizer.transform(texts), y, classes=CLASSES,
+                        sample_weight=np.full(len(texts), weight))
+    return updated
@@ -1,11 +1,45 @@
 """
 Persist the best model and the fitted TF-IDF vectorizer to disk.
+
+Artifacts are written uncompressed so every numpy array inside them
+(coefficients, IDF weights, category matrices) can be memory-mapped on
+load. Loading with mmap_mode="r" maps those arrays from the file instead
+of copying them into each process, so worker processes share one copy
+through the OS page cache. That includes the TF-IDF vocabulary, which is
+saved as sorted term / column arrays (feature_extractor.TermArray)
+rather than a dict.
 """
+import copy
 import os
 import joblib
 from src.model_training.config import (
-    MODELS_DIR, BEST_MODEL_FILENAME, VECTORIZER_FILENAME
+    MODELS_DIR, BEST_MODEL_FILENAME, VECTORIZER_FILENAME, CATEGORY_MODEL_FILENAME
 )
+from src.model_training.feature_extractor import mappable_vectorizer
+
+# Read-only maps: safe to share between processes
+MMAP_MODE = "r"
+
+
+def dump_artifact(obj, path: str) -> None:
+    """
+    Write a model artifact uncompressed (memory-mappable arrays).
+
+    A fitted vectorizer is saved with a TermArray vocabulary, and its
+    stop_words_ set (every term dropped by max_features / min_df / max_df,
+    only kept for introspection) is left out; it is often larger than the
+    vocabulary itself.
+    """
+    obj = mappable_vectorizer(obj)
+    if getattr(obj, "stop_words_", None) is not None:
+        obj = copy.copy(obj)
+        obj.stop_words_ = None
+    joblib.dump(obj, path, compress=0)
+
+
+def load_artifact(path: str, mmap_mode: str = MMAP_MODE):
+    """Load a model artifact, memory-mapping its arrays (None = copy into RAM)."""
+    return joblib.load(path, mmap_mode=mmap_mode)
 
 
 def save_best(models: dict, best_name: str, vectorizer) -> None:
@@ -22,8 +56,34 @@ def save_best(models: dict, best_name: str, vectorizer) -> None:
     model_path = os.path.join(MODELS_DIR, BEST_MODEL_FILENAME)
     vec_path = os.path.join(MODELS_DIR, VECTORIZER_FILENAME)
 
-    joblib.dump(models[best_name], model_path)
-    joblib.dump(vectorizer, vec_path)
+    dump_artifact(models[best_name], model_path)
+    dump_artifact(vectorizer, vec_path)
 
     print(f"\nSaved model     → {model_path}")
     print(f"Saved vectorizer → {vec_path}")
+
+
+def save_category_model(category_model) -> None:
+    """
+    Save the multi-label CategoryModel next to the vectorizer it was
+    trained against.
+    """
+    os.makedirs(MODELS_DIR, exist_ok=True)
+    path = os.path.join(MODELS_DIR, CATEGORY_MODEL_FILENAME)
+    dump_artifact(category_model, path)
+    print(f"Saved category model → {path}")
+
+
+def load_best(mmap_mode: str = MMAP_MODE):
+    """
+    Load the artifacts written by save_best() / save_category_model().
+
+    Returns:
+        Tuple of (model, vectorizer, category_model or None).
+    """
+    category_path = os.path.join(MODELS_DIR, CATEGORY_MODEL_FILENAME)
+    return (
+        load_artifact(os.path.join(MODELS_DIR, BEST_MODEL_FILENAME), mmap_mode),
+        load_artifact(os.path.join(MODELS_DIR, VECTORIZER_FILENAME), mmap_mode),
+        load_artifact(category_path, mmap_mode) if os.path.exists(category_path) else None,
+    )
@@ -3,17 +3,29 @@ train_classifier.py – Main entry point for the Risk Contract Classifier pipeli
 
 Usage:
     python train_classifier.py
+    python train_classifier.py --memory-budget-mb 2048   # size TF-IDF for a memory budget
 
 The script uses a synthetic DataFrame for demonstration.
 Replace `build_demo_dataframe()` with your real data loading logic.
 """
+import argparse
+
 import pandas as pd
 
+from src.model_training.config import VECTORIZER_MEMORY_BUDGET_MB
 from src.model_training.data_loader import load_and_split
-from src.model_training.feature_extractor import build_vectorizer, fit_and_transform
+from src.model_training.feature_extractor import (
+    build_budgeted_vectorizer,
+    build_vectorizer,
+    describe_features,
+    fit_and_transform,
+    format_feature_report,
+)
 from src.model_training.trainer import train_models
-from src.model_training.evaluator import evaluate_models
-from src.model_training.model_saver import save_best
+from src.model_training.category_model import train_category_model
+from src.model_training.evaluator import evaluate_models, evaluate_categories
+from src.model_training.model_saver import save_best, save_category_model
+from utils.risk_predictor import predict_clause_risk
 
 
 def build_demo_dataframe() -> pd.DataFrame:
@@ -36,7 +48,22 @@ def build_demo_dataframe() -> pd.DataFrame:
     return pd.DataFrame(data)
 
 
+def category_lists(texts) -> list:
+    """
+    Risk categories per clause for training the category model. The demo
+    data has no category annotations, so they are derived from the keyword
+    map; swap in labelled categories when available.
+    """
+    return [predict_clause_risk({"text": t})["categories"] for t in texts]
+
+
 def main():
+    parser = argparse.ArgumentParser(description="Train the risk classifier")
+    parser.add_argument("--memory-budget-mb", type=float, default=VECTORIZER_MEMORY_BUDGET_MB,
+                        help="Pick min_df / max_df / max_features so the float32 training "
+                             "matrix and vocabulary fit in this many MB")
+    args = parser.parse_args()
+
     print("=== Risk Contract Classifier Pipeline ===\n")
 
     # 1. Load & split
@@ -46,8 +73,12 @@ def main():
     print(f"Train: {len(X_train)}  |  Test: {len(X_test)}\n")
 
     # 2. TF-IDF feature extraction
-    vectorizer = build_vectorizer()
+    if args.memory_budget_mb:
+        vectorizer, plan = build_budgeted_vectorizer(X_train, args.memory_budget_mb)
+    else:
+        vectorizer, plan = build_vectorizer(), None
     X_train_vec, X_test_vec = fit_and_transform(vectorizer, X_train, X_test)
+    print(format_feature_report(plan, describe_features(vectorizer, X_train_vec)) + "\n")
 
     # 3. Train models
     models = train_models(X_train_vec, y_train)
@@ -58,6 +89,11 @@ def main():
     # 5. Save best model & vectorizer
     save_best(models, best_name, vectorizer)
 
+    # 6. Multi-label category model on the same TF-IDF features
+    category_model = train_category_model(X_train_vec, category_lists(X_train))
+    evaluate_categories(category_model, X_test_vec, category_lists(X_test))
+    save_category_model(category_model)
+
     print("\nPipeline complete.")
 
 
@@ -0,0 +1,73 @@
+"""
+tune_cascade.py – Tune the cascade thresholds for the live model.
+
+Usage:
+    python tune_cascade.py heldout.csv
+    python tune_cascade.py heldout.csv --tolerance 0.02 --dry-run
+
+heldout.csv needs clause_text and is_risky (0/1) columns and should not
+overlap the model's training data. The thresholds that send the fewest
+clauses to the model while keeping accuracy within --tolerance of the
+model-only path are stored in the live model version's metadata; the
+app's cascade mode uses them from then on, including for the incremental
+versions published after it. After a full retrain, run this again (or set
+CASCADE_HELDOUT_PATH to have the updater re-tune).
+"""
+import argparse
+import sys
+
+from app_config import CASCADE_TOLERANCE
+from utils.cascade import load_heldout, save_thresholds, tune_thresholds, tuning_report
+from utils.model_registry import ModelRegistry
+
+
+def _fmt(value) -> str:
+    return "off" if value is None else str(value)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tune cascade thresholds on held-out data")
+    parser.add_argument("data", help="CSV with clause_text and is_risky columns")
+    parser.add_argument("--tolerance", type=float, default=CASCADE_TOLERANCE,
+                        help="Allowed accuracy drop vs model-only, as a fraction")
+    parser.add_argument("--top", type=int, default=10, help="Candidates to print")
+    parser.add_argument("--dry-run", action="store_true", help="Print the result without saving it")
+    args = parser.parse_args()
+
+    model = ModelRegistry().load()
+    if model is None:
+        print("No model has been published yet (see update_model.py).", file=sys.stderr)
+        sys.exit(1)
+
+    texts, labels = load_heldout(args.data)
+    if not texts:
+        print("The held-out file has no rows.", file=sys.stderr)
+        sys.exit(1)
+
+    best, rows = tune_thresholds(texts, labels, model, tolerance=args.tolerance)
+    model_acc = rows[0]["model_only_accuracy"]
+
+    print(f"Model {model.version}, {len(texts)} held-out clauses, model-only accuracy {model_acc:.4f}\n")
+    print(f"{'Safe ≤ words':>12} {'Risky ≥ kw':>10} {'Accuracy':>9} {'To model':>9}  OK")
+    ranked = sorted(rows, key=lambda r: (not r["within_tolerance"], r["model_fraction"], -r["accuracy"]))
+    for r in ranked[:args.top]:
+        print(f"{_fmt(r['safe_max_words']):>12} {_fmt(r['risky_min_keywords']):>10} "
+              f"{r['accuracy']:>9.4f} {r['model_fraction']:>9.1%}  {'✓' if r['within_tolerance'] else ''}")
+
+    chosen = next(r for r in rows if r["safe_max_words"] == best["safe_max_words"]
+                  and r["risky_min_keywords"] == best["risky_min_keywords"])
+    print(f"\nChosen: safe_max_words={_fmt(best['safe_max_words'])}, "
+          f"risky_min_keywords={_fmt(best['risky_min_keywords'])} — "
+          f"{1 - chosen['model_fraction']:.1%} of clauses settled without the model, "
+          f"accuracy {chosen['accuracy']:.4f}")
+
+    if not args.dry_run:
+        save_thresholds(best, model.version, {
+            **tuning_report(best, rows, args.tolerance),
+            "heldout_rows": len(texts),
+        })
+        print(f"Saved thresholds with model {model.version}.")
+
+
+if __name__ == "__main__":
+    main()
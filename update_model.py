@@ -0,0 +1,71 @@
+"""
+update_model.py – Apply reviewer feedback to the published risk model.
+
+Usage:
+    python update_model.py                 # apply pending corrections once
+    python update_model.py --full          # force a full retrain
+    python update_model.py --watch         # keep polling the feedback log
+    python update_model.py --publish-trained   # make train_classifier.py's model live
+
+Reads corrections from FEEDBACK_LOG_PATH, updates the live model with
+partial_fit (or fully retrains on TRAINING_DATA_PATH plus all corrections
+when due) and publishes a new version to MODEL_REGISTRY_DIR. Run either
+this or the app's built-in updater (FEEDBACK_BACKGROUND_UPDATES), not both.
+
+--publish-trained publishes the model saved under models/ by
+train_classifier.py as a new version instead. Pending corrections are
+applied to it on the next run (a full retrain if its classifier has no
+partial_fit).
+"""
+import argparse
+import time
+
+from app_config import FEEDBACK_POLL_INTERVAL
+from utils.feedback_log import FeedbackLog
+from utils.feedback_updater import apply_feedback, publish_trained
+from utils.model_registry import ModelRegistry
+
+
+def _report(result) -> None:
+    if result is None:
+        return
+    print(f"Published {result['version']} ({result['kind']}): "
+          f"{result['corrections_applied']} new correction(s), "
+          f"{result['training_rows']} training rows")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Apply reviewer feedback to the risk model")
+    parser.add_argument("--full", action="store_true", help="Force a full retrain")
+    parser.add_argument("--watch", action="store_true", help="Keep polling the feedback log")
+    parser.add_argument("--interval", type=float, default=FEEDBACK_POLL_INTERVAL,
+                        help="Seconds between polls with --watch")
+    parser.add_argument("--publish-trained", action="store_true",
+                        help="Publish the model saved by train_classifier.py and exit")
+    args = parser.parse_args()
+
+    log, registry = FeedbackLog(), ModelRegistry()
+    if args.publish_trained:
+        try:
+            result = publish_trained(registry)
+        except FileNotFoundError as e:
+            parser.error(f"{e.filename} not found; run train_classifier.py first.")
+        print(f"Published {result['version']} (trained) from train_classifier.py's artifacts")
+        return
+
+    result = apply_feedback(log, registry, force_full=args.full)
+    _report(result)
+    if result is None and not args.watch:
+        current = registry.current_version()
+        print(f"Nothing to apply (live version: {current or 'none'}).")
+
+    try:
+        while args.watch:
+            time.sleep(args.interval)
+            _report(apply_feedback(log, registry))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,349 @@
+"""
+utils/analysis_store.py
+------------------------
+Persistent, indexed store of past analyses backed by embedded SQLite.
+
+Documents, clauses, labels, confidences, matched keywords and categories
+from analyze_clauses() are written to a local database file. Clause text
+is zlib-compressed. Label, category, keyword, document and date lookups
+are served from indexes, so historical queries such as "all Non-Compete
+clauses flagged last quarter" never touch the original files.
+"""
+
+import os
+import sqlite3
+import time
+import zlib
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from app_config import ANALYSIS_STORE_PATH
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    id              INTEGER PRIMARY KEY,
+    name            TEXT    NOT NULL,
+    analyzed_at     REAL    NOT NULL,
+    total           INTEGER NOT NULL,
+    risky_count     INTEGER NOT NULL,
+    risk_percentage REAL    NOT NULL
+);
+CREATE TABLE IF NOT EXISTS clauses (
+    id          INTEGER PRIMARY KEY,
+    document_id INTEGER NOT NULL REFERENCES documents(id) ON DELETE CASCADE,
+    clause_no   INTEGER NOT NULL,
+    label       TEXT    NOT NULL,
+    confidence  REAL    NOT NULL,
+    word_count  INTEGER NOT NULL,
+    analyzed_at REAL    NOT NULL,
+    text_z      BLOB    NOT NULL
+);
+CREATE TABLE IF NOT EXISTS clause_keywords (
+    clause_id INTEGER NOT NULL REFERENCES clauses(id) ON DELETE CASCADE,
+    keyword   TEXT    NOT NULL
+);
+CREATE TABLE IF NOT EXISTS clause_categories (
+    clause_id INTEGER NOT NULL REFERENCES clauses(id) ON DELETE CASCADE,
+    category  TEXT    NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_documents_name     ON documents(name);
+CREATE INDEX IF NOT EXISTS idx_documents_time     ON documents(analyzed_at);
+CREATE INDEX IF NOT EXISTS idx_clauses_document   ON clauses(document_id, clause_no);
+CREATE INDEX IF NOT EXISTS idx_clauses_label_time ON clauses(label, analyzed_at);
+CREATE INDEX IF NOT EXISTS idx_keywords_keyword   ON clause_keywords(keyword, clause_id);
+CREATE INDEX IF NOT EXISTS idx_keywords_clause    ON clause_keywords(clause_id);
+CREATE INDEX IF NOT EXISTS idx_categories_cat     ON clause_categories(category, clause_id);
+CREATE INDEX IF NOT EXISTS idx_categories_clause  ON clause_categories(clause_id);
+"""
+
+
+class AnalysisStore:
+    """
+    SQLite-backed store of analyzed documents.
+
+    Usage:
+        with AnalysisStore() as store:
+            store.save_document("nda.pdf", analyzed)
+            store.query_clauses(label="Risky", category="Non-Compete",
+                                since=time.time() - 90 * 86400)
+    """
+
+    def __init__(self, path: Optional[str] = None) -> None:
+        self.path = path or ANALYSIS_STORE_PATH
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(self.path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("PRAGMA foreign_keys=ON")
+        self.conn.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def __enter__(self) -> "AnalysisStore":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    # ------------------------------------------------------------------
+    # Writing
+    # ------------------------------------------------------------------
+    def save_document(
+        self,
+        name: str,
+        analyzed: List[Dict],
+        stats: Optional[Dict] = None,
+        analyzed_at: Optional[float] = None,
+    ) -> int:
+        """
+        Persists one analyzed document in its own transaction.
+
+        Args:
+            name: Document (file) name.
+            analyzed: Output of analyze_clauses().
+            stats: Summary dict; computed from analyzed when omitted.
+            analyzed_at: Unix timestamp (default: now).
+
+        Returns:
+            The new document id.
+        """
+        return self.save_documents([(name, analyzed, stats, analyzed_at)])[0]
+
+    def save_documents(
+        self,
+        documents: Iterable[Tuple[str, List[Dict], Optional[Dict], Optional[float]]],
+    ) -> List[int]:
+        """
+        Bulk-inserts many analyzed documents in a single transaction.
+
+        Args:
+            documents: Iterable of (name, analyzed, stats, analyzed_at)
+                tuples; stats and analyzed_at may be None.
+
+        Returns:
+            Document ids in input order.
+        """
+        doc_ids = []
+        with self.conn:
+            for name, analyzed, stats, analyzed_at in documents:
+                doc_ids.append(self._insert_document(name, analyzed, stats, analyzed_at))
+        return doc_ids
+
+    def _insert_document(self, name, analyzed, stats, analyzed_at) -> int:
+        analyzed_at = time.time() if analyzed_at is None else analyzed_at
+        total = len(analyzed)
+        risky = sum(1 for c in analyzed if c["label"] == "Risky") if stats is None else stats["risky_count"]
+        risk_pct = round((risky / total * 100) if total > 0 else 0.0, 1)
+
+        cur = self.conn.execute(
+            "INSERT INTO documents (name, analyzed_at, total, risky_count, risk_percentage) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (name, analyzed_at, total, risky, risk_pct),
+        )
+        doc_id = cur.lastrowid
+
+        keyword_rows, category_rows = [], []
+        for clause in analyzed:
+            cur = self.conn.execute(
+                "INSERT INTO clauses (document_id, clause_no, label, confidence, "
+                "word_count, analyzed_at, text_z) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    doc_id,
+                    clause["id"],
+                    clause["label"],
+                    clause["confidence"],
+                    clause.get("word_count", len(clause["text"].split())),
+                    analyzed_at,
+                    zlib.compress(clause["text"].encode("utf-8")),
+                ),
+            )
+            clause_id = cur.lastrowid
+            keyword_rows.extend((clause_id, kw) for kw in clause["matched_keywords"])
+            category_rows.extend((clause_id, cat) for cat in clause["categories"])
+
+        self.conn.executemany(
+            "INSERT INTO clause_keywords (clause_id, keyword) VALUES (?, ?)", keyword_rows
+        )
+        self.conn.executemany(
+            "INSERT INTO clause_categories (clause_id, category) VALUES (?, ?)", category_rows
+        )
+        return doc_id
+
+    def delete_document(self, document_id: int) -> None:
+        """Removes a document and all of its clauses."""
+        with self.conn:
+            self.conn.execute("DELETE FROM documents WHERE id = ?", (document_id,))
+
+    # ------------------------------------------------------------------
+    # Reading
+    # ------------------------------------------------------------------
+    def list_documents(self, limit: Optional[int] = None) -> List[Dict]:
+        """Returns stored documents, newest first."""
+        sql = "SELECT * FROM documents ORDER BY analyzed_at DESC, id DESC"
+        params: Tuple = ()
+        if limit is not None:
+            sql += " LIMIT ?"
+            params = (limit,)
+        return [dict(row) for row in self.conn.execute(sql, params)]
+
+    def query_clauses(
+        self,
+        label: Optional[str] = None,
+        category: Optional[str] = None,
+        keyword: Optional[str] = None,
+        document_id: Optional[int] = None,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+        limit: Optional[int] = None,
+    ) -> List[Dict]:
+        """
+        Returns stored clauses matching all of the given filters.
+
+        Args:
+            label: "Risky" or "Safe".
+            category: Risk category, e.g. "Non-Compete".
+            keyword: Matched risk keyword, e.g. "indemnify".
+            document_id: Restrict to one document.
+            since / until: Unix timestamps bounding the analysis time.
+            limit: Maximum number of clauses to return.
+
+        Returns:
+            List of clause dicts in the analyze_clauses() format, plus
+            store_id, document_id, document_name and analyzed_at.
+        """
+        joins, where, params = [], [], []
+        if category is not None:
+            joins.append("JOIN clause_categories cc ON cc.clause_id = c.id AND cc.category = ?")
+            params.append(category)
+        if keyword is not None:
+            joins.append("JOIN clause_keywords ck ON ck.clause_id = c.id AND ck.keyword = ?")
+            params.append(keyword)
+        if label is not None:
+            where.append("c.label = ?")
+            params.append(label)
+        if document_id is not None:
+            where.append("c.document_id = ?")
+            params.append(document_id)
+        if since is not None:
+            where.append("c.analyzed_at >= ?")
+            params.append(since)
+        if until is not None:
+            where.append("c.analyzed_at < ?")
+            params.append(until)
+
+        sql = (
+            "SELECT c.*, d.name AS document_name FROM clauses c "
+            + " ".join(joins)
+            + " JOIN documents d ON d.id = c.document_id"
+            + (" WHERE " + " AND ".join(where) if where else "")
+            + " ORDER BY c.analyzed_at DESC, c.document_id, c.clause_no"
+        )
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+
+        rows = self.conn.execute(sql, params).fetchall()
+        return self._hydrate(rows)
+
+    def get_document(self, document_id: int) -> Optional[Dict]:
+        """Returns a stored document with its full analyzed clause list."""
+        row = self.conn.execute("SELECT * FROM documents WHERE id = ?", (document_id,)).fetchone()
+        if row is None:
+            return None
+        doc = dict(row)
+        doc["clauses"] = self.query_clauses(document_id=document_id)
+        doc["clauses"].sort(key=lambda c: c["id"])
+        return doc
+
+    def get_clauses(self, clause_ids: List[int]) -> List[Dict]:
+        """
+        Returns stored clauses by their store ids, in the given order.
+
+        Ids that no longer exist (deleted documents) are skipped.
+        """
+        if not clause_ids:
+            return []
+        rows = []
+        for start in range(0, len(clause_ids), 900):
+            chunk = clause_ids[start:start + 900]
+            placeholders = ",".join("?" * len(chunk))
+            rows.extend(self.conn.execute(
+                "SELECT c.*, d.name AS document_name FROM clauses c "
+                "JOIN documents d ON d.id = c.document_id "
+                f"WHERE c.id IN ({placeholders})",
+                chunk,
+            ).fetchall())
+        by_id = {c["store_id"]: c for c in self._hydrate(rows)}
+        return [by_id[cid] for cid in clause_ids if cid in by_id]
+
+    def iter_clauses_after(self, last_store_id: int, batch_size: int = 5000):
+        """
+        Yields batches of stored clauses with a store id above last_store_id,
+        in id order. Used to feed incremental index updates.
+        """
+        while True:
+            rows = self.conn.execute(
+                "SELECT c.*, d.name AS document_name FROM clauses c "
+                "JOIN documents d ON d.id = c.document_id "
+                "WHERE c.id > ? ORDER BY c.id LIMIT ?",
+                (last_store_id, batch_size),
+            ).fetchall()
+            if not rows:
+                return
+            yield self._hydrate(rows)
+            last_store_id = rows[-1]["id"]
+
+    def categories(self) -> List[str]:
+        """Returns all stored risk categories."""
+        rows = self.conn.execute("SELECT DISTINCT category FROM clause_categories ORDER BY category")
+        return [r[0] for r in rows]
+
+    def keywords(self) -> List[str]:
+        """Returns all stored matched keywords."""
+        rows = self.conn.execute("SELECT DISTINCT keyword FROM clause_keywords ORDER BY keyword")
+        return [r[0] for r in rows]
+
+    def _hydrate(self, rows) -> List[Dict]:
+        """Turns clause rows into analyzed clause dicts."""
+        if not rows:
+            return []
+        ids = [row["id"] for row in rows]
+        keywords = self._lookup("clause_keywords", "keyword", ids)
+        categories = self._lookup("clause_categories", "category", ids)
+
+        clauses = []
+        for row in rows:
+            clauses.append({
+                "store_id": row["id"],
+                "id": row["clause_no"],
+                "text": zlib.decompress(row["text_z"]).decode("utf-8"),
+                "word_count": row["word_count"],
+                "label": row["label"],
+                "confidence": row["confidence"],
+                "matched_keywords": keywords.get(row["id"], []),
+                "categories": categories.get(row["id"], []),
+                "document_id": row["document_id"],
+                "document_name": row["document_name"],
+                "analyzed_at": row["analyzed_at"],
+            })
+        return clauses
+
+    def _lookup(self, table: str, column: str, clause_ids: List[int]) -> Dict[int, List[str]]:
+        """Fetches keyword / category lists for many clauses at once."""
+        result: Dict[int, List[str]] = {}
+        # Stay under SQLite's bound-parameter limit
+        for start in range(0, len(clause_ids), 900):
+            chunk = clause_ids[start:start + 900]
+            placeholders = ",".join("?" * len(chunk))
+            rows = self.conn.execute(
+                f"SELECT clause_id, {column} FROM {table} "
+                f"WHERE clause_id IN ({placeholders}) ORDER BY rowid",
+                chunk,
+            )
+            for clause_id, value in rows:
+                result.setdefault(clause_id, []).append(value)
+        return result
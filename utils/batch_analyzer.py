@@ -0,0 +1,467 @@
+"""
+utils/batch_analyzer.py
+------------------------
+Multi-document (portfolio) analysis on a bounded process pool.
+
+Each document runs through the same Extraction → Segmentation → Risk
+Prediction pipeline as the single-file view, but documents are spread
+across worker processes so total wall time scales with available cores
+rather than with the number of documents.
+"""
+
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from app_config import BATCH_MAX_WORKERS, PIPELINE_STAGE_WORKERS, PIPELINE_QUEUE_SIZE
+from utils.file_handler import extract_text_from_bytes
+from utils.clause_segmenter import segment_document
+from utils.risk_predictor import analyze_clauses, analyze_clauses_table, build_clause_index
+from utils.clause_table import ClauseTable
+from utils.stats_aggregator import SummaryAggregator
+from utils.version_diff import reanalyze_revision, summarize_diff
+from utils.analysis_store import AnalysisStore
+from utils.cascade import analyze_clauses_cascade, load_thresholds
+from utils.parallel_analyzer import analyze_text_parallel
+from utils.pipeline import Pipeline, Stage
+
+# Callback signature: (done, total, name, result)
+ProgressCallback = Callable[[int, int, str, Dict], None]
+
+
+def analyze_text(
+    text: str, previous: Optional[List[Dict]] = None, compact: bool = False, workers: int = 1
+) -> Dict:
+    """
+    Runs segmentation and risk prediction on already-extracted text.
+
+    Args:
+        text: Extracted document text.
+        previous: Analyzed clauses of the previous version of this document.
+            When given, only inserted or modified clauses are re-scored.
+        compact: Return analyzed clauses as a ClauseTable instead of a list
+            of dicts. Much smaller in memory and cheaper to send back from
+            worker processes; reads the same through the dict API.
+        workers: Processes for one very long text (see
+            utils/parallel_analyzer.py); ignored when previous is given.
+
+    Returns:
+        dict with analyzed (list or ClauseTable), stats (dict), index (dict) and
+        aggregator (SummaryAggregator) for the document, plus diff and
+        diff_summary when previous was given.
+    """
+    if workers > 1 and previous is None:
+        result = analyze_text_parallel(text, max_workers=workers)
+        analyzed = result["analyzed"]
+        return {
+            "analyzed": ClauseTable.from_clauses(analyzed) if compact else analyzed,
+            "stats": result["stats"],
+            "index": result["index"],
+            "aggregator": result["aggregator"],
+        }
+    return score_clauses(segment_document(text), previous=previous, compact=compact)
+
+
+def score_clauses(
+    clauses: List[Dict],
+    previous: Optional[List[Dict]] = None,
+    compact: bool = False,
+    model=None,
+    scoring: Optional[str] = None,
+    thresholds: Optional[Dict] = None,
+) -> Dict:
+    """
+    Risk-scores segmented clauses; the second half of analyze_text().
+
+    model, scoring and thresholds are as in
+    parallel_analyzer.analyze_text_parallel(); a revision (previous) is
+    re-scored with the model alone.
+
+    Returns:
+        Same dict as analyze_text(), plus routing (clauses per tier) with
+        scoring="cascade".
+    """
+    aggregator = SummaryAggregator()
+    result = {}
+    if previous is not None:
+        analyzed, diff = reanalyze_revision(clauses, previous, aggregator=aggregator, model=model)
+        result["diff"] = diff
+        result["diff_summary"] = summarize_diff(diff)
+        if compact:
+            analyzed = ClauseTable.from_clauses(analyzed)
+    elif scoring == "cascade" and model is not None:
+        analyzed, result["routing"] = analyze_clauses_cascade(
+            clauses, model, thresholds or load_thresholds(model), aggregator=aggregator
+        )
+        if compact:
+            analyzed = ClauseTable.from_clauses(analyzed)
+    elif compact and model is None:
+        analyzed = analyze_clauses_table(clauses, aggregator=aggregator)
+    else:
+        analyzed = analyze_clauses(clauses, aggregator=aggregator, model=model)
+        if compact:
+            analyzed = ClauseTable.from_clauses(analyzed)
+    result.update({
+        "analyzed": analyzed,
+        "stats": aggregator.summary(),
+        "index": build_clause_index(analyzed),
+        "aggregator": aggregator,
+    })
+    return result
+
+
+def analyze_document(
+    name: str,
+    raw_bytes: bytes,
+    previous: Optional[List[Dict]] = None,
+    compact: bool = False,
+    workers: int = 1,
+) -> Dict:
+    """
+    Runs the full pipeline on the bytes of a single .txt or .pdf file.
+
+    Errors are captured in the result instead of raised, so one bad file
+    does not abort a portfolio run.
+
+    Returns:
+        dict with name, error (str or None), elapsed (seconds) and, on
+        success, the keys from analyze_text().
+    """
+    start = time.perf_counter()
+    try:
+        text = extract_text_from_bytes(name, raw_bytes)
+        if not text or not text.strip():
+            raise ValueError("Could not extract any text from the document.")
+        result = analyze_text(text, previous=previous, compact=compact, workers=workers)
+        if not len(result["analyzed"]):
+            raise ValueError("No clauses could be extracted from this document.")
+        result["error"] = None
+    except Exception as e:
+        result = {"error": str(e)}
+
+    result["name"] = name
+    result["elapsed"] = round(time.perf_counter() - start, 3)
+    return result
+
+
+def analyze_path(
+    path: str, previous: Optional[List[Dict]] = None, compact: bool = False, workers: int = 1
+) -> Dict:
+    """Reads a file from disk and runs analyze_document() on it."""
+    with open(path, "rb") as f:
+        raw_bytes = f.read()
+    result = analyze_document(os.path.basename(path), raw_bytes, previous=previous,
+                              compact=compact, workers=workers)
+    result["path"] = path
+    return result
+
+
+def document_keys(paths: List[str]) -> List[str]:
+    """
+    Keys that tell documents apart when file names repeat: each path
+    relative to the paths' common directory, "/"-separated.
+    """
+    if not paths:
+        return []
+    root = os.path.commonpath([os.path.dirname(os.path.abspath(p)) for p in paths])
+    return [os.path.relpath(os.path.abspath(p), root).replace(os.sep, "/") for p in paths]
+
+
+def resolve_workers(max_workers: Optional[int] = None) -> int:
+    """Returns the worker count to use, defaulting to the CPU count."""
+    workers = max_workers or BATCH_MAX_WORKERS or os.cpu_count() or 1
+    return max(1, int(workers))
+
+
+def analyze_documents(
+    documents: List[Tuple[str, bytes]],
+    max_workers: Optional[int] = None,
+    on_progress: Optional[ProgressCallback] = None,
+    compact: bool = False,
+) -> List[Dict]:
+    """
+    Analyzes several in-memory documents concurrently.
+
+    Args:
+        documents: List of (file name, file bytes) pairs.
+        max_workers: Size of the process pool (default: CPU count).
+        on_progress: Called in the calling thread as each document finishes.
+        compact: Return each document's clauses as a ClauseTable.
+
+    Returns:
+        List of analyze_document() results in the input order. A single
+        document is split across the workers instead.
+    """
+    doc_workers = resolve_workers(max_workers) if len(documents) == 1 else 1
+    return _run_pool(
+        analyze_document,
+        [(name, data, None, compact, doc_workers) for name, data in documents],
+        [name for name, _ in documents],
+        max_workers,
+        on_progress,
+    )
+
+
+def analyze_paths(
+    paths: List[str],
+    max_workers: Optional[int] = None,
+    on_progress: Optional[ProgressCallback] = None,
+    previous_by_path: Optional[Dict[str, List[Dict]]] = None,
+    compact: bool = False,
+) -> List[Dict]:
+    """
+    Analyzes several files on disk concurrently.
+
+    Workers read their own files, so the parent never holds more than
+    the finished results in memory.
+
+    Args:
+        previous_by_path: Optional map of path (as given in paths) to the
+            analyzed clauses of that document's previous version
+            (version-aware mode).
+        compact: Return each document's clauses as a ClauseTable.
+
+    Returns:
+        List of analyze_path() results in the input order. A single
+        document is split across the workers instead.
+    """
+    previous_by_path = previous_by_path or {}
+    doc_workers = resolve_workers(max_workers) if len(paths) == 1 else 1
+    return _run_pool(
+        analyze_path,
+        [(p, previous_by_path.get(p), compact, doc_workers) for p in paths],
+        [os.path.basename(p) for p in paths],
+        max_workers,
+        on_progress,
+    )
+
+
+def _run_pool(fn, arg_list, names, max_workers, on_progress) -> List[Dict]:
+    """Maps fn over arg_list on a bounded process pool."""
+    total = len(arg_list)
+    results: List[Optional[Dict]] = [None] * total
+    if total == 0:
+        return []
+
+    workers = min(resolve_workers(max_workers), total)
+    if workers == 1:
+        # Avoid process start-up cost for a single worker
+        for i, args in enumerate(arg_list):
+            results[i] = fn(*args)
+            if on_progress:
+                on_progress(i + 1, total, names[i], results[i])
+        return results
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(fn, *args): i for i, args in enumerate(arg_list)}
+        for done, future in enumerate(as_completed(futures), start=1):
+            i = futures[future]
+            try:
+                results[i] = future.result()
+            except Exception as e:
+                results[i] = {"name": names[i], "error": str(e), "elapsed": 0.0}
+            if on_progress:
+                on_progress(done, total, names[i], results[i])
+
+    return results
+
+
+# ---------------------------------------------------------------------------
+# Staged pipeline: extraction → segmentation → scoring → persistence
+# ---------------------------------------------------------------------------
+# Keys that only exist between stages and are dropped from final results
+_TRANSIENT_KEYS = ("raw_bytes", "text", "clauses", "previous", "compact")
+
+
+def _timed(doc: Dict, start: float) -> Dict:
+    doc["elapsed"] = round(doc.get("elapsed", 0.0) + time.perf_counter() - start, 3)
+    return doc
+
+
+def _extract_stage(doc: Dict) -> Dict:
+    start = time.perf_counter()
+    raw_bytes = doc.pop("raw_bytes", None)
+    if raw_bytes is None:
+        with open(doc["path"], "rb") as f:
+            raw_bytes = f.read()
+    text = extract_text_from_bytes(doc["name"], raw_bytes)
+    if not text or not text.strip():
+        raise ValueError("Could not extract any text from the document.")
+    doc["text"] = text
+    return _timed(doc, start)
+
+
+def _segment_stage(doc: Dict) -> Dict:
+    start = time.perf_counter()
+    clauses = segment_document(doc.pop("text"))
+    if not clauses:
+        raise ValueError("No clauses could be extracted from this document.")
+    doc["clauses"] = clauses
+    return _timed(doc, start)
+
+
+# Set once per scoring worker by _init_scoring (see build_document_pipeline)
+_scoring_model = None
+_scoring_mode = None
+_scoring_thresholds = None
+
+
+def _init_scoring(model, scoring: Optional[str], thresholds: Optional[Dict]) -> None:
+    # The model is sent once per worker, not once per document
+    global _scoring_model, _scoring_mode, _scoring_thresholds
+    _scoring_model, _scoring_mode, _scoring_thresholds = model, scoring, thresholds
+
+
+def _score_stage(doc: Dict) -> Dict:
+    start = time.perf_counter()
+    doc.update(score_clauses(
+        doc.pop("clauses"), previous=doc.pop("previous", None), compact=doc.pop("compact", False),
+        model=_scoring_model, scoring=_scoring_mode, thresholds=_scoring_thresholds,
+    ))
+    return _timed(doc, start)
+
+
+class _PersistStage:
+    """Saves each scored document to the history store."""
+
+    def __init__(self, store_path: Optional[str] = None) -> None:
+        self.store_path = store_path
+
+    def __call__(self, doc: Dict) -> Dict:
+        start = time.perf_counter()
+        with AnalysisStore(self.store_path) as store:
+            doc["document_id"] = store.save_document(doc["name"], doc["analyzed"], doc["stats"])
+        return _timed(doc, start)
+
+
+def build_document_pipeline(
+    stage_workers: Optional[Dict[str, Optional[int]]] = None,
+    store_path: Optional[str] = None,
+    persist: bool = False,
+    queue_size: int = PIPELINE_QUEUE_SIZE,
+    model=None,
+    scoring: Optional[str] = None,
+) -> Pipeline:
+    """
+    Builds the staged document pipeline used by the app's portfolio view
+    and the batch CLI.
+
+    Args:
+        stage_workers: Overrides for PIPELINE_STAGE_WORKERS, keyed by stage
+            name (extraction, segmentation, scoring, persistence).
+        store_path: History store file for the persistence stage.
+        persist: Add the persistence stage (implied by store_path).
+        queue_size: Capacity of each inter-stage queue.
+        model: Optional model_registry.PublishedModel for the scoring
+            stage, sent once to each of its workers.
+        scoring: None (keyword rules, or the model when given) or
+            "cascade" (requires model).
+
+    Returns:
+        A Pipeline to pass to run_document_pipeline().
+    """
+    workers = {**PIPELINE_STAGE_WORKERS, **(stage_workers or {})}
+    thresholds = load_thresholds(model) if scoring == "cascade" and model is not None else None
+    stages = [
+        Stage("extraction", _extract_stage, workers["extraction"], kind="process"),
+        Stage("segmentation", _segment_stage, workers["segmentation"]),
+        Stage("scoring", _score_stage, workers["scoring"], kind="process",
+              initializer=_init_scoring, initargs=(model, scoring, thresholds)),
+    ]
+    if persist or store_path:
+        stages.append(Stage("persistence", _PersistStage(store_path), workers["persistence"]))
+    return Pipeline(stages, queue_size=queue_size)
+
+
+def run_document_pipeline(
+    pipeline: Pipeline,
+    documents: Iterable[Dict],
+    on_progress: Optional[ProgressCallback] = None,
+) -> List[Dict]:
+    """
+    Streams documents through a pipeline from build_document_pipeline().
+
+    Args:
+        pipeline: The pipeline to run; call pipeline.cancel() (e.g. from
+            on_progress) to stop early.
+        documents: Dicts with name and either path or raw_bytes, plus
+            optional previous (analyzed clauses of the prior version) and
+            compact (return a ClauseTable). Other keys are passed through
+            to the document's result.
+        on_progress: Called in the calling thread as each document finishes.
+
+    Returns:
+        Results shaped like analyze_document() (plus path / document_id when
+        set) in input order. Documents not finished before a cancel are
+        omitted.
+    """
+    documents = list(documents)
+    results = {}
+    stream = pipeline.run(dict(doc) for doc in documents)
+    try:
+        for item in stream:
+            if item.error is not None:
+                doc = documents[item.seq] if item.seq >= 0 else {"name": "<input>"}
+                # Keep the caller's identifying keys (path, upload index, ...)
+                result = {k: v for k, v in doc.items() if k not in _TRANSIENT_KEYS}
+                result.update({"error": item.error, "elapsed": 0.0})
+            else:
+                result = {k: v for k, v in item.value.items() if k not in _TRANSIENT_KEYS}
+                result["error"] = None
+            results[item.seq] = result
+            if on_progress:
+                on_progress(len(results), len(documents), result["name"], result)
+    finally:
+        # Cancels the run if on_progress raised (e.g. KeyboardInterrupt)
+        stream.close()
+    return [results[seq] for seq in sorted(results)]
+
+
+def rank_portfolio(results: List[Dict]) -> List[Dict]:
+    """
+    Ranks analyzed documents by risk for the portfolio dashboard.
+
+    Documents are ordered by risk percentage, then by the number of
+    distinct risk categories they are exposed to, then by risky clause
+    count. Failed documents are listed last.
+
+    Returns:
+        List of row dicts: rank, index (position in results), name, total,
+        risky_count, risk_percentage, category_count, top_categories,
+        by_category, error.
+    """
+    rows = []
+    for i, r in enumerate(results):
+        stats = r.get("stats")
+        if r.get("error") or stats is None:
+            rows.append({
+                "index": i, "name": r["name"], "total": 0, "risky_count": 0,
+                "risk_percentage": 0.0, "category_count": 0,
+                "top_categories": "", "by_category": {}, "error": r.get("error"),
+            })
+            continue
+        by_category = stats["by_category"]
+        rows.append({
+            "index": i,
+            "name": r["name"],
+            "total": stats["total"],
+            "risky_count": stats["risky_count"],
+            "risk_percentage": stats["risk_percentage"],
+            "category_count": len(by_category),
+            "top_categories": ", ".join(list(by_category)[:3]),
+            "by_category": by_category,
+            "error": None,
+        })
+
+    rows.sort(key=lambda row: (
+        row["error"] is not None,
+        -row["risk_percentage"],
+        -row["category_count"],
+        -row["risky_count"],
+        row["name"],
+        row["index"],
+    ))
+    for rank, row in enumerate(rows, start=1):
+        row["rank"] = rank
+    return rows
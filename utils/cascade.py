@@ -0,0 +1,214 @@
+"""
+utils/cascade.py
+-----------------
+Cascaded inference: cheap keyword triage before learned-model scoring.
+
+Every clause first goes through the keyword engine (risk_predictor). Two
+cheap tiers settle the clear cases:
+
+  - keyword_safe  : no risk keywords and a short clause (boilerplate)
+  - keyword_risky : many risk keywords
+
+Everything else is ambiguous and is scored by the learned model in one
+batch. Thresholds come from tune_thresholds(), which picks the setting
+that sends the fewest clauses to the model while keeping held-out accuracy
+within a tolerance of the model-only path. Routing counts per tier show
+how much model compute the cascade saved.
+
+Tuned thresholds are stored in the model version's meta.json. Incremental
+(partial_fit) versions inherit them from their parent; a full retrain
+re-tunes when CASCADE_HELDOUT_PATH is set and otherwise falls back to
+CASCADE_THRESHOLDS until tune_cascade.py is run again.
+"""
+
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from app_config import CASCADE_THRESHOLDS, CASCADE_TOLERANCE
+from utils.model_registry import ModelRegistry
+from utils.risk_predictor import apply_model_labels, match_keywords, predict_clause_risk
+from utils.stats_aggregator import SummaryAggregator
+from utils.tokenizer import tokens_of
+
+CASCADE_TIERS = ("keyword_safe", "keyword_risky", "model")
+
+# Model metadata keys holding the tuned thresholds and how they were tuned
+CASCADE_META_KEYS = ("cascade_thresholds", "cascade_tuning")
+
+# Candidate thresholds searched by tune_thresholds (None disables the tier)
+SAFE_MAX_WORDS_GRID = (None, 10, 15, 20, 30, 40, 60, 80, 120)
+RISKY_MIN_KEYWORDS_GRID = (None, 1, 2, 3, 4, 5)
+
+
+def route(matched_keywords: int, word_count: int, thresholds: Dict) -> str:
+    """Returns the tier that decides a clause with these cheap features."""
+    risky_min = thresholds.get("risky_min_keywords")
+    if risky_min is not None and matched_keywords >= risky_min:
+        return "keyword_risky"
+    safe_max = thresholds.get("safe_max_words")
+    if safe_max is not None and matched_keywords == 0 and word_count <= safe_max:
+        return "keyword_safe"
+    return "model"
+
+
+def analyze_clauses_cascade(
+    clauses: List[Dict],
+    model,
+    thresholds: Optional[Dict] = None,
+    aggregator: Optional[SummaryAggregator] = None,
+) -> Tuple[List[Dict], Dict[str, int]]:
+    """
+    Scores clauses with the keyword engine and sends only the ambiguous
+    ones, in a single batch, to the learned model.
+
+    Args:
+        clauses: Output of clause_segmenter.segment_document().
+        model: A model_registry.PublishedModel.
+        thresholds: Tier thresholds (default: CASCADE_THRESHOLDS).
+        aggregator: Optional SummaryAggregator updated with every clause.
+
+    Returns:
+        Tuple of (analyzed, routing) where routing maps each tier to the
+        number of clauses it decided.
+    """
+    thresholds = {**CASCADE_THRESHOLDS, **(thresholds or {})}
+    tokenized = [tokens_of(c) for c in clauses]
+    analyzed = [predict_clause_risk(c, t) for c, t in zip(clauses, tokenized)]
+    routing = dict.fromkeys(CASCADE_TIERS, 0)
+    ambiguous, ambiguous_tokens = [], []
+    for clause, tokens in zip(analyzed, tokenized):
+        word_count = clause.get("word_count")
+        if word_count is None:
+            word_count = tokens.word_count
+        tier = route(len(clause["matched_keywords"]), word_count, thresholds)
+        routing[tier] += 1
+        if tier == "model":
+            ambiguous.append(clause)
+            ambiguous_tokens.append(tokens)
+        else:
+            clause["label"] = "Risky" if tier == "keyword_risky" else "Safe"
+
+    if ambiguous:
+        apply_model_labels(ambiguous, model, ambiguous_tokens)
+    if aggregator is not None:
+        for clause in analyzed:
+            aggregator.update(clause)
+    return analyzed, routing
+
+
+def format_routing(routing: Dict[str, int]) -> str:
+    """One-line summary, e.g. "model 12/80 (15%), keyword_safe 50, ..."."""
+    total = sum(routing.values()) or 1
+    settled = total - routing.get("model", 0)
+    parts = [f"{tier} {routing.get(tier, 0)}" for tier in CASCADE_TIERS]
+    return f"{', '.join(parts)} — {settled / total:.0%} settled without the model"
+
+
+# ---------------------------------------------------------------------------
+# Threshold tuning on held-out data
+# ---------------------------------------------------------------------------
+def tune_thresholds(
+    texts: Sequence[str],
+    labels: Sequence[int],
+    model,
+    tolerance: float = CASCADE_TOLERANCE,
+) -> Tuple[Dict, List[Dict]]:
+    """
+    Grid-searches the tier thresholds on labelled held-out clauses.
+
+    The model scores every clause once and the keyword features are
+    computed once; each candidate is then evaluated with array operations.
+    Among candidates whose accuracy is within `tolerance` of the
+    model-only path, the one routing the most clauses away from the model
+    wins (ties go to higher accuracy).
+
+    Args:
+        texts: Held-out clause texts.
+        labels: True labels (1 = Risky, 0 = Safe).
+        model: A model_registry.PublishedModel.
+        tolerance: Allowed accuracy drop as a fraction (0.01 = 1 point).
+
+    Returns:
+        Tuple of (best thresholds dict, one result row per candidate).
+    """
+    y = np.asarray(labels, dtype=int)
+    tokenized = [tokens_of(t) for t in texts]
+    model_pred = (np.asarray(model.risk_probabilities(tokenized)) >= 0.5).astype(int)
+    hits = np.array([len(match_keywords(t)) for t in tokenized])
+    words = np.array([t.word_count for t in tokenized])
+    model_acc = float((model_pred == y).mean()) if len(y) else 0.0
+
+    rows = []
+    for safe_max in SAFE_MAX_WORDS_GRID:
+        safe_tier = (hits == 0) & (words <= safe_max) if safe_max is not None else np.zeros(len(y), bool)
+        for risky_min in RISKY_MIN_KEYWORDS_GRID:
+            risky_tier = hits >= risky_min if risky_min is not None else np.zeros(len(y), bool)
+            safe_only = safe_tier & ~risky_tier
+            pred = np.where(risky_tier, 1, np.where(safe_only, 0, model_pred))
+            accuracy = float((pred == y).mean()) if len(y) else 0.0
+            rows.append({
+                "safe_max_words": safe_max,
+                "risky_min_keywords": risky_min,
+                "accuracy": round(accuracy, 4),
+                "model_only_accuracy": round(model_acc, 4),
+                "model_fraction": round(float((~(risky_tier | safe_only)).mean()) if len(y) else 1.0, 4),
+                "within_tolerance": accuracy >= model_acc - tolerance,
+            })
+
+    feasible = [r for r in rows if r["within_tolerance"]]
+    best = min(feasible, key=lambda r: (r["model_fraction"], -r["accuracy"]))
+    return {"safe_max_words": best["safe_max_words"],
+            "risky_min_keywords": best["risky_min_keywords"]}, rows
+
+
+def tuning_report(best: Dict, rows: List[Dict], tolerance: float) -> Dict:
+    """Summary of a tune_thresholds() run, stored next to the thresholds."""
+    chosen = next(r for r in rows if r["safe_max_words"] == best["safe_max_words"]
+                  and r["risky_min_keywords"] == best["risky_min_keywords"])
+    return {
+        "tuned_at": time.time(),
+        "tolerance": tolerance,
+        "accuracy": chosen["accuracy"],
+        "model_only_accuracy": chosen["model_only_accuracy"],
+        "model_fraction": chosen["model_fraction"],
+    }
+
+
+def load_heldout(path: str) -> Tuple[List[str], List[int]]:
+    """Clause texts and 0/1 labels from a clause_text,is_risky CSV."""
+    df = pd.read_csv(path, usecols=["clause_text", "is_risky"]).dropna()
+    return df["clause_text"].astype(str).tolist(), df["is_risky"].astype(int).tolist()
+
+
+def save_thresholds(thresholds: Dict, model_version: str, report: Optional[Dict] = None,
+                    registry=None) -> None:
+    """
+    Stores tuned thresholds in a model version's metadata, from where the
+    incremental versions published after it inherit them.
+
+    Args:
+        thresholds: Output of tune_thresholds().
+        model_version: The version they were tuned for.
+        report: Optional tuning_report() to keep with them.
+        registry: model_registry.ModelRegistry (default: MODEL_REGISTRY_DIR).
+    """
+    registry = registry or ModelRegistry()
+    registry.update_meta(model_version, {"cascade_thresholds": thresholds,
+                                         "cascade_tuning": report or {}})
+
+
+def load_thresholds(model=None) -> Dict:
+    """
+    The thresholds stored with a PublishedModel, or CASCADE_THRESHOLDS if
+    it has none (see thresholds_tuned()).
+    """
+    tuned = model.meta.get("cascade_thresholds") if model is not None else None
+    return {**CASCADE_THRESHOLDS, **(tuned or {})}
+
+
+def thresholds_tuned(model) -> bool:
+    """True if the model carries thresholds tuned for its lineage."""
+    return model is not None and bool(model.meta.get("cascade_thresholds"))
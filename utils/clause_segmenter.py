@@ -3,27 +3,51 @@ utils/clause_segmenter.py
 --------------------------
 Wraps the existing segmenter logic and adds structured output with
 clause IDs and character counts suitable for Streamlit display.
+
+Two backends are available: the regex segmenter (numbering and blank-line
+rules) and a spaCy sentence-aware backend for unnumbered prose (see
+utils/spacy_segmenter.py). "auto" picks one per document from its
+structure.
 """
 
 import re
 import sys
 import os
-from typing import List, Dict
+from typing import List, Dict, Optional, Tuple
 
 # Allow importing from src/ even when running from the project root
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
 
 try:
-    from src.data_preprocessing.segmenter import segment_into_clauses as _core_segment
+    from src.data_preprocessing.segmenter import MIN_CLAUSE_WORDS, split_into_clauses as _core_split
     _USE_CORE = True
 except ImportError:
+    MIN_CLAUSE_WORDS = 3
     _USE_CORE = False
 
+from app_config import (
+    PROSE_PARAGRAPH_MIN_WORDS,
+    SEGMENTATION_BACKEND,
+    SEGMENTATION_MAX_NUMBERED_RATIO,
+    SEGMENTATION_PROSE_RATIO,
+    SPACY_BATCH_SIZE,
+    SPACY_N_PROCESS,
+)
+from utils.spacy_segmenter import segment_paragraphs, spacy_available
+from utils.tokenizer import tokenize
+
+SEGMENTATION_BACKENDS = ("regex", "spacy", "auto")
+
+_PARAGRAPH_BREAK = re.compile(r"\n\s*\n")
+_NUMBERING = re.compile(r"(?m)^\s*(\d+\.\d*|[a-zA-Z]\)|[ivxIVX]+\.)\s")
+_WHITESPACE = re.compile(r"\s*")
+
 
 def _fallback_segment(text: str) -> List[str]:
     """
     Simple fallback clause segmenter in case the src module is unavailable.
-    Splits on double newlines and then on numbered list starters.
+    Splits on double newlines and then on numbered list starters; short
+    clauses are left for segment_document() to drop.
     """
     if not text:
         return []
@@ -49,10 +73,96 @@ def _fallback_segment(text: str) -> List[str]:
         if current.strip():
             clauses.append(current.strip())
 
-    return [c for c in clauses if len(c.split()) > 3]
+    return clauses
 
 
-def segment_document(text: str) -> List[Dict]:
+def _regex_segment(text: str) -> List[str]:
+    return _core_split(text) if _USE_CORE else _fallback_segment(text)
+
+
+def _paragraph_structure(text: str) -> Tuple[List[str], List[bool], int]:
+    """
+    Splits text into paragraphs, flags the unnumbered prose ones and counts
+    the numbered ones.
+    """
+    paragraphs = [p.strip() for p in _PARAGRAPH_BREAK.split(text) if p.strip()]
+    numbered = [bool(_NUMBERING.search(p)) for p in paragraphs]
+    prose = [not is_numbered and len(p.split()) >= PROSE_PARAGRAPH_MIN_WORDS
+             for p, is_numbered in zip(paragraphs, numbered)]
+    return paragraphs, prose, sum(numbered)
+
+
+def choose_backend(text: str) -> str:
+    """
+    "spacy" when at most SEGMENTATION_MAX_NUMBERED_RATIO of the paragraphs
+    are numbered, unnumbered prose paragraphs hold at least
+    SEGMENTATION_PROSE_RATIO of the words and spaCy is installed; otherwise
+    "regex". The structure is checked first, so regex documents never
+    import spaCy.
+    """
+    if not text:
+        return "regex"
+    paragraphs, prose, numbered = _paragraph_structure(text)
+    if not paragraphs or numbered / len(paragraphs) > SEGMENTATION_MAX_NUMBERED_RATIO:
+        return "regex"
+    total = sum(len(p.split()) for p in paragraphs)
+    prose_words = sum(len(p.split()) for p, is_prose in zip(paragraphs, prose) if is_prose)
+    if not total or prose_words / total < SEGMENTATION_PROSE_RATIO:
+        return "regex"
+    return "spacy" if spacy_available() else "regex"
+
+
+def locate_clauses(text: str, clause_texts: List[str]) -> List[Optional[Tuple[int, int]]]:
+    """
+    (start, end) offsets of each segmented clause in the text it came from.
+
+    Both backends emit clauses in order with only whitespace between them,
+    so each clause is matched right after the previous one: verbatim (the
+    regex backend's clauses are stripped substrings), else word by word
+    across any whitespace (the spaCy backend collapses line breaks and
+    runs of spaces). A clause that does not match gets None.
+    """
+    spans: List[Optional[Tuple[int, int]]] = []
+    cursor = 0
+    for clause in clause_texts:
+        start = _WHITESPACE.match(text, cursor).end()
+        if text.startswith(clause, start):
+            end = start + len(clause)
+        else:
+            end = start
+            for word in clause.split():
+                end = _WHITESPACE.match(text, end).end()
+                if not text.startswith(word, end):
+                    end = None
+                    break
+                end += len(word)
+        if end is None:
+            spans.append(None)
+        else:
+            spans.append((start, end))
+            cursor = end
+    return spans
+
+
+def spacy_segment(text: str, batch_size: int = SPACY_BATCH_SIZE,
+                  n_process: int = SPACY_N_PROCESS) -> List[str]:
+    """
+    The spaCy backend: numbered paragraphs keep the regex rules, unnumbered
+    prose paragraphs are split on sentence boundaries in one batched
+    nlp.pipe pass. Returns clause strings, short ones included (see
+    segment_document()).
+    """
+    paragraphs, prose, _ = _paragraph_structure(text)
+    prose_paragraphs = [p for p, is_prose in zip(paragraphs, prose) if is_prose]
+    sentences = iter(segment_paragraphs(prose_paragraphs, batch_size=batch_size, n_process=n_process))
+
+    clauses = []
+    for para, is_prose in zip(paragraphs, prose):
+        clauses.extend(next(sentences) if is_prose else _regex_segment(para))
+    return clauses
+
+
+def segment_document(text: str, backend: Optional[str] = None) -> List[Dict]:
     """
     Segments the raw contract text into a list of clause dicts.
 
@@ -60,25 +170,51 @@ def segment_document(text: str) -> List[Dict]:
         - id          (int)   : 1-based clause index
         - text        (str)   : the clause text
         - word_count  (int)   : number of words in the clause
+        - tokens      (TokenizedClause): the clause tokenized once, for
+          scoring and featurization (dropped from analyzed clauses)
+        - span        (tuple) : (start, end) of the clause in text, or None
+          (see locate_clauses(); dropped from analyzed clauses)
+
+    Clauses of MIN_CLAUSE_WORDS words or fewer are dropped.
 
     Args:
         text (str): Raw contract text.
+        backend (str): "regex", "spacy" or "auto" (default:
+            SEGMENTATION_BACKEND in app_config).
 
     Returns:
         List of clause dicts.
+
+    Raises:
+        ValueError: For an unknown backend.
+        ImportError: If backend="spacy" and spaCy is not installed.
     """
-    if _USE_CORE:
-        raw_clauses = _core_segment(text)
+    backend = backend or SEGMENTATION_BACKEND
+    if backend not in SEGMENTATION_BACKENDS:
+        raise ValueError(f"Unknown segmentation backend: {backend!r} "
+                         f"(expected one of {', '.join(SEGMENTATION_BACKENDS)})")
+    if backend == "auto":
+        backend = choose_backend(text)
+
+    if backend == "spacy":
+        if not spacy_available():
+            raise ImportError("The spaCy segmentation backend needs spaCy: pip install spacy")
+        raw_clauses = spacy_segment(text) if text else []
     else:
-        raw_clauses = _fallback_segment(text)
+        raw_clauses = _regex_segment(text)
 
     structured = []
-    for idx, clause_text in enumerate(raw_clauses, start=1):
+    for clause_text, span in zip(raw_clauses, locate_clauses(text, raw_clauses)):
+        tokenized = tokenize(clause_text)
+        if tokenized.word_count <= MIN_CLAUSE_WORDS:
+            continue
         structured.append(
             {
-                "id": idx,
+                "id": len(structured) + 1,
                 "text": clause_text,
-                "word_count": len(clause_text.split()),
+                "word_count": tokenized.word_count,
+                "tokens": tokenized,
+                "span": span,
             }
         )
 
@@ -0,0 +1,283 @@
+"""
+utils/clause_table.py
+----------------------
+Compact columnar container for analyzed clauses.
+
+A list of analyzed clause dicts costs a dict, two lists and several boxed
+numbers per clause, which dominates memory on large batch runs. A
+ClauseTable stores the same fields as typed arrays instead:
+
+    id, word_count      int32
+    label               int8 codes into LABELS
+    confidence          float64
+    text                one list of str
+    matched_keywords    uint16 ids into a per-table keyword vocabulary,
+    categories          uint16 ids into a per-table category vocabulary,
+                        each flattened with an int64 offsets array
+
+The table behaves as a read-only sequence of ClauseView mappings, so code
+written against the dict API (UI renderers, the history store, the
+summary aggregator) works unchanged. Numeric columns are exposed as
+numpy arrays over the same buffers and convert without copying to
+pandas / Arrow.
+"""
+
+from array import array
+from collections.abc import Mapping, Sequence
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+LABELS: List[str] = ["Safe", "Risky"]
+_LABEL_CODES: Dict[str, int] = {label: code for code, label in enumerate(LABELS)}
+
+FIELDS = ("id", "text", "word_count", "label", "confidence", "matched_keywords", "categories")
+
+
+class ClauseView(Mapping):
+    """Read-only dict-like view of one row of a ClauseTable."""
+
+    __slots__ = ("_table", "_row")
+
+    def __init__(self, table: "ClauseTable", row: int) -> None:
+        self._table = table
+        self._row = row
+
+    def __getitem__(self, key: str):
+        return self._table._field(key, self._row)
+
+    def __iter__(self):
+        return iter(FIELDS)
+
+    def __len__(self) -> int:
+        return len(FIELDS)
+
+    def __repr__(self) -> str:
+        return f"ClauseView({dict(self)!r})"
+
+
+class ClauseTable(Sequence):
+    """
+    Append-only columnar table of analyzed clauses.
+
+    Build one with append() / from_clauses(), or directly from
+    risk_predictor.analyze_clauses_table(). Indexing returns a ClauseView
+    (or a new ClauseTable for slices); iteration yields views in order.
+    """
+
+    __slots__ = (
+        "_ids", "_word_counts", "_labels", "_confidences", "_texts",
+        "_kw_ids", "_kw_offsets", "_cat_ids", "_cat_offsets",
+        "keyword_vocab", "category_vocab", "_kw_lookup", "_cat_lookup",
+    )
+
+    def __init__(self) -> None:
+        self._ids = array("i")
+        self._word_counts = array("i")
+        self._labels = array("b")
+        self._confidences = array("d")
+        self._texts: List[str] = []
+        self._kw_ids = array("H")
+        self._kw_offsets = array("q", [0])
+        self._cat_ids = array("H")
+        self._cat_offsets = array("q", [0])
+        self.keyword_vocab: List[str] = []
+        self.category_vocab: List[str] = []
+        self._kw_lookup: Dict[str, int] = {}
+        self._cat_lookup: Dict[str, int] = {}
+
+    # ------------------------------------------------------------------
+    # Building
+    # ------------------------------------------------------------------
+    def append(
+        self,
+        clause_id: int,
+        text: str,
+        word_count: int,
+        label: str,
+        confidence: float,
+        matched_keywords: Iterable[str],
+        categories: Iterable[str],
+    ) -> None:
+        """Adds one analyzed clause, interning its keywords and categories."""
+        self._ids.append(clause_id)
+        self._texts.append(text)
+        self._word_counts.append(word_count)
+        self._labels.append(_LABEL_CODES[label])
+        self._confidences.append(confidence)
+        self._kw_ids.extend(_intern(kw, self.keyword_vocab, self._kw_lookup) for kw in matched_keywords)
+        self._kw_offsets.append(len(self._kw_ids))
+        self._cat_ids.extend(_intern(cat, self.category_vocab, self._cat_lookup) for cat in categories)
+        self._cat_offsets.append(len(self._cat_ids))
+
+    def append_clause(self, clause: Dict) -> None:
+        """Adds an analyzed clause dict (extra keys are ignored)."""
+        word_count = clause.get("word_count")
+        if word_count is None:
+            word_count = len(clause["text"].split())
+        self.append(
+            clause["id"], clause["text"], word_count, clause["label"],
+            clause["confidence"], clause["matched_keywords"], clause["categories"],
+        )
+
+    @classmethod
+    def from_clauses(cls, analyzed_clauses: Iterable[Dict]) -> "ClauseTable":
+        """Packs an analyzed clause list into a table."""
+        table = cls()
+        for clause in analyzed_clauses:
+            table.append_clause(clause)
+        return table
+
+    # ------------------------------------------------------------------
+    # Sequence / dict-view API
+    # ------------------------------------------------------------------
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return ClauseTable.from_clauses(ClauseView(self, i) for i in range(*index.indices(len(self))))
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("ClauseTable index out of range")
+        return ClauseView(self, index)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield ClauseView(self, i)
+
+    def __repr__(self) -> str:
+        return (f"ClauseTable({len(self)} clauses, {len(self.keyword_vocab)} keywords, "
+                f"{len(self.category_vocab)} categories)")
+
+    def _field(self, key: str, row: int):
+        if key == "id":
+            return self._ids[row]
+        if key == "text":
+            return self._texts[row]
+        if key == "word_count":
+            return self._word_counts[row]
+        if key == "label":
+            return LABELS[self._labels[row]]
+        if key == "confidence":
+            return self._confidences[row]
+        if key == "matched_keywords":
+            vocab = self.keyword_vocab
+            return [vocab[i] for i in self._kw_ids[self._kw_offsets[row]:self._kw_offsets[row + 1]]]
+        if key == "categories":
+            vocab = self.category_vocab
+            return [vocab[i] for i in self._cat_ids[self._cat_offsets[row]:self._cat_offsets[row + 1]]]
+        raise KeyError(key)
+
+    def to_dicts(self) -> List[Dict]:
+        """Materializes the table as a plain list of analyzed clause dicts."""
+        return [dict(view) for view in self]
+
+    # ------------------------------------------------------------------
+    # Columnar access
+    # ------------------------------------------------------------------
+    def columns(self) -> Dict[str, np.ndarray]:
+        """
+        Returns the fixed-width columns as numpy arrays sharing the table's
+        buffers (no copy). Arrays are invalidated by later appends.
+        """
+        return {
+            "id": np.frombuffer(self._ids, dtype=np.int32),
+            "word_count": np.frombuffer(self._word_counts, dtype=np.int32),
+            "label_code": np.frombuffer(self._labels, dtype=np.int8),
+            "confidence": np.frombuffer(self._confidences, dtype=np.float64),
+            "keyword_ids": np.frombuffer(self._kw_ids, dtype=np.uint16),
+            "keyword_offsets": np.frombuffer(self._kw_offsets, dtype=np.int64),
+            "category_ids": np.frombuffer(self._cat_ids, dtype=np.uint16),
+            "category_offsets": np.frombuffer(self._cat_offsets, dtype=np.int64),
+        }
+
+    def to_arrow(self):
+        """
+        Converts to a pyarrow.Table. Numeric columns, label codes and the
+        keyword / category offsets and ids are wrapped without copying;
+        only the text column is encoded. Requires pyarrow.
+        """
+        import pyarrow as pa
+
+        cols = self.columns()
+
+        def _lists(ids, offsets, vocab):
+            values = pa.DictionaryArray.from_arrays(
+                pa.array(ids), pa.array(vocab, type=pa.string())
+            )
+            return pa.LargeListArray.from_arrays(pa.array(offsets), values)
+
+        return pa.table({
+            "id": pa.array(cols["id"]),
+            "text": pa.array(self._texts, type=pa.large_string()),
+            "word_count": pa.array(cols["word_count"]),
+            "label": pa.DictionaryArray.from_arrays(pa.array(cols["label_code"]), pa.array(LABELS)),
+            "confidence": pa.array(cols["confidence"]),
+            "matched_keywords": _lists(cols["keyword_ids"], cols["keyword_offsets"], self.keyword_vocab),
+            "categories": _lists(cols["category_ids"], cols["category_offsets"], self.category_vocab),
+        })
+
+    def to_pandas(self):
+        """
+        Converts to a pandas DataFrame. With pyarrow installed the frame is
+        backed by the Arrow buffers (pd.ArrowDtype); otherwise numeric columns
+        share the numpy buffers, label is a Categorical over the int8 codes
+        and the list columns are materialized.
+        """
+        import pandas as pd
+
+        try:
+            return self.to_arrow().to_pandas(types_mapper=pd.ArrowDtype)
+        except ImportError:
+            pass
+
+        cols = self.columns()
+        return pd.DataFrame({
+            "id": cols["id"],
+            "text": self._texts,
+            "word_count": cols["word_count"],
+            "label": pd.Categorical.from_codes(cols["label_code"], categories=LABELS),
+            "confidence": cols["confidence"],
+            "matched_keywords": [self._field("matched_keywords", i) for i in range(len(self))],
+            "categories": [self._field("categories", i) for i in range(len(self))],
+        }, copy=False)
+
+    def nbytes(self) -> int:
+        """Approximate memory held by the table, including text."""
+        arrays = (self._ids, self._word_counts, self._labels, self._confidences,
+                  self._kw_ids, self._kw_offsets, self._cat_ids, self._cat_offsets)
+        return (sum(a.itemsize * len(a) for a in arrays)
+                + sum(len(t) for t in self._texts)
+                + sum(len(v) for v in self.keyword_vocab + self.category_vocab))
+
+    # ------------------------------------------------------------------
+    # Pickling (worker processes return tables to the parent)
+    # ------------------------------------------------------------------
+    def __getstate__(self):
+        return {name: getattr(self, name) for name in self.__slots__
+                if name not in ("_kw_lookup", "_cat_lookup")}
+
+    def __setstate__(self, state: Dict) -> None:
+        for name, value in state.items():
+            setattr(self, name, value)
+        self._kw_lookup = {kw: i for i, kw in enumerate(self.keyword_vocab)}
+        self._cat_lookup = {cat: i for i, cat in enumerate(self.category_vocab)}
+
+
+def _intern(value: str, vocab: List[str], lookup: Dict[str, int]) -> int:
+    idx = lookup.get(value)
+    if idx is None:
+        idx = lookup[value] = len(vocab)
+        vocab.append(value)
+    return idx
+
+
+def as_dicts(analyzed: Optional[Iterable]) -> List[Dict]:
+    """Returns analyzed clauses as plain dicts, whether given a list or a ClauseTable."""
+    if analyzed is None:
+        return []
+    if isinstance(analyzed, ClauseTable):
+        return analyzed.to_dicts()
+    return list(analyzed)
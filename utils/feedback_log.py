@@ -0,0 +1,94 @@
+"""
+utils/feedback_log.py
+----------------------
+Append-only log of reviewer label corrections.
+
+Each correction made on a clause card is one JSON line: the clause text,
+the label the analyzer gave it, the reviewer's label, and where it came
+from. Readers track a byte offset, so the model updater only reads the
+corrections added since its last run.
+"""
+
+import json
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from app_config import FEEDBACK_LOG_PATH
+
+# One lock per process; O_APPEND keeps single-write lines whole across processes
+_WRITE_LOCK = threading.Lock()
+
+
+class FeedbackLog:
+    """
+    JSON-lines file of label corrections.
+
+    Usage:
+        log = FeedbackLog()
+        log.record(clause["text"], "Risky", "Safe", document="nda.pdf", clause_id=7)
+        entries, offset = log.read(since=offset)
+    """
+
+    def __init__(self, path: Optional[str] = None) -> None:
+        self.path = path or FEEDBACK_LOG_PATH
+
+    def record(
+        self,
+        text: str,
+        predicted: str,
+        corrected: str,
+        document: Optional[str] = None,
+        clause_id: Optional[int] = None,
+    ) -> Dict:
+        """Appends one correction and returns the stored entry."""
+        if corrected not in ("Risky", "Safe"):
+            raise ValueError(f"Unknown label: {corrected!r}")
+        entry = {
+            "recorded_at": time.time(),
+            "document": document,
+            "clause_id": clause_id,
+            "text": text,
+            "predicted": predicted,
+            "label": corrected,
+        }
+        line = (json.dumps(entry, ensure_ascii=False) + "\n").encode("utf-8")
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with _WRITE_LOCK:
+            fd = os.open(self.path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+            try:
+                os.write(fd, line)
+            finally:
+                os.close(fd)
+        return entry
+
+    def read(self, since: int = 0) -> Tuple[List[Dict], int]:
+        """
+        Returns the entries after byte offset `since` and the offset to pass
+        next time. A partially written last line is left for the next read.
+        """
+        if not os.path.exists(self.path):
+            return [], since
+        entries = []
+        offset = since
+        with open(self.path, "rb") as f:
+            f.seek(since)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                offset += len(line)
+                try:
+                    entries.append(json.loads(line))
+                except json.JSONDecodeError:
+                    continue
+        return entries, offset
+
+    def corrections(self) -> Dict[str, str]:
+        """Returns clause text -> latest reviewer label over the whole log."""
+        latest: Dict[str, str] = {}
+        for entry in self.read()[0]:
+            latest[entry["text"]] = entry["label"]
+        return latest
@@ -0,0 +1,232 @@
+"""
+utils/feedback_updater.py
+--------------------------
+Turns reviewer corrections into new published model versions.
+
+Each run reads the feedback log from where the live version left off:
+
+  - if no model is published yet, or FEEDBACK_RETRAIN_EVERY corrections /
+    FEEDBACK_RETRAIN_INTERVAL seconds have passed since the last full
+    retrain, the vectorizer and classifier are refit on the base training
+    data plus every correction ("full" version);
+  - otherwise the new corrections are applied to a copy of the live model
+    with partial_fit ("incremental" version), unless its classifier has
+    no partial_fit, which also means a full retrain.
+
+Progress (feedback log offset, corrections since the last full retrain)
+is stored in each version's metadata, so updates resume correctly after
+a restart. Tuned cascade thresholds are carried over to incremental
+versions; a full version is re-tuned on CASCADE_HELDOUT_PATH when it is
+set (see utils/cascade.py). FeedbackUpdater runs this on a background
+thread; the app starts one, and update_model.py runs it from the command
+line. publish_trained() publishes the artifacts saved by
+train_classifier.py instead ("trained" version).
+"""
+
+import glob
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+from app_config import (
+    CASCADE_HELDOUT_PATH,
+    CASCADE_TOLERANCE,
+    FEEDBACK_POLL_INTERVAL,
+    FEEDBACK_RETRAIN_EVERY,
+    FEEDBACK_RETRAIN_INTERVAL,
+    FEEDBACK_SAMPLE_WEIGHT,
+    TRAINING_DATA_PATH,
+)
+from utils.cascade import CASCADE_META_KEYS, load_heldout, tune_thresholds, tuning_report
+from utils.feedback_log import FeedbackLog
+from utils.model_registry import ModelRegistry, PublishedModel
+from utils.risk_predictor import predict_clause_risk
+from src.model_training.incremental import full_retrain, partial_update
+from src.model_training.model_saver import load_best
+
+
+def load_base_data(path: Optional[str] = None) -> pd.DataFrame:
+    """
+    The labelled base set for full retrains (empty if the file is missing):
+    one CSV, or a directory of part-*.csv chunks. An optional "categories"
+    column holds "; "-joined category names.
+    """
+    path = path or TRAINING_DATA_PATH
+    if not os.path.exists(path):
+        return pd.DataFrame({"clause_text": [], "is_risky": []})
+    columns = lambda c: c in ("clause_text", "is_risky", "categories")
+    if os.path.isdir(path):
+        # Chunked output of demo_data_prep.py --weak-labels
+        parts = sorted(glob.glob(os.path.join(path, "part-*.csv")))
+        if not parts:
+            return pd.DataFrame({"clause_text": [], "is_risky": []})
+        return pd.concat((pd.read_csv(p, usecols=columns) for p in parts), ignore_index=True)
+    return pd.read_csv(path, usecols=columns)
+
+
+def category_targets(base_df: pd.DataFrame, texts) -> Dict[str, List[str]]:
+    """
+    Category names per clause text for training the category model: the
+    base set's "categories" column where present, otherwise the keyword
+    categories from the rule engine.
+    """
+    targets: Dict[str, List[str]] = {}
+    if "categories" in base_df.columns:
+        for text, cats in zip(base_df["clause_text"].astype(str), base_df["categories"]):
+            if isinstance(cats, str) and cats.strip():
+                targets[text] = [c.strip() for c in cats.split(";") if c.strip()]
+    for text in texts:
+        if text not in targets:
+            targets[text] = predict_clause_risk({"text": text})["categories"]
+    return targets
+
+
+def retune_cascade(model, vectorizer, category_model=None,
+                   heldout_path: Optional[str] = None) -> Dict:
+    """
+    Cascade metadata for a freshly retrained model: thresholds tuned on
+    the held-out set, or {} (defaults apply) when there is none.
+    """
+    path = heldout_path or CASCADE_HELDOUT_PATH
+    if not path or not os.path.exists(path):
+        return {}
+    texts, labels = load_heldout(path)
+    if not texts:
+        return {}
+    candidate = PublishedModel("unpublished", model, vectorizer, {}, category_model)
+    best, rows = tune_thresholds(texts, labels, candidate, tolerance=CASCADE_TOLERANCE)
+    return {"cascade_thresholds": best,
+            "cascade_tuning": {**tuning_report(best, rows, CASCADE_TOLERANCE), "heldout_rows": len(texts)}}
+
+
+def apply_feedback(
+    log: FeedbackLog,
+    registry: ModelRegistry,
+    force_full: bool = False,
+    base_data_path: Optional[str] = None,
+) -> Optional[Dict]:
+    """
+    Publishes a new version if there are unapplied corrections.
+
+    Returns:
+        The new version's metadata, or None when there was nothing to do
+        (or a full retrain lacked both labels).
+    """
+    current = registry.load()
+    meta = current.meta if current is not None else {}
+    entries, offset = log.read(since=meta.get("feedback_offset", 0))
+    if not entries and not force_full:
+        return None
+
+    since_full = meta.get("feedback_since_full", 0) + len(entries)
+    last_full = meta.get("full_retrain_at", 0.0)
+    full = (force_full or current is None
+            or not hasattr(current.model, "partial_fit")
+            or since_full >= FEEDBACK_RETRAIN_EVERY
+            or time.time() - last_full >= FEEDBACK_RETRAIN_INTERVAL)
+
+    if full:
+        base_df = load_base_data(base_data_path)
+        corrections = log.corrections()
+        texts = set(base_df["clause_text"].astype(str)) | set(corrections)
+        try:
+            vectorizer, model, category_model, rows = full_retrain(
+                base_df, corrections, FEEDBACK_SAMPLE_WEIGHT,
+                categories=category_targets(base_df, texts),
+            )
+        except ValueError:
+            return None
+        new_meta = {"kind": "full", "training_rows": rows, "feedback_since_full": 0,
+                    "full_retrain_at": time.time()}
+        new_meta.update(retune_cascade(model, vectorizer, category_model))
+    else:
+        vectorizer, category_model = current.vectorizer, current.category_model
+        model = partial_update(current.model, vectorizer,
+                               [e["text"] for e in entries], [e["label"] for e in entries],
+                               weight=FEEDBACK_SAMPLE_WEIGHT)
+        new_meta = {"kind": "incremental", "training_rows": meta.get("training_rows", 0) + len(entries),
+                    "feedback_since_full": since_full, "full_retrain_at": last_full}
+        new_meta.update({k: meta[k] for k in CASCADE_META_KEYS if k in meta})
+
+    new_meta.update({
+        "parent": current.version if current is not None else None,
+        "feedback_offset": offset,
+        "corrections_applied": len(entries),
+    })
+    version = registry.publish(model, vectorizer, new_meta, category_model=category_model)
+    return {**new_meta, "version": version}
+
+
+def publish_trained(registry: ModelRegistry, heldout_path: Optional[str] = None) -> Dict:
+    """
+    Publishes the classifier, vectorizer and category model saved by
+    train_classifier.py (models/) as the live version. Corrections
+    already in the log are not part of it, so the next apply_feedback()
+    run picks them all up.
+
+    Returns:
+        The new version's metadata.
+    """
+    current = registry.load()
+    model, vectorizer, category_model = load_best()
+    meta = {"kind": "trained", "feedback_since_full": 0, "full_retrain_at": time.time(),
+            "parent": current.version if current is not None else None,
+            "feedback_offset": 0, "corrections_applied": 0}
+    meta.update(retune_cascade(model, vectorizer, category_model, heldout_path))
+    version = registry.publish(model, vectorizer, meta, category_model=category_model)
+    return {**meta, "version": version}
+
+
+class FeedbackUpdater:
+    """
+    Background thread calling apply_feedback() every `interval` seconds.
+
+    Args:
+        log: Feedback log to read (default: FEEDBACK_LOG_PATH).
+        registry: Registry to publish into (default: MODEL_REGISTRY_DIR).
+        interval: Seconds between checks.
+    """
+
+    def __init__(
+        self,
+        log: Optional[FeedbackLog] = None,
+        registry: Optional[ModelRegistry] = None,
+        interval: float = FEEDBACK_POLL_INTERVAL,
+    ) -> None:
+        self.log = log or FeedbackLog()
+        self.registry = registry or ModelRegistry()
+        self.interval = interval
+        self.last_error: Optional[str] = None
+        self.last_result: Optional[Dict] = None
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="feedback-updater", daemon=True)
+
+    def start(self) -> "FeedbackUpdater":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._wake.set()
+        self._thread.join()
+
+    def poke(self) -> None:
+        """Checks the log now instead of waiting for the next interval."""
+        self._wake.set()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                result = apply_feedback(self.log, self.registry)
+                if result is not None:
+                    self.last_result = result
+                self.last_error = None
+            except Exception as e:
+                # Keep the thread alive; the next correction retries
+                self.last_error = str(e)
+            self._wake.wait(self.interval)
+            self._wake.clear()
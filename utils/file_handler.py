@@ -30,22 +30,41 @@ def extract_text_from_upload(uploaded_file) -> Optional[str]:
     if uploaded_file is None:
         return None
 
-    filename: str = uploaded_file.name.lower()
+    return extract_text_from_bytes(uploaded_file.name, uploaded_file.read())
 
-    if filename.endswith(".txt"):
-        return _read_txt(uploaded_file)
-    elif filename.endswith(".pdf"):
-        return _read_pdf(uploaded_file)
+
+def extract_text_from_bytes(filename: str, raw_bytes: bytes) -> str:
+    """
+    Extracts raw text from the bytes of a .txt or .pdf file.
+
+    Used directly by batch and worker-process code paths that have no
+    Streamlit UploadedFile to hand.
+
+    Args:
+        filename: Original file name; its extension selects the reader.
+        raw_bytes: File contents.
+
+    Returns:
+        Extracted text as a string.
+
+    Raises:
+        ValueError: If the file format is not supported or the PDF is unreadable.
+    """
+    lowered = filename.lower()
+
+    if lowered.endswith(".txt"):
+        return _read_txt(raw_bytes)
+    elif lowered.endswith(".pdf"):
+        return _read_pdf(raw_bytes)
     else:
         raise ValueError(
-            f"Unsupported file type: '{uploaded_file.name}'. "
+            f"Unsupported file type: '{filename}'. "
             "Please upload a .pdf or .txt file."
         )
 
 
-def _read_txt(uploaded_file) -> str:
-    """Reads text from a TXT UploadedFile."""
-    raw_bytes: bytes = uploaded_file.read()
+def _read_txt(raw_bytes: bytes) -> str:
+    """Decodes text from the bytes of a TXT file."""
     # Try UTF-8 first, fall back to latin-1 for older legal docs
     for encoding in ("utf-8", "latin-1", "cp1252"):
         try:
@@ -56,9 +75,8 @@ def _read_txt(uploaded_file) -> str:
     return raw_bytes.decode("utf-8", errors="replace")
 
 
-def _read_pdf(uploaded_file) -> str:
-    """Reads text from a PDF UploadedFile using PyPDF2."""
-    raw_bytes: bytes = uploaded_file.read()
+def _read_pdf(raw_bytes: bytes) -> str:
+    """Reads text from the bytes of a PDF file using PyPDF2."""
     pdf_buffer = io.BytesIO(raw_bytes)
 
     text_parts = []
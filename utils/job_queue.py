@@ -0,0 +1,511 @@
+"""
+utils/job_queue.py
+-------------------
+Local background job queue for analyzing very large documents.
+
+Uploads above ASYNC_SIZE_THRESHOLD_MB are submitted as jobs instead of
+being analyzed on the Streamlit script thread. Jobs live in a SQLite
+database under JOB_QUEUE_DIR, and each job's input file and pickled
+result sit in a per-job directory next to it, so status, progress and
+results survive page reloads and app restarts and can be fetched by job
+id from any process.
+
+A JobWorker (one per worker node: inside the app, or job_worker.py)
+claims queued jobs and runs each in its own child process:
+
+  - at most `concurrency` jobs run at once on the node;
+  - a job running longer than JOB_TIMEOUT seconds is killed;
+  - timeouts, crashes and unexpected errors are retried up to
+    JOB_MAX_ATTEMPTS times with exponential backoff (JOB_RETRY_BACKOFF);
+    ValueErrors (unreadable or empty documents) fail immediately;
+  - running jobs hold a lease renewed by their worker; jobs whose lease
+    expires (worker node died) are picked up again by any other worker.
+
+Every write a worker makes to a running job (lease renewal, progress,
+completion, failure) is conditioned on the (worker, attempt) that claimed
+it, so a worker that lost its lease cannot overwrite the attempt that
+replaced it; its supervisor kills the stale process on the next tick.
+"""
+
+import json
+import multiprocessing as mp
+import os
+import pickle
+import shutil
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from functools import partial
+from typing import Dict, List, Optional
+
+from app_config import (
+    JOB_LEASE_SECONDS,
+    JOB_MAX_ATTEMPTS,
+    JOB_MAX_CONCURRENCY,
+    JOB_PROGRESS_CHUNK,
+    JOB_QUEUE_DIR,
+    JOB_RETRY_BACKOFF,
+    JOB_TIMEOUT,
+)
+from utils.file_handler import extract_text_from_bytes
+from utils.clause_segmenter import segment_document
+from utils.cascade import analyze_clauses_cascade, load_thresholds
+from utils.model_registry import ModelRegistry
+from utils.risk_predictor import analyze_clauses, build_clause_index
+from utils.stats_aggregator import SummaryAggregator
+
+JOB_STATUSES = ("queued", "running", "done", "failed", "cancelled")
+FINISHED_STATUSES = ("done", "failed", "cancelled")
+
+# A running job still belongs to the (worker, attempt) that claimed it
+_OWNED = "id = ? AND status = 'running' AND worker = ? AND attempts = ?"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id           TEXT    PRIMARY KEY,
+    name         TEXT    NOT NULL,
+    status       TEXT    NOT NULL,
+    options      TEXT    NOT NULL,
+    size_bytes   INTEGER NOT NULL,
+    attempts     INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL,
+    progress     REAL    NOT NULL DEFAULT 0,
+    stage        TEXT,
+    error        TEXT,
+    worker       TEXT,
+    created_at   REAL    NOT NULL,
+    started_at   REAL,
+    finished_at  REAL,
+    run_after    REAL    NOT NULL,
+    lease_until  REAL
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_status  ON jobs(status, run_after);
+CREATE INDEX IF NOT EXISTS idx_jobs_created ON jobs(created_at);
+"""
+
+
+class JobQueue:
+    """
+    SQLite-backed queue of document analysis jobs.
+
+    Usage:
+        queue = JobQueue()
+        job_id = queue.submit("msa.pdf", raw_bytes, {"scoring": "cascade"})
+        queue.get(job_id)["status"]     # queued / running / done / ...
+        queue.result(job_id)            # analysis dict once done
+    """
+
+    def __init__(self, root: Optional[str] = None, max_attempts: int = JOB_MAX_ATTEMPTS,
+                 lease_seconds: float = JOB_LEASE_SECONDS,
+                 retry_backoff: float = JOB_RETRY_BACKOFF) -> None:
+        self.root = root or JOB_QUEUE_DIR
+        self.max_attempts = max_attempts
+        self.lease_seconds = lease_seconds
+        self.retry_backoff = retry_backoff
+        os.makedirs(self.root, exist_ok=True)
+        # Autocommit; claim() takes the write lock explicitly
+        self.conn = sqlite3.connect(os.path.join(self.root, "jobs.sqlite3"),
+                                    timeout=30, isolation_level=None)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def __enter__(self) -> "JobQueue":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def job_dir(self, job_id: str) -> str:
+        return os.path.join(self.root, job_id)
+
+    # ------------------------------------------------------------------
+    # Submitting and reading
+    # ------------------------------------------------------------------
+    def submit(self, name: str, raw_bytes: bytes, options: Optional[Dict] = None) -> str:
+        """
+        Queues one document for analysis.
+
+        Args:
+            name: File name (its extension selects the text extractor).
+            raw_bytes: File contents; written to the job directory.
+            options: JSON-serializable job options, e.g. {"scoring": "model"}.
+
+        Returns:
+            The new job id.
+        """
+        job_id = uuid.uuid4().hex
+        os.makedirs(self.job_dir(job_id))
+        with open(os.path.join(self.job_dir(job_id), "input"), "wb") as f:
+            f.write(raw_bytes)
+        now = time.time()
+        self.conn.execute(
+            "INSERT INTO jobs (id, name, status, options, size_bytes, max_attempts, created_at, run_after) "
+            "VALUES (?, ?, 'queued', ?, ?, ?, ?, ?)",
+            (job_id, name, json.dumps(options or {}), len(raw_bytes), self.max_attempts, now, now),
+        )
+        return job_id
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        """Job row as a dict (options decoded), or None for an unknown id."""
+        row = self.conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return _row_to_job(row) if row is not None else None
+
+    def list_jobs(self, limit: int = 20, status: Optional[str] = None) -> List[Dict]:
+        """Most recent jobs first."""
+        sql, params = "SELECT * FROM jobs", []
+        if status is not None:
+            sql += " WHERE status = ?"
+            params.append(status)
+        sql += " ORDER BY created_at DESC LIMIT ?"
+        return [_row_to_job(r) for r in self.conn.execute(sql, params + [limit])]
+
+    def read_input(self, job_id: str) -> bytes:
+        with open(os.path.join(self.job_dir(job_id), "input"), "rb") as f:
+            return f.read()
+
+    def result(self, job_id: str) -> Optional[Dict]:
+        """The finished job's analysis dict, or None if it has not completed."""
+        path = os.path.join(self.job_dir(job_id), "result.pkl")
+        if not os.path.exists(path):
+            return None
+        with open(path, "rb") as f:
+            return pickle.load(f)
+
+    # ------------------------------------------------------------------
+    # Worker side
+    # ------------------------------------------------------------------
+    def claim(self, worker: str) -> Optional[Dict]:
+        """
+        Atomically takes the oldest runnable job for `worker`.
+
+        Jobs whose lease expired go back to the queue first (or fail, when
+        out of attempts). Returns the claimed job or None.
+        """
+        now = time.time()
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            self.conn.execute(
+                "UPDATE jobs SET status = 'failed', finished_at = ?, lease_until = NULL, "
+                "error = 'Worker lost; no attempts left' "
+                "WHERE status = 'running' AND lease_until < ? AND attempts >= max_attempts",
+                (now, now),
+            )
+            self.conn.execute(
+                "UPDATE jobs SET status = 'queued', run_after = ?, lease_until = NULL, "
+                "error = 'Worker lost; retrying' "
+                "WHERE status = 'running' AND lease_until < ?",
+                (now, now),
+            )
+            row = self.conn.execute(
+                "SELECT id FROM jobs WHERE status = 'queued' AND run_after <= ? "
+                "ORDER BY created_at LIMIT 1",
+                (now,),
+            ).fetchone()
+            if row is not None:
+                self.conn.execute(
+                    "UPDATE jobs SET status = 'running', attempts = attempts + 1, worker = ?, "
+                    "started_at = ?, lease_until = ?, progress = 0, stage = NULL WHERE id = ?",
+                    (worker, now, now + self.lease_seconds, row["id"]),
+                )
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+        return self.get(row["id"]) if row is not None else None
+
+    # The methods below only act while (worker, attempt) still owns the job
+    # and return False (or the job's current status) once it does not.
+    def renew_lease(self, job_id: str, worker: str, attempt: int) -> bool:
+        cur = self.conn.execute(
+            f"UPDATE jobs SET lease_until = ? WHERE {_OWNED}",
+            (time.time() + self.lease_seconds, job_id, worker, attempt),
+        )
+        return cur.rowcount > 0
+
+    def update_progress(self, job_id: str, worker: str, attempt: int, progress: float, stage: str) -> bool:
+        cur = self.conn.execute(
+            f"UPDATE jobs SET progress = ?, stage = ? WHERE {_OWNED}",
+            (round(progress, 3), stage, job_id, worker, attempt),
+        )
+        return cur.rowcount > 0
+
+    def complete(self, job_id: str, worker: str, attempt: int, result: Dict) -> bool:
+        """Stores the result and marks the job done."""
+        path = os.path.join(self.job_dir(job_id), "result.pkl")
+        tmp = f"{path}.{attempt}.tmp"
+        with open(tmp, "wb") as f:
+            pickle.dump(result, f, protocol=pickle.HIGHEST_PROTOCOL)
+        # Publish the file under the write lock, only if the job is still ours
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            cur = self.conn.execute(
+                "UPDATE jobs SET status = 'done', progress = 1, stage = 'done', error = NULL, "
+                f"finished_at = ?, lease_until = NULL WHERE {_OWNED}",
+                (time.time(), job_id, worker, attempt),
+            )
+            if cur.rowcount:
+                os.replace(tmp, path)
+            self.conn.execute("COMMIT")
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+        return cur.rowcount > 0
+
+    def fail(self, job_id: str, worker: str, attempt: int, error: str, retry: bool = True) -> str:
+        """
+        Records a failed attempt. The job is re-queued with exponential
+        backoff when retry is set and attempts remain, otherwise it fails.
+
+        Returns:
+            The job's new status ("queued" or "failed"), or its current one
+            when the attempt no longer owns it.
+        """
+        job = self.get(job_id)
+        if job is None:
+            return "failed"
+        now = time.time()
+        if retry and job["attempts"] < job["max_attempts"]:
+            delay = self.retry_backoff * 2 ** (attempt - 1)
+            status, sql, params = "queued", "status = 'queued', error = ?, run_after = ?", (error, now + delay)
+        else:
+            status, sql, params = "failed", "status = 'failed', error = ?, finished_at = ?", (error, now)
+        cur = self.conn.execute(
+            f"UPDATE jobs SET {sql}, lease_until = NULL WHERE {_OWNED}",
+            params + (job_id, worker, attempt),
+        )
+        return status if cur.rowcount else self.get(job_id)["status"]
+
+    def cancel(self, job_id: str) -> bool:
+        """Cancels a queued or running job; running ones are killed by their worker."""
+        cur = self.conn.execute(
+            "UPDATE jobs SET status = 'cancelled', finished_at = ?, lease_until = NULL "
+            "WHERE id = ? AND status IN ('queued', 'running')",
+            (time.time(), job_id),
+        )
+        return cur.rowcount > 0
+
+    def purge(self, older_than: float) -> int:
+        """Deletes finished jobs (and their files) that finished before `older_than`."""
+        ids = [r["id"] for r in self.conn.execute(
+            "SELECT id FROM jobs WHERE status IN ('done', 'failed', 'cancelled') AND finished_at < ?",
+            (older_than,),
+        )]
+        for job_id in ids:
+            shutil.rmtree(self.job_dir(job_id), ignore_errors=True)
+            self.conn.execute("DELETE FROM jobs WHERE id = ?", (job_id,))
+        return len(ids)
+
+
+def _row_to_job(row: sqlite3.Row) -> Dict:
+    job = dict(row)
+    job["options"] = json.loads(job["options"])
+    return job
+
+
+# ---------------------------------------------------------------------------
+# Running one job
+# ---------------------------------------------------------------------------
+def execute_job(queue: JobQueue, job: Dict) -> Dict:
+    """
+    Runs extraction → segmentation → scoring → summary for a claimed job,
+    reporting progress to the queue as it goes.
+
+    Job options:
+        scoring: None (keyword rules), "model" or "cascade"; the model is
+            the registry's current version when the job runs.
+
+    Returns:
+        dict with analyzed, stats, index, routing (cascade only),
+        model_version and elapsed.
+    """
+    start = time.perf_counter()
+    job_id, scoring = job["id"], job["options"].get("scoring")
+    progress = partial(queue.update_progress, job_id, job["worker"], job["attempts"])
+
+    progress(0.05, "extraction")
+    text = extract_text_from_bytes(job["name"], queue.read_input(job_id))
+    if not text or not text.strip():
+        raise ValueError("Could not extract any text from the document.")
+
+    progress(0.3, "segmentation")
+    clauses = segment_document(text)
+    if not clauses:
+        raise ValueError("No clauses could be extracted from this document.")
+
+    model = None
+    if scoring:
+        model = ModelRegistry().load()
+        if model is None:
+            raise ValueError("No learned model has been published yet.")
+
+    # Score in chunks so progress moves on very long documents
+    aggregator = SummaryAggregator()
+    analyzed, routing = [], None
+    for i in range(0, len(clauses), JOB_PROGRESS_CHUNK):
+        progress(0.4 + 0.5 * i / len(clauses), "scoring")
+        chunk = clauses[i:i + JOB_PROGRESS_CHUNK]
+        if scoring == "cascade":
+            scored, chunk_routing = analyze_clauses_cascade(
+                chunk, model, load_thresholds(model), aggregator=aggregator
+            )
+            routing = {t: (routing or {}).get(t, 0) + n for t, n in chunk_routing.items()}
+        else:
+            scored = analyze_clauses(chunk, aggregator=aggregator, model=model)
+        analyzed.extend(scored)
+
+    progress(0.95, "summary")
+    return {
+        "analyzed": analyzed,
+        "stats": aggregator.summary(),
+        "index": build_clause_index(analyzed),
+        "routing": routing,
+        "model_version": model.version if model is not None else None,
+        "elapsed": round(time.perf_counter() - start, 3),
+    }
+
+
+def _job_process(root: str, job_id: str, worker: str, attempt: int) -> None:
+    """Child-process entry point: runs one claimed job and records the outcome."""
+    queue = JobQueue(root)
+    try:
+        job = queue.get(job_id)
+        if job is None or (job["status"], job["worker"], job["attempts"]) != ("running", worker, attempt):
+            return  # cancelled or re-claimed before this process started
+        result = execute_job(queue, job)
+        queue.complete(job_id, worker, attempt, result)
+    except ValueError as e:
+        # Bad input: retrying would fail the same way
+        queue.fail(job_id, worker, attempt, str(e), retry=False)
+    except Exception as e:
+        queue.fail(job_id, worker, attempt, f"{type(e).__name__}: {e}", retry=True)
+    finally:
+        queue.close()
+
+
+# ---------------------------------------------------------------------------
+# Worker node
+# ---------------------------------------------------------------------------
+class JobWorker:
+    """
+    Claims jobs and runs each in a child process, up to `concurrency` at
+    a time, enforcing the timeout and renewing leases.
+
+    Use run() in the foreground (job_worker.py) or start() for a daemon
+    thread (the app).
+
+    Args:
+        root: Queue directory (default: JOB_QUEUE_DIR).
+        concurrency: Jobs run at once on this node.
+        timeout: Seconds before a running job is killed and retried.
+        poll_interval: Seconds between queue checks.
+    """
+
+    def __init__(self, root: Optional[str] = None, concurrency: int = JOB_MAX_CONCURRENCY,
+                 timeout: float = JOB_TIMEOUT, poll_interval: float = 1.0) -> None:
+        self.root = root or JOB_QUEUE_DIR
+        self.concurrency = max(1, int(concurrency))
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self.last_error: Optional[str] = None
+        # spawn: the app's server process is multi-threaded
+        self._ctx = mp.get_context("spawn")
+        self._running: Dict[str, tuple] = {}
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self.run, name="job-worker", daemon=True)
+
+    def start(self) -> "JobWorker":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join()
+
+    def run(self, drain: bool = False) -> None:
+        """
+        Processes jobs until stop() is called, or, with drain=True, until
+        the queue has no runnable or running jobs left.
+        """
+        queue = JobQueue(self.root)
+        try:
+            while not self._stop.is_set():
+                try:
+                    self._supervise(queue)
+                    claimed = self._fill(queue)
+                    self.last_error = None
+                except sqlite3.Error as e:
+                    # Locked or briefly unavailable database: try again next tick
+                    self.last_error = str(e)
+                    claimed = False
+                if drain and not self._running and not claimed and not _has_pending(queue):
+                    break
+                self._stop.wait(self.poll_interval)
+        finally:
+            for job_id, (proc, _, attempt) in list(self._running.items()):
+                proc.terminate()
+                proc.join()
+                queue.fail(job_id, self.worker_id, attempt, "Worker stopped; retrying", retry=True)
+            self._running.clear()
+            queue.close()
+
+    def _fill(self, queue: JobQueue) -> bool:
+        claimed = False
+        while len(self._running) < self.concurrency:
+            job = queue.claim(self.worker_id)
+            if job is None:
+                break
+            if job["id"] in self._running:
+                # Our own lease on it expired and we claimed it again
+                stale = self._running.pop(job["id"])[0]
+                stale.terminate()
+                stale.join()
+            proc = self._ctx.Process(target=_job_process,
+                                     args=(self.root, job["id"], self.worker_id, job["attempts"]),
+                                     name=f"job-{job['id'][:8]}", daemon=True)
+            proc.start()
+            self._running[job["id"]] = (proc, time.monotonic(), job["attempts"])
+            claimed = True
+        return claimed
+
+    def _supervise(self, queue: JobQueue) -> None:
+        for job_id, (proc, started, attempt) in list(self._running.items()):
+            job = queue.get(job_id) or {}
+            owned = (job.get("status"), job.get("worker"), job.get("attempts")) \
+                == ("running", self.worker_id, attempt)
+            if not proc.is_alive():
+                proc.join()
+                del self._running[job_id]
+                if owned:
+                    queue.fail(job_id, self.worker_id, attempt,
+                               f"Worker process exited with code {proc.exitcode}", retry=True)
+            elif not owned:
+                # Cancelled, or re-claimed (possibly by another worker) after a lost lease
+                proc.terminate()
+                proc.join()
+                del self._running[job_id]
+            elif time.monotonic() - started > self.timeout:
+                proc.terminate()
+                proc.join()
+                del self._running[job_id]
+                queue.fail(job_id, self.worker_id, attempt, f"Timed out after {self.timeout:.0f}s", retry=True)
+            else:
+                queue.renew_lease(job_id, self.worker_id, attempt)
+
+
+def _has_pending(queue: JobQueue) -> bool:
+    row = queue.conn.execute(
+        "SELECT COUNT(*) FROM jobs WHERE status IN ('queued', 'running')"
+    ).fetchone()
+    return row[0] > 0
@@ -0,0 +1,218 @@
+"""
+utils/model_registry.py
+------------------------
+Versioned store of published risk models.
+
+Each version is a directory (versions/v000042/ holding the classifier,
+the TF-IDF vectorizer, an optional multi-label category model and
+meta.json); a CURRENT file names the
+live version. Publishing writes the new directory under a temporary name,
+renames it into place and then swaps CURRENT with os.replace, so a reader
+always sees either the old version or the complete new one. The running
+app calls load() on each analysis and picks up new versions without a
+restart. Artifacts never change once published; meta.json can gain facts
+learned afterwards (update_meta(), e.g. tuned cascade thresholds), which
+load() also picks up.
+
+Artifacts are stored uncompressed and loaded with mmap_mode, so server
+threads and worker processes that load the same version share its arrays
+through the page cache instead of each holding a private copy.
+"""
+
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from app_config import MODEL_REGISTRY_DIR, MODEL_VERSIONS_KEPT
+from src.model_training.model_saver import MMAP_MODE, dump_artifact, load_artifact
+from utils.tokenizer import vectorizer_inputs
+
+_MODEL_FILE = "model.joblib"
+_VECTORIZER_FILE = "vectorizer.joblib"
+_CATEGORY_MODEL_FILE = "category_model.joblib"
+_META_FILE = "meta.json"
+_POINTER_FILE = "CURRENT"
+
+
+class PublishedModel:
+    """
+    A loaded model version: vectorizer + risk classifier + optional
+    CategoryModel + metadata.
+    """
+
+    def __init__(self, version: str, model, vectorizer, meta: Dict, category_model=None) -> None:
+        self.version = version
+        self.model = model
+        self.vectorizer = vectorizer
+        self.meta = meta
+        self.category_model = category_model
+
+    def score(self, texts: List[str]) -> Tuple[List[float], Optional[List[List[str]]]]:
+        """
+        Vectorizes texts once and returns (P(Risky) per text, learned
+        categories per text or None without a category model). texts may
+        be TokenizedClauses, whose tokens are reused.
+        """
+        if not texts:
+            return [], ([] if self.category_model is not None else None)
+        X = self.vectorizer.transform(vectorizer_inputs(self.vectorizer, texts))
+        classes = list(self.model.classes_)
+        risk = self.model.predict_proba(X)[:, classes.index(1)].tolist()
+        if self.category_model is None:
+            return risk, None
+        return risk, self.category_model.decode(self.category_model.predict_proba(X))
+
+    def risk_probabilities(self, texts: List[str]) -> List[float]:
+        """P(Risky) for each text, vectorized in one batch."""
+        if not texts:
+            return []
+        X = self.vectorizer.transform(vectorizer_inputs(self.vectorizer, texts))
+        classes = list(self.model.classes_)
+        return self.model.predict_proba(X)[:, classes.index(1)].tolist()
+
+
+class ModelRegistry:
+    """
+    Publishes and loads model versions under one directory.
+
+    Usage:
+        registry = ModelRegistry()
+        registry.publish(model, vectorizer, {"kind": "full"})
+        current = registry.load()        # None until something is published
+    """
+
+    def __init__(self, root: Optional[str] = None, keep: int = MODEL_VERSIONS_KEPT,
+                 mmap_mode: Optional[str] = MMAP_MODE) -> None:
+        self.root = root or MODEL_REGISTRY_DIR
+        self.versions_dir = os.path.join(self.root, "versions")
+        self.keep = keep
+        self.mmap_mode = mmap_mode
+        self._lock = threading.Lock()
+        self._loaded: Optional[PublishedModel] = None
+        self._meta_stamp = None
+
+    # ------------------------------------------------------------------
+    # Reading
+    # ------------------------------------------------------------------
+    def current_version(self) -> Optional[str]:
+        """Name of the live version, or None if nothing is published."""
+        try:
+            with open(os.path.join(self.root, _POINTER_FILE), encoding="utf-8") as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def load(self) -> Optional[PublishedModel]:
+        """
+        Returns the live version, reloading from disk only when CURRENT
+        points somewhere new.
+        """
+        version = self.current_version()
+        if version is None:
+            return None
+        with self._lock:
+            if self._loaded is None or self._loaded.version != version:
+                self._meta_stamp = self._stamp(version)
+                self._loaded = self._load_version(version)
+            elif self._stamp(version) != self._meta_stamp:
+                # Only meta.json changed: keep the loaded artifacts
+                self._meta_stamp = self._stamp(version)
+                self._loaded.meta = self.meta(version)
+            return self._loaded
+
+    def meta(self, version: str) -> Dict:
+        """A published version's meta.json."""
+        with open(self._meta_path(version), encoding="utf-8") as f:
+            return json.load(f)
+
+    def _meta_path(self, version: str) -> str:
+        return os.path.join(self.versions_dir, version, _META_FILE)
+
+    def _stamp(self, version: str) -> Tuple[int, int]:
+        st = os.stat(self._meta_path(version))
+        return st.st_ino, st.st_mtime_ns
+
+    def _load_version(self, version: str) -> PublishedModel:
+        path = os.path.join(self.versions_dir, version)
+        meta = self.meta(version)
+        category_path = os.path.join(path, _CATEGORY_MODEL_FILE)
+        return PublishedModel(
+            version,
+            load_artifact(os.path.join(path, _MODEL_FILE), self.mmap_mode),
+            load_artifact(os.path.join(path, _VECTORIZER_FILE), self.mmap_mode),
+            meta,
+            load_artifact(category_path, self.mmap_mode) if os.path.exists(category_path) else None,
+        )
+
+    def versions(self) -> List[str]:
+        """Published version names, oldest first."""
+        if not os.path.isdir(self.versions_dir):
+            return []
+        return sorted(v for v in os.listdir(self.versions_dir) if v.startswith("v"))
+
+    # ------------------------------------------------------------------
+    # Publishing
+    # ------------------------------------------------------------------
+    def publish(self, model, vectorizer, meta: Optional[Dict] = None, category_model=None) -> str:
+        """
+        Writes a new version and makes it live atomically. category_model
+        must have been trained on the same vectorizer.
+
+        Returns:
+            The new version name.
+        """
+        os.makedirs(self.versions_dir, exist_ok=True)
+        staging = tempfile.mkdtemp(prefix=".staging-", dir=self.versions_dir)
+        try:
+            dump_artifact(model, os.path.join(staging, _MODEL_FILE))
+            dump_artifact(vectorizer, os.path.join(staging, _VECTORIZER_FILE))
+            if category_model is not None:
+                dump_artifact(category_model, os.path.join(staging, _CATEGORY_MODEL_FILE))
+            meta = {**(meta or {}), "published_at": time.time()}
+
+            # Another publisher may take the same number: retry with the next
+            while True:
+                existing = self.versions()
+                number = int(existing[-1][1:]) + 1 if existing else 1
+                version = f"v{number:06d}"
+                meta["version"] = version
+                with open(os.path.join(staging, _META_FILE), "w", encoding="utf-8") as f:
+                    json.dump(meta, f, indent=2)
+                try:
+                    os.rename(staging, os.path.join(self.versions_dir, version))
+                    break
+                except OSError:
+                    if not os.path.exists(os.path.join(self.versions_dir, version)):
+                        raise
+        except BaseException:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+
+        fd, tmp = tempfile.mkstemp(prefix=".current-", dir=self.root)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(version + "\n")
+        os.replace(tmp, os.path.join(self.root, _POINTER_FILE))
+
+        self._prune(version)
+        return version
+
+    def update_meta(self, version: str, updates: Dict) -> Dict:
+        """
+        Merges updates into a published version's meta.json (atomic
+        replace) and returns the new metadata. The artifacts are untouched.
+        """
+        meta = {**self.meta(version), **updates}
+        fd, tmp = tempfile.mkstemp(prefix=".meta-", dir=os.path.join(self.versions_dir, version))
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(meta, f, indent=2)
+        os.replace(tmp, self._meta_path(version))
+        return meta
+
+    def _prune(self, live: str) -> None:
+        for old in self.versions()[:-self.keep] if self.keep > 0 else []:
+            if old != live:
+                shutil.rmtree(os.path.join(self.versions_dir, old), ignore_errors=True)
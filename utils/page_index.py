@@ -0,0 +1,341 @@
+"""
+utils/page_index.py
+--------------------
+Random-access page index for analyzing selected parts of long contracts.
+
+build_page_index() makes one pass over a document: it extracts each
+page's text once, records where every page starts in the joined text,
+reads the PDF outline (bookmarks) and detects section headings
+(ARTICLE / SECTION lines, numbered all-caps titles). No segmentation or
+scoring happens, so the index is cheap next to a full analysis.
+
+With the index, any page ranges or named sections can be analyzed on
+their own (analyze_selection). Each clause gets the page it starts on,
+and the rest of the document is left untouched. TXT files are paged on
+form feeds, or on blank lines every TXT_PAGE_CHARS characters.
+"""
+
+import bisect
+import io
+import re
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import PyPDF2
+
+from app_config import PAGE_INDEX_MAX_HEADING_WORDS, TXT_PAGE_CHARS
+from utils.file_handler import extract_text_from_bytes
+from utils.clause_segmenter import segment_document
+from utils.cascade import analyze_clauses_cascade, load_thresholds
+from utils.risk_predictor import analyze_clauses, build_clause_index
+from utils.stats_aggregator import SummaryAggregator
+
+# Pages are joined with a blank line, as in file_handler._read_pdf
+PAGE_SEPARATOR = "\n\n"
+
+_ARTICLE_HEADING = re.compile(
+    r"^(?:ARTICLE|Article|SECTION|Section)\s+([0-9]+|[IVXLC]+)\b[.:]?\s*[-–—:.]?\s*(.*)$"
+)
+_NUMBERED_HEADING = re.compile(r"^(\d{1,3}(?:\.\d{1,3})*)\.?\s+([A-Z][A-Z0-9 ,&/'()\-–]{2,80})$")
+_CAPS_HEADING = re.compile(r"^[A-Z][A-Z0-9 ,&/'()\-–]{3,80}$")
+
+
+class PageIndex:
+    """
+    Page offsets, outline entries and detected headings of one document.
+
+    Attributes:
+        name: Document (file) name.
+        text: Full text, pages joined with PAGE_SEPARATOR.
+        page_offsets: Start offset of each page in text (page N is index N-1).
+        outline: PDF bookmarks as {"title", "level", "page"} dicts.
+        headings: Detected headings as {"title", "level", "page", "offset"}.
+    """
+
+    def __init__(self, name: str, pages: Sequence[str], outline: Optional[List[Dict]] = None) -> None:
+        self.name = name
+        self.page_offsets: List[int] = []
+        offset = 0
+        for page in pages:
+            self.page_offsets.append(offset)
+            offset += len(page) + len(PAGE_SEPARATOR)
+        self.text = PAGE_SEPARATOR.join(pages)
+        self.outline = outline or []
+        self.headings = detect_headings(self)
+
+    @property
+    def n_pages(self) -> int:
+        return len(self.page_offsets)
+
+    def page_of(self, offset: int) -> int:
+        """1-based page number containing a text offset."""
+        return max(1, bisect.bisect_right(self.page_offsets, offset))
+
+    def page_span(self, first: int, last: int) -> Tuple[int, int]:
+        """Text offsets [start, end) of pages first..last (1-based, inclusive)."""
+        start = self.page_offsets[first - 1]
+        end = self.page_offsets[last] - len(PAGE_SEPARATOR) if last < self.n_pages else len(self.text)
+        return start, end
+
+    def sections(self) -> List[Dict]:
+        """
+        Top-level sections with their page ranges: outline entries when the
+        PDF has bookmarks, otherwise detected headings.
+
+        Returns:
+            List of {"title", "first_page", "last_page", "source"} dicts.
+        """
+        if self.outline:
+            top = min(e["level"] for e in self.outline)
+            entries, source = [e for e in self.outline if e["level"] == top], "outline"
+        else:
+            top = min((h["level"] for h in self.headings), default=1)
+            entries, source = [h for h in self.headings if h["level"] == top], "heading"
+        sections = []
+        for i, entry in enumerate(entries):
+            nxt = entries[i + 1]["page"] if i + 1 < len(entries) else self.n_pages
+            # A section ends on the page the next one starts on (they may share it)
+            sections.append({
+                "title": entry["title"],
+                "first_page": entry["page"],
+                "last_page": max(entry["page"], nxt),
+                "source": source,
+            })
+        return sections
+
+    def section_pages(self, titles: Sequence[str]) -> List[Tuple[int, int]]:
+        """Page ranges of the sections whose title contains any of titles (case-insensitive)."""
+        wanted = [t.lower() for t in titles]
+        ranges = [(s["first_page"], s["last_page"]) for s in self.sections()
+                  if any(w in s["title"].lower() for w in wanted)]
+        return merge_ranges(ranges)
+
+    def text_for_pages(self, ranges: Sequence[Tuple[int, int]]) -> Tuple[str, List[Tuple[int, int]]]:
+        """
+        Text of the selected page ranges, plus (selection offset, page)
+        anchors for mapping offsets in that text back to pages.
+        """
+        parts, anchors, length = [], [], 0
+        for first, last in merge_ranges(ranges):
+            for page in range(first, last + 1):
+                start, end = self.page_span(page, page)
+                if parts:
+                    parts.append(PAGE_SEPARATOR)
+                    length += len(PAGE_SEPARATOR)
+                anchors.append((length, page))
+                parts.append(self.text[start:end])
+                length += end - start
+        return "".join(parts), anchors
+
+    def summary(self) -> Dict:
+        return {
+            "name": self.name,
+            "pages": self.n_pages,
+            "characters": len(self.text),
+            "outline_entries": len(self.outline),
+            "headings": len(self.headings),
+            "sections": self.sections(),
+        }
+
+
+# ---------------------------------------------------------------------------
+# Building the index
+# ---------------------------------------------------------------------------
+def build_page_index(name: str, raw_bytes: bytes) -> PageIndex:
+    """
+    Builds the page index of a .pdf or .txt file in one pass.
+
+    Raises:
+        ValueError: If the format is unsupported or the PDF is unreadable.
+    """
+    if name.lower().endswith(".pdf"):
+        try:
+            reader = PyPDF2.PdfReader(io.BytesIO(raw_bytes))
+            pages = [page.extract_text() or "" for page in reader.pages]
+        except Exception as e:
+            raise ValueError(f"Could not parse PDF: {e}") from e
+        return PageIndex(name, pages, _read_outline(reader))
+    return PageIndex(name, split_text_pages(extract_text_from_bytes(name, raw_bytes)))
+
+
+def _read_outline(reader) -> List[Dict]:
+    """Flattens the PDF outline into {"title", "level", "page"} entries."""
+    entries: List[Dict] = []
+
+    def walk(items, level):
+        for item in items:
+            if isinstance(item, list):
+                walk(item, level + 1)
+                continue
+            try:
+                page = reader.get_destination_page_number(item) + 1
+            except Exception:
+                continue  # bookmark without a page destination
+            entries.append({"title": str(item.title).strip(), "level": level, "page": page})
+
+    try:
+        walk(reader.outline, 1)
+    except Exception:
+        return []
+    return sorted(entries, key=lambda e: e["page"])
+
+
+def split_text_pages(text: str, page_chars: int = TXT_PAGE_CHARS) -> List[str]:
+    """
+    Pages of a plain-text document: form-feed separated when it has form
+    feeds, otherwise cut at the first blank line after every page_chars
+    characters.
+    """
+    if "\f" in text:
+        return text.split("\f")
+    pages, start = [], 0
+    while start < len(text):
+        cut = text.find(PAGE_SEPARATOR, start + page_chars)
+        if cut == -1:
+            pages.append(text[start:])
+            break
+        pages.append(text[start:cut])
+        start = cut + len(PAGE_SEPARATOR)
+    return pages or [""]
+
+
+def detect_headings(index: PageIndex) -> List[Dict]:
+    """
+    Section headings found line by line: "ARTICLE 5 - TERMINATION" and
+    "SECTION 5" lines (level 1), numbered all-caps titles such as
+    "4. LIMITATION OF LIABILITY" (level = numbering depth) and short
+    all-caps lines (level 1).
+    """
+    headings = []
+    offset = 0
+    for line in index.text.split("\n"):
+        stripped = line.strip()
+        if stripped and len(stripped.split()) <= PAGE_INDEX_MAX_HEADING_WORDS:
+            heading = _classify_heading(stripped)
+            if heading is not None:
+                title, level = heading
+                pos = offset + line.find(stripped)
+                headings.append({"title": title, "level": level,
+                                 "page": index.page_of(pos), "offset": pos})
+        offset += len(line) + 1
+    return headings
+
+
+def _classify_heading(line: str) -> Optional[Tuple[str, int]]:
+    match = _ARTICLE_HEADING.match(line)
+    if match:
+        return line, 1
+    match = _NUMBERED_HEADING.match(line)
+    if match:
+        return line, match.group(1).count(".") + 1
+    if _CAPS_HEADING.match(line) and any(c.isalpha() for c in line):
+        return line, 1
+    return None
+
+
+# ---------------------------------------------------------------------------
+# Page range selection
+# ---------------------------------------------------------------------------
+def parse_page_ranges(spec: str, n_pages: int) -> List[Tuple[int, int]]:
+    """
+    Parses "1-5, 12, 40-" into merged 1-based inclusive ranges, clipped
+    to the document.
+
+    Raises:
+        ValueError: On malformed input or ranges outside the document.
+    """
+    ranges = []
+    for part in spec.replace(" ", "").split(","):
+        if not part:
+            continue
+        match = re.fullmatch(r"(\d+)?(-)?(\d+)?", part)
+        if not match or not (match.group(1) or match.group(3)):
+            raise ValueError(f"Invalid page range: {part!r}")
+        first = int(match.group(1)) if match.group(1) else 1
+        last = int(match.group(3)) if match.group(3) else (n_pages if match.group(2) else first)
+        if first < 1 or first > n_pages or last < first:
+            raise ValueError(f"Page range {part!r} is outside 1-{n_pages}")
+        ranges.append((first, min(last, n_pages)))
+    if not ranges:
+        raise ValueError("No pages selected.")
+    return merge_ranges(ranges)
+
+
+def merge_ranges(ranges: Sequence[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    """Sorts and merges overlapping or adjacent page ranges."""
+    merged: List[Tuple[int, int]] = []
+    for first, last in sorted(ranges):
+        if merged and first <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], last))
+        else:
+            merged.append((first, last))
+    return merged
+
+
+def format_ranges(ranges: Sequence[Tuple[int, int]]) -> str:
+    """[(1, 5), (12, 12)] → "1-5, 12"."""
+    return ", ".join(f"{a}-{b}" if a != b else str(a) for a, b in ranges)
+
+
+# ---------------------------------------------------------------------------
+# Analysis of a selection
+# ---------------------------------------------------------------------------
+def annotate_pages(clauses: List[Dict], anchors: Sequence[Tuple[int, int]]) -> List[Dict]:
+    """
+    Sets each clause's "page" to the page its text starts on, from the
+    clause spans segment_document() records. A clause without a span gets
+    the page where the previous one ended.
+    """
+    starts = [a[0] for a in anchors]
+    pos = 0
+    for clause in clauses:
+        span = clause.get("span")
+        if span is not None:
+            pos = span[0]
+        clause["page"] = anchors[max(0, bisect.bisect_right(starts, pos) - 1)][1]
+        if span is not None:
+            pos = span[1]
+    return clauses
+
+
+def analyze_selection(
+    index: PageIndex,
+    ranges: Sequence[Tuple[int, int]],
+    model=None,
+    cascade: bool = False,
+) -> Dict:
+    """
+    Segments and scores only the selected pages.
+
+    Args:
+        index: Output of build_page_index().
+        ranges: 1-based inclusive page ranges.
+        model: Optional model_registry.PublishedModel.
+        cascade: Score with the cascade (needs model).
+
+    Returns:
+        dict with analyzed (clauses carry "page"), stats, index, routing
+        (cascade only) and pages (the merged ranges).
+
+    Raises:
+        ValueError: If the selection has no clauses.
+    """
+    ranges = merge_ranges(ranges)
+    text, anchors = index.text_for_pages(ranges)
+    clauses = segment_document(text)
+    if not clauses:
+        raise ValueError(f"No clauses could be extracted from pages {format_ranges(ranges)}.")
+    annotate_pages(clauses, anchors)
+    aggregator = SummaryAggregator()
+    routing = None
+    if cascade and model is not None:
+        analyzed, routing = analyze_clauses_cascade(clauses, model, load_thresholds(model),
+                                                    aggregator=aggregator)
+    else:
+        analyzed = analyze_clauses(clauses, aggregator=aggregator, model=model)
+    return {
+        "analyzed": analyzed,
+        "stats": aggregator.summary(),
+        "index": build_clause_index(analyzed),
+        "routing": routing,
+        "pages": ranges,
+    }
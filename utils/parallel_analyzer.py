@@ -0,0 +1,193 @@
+"""
+utils/parallel_analyzer.py
+---------------------------
+Chunked parallel analysis of a single very large document.
+
+Batch mode spreads documents across cores, but one 200 MB contract still
+runs end to end on one core. analyze_text_parallel() cuts the extracted
+text at paragraph breaks into chunks of about DOCUMENT_CHUNK_CHARS,
+segments and scores the chunks on a process pool and stitches the results
+back together:
+
+  - cuts fall on the end of a paragraph break (the same r"\\n\\s*\\n"
+    matches the segmenters split on), so no clause spans two chunks and
+    every chunk splits into exactly the paragraphs the whole text would;
+  - the segmentation backend is chosen once, on the whole text;
+  - clause ids are renumbered in chunk order and spans shifted by each
+    chunk's offset, so both are the same on every run;
+  - per-chunk SummaryAggregators are merged in chunk order.
+
+analyzed and stats are identical to segment_document() followed by
+analyze_clauses() (or analyze_clauses_cascade()) on the whole text.
+"""
+
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Callable, Dict, List, Optional, Tuple
+
+from app_config import (
+    DOCUMENT_CHUNK_CHARS,
+    DOCUMENT_MAX_WORKERS,
+    DOCUMENT_PARALLEL_MIN_CHARS,
+    SEGMENTATION_BACKEND,
+)
+from utils.cascade import analyze_clauses_cascade
+from utils.clause_segmenter import choose_backend, segment_document
+from utils.risk_predictor import analyze_clauses, build_clause_index
+from utils.stats_aggregator import SummaryAggregator
+
+# Same pattern as the paragraph split in the segmenters
+_PARAGRAPH_BREAK = re.compile(r"\n\s*\n")
+
+# Callback signature: (chunks done, total chunks)
+ChunkProgressCallback = Callable[[int, int], None]
+
+
+# ---------------------------------------------------------------------------
+# Splitting
+# ---------------------------------------------------------------------------
+def split_text(text: str, chunk_chars: int = DOCUMENT_CHUNK_CHARS) -> List[Tuple[int, str]]:
+    """
+    Cuts text into chunks of at least chunk_chars characters (the last one
+    may be shorter), each ending just after a paragraph break.
+
+    A break found from the middle of a whitespace run ends where the whole
+    run's break does (at its last newline), so every cut is also the end
+    of a break in a left-to-right split of the full text.
+
+    Returns:
+        List of (offset, chunk text) pairs covering text exactly.
+    """
+    chunks, start = [], 0
+    while start < len(text):
+        match = _PARAGRAPH_BREAK.search(text, start + max(1, chunk_chars))
+        end = match.end() if match else len(text)
+        chunks.append((start, text[start:end]))
+        start = end
+    return chunks
+
+
+# ---------------------------------------------------------------------------
+# Workers
+# ---------------------------------------------------------------------------
+_worker_model = None
+_worker_thresholds = None
+
+
+def _init_worker(model, thresholds) -> None:
+    # The model is sent once per worker, not once per chunk
+    global _worker_model, _worker_thresholds
+    _worker_model, _worker_thresholds = model, thresholds
+
+
+def _analyze_chunk(offset: int, chunk: str, backend: str, scoring: Optional[str]) -> Dict:
+    """Segments and scores one chunk; ids are chunk-local, spans are absolute."""
+    clauses = segment_document(chunk, backend=backend)
+    # Segmentation records each clause's span in the chunk (scoring drops it)
+    spans = [(offset + c["span"][0], offset + c["span"][1]) if c["span"] is not None else None
+             for c in clauses]
+    aggregator = SummaryAggregator()
+    routing = None
+    if scoring == "cascade":
+        analyzed, routing = analyze_clauses_cascade(
+            clauses, _worker_model, _worker_thresholds, aggregator=aggregator
+        )
+    else:
+        analyzed = analyze_clauses(clauses, aggregator=aggregator, model=_worker_model)
+    return {
+        "analyzed": analyzed,
+        "spans": spans,
+        "aggregator": aggregator,
+        "routing": routing,
+    }
+
+
+# ---------------------------------------------------------------------------
+# Entry point
+# ---------------------------------------------------------------------------
+def analyze_text_parallel(
+    text: str,
+    model=None,
+    scoring: Optional[str] = None,
+    thresholds: Optional[Dict] = None,
+    backend: Optional[str] = None,
+    max_workers: Optional[int] = None,
+    chunk_chars: int = DOCUMENT_CHUNK_CHARS,
+    min_chars: int = DOCUMENT_PARALLEL_MIN_CHARS,
+    on_progress: Optional[ChunkProgressCallback] = None,
+) -> Dict:
+    """
+    Segments and scores one document's text, in parallel chunks when it is
+    long enough to pay for the process pool.
+
+    Args:
+        text: Extracted document text.
+        model: Optional model_registry.PublishedModel (required for
+            scoring="cascade").
+        scoring: None (keyword rules, or the model when given) or "cascade".
+        thresholds: Cascade tier thresholds (see utils/cascade.py).
+        backend: Segmentation backend (default: SEGMENTATION_BACKEND).
+        max_workers: Pool size (default: DOCUMENT_MAX_WORKERS or CPU count).
+        chunk_chars: Target chunk size in characters.
+        min_chars: Shorter texts, single chunks and a single worker run
+            serially in this process.
+        on_progress: Called in the calling process as each chunk finishes.
+
+    Returns:
+        dict with analyzed, spans ((start, end) in text per clause), stats,
+        index, aggregator, routing (cascade only), chunks, workers and
+        elapsed.
+    """
+    start_time = time.perf_counter()
+    backend = backend or SEGMENTATION_BACKEND
+    if backend == "auto":
+        backend = choose_backend(text)
+
+    chunks = split_text(text, chunk_chars) if len(text) >= min_chars else [(0, text)]
+    workers = max(1, min(max_workers or DOCUMENT_MAX_WORKERS or os.cpu_count() or 1, len(chunks)))
+    parts: List[Optional[Dict]] = [None] * len(chunks)
+
+    if workers == 1:
+        _init_worker(model, thresholds)
+        try:
+            for i, (offset, chunk) in enumerate(chunks):
+                parts[i] = _analyze_chunk(offset, chunk, backend, scoring)
+                if on_progress:
+                    on_progress(i + 1, len(chunks))
+        finally:
+            _init_worker(None, None)
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(model, thresholds)) as pool:
+            futures = {pool.submit(_analyze_chunk, offset, chunk, backend, scoring): i
+                       for i, (offset, chunk) in enumerate(chunks)}
+            for done, future in enumerate(as_completed(futures), start=1):
+                parts[futures[future]] = future.result()
+                if on_progress:
+                    on_progress(done, len(chunks))
+
+    # Stitch in chunk order: renumber ids, merge the aggregates
+    analyzed, spans, routing = [], [], None
+    aggregator = SummaryAggregator()
+    for part in parts:
+        for clause in part["analyzed"]:
+            clause["id"] = len(analyzed) + 1
+            analyzed.append(clause)
+        spans.extend(part["spans"])
+        aggregator.merge(part["aggregator"])
+        if part["routing"] is not None:
+            routing = {t: (routing or {}).get(t, 0) + n for t, n in part["routing"].items()}
+
+    return {
+        "analyzed": analyzed,
+        "spans": spans,
+        "stats": aggregator.summary(),
+        "index": build_clause_index(analyzed),
+        "aggregator": aggregator,
+        "routing": routing,
+        "chunks": len(chunks),
+        "workers": workers,
+        "elapsed": round(time.perf_counter() - start_time, 3),
+    }
@@ -0,0 +1,336 @@
+"""
+utils/pipeline.py
+------------------
+Staged pipeline executor with bounded queues and per-stage metrics.
+
+A Pipeline chains Stages (e.g. extraction → segmentation → scoring →
+persistence). Every stage has its own worker count and runs either on
+threads or on a process pool of that size; stages are connected by
+bounded queues, so a slow stage blocks the ones upstream instead of
+letting work pile up in memory. Items flow one-to-one through the
+stages; an item whose stage function raises carries the error through
+the remaining stages untouched.
+
+Usage:
+    pipeline = Pipeline([
+        Stage("extraction", extract, workers=4, kind="process"),
+        Stage("scoring", score, workers=2),
+    ])
+    for item in pipeline.run(inputs):
+        ...                       # items arrive in completion order
+    pipeline.metrics()            # per-stage utilization / wait times
+
+Call cancel() (from another thread or a progress callback) to stop
+gracefully: no new items are started, in-flight items finish their
+current stage and are dropped. Closing the run() generator early, e.g. on
+KeyboardInterrupt, cancels the same way.
+"""
+
+import os
+import queue
+import signal
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+
+# Default capacity of the queue in front of each stage
+DEFAULT_QUEUE_SIZE = 8
+
+# How often blocked workers re-check for cancellation (seconds)
+_POLL_INTERVAL = 0.1
+
+# End-of-stream marker passed between stages
+_DONE = object()
+
+
+class Stage:
+    """
+    One step of a Pipeline.
+
+    Args:
+        name: Stage name used in metrics and error reports.
+        fn: Callable taking one item and returning the transformed item.
+            Must be a picklable module-level function for kind="process".
+        workers: Concurrent workers (None = CPU count).
+        kind: "thread" or "process".
+        queue_size: Capacity of this stage's input queue (default: the
+            pipeline's queue_size).
+        initializer: Called with initargs once per worker process
+            (kind="process") or once per run (kind="thread"), e.g. to send
+            a model to the workers once rather than with every item.
+        initargs: Arguments for initializer.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        fn: Callable,
+        workers: Optional[int] = 1,
+        kind: str = "thread",
+        queue_size: Optional[int] = None,
+        initializer: Optional[Callable] = None,
+        initargs: tuple = (),
+    ) -> None:
+        if kind not in ("thread", "process"):
+            raise ValueError(f"Unknown stage kind: {kind!r} (expected 'thread' or 'process')")
+        self.name = name
+        self.fn = fn
+        self.workers = max(1, int(workers or os.cpu_count() or 1))
+        self.kind = kind
+        self.queue_size = queue_size
+        self.initializer = initializer
+        self.initargs = initargs
+
+
+class PipelineItem:
+    """An input travelling through the pipeline, tagged with its input position."""
+
+    __slots__ = ("seq", "value", "error", "failed_stage")
+
+    def __init__(self, seq: int, value) -> None:
+        self.seq = seq
+        self.value = value
+        self.error: Optional[str] = None
+        self.failed_stage: Optional[str] = None
+
+
+class _StageMetrics:
+    def __init__(self, stage: Stage) -> None:
+        self.stage = stage
+        self.lock = threading.Lock()
+        self.processed = 0
+        self.errors = 0
+        self.busy_s = 0.0
+        self.starved_s = 0.0
+        self.blocked_s = 0.0
+        self.max_queue = 0
+
+    def to_dict(self, elapsed: float) -> Dict:
+        capacity = self.stage.workers * elapsed
+        return {
+            "stage": self.stage.name,
+            "kind": self.stage.kind,
+            "workers": self.stage.workers,
+            "processed": self.processed,
+            "errors": self.errors,
+            "busy_s": round(self.busy_s, 3),
+            "starved_s": round(self.starved_s, 3),
+            "blocked_s": round(self.blocked_s, 3),
+            "utilization": round(self.busy_s / capacity, 3) if capacity > 0 else 0.0,
+            "max_queue": self.max_queue,
+        }
+
+
+class Pipeline:
+    """
+    Runs items through a sequence of stages concurrently.
+
+    Args:
+        stages: Stages in execution order.
+        queue_size: Default capacity of each inter-stage queue.
+    """
+
+    def __init__(self, stages: List[Stage], queue_size: int = DEFAULT_QUEUE_SIZE) -> None:
+        if not stages:
+            raise ValueError("A pipeline needs at least one stage.")
+        self.stages = stages
+        self.queue_size = max(1, queue_size)
+        self._cancel = threading.Event()
+        self._metrics = [_StageMetrics(s) for s in stages]
+        self._elapsed = 0.0
+
+    # ------------------------------------------------------------------
+    # Control
+    # ------------------------------------------------------------------
+    def cancel(self) -> None:
+        """Stops the current run after in-flight items finish their stage."""
+        self._cancel.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel.is_set()
+
+    def metrics(self) -> Dict:
+        """
+        Returns elapsed wall time and, per stage: processed and error counts,
+        busy / starved (waiting for input) / blocked (waiting for space
+        downstream) seconds summed over workers, utilization (busy time over
+        workers × elapsed) and the deepest its input queue got.
+        """
+        return {
+            "elapsed_s": round(self._elapsed, 3),
+            "cancelled": self.cancelled,
+            "stages": [m.to_dict(self._elapsed) for m in self._metrics],
+        }
+
+    # ------------------------------------------------------------------
+    # Running
+    # ------------------------------------------------------------------
+    def run(self, items: Iterable) -> Iterator[PipelineItem]:
+        """
+        Feeds items through every stage, yielding PipelineItems as they
+        leave the last stage (completion order; use .seq for input order).
+        """
+        self._cancel.clear()
+        self._metrics = [_StageMetrics(s) for s in self.stages]
+        queues = [queue.Queue(maxsize=s.queue_size or self.queue_size) for s in self.stages]
+        queues.append(queue.Queue(maxsize=self.queue_size))
+        pools = {
+            i: ProcessPoolExecutor(max_workers=s.workers, initializer=_init_process,
+                                   initargs=(s.initializer, s.initargs))
+            for i, s in enumerate(self.stages) if s.kind == "process"
+        }
+        for stage in self.stages:
+            if stage.kind == "thread" and stage.initializer is not None:
+                stage.initializer(*stage.initargs)
+        remaining = [s.workers for s in self.stages]
+        remaining_lock = threading.Lock()
+
+        def feed():
+            first = self.stages[0]
+            try:
+                for seq, value in enumerate(items):
+                    if not self._put(queues[0], PipelineItem(seq, value), self._metrics[0]):
+                        return
+            except Exception as e:
+                # A failing input iterator ends the stream; report it as an item
+                failed = PipelineItem(-1, None)
+                failed.error, failed.failed_stage = str(e), "input"
+                self._put(queues[0], failed, self._metrics[0])
+            for _ in range(first.workers):
+                if not self._put(queues[0], _DONE):
+                    return
+
+        def work(i: int):
+            stage, metrics, pool = self.stages[i], self._metrics[i], pools.get(i)
+            q_in, q_out = queues[i], queues[i + 1]
+            while True:
+                start = time.perf_counter()
+                item = self._get(q_in)
+                waited = time.perf_counter() - start
+                if item is None or item is _DONE:
+                    break
+                with metrics.lock:
+                    metrics.starved_s += waited
+
+                if item.error is None:
+                    start = time.perf_counter()
+                    try:
+                        if pool is not None:
+                            item.value = pool.submit(stage.fn, item.value).result()
+                        else:
+                            item.value = stage.fn(item.value)
+                        failed = 0
+                    except Exception as e:
+                        item.error, item.failed_stage = str(e), stage.name
+                        failed = 1
+                    with metrics.lock:
+                        metrics.busy_s += time.perf_counter() - start
+                        metrics.processed += 1
+                        metrics.errors += failed
+
+                start = time.perf_counter()
+                ok = self._put(q_out, item, self._metrics[i + 1] if i + 1 < len(self._metrics) else None)
+                with metrics.lock:
+                    metrics.blocked_s += time.perf_counter() - start
+                if not ok:
+                    break
+
+            with remaining_lock:
+                remaining[i] -= 1
+                last = remaining[i] == 0
+            if last:
+                downstream = self.stages[i + 1].workers if i + 1 < len(self.stages) else 1
+                for _ in range(downstream):
+                    if not self._put(q_out, _DONE):
+                        break
+
+        threads = [threading.Thread(target=feed, name="pipeline-feed", daemon=True)]
+        for i, stage in enumerate(self.stages):
+            threads.extend(
+                threading.Thread(target=work, args=(i,), name=f"pipeline-{stage.name}-{w}", daemon=True)
+                for w in range(stage.workers)
+            )
+
+        started = time.perf_counter()
+        finished = False
+        try:
+            for t in threads:
+                t.start()
+            while True:
+                item = self._get(queues[-1])
+                if item is None:
+                    break
+                if item is _DONE:
+                    finished = True
+                    break
+                yield item
+        finally:
+            # cancel() was called or the consumer stopped early: unblock workers
+            if not finished:
+                self._cancel.set()
+            self._elapsed = time.perf_counter() - started
+            joined = False
+            try:
+                for t in threads:
+                    t.join()
+                joined = True
+            finally:
+                # Still release the pools if a second Ctrl+C interrupts the join
+                for pool in pools.values():
+                    pool.shutdown(wait=joined, cancel_futures=True)
+
+    def run_all(self, items: Iterable) -> List[PipelineItem]:
+        """Runs the pipeline to completion and returns items in input order."""
+        return sorted(self.run(items), key=lambda item: item.seq)
+
+    # ------------------------------------------------------------------
+    # Queue helpers that give up on cancellation
+    # ------------------------------------------------------------------
+    def _put(self, q: queue.Queue, item, metrics: Optional[_StageMetrics] = None) -> bool:
+        while not self._cancel.is_set():
+            try:
+                q.put(item, timeout=_POLL_INTERVAL)
+            except queue.Full:
+                continue
+            if metrics is not None:
+                depth = q.qsize()
+                if depth > metrics.max_queue:
+                    metrics.max_queue = depth
+            return True
+        return False
+
+    def _get(self, q: queue.Queue):
+        while not self._cancel.is_set():
+            try:
+                return q.get(timeout=_POLL_INTERVAL)
+            except queue.Empty:
+                continue
+        return None
+
+
+def _ignore_sigint() -> None:
+    # Ctrl+C reaches the whole process group; let the parent cancel instead
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+
+def _init_process(initializer: Optional[Callable], initargs: tuple) -> None:
+    _ignore_sigint()
+    if initializer is not None:
+        initializer(*initargs)
+
+
+def format_metrics(metrics: Dict) -> str:
+    """Renders Pipeline.metrics() as a plain-text table."""
+    lines = [f"{'Stage':<14} {'Kind':<8} {'Wkrs':>4} {'Done':>6} {'Err':>4} "
+             f"{'Busy s':>8} {'Starved s':>9} {'Blocked s':>9} {'Util':>6} {'MaxQ':>5}"]
+    for s in metrics["stages"]:
+        lines.append(
+            f"{s['stage']:<14} {s['kind']:<8} {s['workers']:>4} {s['processed']:>6} {s['errors']:>4} "
+            f"{s['busy_s']:>8.2f} {s['starved_s']:>9.2f} {s['blocked_s']:>9.2f} "
+            f"{s['utilization']:>6.0%} {s['max_queue']:>5}"
+        )
+    status = " (cancelled)" if metrics["cancelled"] else ""
+    lines.append(f"Elapsed {metrics['elapsed_s']:.2f}s{status}")
+    return "\n".join(lines)
@@ -0,0 +1,202 @@
+"""
+utils/precedent_matcher.py
+---------------------------
+Nearest-neighbour retrieval of approved fallback clauses from a precedent
+library, using the project's TF-IDF representation
+(src/model_training/feature_extractor.build_vectorizer).
+
+The library is vectorized once into an L2-normalized sparse matrix. All
+risky clauses of a document are then matched in one batched sparse
+product, so cosine similarity is a single Q @ L.T. An optional
+approximate mode hashes library rows with random-projection LSH and
+scores only the candidates sharing a bucket with the query, which keeps
+latency flat as the library grows past a million clauses.
+"""
+
+import csv
+import os
+import sys
+from typing import Dict, List, Optional
+
+import numpy as np
+from sklearn.preprocessing import normalize
+
+# Allow importing from src/ even when running from the project root
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.model_training.feature_extractor import build_vectorizer
+from app_config import PRECEDENT_LIBRARY_PATH, PRECEDENT_TOP_K, PRECEDENT_MIN_SIMILARITY
+
+# Target number of library clauses per LSH bucket in approximate mode
+LSH_BUCKET_SIZE = 64
+
+
+class PrecedentLibrary:
+    """
+    TF-IDF cosine nearest-neighbour index over precedent clauses.
+
+    Args:
+        precedents: List of dicts with at least "text"; other keys (title,
+            category, source) are passed through on matches.
+        approximate: Use random-projection LSH candidate generation instead
+            of scoring every library clause.
+        n_tables: Number of LSH hash tables (approximate mode).
+        n_bits: Hyperplanes per table (approximate mode). By default this is
+            sized so that buckets hold about LSH_BUCKET_SIZE clauses, which
+            keeps the candidate count, and so latency, constant as the
+            library grows.
+        random_state: Seed for the random projections.
+    """
+
+    def __init__(
+        self,
+        precedents: List[Dict],
+        approximate: bool = False,
+        n_tables: int = 16,
+        n_bits: Optional[int] = None,
+        random_state: int = 42,
+    ) -> None:
+        if not precedents:
+            raise ValueError("Precedent library is empty.")
+        self.precedents = precedents
+        self.vectorizer = build_vectorizer()
+        matrix = self.vectorizer.fit_transform([p["text"] for p in precedents])
+        self.matrix = normalize(matrix.astype(np.float32), norm="l2", copy=False).tocsr()
+
+        self.approximate = approximate
+        self.n_tables = n_tables
+        self.n_bits = n_bits or max(1, int(np.ceil(np.log2(max(len(precedents), 2) / LSH_BUCKET_SIZE))))
+        if approximate:
+            rng = np.random.default_rng(random_state)
+            n_features = self.matrix.shape[1]
+            self._planes = rng.standard_normal(
+                (n_features, n_tables * self.n_bits)
+            ).astype(np.float32)
+            self._buckets = self._build_buckets(self._hash(self.matrix))
+
+    # ------------------------------------------------------------------
+    # LSH helpers
+    # ------------------------------------------------------------------
+    def _hash(self, vectors) -> np.ndarray:
+        """Returns (n_rows, n_tables) integer bucket codes."""
+        bits = np.asarray(vectors @ self._planes) > 0
+        bits = bits.reshape(bits.shape[0], self.n_tables, self.n_bits)
+        weights = (1 << np.arange(self.n_bits)).astype(np.int64)
+        return (bits * weights).sum(axis=2)
+
+    def _build_buckets(self, codes: np.ndarray) -> List[Dict[int, np.ndarray]]:
+        buckets = []
+        for t in range(self.n_tables):
+            order = np.argsort(codes[:, t], kind="stable")
+            sorted_codes = codes[order, t]
+            starts = np.flatnonzero(np.r_[True, sorted_codes[1:] != sorted_codes[:-1]])
+            ends = np.r_[starts[1:], len(order)]
+            buckets.append({
+                int(sorted_codes[s]): order[s:e] for s, e in zip(starts, ends)
+            })
+        return buckets
+
+    # ------------------------------------------------------------------
+    # Querying
+    # ------------------------------------------------------------------
+    def match(
+        self,
+        texts: List[str],
+        k: int = PRECEDENT_TOP_K,
+        min_similarity: float = PRECEDENT_MIN_SIMILARITY,
+    ) -> List[List[Dict]]:
+        """
+        Finds the k most similar precedents for each query text.
+
+        Args:
+            texts: Clause texts to match (typically a document's risky clauses).
+            k: Matches per query.
+            min_similarity: Drop matches below this cosine similarity.
+
+        Returns:
+            One list per query of precedent dicts with an added "similarity".
+        """
+        if not texts:
+            return []
+        queries = normalize(
+            self.vectorizer.transform(texts).astype(np.float32), norm="l2", copy=False
+        ).tocsr()
+
+        if self.approximate:
+            return self._match_approximate(queries, k, min_similarity)
+
+        # One batched sparse product for the whole document
+        sims = (queries @ self.matrix.T).tocsr()
+        results = []
+        for row in range(sims.shape[0]):
+            start, end = sims.indptr[row], sims.indptr[row + 1]
+            cols, vals = sims.indices[start:end], sims.data[start:end]
+            results.append(self._top_k(cols, vals, k, min_similarity))
+        return results
+
+    def _match_approximate(self, queries, k, min_similarity) -> List[List[Dict]]:
+        codes = self._hash(queries)
+        # Multi-probe: the query's own bucket plus every bucket one bit away
+        probes = [0] + [1 << b for b in range(self.n_bits)]
+        results = []
+        for row in range(queries.shape[0]):
+            parts = [
+                self._buckets[t].get(int(codes[row, t]) ^ flip)
+                for t in range(self.n_tables)
+                for flip in probes
+            ]
+            parts = [p for p in parts if p is not None]
+            if not parts:
+                results.append([])
+                continue
+            candidates = np.unique(np.concatenate(parts))
+            vals = np.asarray((self.matrix[candidates] @ queries[row].T).todense()).ravel()
+            results.append(self._top_k(candidates, vals, k, min_similarity))
+        return results
+
+    def _top_k(self, cols, vals, k, min_similarity) -> List[Dict]:
+        keep = vals >= min_similarity
+        cols, vals = cols[keep], vals[keep]
+        if len(vals) > k:
+            top = np.argpartition(-vals, k - 1)[:k]
+            cols, vals = cols[top], vals[top]
+        order = np.argsort(-vals, kind="stable")
+        return [
+            {**self.precedents[int(cols[i])], "similarity": round(float(vals[i]), 3)}
+            for i in order
+        ]
+
+
+def load_precedents(path: Optional[str] = None) -> List[Dict]:
+    """
+    Reads a precedent library CSV with columns clause_text, title, category.
+
+    Returns:
+        List of precedent dicts (text, title, category), or [] if the file
+        does not exist.
+    """
+    path = path or PRECEDENT_LIBRARY_PATH
+    if not os.path.exists(path):
+        return []
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        return [
+            {
+                "text": row["clause_text"],
+                "title": row.get("title", ""),
+                "category": row.get("category", ""),
+            }
+            for row in csv.DictReader(f)
+            if row.get("clause_text")
+        ]
+
+
+def match_risky_clauses(library: PrecedentLibrary, analyzed_clauses: List[Dict]) -> Dict[int, List[Dict]]:
+    """
+    Matches every risky clause of a document against the library in one batch.
+
+    Returns:
+        dict mapping clause id -> list of precedent matches.
+    """
+    risky = [c for c in analyzed_clauses if c["label"] == "Risky"]
+    matches = library.match([c["text"] for c in risky])
+    return {c["id"]: m for c, m in zip(risky, matches) if m}
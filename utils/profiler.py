@@ -0,0 +1,306 @@
+"""
+utils/profiler.py
+------------------
+Per-stage CPU and memory profiling of the analysis pipeline.
+
+A PipelineProfiler wraps each pipeline stage (extraction, segmentation,
+scoring, summary) in profiler.stage(name) and collects:
+
+  - hotspots: the top-N functions per stage, from cProfile ("deterministic"
+    mode) or from stack samples ("sampling" mode, lower overhead);
+  - a collapsed-stack file (one "stage;frame;frame count" line per unique
+    stack) for flamegraph.pl, speedscope or inferno, always built from a
+    background stack sampler;
+  - with memory=True, allocation peaks per stage from tracemalloc and
+    the source lines that allocated the most. Tracing every allocation
+    makes the pipeline several times slower, so it is off by default and
+    the timings of a memory run are not representative.
+
+profile_document() runs the whole pipeline on one file under a profiler;
+profile_document.py is the command-line entry point and the Streamlit app
+exposes the same report behind its admin option.
+"""
+
+import contextlib
+import cProfile
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+from typing import Dict, List, Optional
+
+from utils.file_handler import extract_text_from_bytes
+from utils.clause_segmenter import segment_document
+from utils.risk_predictor import analyze_clauses, build_clause_index
+from utils.stats_aggregator import SummaryAggregator
+
+PROFILE_MODES = ("deterministic", "sampling")
+
+# Seconds between stack samples
+DEFAULT_SAMPLE_INTERVAL = 0.002
+
+# Deepest stack kept per sample
+MAX_STACK_DEPTH = 128
+
+
+class _StackSampler:
+    """Samples one thread's Python stack on a timer into collapsed-stack counts."""
+
+    def __init__(self, thread_id: int, interval: float) -> None:
+        self.thread_id = thread_id
+        self.interval = interval
+        self.counts: Counter = Counter()
+        self.stage: Optional[str] = None
+        self.root_code = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            stage = self.stage
+            if stage is None:
+                continue
+            frame = sys._current_frames().get(self.thread_id)
+            frames = []
+            while frame is not None and len(frames) < MAX_STACK_DEPTH:
+                if frame.f_code is self.root_code:
+                    break
+                code = frame.f_code
+                frames.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+                              .replace(";", ":"))
+                frame = frame.f_back
+            frames.append(stage)
+            self.counts[";".join(reversed(frames))] += 1
+
+
+class PipelineProfiler:
+    """
+    Collects per-stage profiles. Use as a context manager around the run and
+    wrap each stage in stage(name).
+
+    Args:
+        mode: "deterministic" (cProfile) or "sampling" hotspots.
+        top_n: Hotspots and allocation sites kept per stage.
+        interval: Stack sampling interval in seconds.
+        memory: Trace allocations (peaks and top allocation sites per
+            stage); slows the run down several times.
+    """
+
+    def __init__(self, mode: str = "deterministic", top_n: int = 20,
+                 interval: float = DEFAULT_SAMPLE_INTERVAL, memory: bool = False) -> None:
+        if mode not in PROFILE_MODES:
+            raise ValueError(f"Unknown profile mode: {mode!r} (expected one of {', '.join(PROFILE_MODES)})")
+        self.mode = mode
+        self.top_n = top_n
+        self.memory = memory
+        self.sampler = _StackSampler(threading.get_ident(), interval)
+        self.stages: List[Dict] = []
+        self._own_tracemalloc = False
+        self._started = 0.0
+        self.total_s = 0.0
+
+    def __enter__(self) -> "PipelineProfiler":
+        if self.memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._own_tracemalloc = True
+        self.sampler.start()
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.total_s = time.perf_counter() - self._started
+        self.sampler.stop()
+        if self._own_tracemalloc:
+            tracemalloc.stop()
+
+    @contextmanager
+    def stage(self, name: str):
+        """Profiles the enclosed block as one pipeline stage."""
+        profile = cProfile.Profile() if self.mode == "deterministic" else None
+        before = base_mem = None
+        if self.memory:
+            before = tracemalloc.take_snapshot()
+            base_mem = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+        sample_base = sum(n for k, n in self.sampler.counts.items() if k.split(";", 1)[0] == name)
+
+        self.sampler.root_code = sys._getframe(2).f_code
+        self.sampler.stage = name
+        wall, cpu = time.perf_counter(), time.process_time()
+        if profile is not None:
+            profile.enable()
+        try:
+            yield
+        finally:
+            if profile is not None:
+                profile.disable()
+            wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+            self.sampler.stage = None
+            current, peak = tracemalloc.get_traced_memory() if self.memory else (None, None)
+
+            samples = sum(n for k, n in self.sampler.counts.items() if k.split(";", 1)[0] == name) - sample_base
+            self.stages.append({
+                "stage": name,
+                "wall_s": round(wall, 4),
+                "cpu_s": round(cpu, 4),
+                "samples": samples,
+                "peak_alloc_mb": round((peak - base_mem) / 1024 ** 2, 3) if self.memory else None,
+                "net_alloc_mb": round((current - base_mem) / 1024 ** 2, 3) if self.memory else None,
+                "hotspots": (_cprofile_hotspots(profile, self.top_n) if profile is not None
+                             else _sampled_hotspots(self.sampler.counts, name, self.top_n)),
+                "allocations": (_allocation_sites(before, tracemalloc.take_snapshot(), self.top_n)
+                                if self.memory else []),
+            })
+
+    # ------------------------------------------------------------------
+    # Output
+    # ------------------------------------------------------------------
+    def report(self) -> Dict:
+        """Returns the profile as a JSON-serializable dict."""
+        return {
+            "mode": self.mode,
+            "memory": self.memory,
+            "total_s": round(self.total_s, 4),
+            "sample_interval_s": self.sampler.interval,
+            "stages": self.stages,
+        }
+
+    def collapsed_stacks(self) -> str:
+        """Returns the samples in collapsed-stack ("a;b;c count") format."""
+        return "".join(f"{stack} {count}\n" for stack, count in sorted(self.sampler.counts.items()))
+
+    def write_collapsed(self, path: str) -> None:
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(self.collapsed_stacks())
+
+
+def maybe_stage(profiler: Optional[PipelineProfiler], name: str):
+    """profiler.stage(name), or a no-op context when profiling is off."""
+    return profiler.stage(name) if profiler is not None else nullcontext()
+
+
+# ---------------------------------------------------------------------------
+# Hotspot / allocation tables
+# ---------------------------------------------------------------------------
+def _cprofile_hotspots(profile: cProfile.Profile, top_n: int) -> List[Dict]:
+    stats = pstats.Stats(profile)
+    rows = []
+    for (filename, line, func), (cc, nc, tt, ct, _) in stats.stats.items():
+        if filename in (__file__, contextlib.__file__):
+            continue  # the profiler's own stage() bookkeeping
+        rows.append({
+            "function": func,
+            "location": f"{os.path.basename(filename)}:{line}",
+            "calls": nc,
+            "self_s": round(tt, 4),
+            "cumulative_s": round(ct, 4),
+        })
+    rows.sort(key=lambda r: r["self_s"], reverse=True)
+    return rows[:top_n]
+
+
+def _sampled_hotspots(counts: Counter, stage: str, top_n: int) -> List[Dict]:
+    self_counts: Counter = Counter()
+    total_counts: Counter = Counter()
+    for stack, n in counts.items():
+        frames = stack.split(";")
+        if frames[0] != stage or len(frames) < 2:
+            continue
+        self_counts[frames[-1]] += n
+        for frame in set(frames[1:]):
+            total_counts[frame] += n
+    rows = []
+    for frame, n in self_counts.most_common(top_n):
+        func, _, location = frame.partition(" (")
+        rows.append({
+            "function": func,
+            "location": location.rstrip(")"),
+            "self_samples": n,
+            "total_samples": total_counts[frame],
+        })
+    return rows
+
+
+def _allocation_sites(before, after, top_n: int) -> List[Dict]:
+    # Compare unfiltered snapshots (filter_traces is pure Python and costs
+    # far more than the stages) and drop the profiler's own lines afterwards
+    own_files = (tracemalloc.__file__, __file__)
+    rows = []
+    for d in after.compare_to(before, "lineno"):
+        if len(rows) == top_n:
+            break
+        frame = d.traceback[0]
+        if d.size_diff <= 0 or frame.filename in own_files:
+            continue
+        rows.append({
+            "location": f"{os.path.basename(frame.filename)}:{frame.lineno}",
+            "size_kb": round(d.size_diff / 1024, 1),
+            "count": d.count_diff,
+        })
+    return rows
+
+
+def format_report(report: Dict, top_n: int = 10) -> str:
+    """Renders a profile report as plain text (stage table + hotspots)."""
+    lines = [f"Profile ({report['mode']}), total {report['total_s']:.3f}s", "",
+             f"{'Stage':<14} {'Wall s':>8} {'CPU s':>8} {'Peak MB':>9} {'Net MB':>8}"]
+    for s in report["stages"]:
+        if s["peak_alloc_mb"] is None:
+            memory = f"{'—':>9} {'—':>8}"
+        else:
+            memory = f"{s['peak_alloc_mb']:>9.2f} {s['net_alloc_mb']:>8.2f}"
+        lines.append(f"{s['stage']:<14} {s['wall_s']:>8.3f} {s['cpu_s']:>8.3f} {memory}")
+    for s in report["stages"]:
+        lines.append(f"\n[{s['stage']}] top {min(top_n, len(s['hotspots']))} hotspots")
+        for h in s["hotspots"][:top_n]:
+            if "self_s" in h:
+                lines.append(f"  {h['self_s']:>8.4f}s self {h['cumulative_s']:>8.4f}s cum "
+                             f"{h['calls']:>8} calls  {h['function']} ({h['location']})")
+            else:
+                lines.append(f"  {h['self_samples']:>6} self {h['total_samples']:>6} total samples  "
+                             f"{h['function']} ({h['location']})")
+        if s["allocations"]:
+            lines.append("  largest allocations:")
+            for a in s["allocations"][:min(top_n, 5)]:
+                lines.append(f"  {a['size_kb']:>10.1f} KB {a['count']:>8} blocks  {a['location']}")
+    return "\n".join(lines)
+
+
+# ---------------------------------------------------------------------------
+# Whole-pipeline entry point
+# ---------------------------------------------------------------------------
+def profile_document(name: str, raw_bytes: bytes, mode: str = "deterministic",
+                     top_n: int = 20, interval: float = DEFAULT_SAMPLE_INTERVAL,
+                     memory: bool = False):
+    """
+    Runs extraction → segmentation → scoring → summary on one file under
+    a PipelineProfiler.
+
+    Returns:
+        (profiler, result) where result has analyzed, stats and index.
+    """
+    with PipelineProfiler(mode, top_n=top_n, interval=interval, memory=memory) as profiler:
+        with profiler.stage("extraction"):
+            text = extract_text_from_bytes(name, raw_bytes)
+        if not text or not text.strip():
+            raise ValueError("Could not extract any text from the document.")
+        with profiler.stage("segmentation"):
+            clauses = segment_document(text)
+        aggregator = SummaryAggregator()
+        with profiler.stage("scoring"):
+            analyzed = analyze_clauses(clauses, aggregator=aggregator)
+        with profiler.stage("summary"):
+            stats = aggregator.summary()
+            index = build_clause_index(analyzed)
+    return profiler, {"analyzed": analyzed, "stats": stats, "index": index}
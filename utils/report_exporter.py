@@ -0,0 +1,360 @@
+"""
+utils/report_exporter.py
+-------------------------
+Streaming export of per-clause results and summary stats as JSON Lines,
+CSV, HTML or Parquet.
+
+Every writer consumes clauses one at a time and keeps only a running
+SummaryAggregator (plus one row group for Parquet), so a 10k-clause report
+starts downloading immediately and a batch run can write multi-GB outputs
+in constant memory. Several documents can be written to one report; each
+clause row carries its document name.
+
+Usage:
+    with open_report("report.html", title="NDA v2") as report:
+        report.write_document(analyzed, document="nda_v2.pdf")
+    # summary stats are appended on close
+"""
+
+import csv
+import html
+import json
+import os
+import tempfile
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, Optional, TextIO
+
+from utils.stats_aggregator import SummaryAggregator
+
+# Clauses per Parquet row group (bounds writer memory)
+PARQUET_BATCH_SIZE = 10_000
+
+# Downloads spill from memory to a temp file above this size
+SPOOL_MAX_BYTES = 8 * 1024 * 1024
+
+CLAUSE_COLUMNS = ["document", "id", "label", "confidence", "word_count",
+                  "categories", "matched_keywords", "text"]
+
+EXPORT_FORMATS: Dict[str, Dict[str, str]] = {
+    "jsonl":   {"extension": ".jsonl",   "mime": "application/x-ndjson"},
+    "csv":     {"extension": ".csv",     "mime": "text/csv"},
+    "html":    {"extension": ".html",    "mime": "text/html"},
+    "parquet": {"extension": ".parquet", "mime": "application/vnd.apache.parquet"},
+}
+
+
+def parquet_available() -> bool:
+    """True if pyarrow is installed (Parquet export is optional)."""
+    try:
+        import pyarrow.parquet  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+# ---------------------------------------------------------------------------
+# Writers
+# ---------------------------------------------------------------------------
+class ReportWriter:
+    """
+    Base class: subclasses write one clause at a time and the summary on close.
+
+    Args:
+        out: Text stream (binary for Parquet) the report is written to.
+        title: Report title (HTML only).
+        stats: Summary stats to emit; when omitted they are aggregated from
+            the clauses as they stream past.
+    """
+
+    def __init__(self, out, title: Optional[str] = None, stats: Optional[Dict] = None) -> None:
+        self.out = out
+        self.title = title or "Contract Risk Report"
+        self.stats = stats
+        self.aggregator = SummaryAggregator()
+        self.closed = False
+
+    def write_clause(self, clause: Dict, document: Optional[str] = None) -> None:
+        self.aggregator.update(clause)
+        self._write_clause(clause, document)
+
+    def write_document(self, clauses: Iterable[Dict], document: Optional[str] = None) -> None:
+        for clause in clauses:
+            self.write_clause(clause, document)
+
+    def summary(self) -> Dict:
+        return self.stats if self.stats is not None else self.aggregator.summary()
+
+    def close(self) -> None:
+        if not self.closed:
+            self._write_summary(self.summary())
+            self.closed = True
+
+    def __enter__(self) -> "ReportWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _write_clause(self, clause: Dict, document: Optional[str]) -> None:
+        raise NotImplementedError
+
+    def _write_summary(self, summary: Dict) -> None:
+        raise NotImplementedError
+
+
+class JsonlReportWriter(ReportWriter):
+    """One {"record": "clause", ...} line per clause, then one summary line."""
+
+    def _write_clause(self, clause, document):
+        record = {"record": "clause", "document": document, **clause}
+        self.out.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    def _write_summary(self, summary):
+        self.out.write(json.dumps({"record": "summary", **summary}, ensure_ascii=False) + "\n")
+
+
+class CsvReportWriter(ReportWriter):
+    """
+    One row per clause (lists joined with "; "). CSV has room for a single
+    table, so the summary goes to summary_out when given.
+    """
+
+    def __init__(self, out, title=None, stats=None, summary_out: Optional[TextIO] = None) -> None:
+        super().__init__(out, title, stats)
+        self.summary_out = summary_out
+        self.writer = csv.writer(out)
+        self.writer.writerow(CLAUSE_COLUMNS)
+
+    def _write_clause(self, clause, document):
+        self.writer.writerow([
+            document or "", clause["id"], clause["label"], clause["confidence"],
+            clause.get("word_count", ""), "; ".join(clause["categories"]),
+            "; ".join(clause["matched_keywords"]), clause["text"],
+        ])
+
+    def _write_summary(self, summary):
+        if self.summary_out is not None:
+            write_summary_csv(summary, self.summary_out)
+
+
+class HtmlReportWriter(ReportWriter):
+    """
+    Self-contained HTML report using the app's card styling. KPI tiles go at
+    the top when stats are known up front, otherwise after the clauses.
+    """
+
+    def __init__(self, out, title=None, stats=None) -> None:
+        super().__init__(out, title, stats)
+        # Imported here so JSONL / CSV / Parquet exports don't need Streamlit
+        from components.result_display import card_styles_css, risky_clause_html, safe_clause_html
+        from app_config import COLOUR
+
+        self._risky_html = risky_clause_html
+        self._safe_html = safe_clause_html
+        self._colour = COLOUR
+        self._document = None
+        self.out.write(
+            f"<!DOCTYPE html>\n<html><head><meta charset=\"utf-8\">"
+            f"<title>{html.escape(self.title)}</title>{card_styles_css()}"
+            f"<style>body{{background:{COLOUR['bg_dark']};color:{COLOUR['text_primary']};"
+            f"font-family:sans-serif;max-width:960px;margin:32px auto;padding:0 16px;}}"
+            f".kpi-row{{display:flex;gap:16px;margin-bottom:24px;}}.kpi-row .kpi-tile{{flex:1;}}</style>"
+            f"</head><body>\n<h1>{html.escape(self.title)}</h1>\n"
+        )
+        if stats is not None:
+            self.out.write(self._summary_html(stats))
+
+    def _write_clause(self, clause, document):
+        if document and document != self._document:
+            self.out.write(f"<h2>{html.escape(document)}</h2>\n")
+            self._document = document
+        escaped = {**clause, "text": html.escape(clause["text"])}
+        card = self._risky_html(escaped) if clause["label"] == "Risky" else self._safe_html(escaped)
+        self.out.write(card)
+
+    def _write_summary(self, summary):
+        if self.stats is None:
+            self.out.write(self._summary_html(summary))
+        self.out.write("</body></html>\n")
+
+    def _summary_html(self, stats: Dict) -> str:
+        colour = self._colour
+        tiles = [
+            (stats["total"], "Total Clauses", colour["accent_light"]),
+            (stats["risky_count"], "⚠️ Risky Clauses", colour["border_risky"]),
+            (stats["safe_count"], "✅ Safe Clauses", colour["border_safe"]),
+            (f"{stats['risk_percentage']}%", "Risk Level", "#F5A623"),
+        ]
+        tiles_html = "".join(
+            f'<div class="kpi-tile"><div class="kpi-value" style="color:{c};">{v}</div>'
+            f'<div class="kpi-label">{label}</div></div>'
+            for v, label, c in tiles
+        )
+        chips = "".join(
+            f'<span class="cat-chip" style="font-size:12px;padding:4px 10px;">'
+            f'{html.escape(cat)} · {count}</span>'
+            for cat, count in (stats.get("by_category") or {}).items()
+        )
+        return f'<div class="kpi-row">{tiles_html}</div><div style="margin-bottom:24px;">{chips}</div>\n'
+
+
+class ParquetReportWriter(ReportWriter):
+    """
+    Parquet file written one row group at a time; the summary is stored as
+    JSON in the file's key-value metadata under "summary". Requires pyarrow.
+    """
+
+    def __init__(self, out, title=None, stats=None, batch_size: int = PARQUET_BATCH_SIZE) -> None:
+        super().__init__(out, title, stats)
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        self._pa = pa
+        self.batch_size = max(1, batch_size)
+        self.schema = pa.schema([
+            ("document", pa.string()),
+            ("id", pa.int32()),
+            ("label", pa.string()),
+            ("confidence", pa.float64()),
+            ("word_count", pa.int32()),
+            ("categories", pa.list_(pa.string())),
+            ("matched_keywords", pa.list_(pa.string())),
+            ("text", pa.large_string()),
+        ])
+        self.writer = pq.ParquetWriter(out, self.schema)
+        self._batch = {name: [] for name in self.schema.names}
+
+    def _write_clause(self, clause, document):
+        batch = self._batch
+        batch["document"].append(document)
+        batch["id"].append(clause["id"])
+        batch["label"].append(clause["label"])
+        batch["confidence"].append(clause["confidence"])
+        batch["word_count"].append(clause.get("word_count"))
+        batch["categories"].append(list(clause["categories"]))
+        batch["matched_keywords"].append(list(clause["matched_keywords"]))
+        batch["text"].append(clause["text"])
+        if len(batch["id"]) >= self.batch_size:
+            self._flush()
+
+    def _flush(self):
+        if self._batch["id"]:
+            self.writer.write_table(self._pa.table(self._batch, schema=self.schema))
+            self._batch = {name: [] for name in self.schema.names}
+
+    def _write_summary(self, summary):
+        self._flush()
+        self.writer.add_key_value_metadata({"summary": json.dumps(summary)})
+        self.writer.close()
+
+
+_WRITERS = {
+    "jsonl": JsonlReportWriter,
+    "csv": CsvReportWriter,
+    "html": HtmlReportWriter,
+    "parquet": ParquetReportWriter,
+}
+
+
+# ---------------------------------------------------------------------------
+# Helpers
+# ---------------------------------------------------------------------------
+def write_summary_csv(stats: Dict, out: TextIO) -> None:
+    """Writes summary stats as metric,value rows (categories / keywords included)."""
+    writer = csv.writer(out)
+    writer.writerow(["metric", "value"])
+    for key in ("total", "risky_count", "safe_count", "risk_percentage"):
+        writer.writerow([key, stats[key]])
+    for cat, count in (stats.get("by_category") or {}).items():
+        writer.writerow([f"category:{cat}", count])
+    for kw, count in (stats.get("by_keyword") or {}).items():
+        writer.writerow([f"keyword:{kw}", count])
+
+
+def format_for_path(path: str) -> str:
+    """Infers the export format from a file extension."""
+    ext = os.path.splitext(path)[1].lower()
+    for fmt, info in EXPORT_FORMATS.items():
+        if info["extension"] == ext:
+            return fmt
+    raise ValueError(f"Unsupported export format: {ext or path!r} "
+                     f"(expected one of {', '.join(EXPORT_FORMATS)})")
+
+
+@contextmanager
+def open_report(path: str, fmt: Optional[str] = None, title: Optional[str] = None,
+                stats: Optional[Dict] = None) -> Iterator[ReportWriter]:
+    """
+    Opens path and yields the matching ReportWriter; the summary is written
+    and the file closed on exit. CSV reports also write <name>.summary.csv.
+
+    Args:
+        path: Output file; the format is taken from its extension unless
+            fmt is given.
+        fmt: One of EXPORT_FORMATS.
+        title: Report title (HTML only).
+        stats: Summary stats, if already known.
+    """
+    fmt = fmt or format_for_path(path)
+    if fmt not in _WRITERS:
+        raise ValueError(f"Unsupported export format: {fmt!r}")
+    out_dir = os.path.dirname(path)
+    if out_dir:
+        os.makedirs(out_dir, exist_ok=True)
+
+    if fmt == "parquet":
+        with ParquetReportWriter(path, title, stats) as writer:
+            yield writer
+        return
+
+    with open(path, "w", encoding="utf-8", newline="") as out:
+        if fmt == "csv":
+            summary_path = os.path.splitext(path)[0] + ".summary.csv"
+            with open(summary_path, "w", encoding="utf-8", newline="") as summary_out:
+                with CsvReportWriter(out, title, stats, summary_out=summary_out) as writer:
+                    yield writer
+        else:
+            with _WRITERS[fmt](out, title, stats) as writer:
+                yield writer
+
+
+def export_to_buffer(fmt: str, clauses: Iterable[Dict], stats: Optional[Dict] = None,
+                     document: Optional[str] = None, title: Optional[str] = None):
+    """
+    Streams a single-document report into a spooled temporary file (memory
+    up to SPOOL_MAX_BYTES, disk beyond) and returns it rewound, ready to
+    hand to a download. fmt may also be "summary_csv".
+    """
+    spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_BYTES)
+    if fmt == "parquet":
+        with ParquetReportWriter(spool, title, stats) as writer:
+            writer.write_document(clauses, document)
+        spool.seek(0)
+        return spool
+
+    text = _TextSpool(spool)
+    if fmt == "summary_csv":
+        write_summary_csv(stats if stats is not None else _aggregate(clauses), text)
+    else:
+        with _WRITERS[fmt](text, title, stats) as writer:
+            writer.write_document(clauses, document)
+    spool.seek(0)
+    return spool
+
+
+class _TextSpool:
+    """Minimal text adapter that UTF-8 encodes writes into a binary spool."""
+
+    def __init__(self, raw) -> None:
+        self.raw = raw
+
+    def write(self, s: str) -> int:
+        self.raw.write(s.encode("utf-8"))
+        return len(s)
+
+
+def _aggregate(clauses: Iterable[Dict]) -> Dict:
+    aggregator = SummaryAggregator()
+    for clause in clauses:
+        aggregator.update(clause)
+    return aggregator.summary()
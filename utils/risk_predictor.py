@@ -6,14 +6,16 @@ Uses keyword matching against a curated list of risky legal terms.
 In a production system, this would be replaced by a trained ML model.
 """
 
-import re
-from typing import Dict, List
+from typing import Dict, List, Optional, Tuple
 from app_config import (
     RISK_KEYWORDS,
     RISK_KEYWORD_THRESHOLD,
     BASE_RISKY_CONFIDENCE,
     SAFE_CONFIDENCE,
 )
+from utils.stats_aggregator import SummaryAggregator
+from utils.clause_table import ClauseTable
+from utils.tokenizer import TokenizedClause, split_phrase, tokens_of
 
 # ---------------------------------------------------------------------------
 # Risk category mapping for richer UI context
@@ -65,27 +67,32 @@ _CATEGORY_MAP: Dict[str, str] = {
 }
 
 
-def predict_clause_risk(clause: Dict) -> Dict:
-    """
-    Predicts whether a single clause is Risky or Safe.
+# Keywords split into words and separators once; single-word keywords are
+# matched by set intersection with the clause's tokens, phrases by their
+# first word and then in sequence (same matches as r"\bkeyword\b")
+_KEYWORD_RANK = {kw: i for i, kw in enumerate(RISK_KEYWORDS)}
+_SINGLE_WORD_KEYWORDS = frozenset(kw for kw in RISK_KEYWORDS if len(split_phrase(kw)[0]) == 1)
+_PHRASES_BY_FIRST_WORD: Dict[str, List[Tuple[str, Tuple[str, ...], Tuple[str, ...]]]] = {}
+for _kw in RISK_KEYWORDS:
+    _words, _separators = split_phrase(_kw)
+    if len(_words) > 1:
+        _PHRASES_BY_FIRST_WORD.setdefault(_words[0], []).append((_kw, _words, _separators))
 
-    Args:
-        clause (Dict): A clause dict with at least a 'text' key.
 
-    Returns:
-        The input dict augmented with:
-            - label           (str)  : "Risky" or "Safe"
-            - confidence      (float): prediction confidence score 0–1
-            - matched_keywords (list): keywords found in the clause
-            - categories      (list): risk categories from matched keywords
-    """
-    text_lower = clause["text"].lower()
-    matched = []
+def match_keywords(tokenized: TokenizedClause) -> List[str]:
+    """RISK_KEYWORDS found in a tokenized clause, in RISK_KEYWORDS order."""
+    token_set = tokenized.token_set
+    found = set(token_set & _SINGLE_WORD_KEYWORDS)
+    for first in token_set.intersection(_PHRASES_BY_FIRST_WORD):
+        for keyword, words, separators in _PHRASES_BY_FIRST_WORD[first]:
+            if token_set.issuperset(words) and tokenized.has_phrase(words, separators):
+                found.add(keyword)
+    return sorted(found, key=_KEYWORD_RANK.__getitem__)
+
 
-    for keyword in RISK_KEYWORDS:
-        pattern = r"\b" + re.escape(keyword) + r"\b"
-        if re.search(pattern, text_lower):
-            matched.append(keyword)
+def _score_tokens(tokenized: TokenizedClause) -> Tuple[str, float, List[str], List[str]]:
+    """Returns (label, confidence, matched_keywords, categories) for a tokenized clause."""
+    matched = match_keywords(tokenized)
 
     is_risky = len(matched) >= RISK_KEYWORD_THRESHOLD
 
@@ -103,44 +110,222 @@ def predict_clause_risk(clause: Dict) -> Dict:
             _CATEGORY_MAP.get(kw, "General Risk") for kw in matched
         )
     )
+    return label, confidence, matched, categories
 
-    return {
+
+def predict_clause_risk(clause: Dict, tokenized: Optional[TokenizedClause] = None) -> Dict:
+    """
+    Predicts whether a single clause is Risky or Safe.
+
+    Args:
+        clause (Dict): A clause dict with at least a 'text' key; its
+            'tokens' (from segment_document) are used when present.
+        tokenized: The clause's TokenizedClause, if the caller has it.
+
+    Returns:
+        The input dict (without 'tokens' and 'span') augmented with:
+            - label           (str)  : "Risky" or "Safe"
+            - confidence      (float): prediction confidence score 0–1
+            - matched_keywords (list): keywords found in the clause
+            - categories      (list): risk categories from matched keywords
+    """
+    label, confidence, matched, categories = _score_tokens(tokenized or tokens_of(clause))
+    result = {
         **clause,
         "label": label,
         "confidence": confidence,
         "matched_keywords": matched,
         "categories": categories,
     }
+    result.pop("tokens", None)
+    result.pop("span", None)
+    return result
+
+
+def apply_model_labels(analyzed: List[Dict], model,
+                       tokenized: Optional[List[TokenizedClause]] = None) -> List[Dict]:
+    """
+    Replaces label, confidence and categories with a learned model's
+    prediction. All clauses are vectorized once and scored in one batch.
+
+    Risky clauses get the model's categories when it has a category model
+    (falling back to the keyword categories if none pass the threshold),
+    otherwise the keyword categories; Safe clauses get none. Matched
+    keywords are kept.
+
+    Args:
+        analyzed: Output of predict_clause_risk() / analyze_clauses().
+        model: A model_registry.PublishedModel.
+        tokenized: TokenizedClause of each clause, reused for featurization
+            (default: the clause texts are tokenized again).
+    """
+    probabilities, learned = model.score(tokenized or [c["text"] for c in analyzed])
+    for i, (clause, p_risky) in enumerate(zip(analyzed, probabilities)):
+        clause["label"] = "Risky" if p_risky >= 0.5 else "Safe"
+        clause["confidence"] = round(max(p_risky, 1.0 - p_risky), 3)
+        if clause["label"] == "Safe":
+            clause["categories"] = []
+        elif learned is not None and learned[i]:
+            clause["categories"] = learned[i]
+        elif not clause["categories"]:
+            clause["categories"] = ["General Risk"]
+    return analyzed
 
 
-def analyze_clauses(clauses: List[Dict]) -> List[Dict]:
+def analyze_clauses(
+    clauses: List[Dict], aggregator: Optional[SummaryAggregator] = None, model=None
+) -> List[Dict]:
     """
     Runs risk prediction on a list of clause dicts.
 
     Args:
         clauses (List[Dict]): Output from clause_segmenter.segment_document()
+        aggregator: Optional SummaryAggregator updated as each clause is
+            scored, so summary stats need no second pass.
+        model: Optional model_registry.PublishedModel; when given it decides
+            label and confidence instead of the keyword rule.
 
     Returns:
         List of clause dicts with risk prediction fields added.
     """
-    return [predict_clause_risk(c) for c in clauses]
+    if model is not None:
+        tokenized = [tokens_of(c) for c in clauses]
+        analyzed = apply_model_labels([predict_clause_risk(c, t) for c, t in zip(clauses, tokenized)],
+                                      model, tokenized)
+        if aggregator is not None:
+            for result in analyzed:
+                aggregator.update(result)
+        return analyzed
+
+    if aggregator is None:
+        return [predict_clause_risk(c) for c in clauses]
+
+    analyzed = []
+    for c in clauses:
+        result = predict_clause_risk(c)
+        aggregator.update(result)
+        analyzed.append(result)
+    return analyzed
+
+
+def analyze_clauses_table(
+    clauses: List[Dict], aggregator: Optional[SummaryAggregator] = None
+) -> ClauseTable:
+    """
+    Same as analyze_clauses(), but writes results straight into a compact
+    ClauseTable instead of building one dict per clause. Use this for large
+    batch runs; the table still reads like a list of clause dicts.
+
+    Args:
+        clauses (List[Dict]): Output from clause_segmenter.segment_document()
+        aggregator: Optional SummaryAggregator updated as each clause is scored.
+
+    Returns:
+        ClauseTable with one row per clause.
+    """
+    table = ClauseTable()
+    for c in clauses:
+        tokenized = tokens_of(c)
+        label, confidence, matched, categories = _score_tokens(tokenized)
+        word_count = c.get("word_count")
+        if word_count is None:
+            word_count = tokenized.word_count
+        table.append(c["id"], c["text"], word_count, label, confidence, matched, categories)
+        if aggregator is not None:
+            aggregator.update(table[-1])
+    return table
 
 
 def compute_summary_stats(analyzed_clauses: List[Dict]) -> Dict:
     """
     Computes summary statistics for display in KPI tiles.
 
+    Prefer passing a SummaryAggregator to analyze_clauses() and calling
+    its summary(); this helper is for lists analyzed elsewhere.
+
+    Returns:
+        dict with total, risky_count, safe_count, risk_percentage plus the
+        per-category / per-keyword breakdowns from SummaryAggregator.summary()
+    """
+    aggregator = SummaryAggregator()
+    for clause in analyzed_clauses:
+        aggregator.update(clause)
+    return aggregator.summary()
+
+
+def build_clause_index(analyzed_clauses: List[Dict]) -> Dict:
+    """
+    Builds a lookup index over an analyzed document in a single pass.
+
+    The index lets the results view pick out the clauses for a tab or
+    filter without rescanning the whole clause list on every rerun.
+
     Returns:
-        dict with total, risky_count, safe_count, risk_percentage
+        dict with:
+            - by_label    : label    -> list of clause ids
+            - by_category : category -> list of clause ids
+            - by_keyword  : keyword  -> list of clause ids
+            - position    : clause id -> position in analyzed_clauses
     """
-    total = len(analyzed_clauses)
-    risky = sum(1 for c in analyzed_clauses if c["label"] == "Risky")
-    safe = total - risky
-    risk_pct = round((risky / total * 100) if total > 0 else 0.0, 1)
+    by_label: Dict[str, List[int]] = {"Risky": [], "Safe": []}
+    by_category: Dict[str, List[int]] = {}
+    by_keyword: Dict[str, List[int]] = {}
+    position: Dict[int, int] = {}
+
+    for pos, clause in enumerate(analyzed_clauses):
+        cid = clause["id"]
+        position[cid] = pos
+        by_label.setdefault(clause["label"], []).append(cid)
+        for cat in clause["categories"]:
+            by_category.setdefault(cat, []).append(cid)
+        for kw in clause["matched_keywords"]:
+            by_keyword.setdefault(kw, []).append(cid)
 
     return {
-        "total": total,
-        "risky_count": risky,
-        "safe_count": safe,
-        "risk_percentage": risk_pct,
+        "by_label": by_label,
+        "by_category": by_category,
+        "by_keyword": by_keyword,
+        "position": position,
     }
+
+
+def select_clauses(
+    analyzed_clauses: List[Dict],
+    index: Dict,
+    label: Optional[str] = None,
+    categories: Optional[List[str]] = None,
+    keywords: Optional[List[str]] = None,
+) -> List[Dict]:
+    """
+    Returns the clauses matching a label and optional category / keyword
+    filters, in document order, using a prebuilt index.
+
+    Args:
+        analyzed_clauses: Full list from analyze_clauses()
+        index: Output of build_clause_index() for the same list
+        label: "Risky", "Safe" or None for all labels
+        categories: Keep clauses in any of these categories (None = no filter)
+        keywords: Keep clauses matching any of these keywords (None = no filter)
+
+    Returns:
+        List of analyzed clause dicts.
+    """
+    selected = None
+    if label is not None:
+        selected = set(index["by_label"].get(label, []))
+    if categories:
+        ids = set()
+        for cat in categories:
+            ids.update(index["by_category"].get(cat, []))
+        selected = ids if selected is None else selected & ids
+    if keywords:
+        ids = set()
+        for kw in keywords:
+            ids.update(index["by_keyword"].get(kw, []))
+        selected = ids if selected is None else selected & ids
+
+    if selected is None:
+        return analyzed_clauses
+
+    position = index["position"]
+    return [analyzed_clauses[position[cid]] for cid in sorted(selected, key=position.get)]
@@ -0,0 +1,693 @@
+"""
+utils/search_index.py
+----------------------
+BM25 full-text search over the clauses in the analysis history store.
+
+The index is a directory of immutable segments. Each segment holds:
+    - lexicon.json     : term -> [offset, doc_freq, max_weight] into the postings arrays
+    - postings_row.npy : uint32 segment-local row of each posting
+    - postings_tf.npy  : uint16 term frequency of each posting
+    - docs.npy         : per-row store id, document id, length, label, category bits
+    - meta.json        : segment categories (bit order) and totals
+
+Postings and doc tables are memory-mapped on load, so opening an index over
+millions of clauses costs little RAM and queries only touch the pages they
+need. New clauses from the store are appended as new segments
+(update_from_store); segments are compacted into one when too many pile up.
+
+Queries are scored term by term with MaxScore pruning, so a whole clause
+pasted as the query stays fast:
+
+  - very common terms are skipped and a long query keeps only its rarest
+    QUERY_MAX_TERMS terms;
+  - each term's contribution is bounded by its max_weight, the largest
+    BM25 term weight (before idf) among its postings at the segment's
+    average clause length (scaled up when the index's average is longer);
+  - terms are scored highest bound first, each over its full posting
+    list, until the bounds of the terms left add up to less than the k-th
+    best score so far. No other clause can reach the top k after that, so
+    the remaining terms are only looked up for the clauses still in the
+    running (binary search in the sorted posting lists).
+
+The result is the same top k as scoring the selected terms exhaustively.
+
+Several processes and sessions may update the same index. Updates take a
+lock file and start from the latest manifest; segments are written to a
+private temporary directory and renamed into place. An update that finds
+the lock taken is skipped: the writer holding it indexes the same store.
+The lock file holds a token per writer and is touched by a heartbeat
+while held; one left by a crashed writer is taken over once it goes
+stale, through an O_EXCL break marker so only one writer can win it (the
+same scheme as shard_runner's leases).
+"""
+
+import json
+import os
+import re
+import shutil
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app_config import ANALYSIS_STORE_PATH, SEARCH_INDEX_DIR
+
+# BM25 parameters
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Query term selection. Terms in more than QUERY_MAX_DF_SHARE of all
+# clauses (the, shall, and) are skipped unless nothing else is left, and
+# only the QUERY_MAX_TERMS rarest terms of a long query (a pasted clause)
+# are scored
+QUERY_MAX_DF_SHARE = 0.5
+QUERY_MAX_TERMS = 12
+
+# Rows of the rarest query term scored in full up front to seed pruning
+SEED_ROWS = 256
+
+# Compact into a single segment once this many segments exist
+MAX_SEGMENTS = 8
+
+# A write lock not touched for this long is left over from a crashed writer.
+# The holder touches it every LOCK_STALE_SECONDS / 3 while it works.
+LOCK_STALE_SECONDS = 600
+
+_TOKEN_RE = re.compile(r"\w+")
+_LABEL_CODES = {"Safe": 0, "Risky": 1}
+_DOCS_DTYPE = np.dtype([
+    ("store_id", "<i8"),
+    ("document_id", "<i8"),
+    ("length", "<u4"),
+    ("label", "u1"),
+    ("categories", "<u8"),
+])
+
+
+def index_dir_for(store_path: str) -> str:
+    """Returns the search index directory that belongs to a history store file."""
+    if os.path.abspath(store_path) == os.path.abspath(ANALYSIS_STORE_PATH):
+        return SEARCH_INDEX_DIR
+    return os.path.splitext(store_path)[0] + "_index"
+
+
+def tokenize(text: str) -> List[str]:
+    """Lower-cases and splits text into word tokens."""
+    return _TOKEN_RE.findall(text.lower())
+
+
+def _read_lock(path: str) -> Optional[str]:
+    """Returns the token in a lock file ("" for a lock without one), or None if there is no lock."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return f.read().strip()
+    except FileNotFoundError:
+        return None
+
+
+def _write_lock_temp(path: str, token: str) -> str:
+    tmp = f"{path}.{token}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(token)
+        f.flush()
+        os.fsync(f.fileno())
+    return tmp
+
+
+def _create_lock(path: str, token: str) -> bool:
+    """Creates the lock file holding token, only if there is none. Returns whether it was created."""
+    tmp = _write_lock_temp(path, token)
+    try:
+        os.link(tmp, path)
+        return True
+    except FileExistsError:
+        return False
+    finally:
+        os.remove(tmp)
+
+
+def _create_marker(path: str) -> bool:
+    try:
+        os.close(os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+        return True
+    except FileExistsError:
+        return False
+
+
+class _Segment:
+    """A single memory-mapped, immutable index segment."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        with open(os.path.join(path, "lexicon.json"), "r", encoding="utf-8") as f:
+            self.lexicon: Dict[str, List[int]] = json.load(f)
+        with open(os.path.join(path, "meta.json"), "r", encoding="utf-8") as f:
+            self.meta = json.load(f)
+        self.rows = np.load(os.path.join(path, "postings_row.npy"), mmap_mode="r")
+        self.tfs = np.load(os.path.join(path, "postings_tf.npy"), mmap_mode="r")
+        self.docs = np.load(os.path.join(path, "docs.npy"), mmap_mode="r")
+        self.category_bits = {cat: i for i, cat in enumerate(self.meta["categories"])}
+        self.avg_length = self.meta["total_length"] / max(1, self.meta["num_docs"]) or 1.0
+        self._norms = None
+
+    def postings(self, term: str):
+        entry = self.lexicon.get(term)
+        if entry is None:
+            return None, None
+        offset, df = entry[:2]
+        return self.rows[offset:offset + df], self.tfs[offset:offset + df]
+
+    def max_weight(self, term: str, avg_length: float) -> float:
+        """
+        Upper bound of the term's BM25 weight (before idf) in any row, for
+        the index's average length. The weight grows at most in proportion
+        to the average length, so a bound stored at the segment's own
+        average is scaled by the ratio when the index's is longer.
+        """
+        entry = self.lexicon[term]
+        if len(entry) < 3:
+            # Older segments: the weight's limit as tf grows
+            return BM25_K1 + 1
+        return entry[2] * max(1.0, avg_length / self.avg_length)
+
+    def norms(self, avg_length: float) -> np.ndarray:
+        """BM25 length normalisation of every row for the index's average length."""
+        if self._norms is None or self._norms[0] != avg_length:
+            lengths = np.asarray(self.docs["length"], dtype=np.float64)
+            self._norms = (avg_length, BM25_K1 * (1 - BM25_B + BM25_B * lengths / avg_length))
+        return self._norms[1]
+
+    def filter_mask(self, label: Optional[str], category: Optional[str]):
+        """Boolean mask over rows for the label / category filters (None = all)."""
+        mask = None
+        if label is not None:
+            mask = self.docs["label"] == _LABEL_CODES[label]
+        if category is not None:
+            bit = self.category_bits.get(category)
+            if bit is None:
+                return np.zeros(len(self.docs), dtype=bool)
+            cat_mask = (self.docs["categories"] & np.uint64(1 << bit)) != 0
+            mask = cat_mask if mask is None else mask & cat_mask
+        return mask
+
+
+def _write_segment(path: str, docs: np.ndarray, categories: List[str],
+                   postings: Dict[str, List]) -> None:
+    """
+    Writes a segment directory from a docs table and term -> (rows, tfs).
+    The files are written to a temporary directory that is renamed to
+    path once complete.
+    """
+    final_path, path = path, f"{path}.tmp-{uuid.uuid4().hex[:8]}"
+    os.makedirs(path)
+    terms = sorted(postings)
+    lengths = docs["length"].astype(np.float64)
+    avg_length = float(lengths.mean()) if len(docs) else 0.0
+    avg_length = avg_length or 1.0
+    norms = BM25_K1 * (1 - BM25_B + BM25_B * lengths / avg_length)
+    lexicon = {}
+    offset = 0
+    row_parts, tf_parts = [], []
+    for term in terms:
+        rows, tfs = postings[term]
+        tfs = np.minimum(np.asarray(tfs), 65535).astype("<u2")
+        tf = tfs.astype(np.float64)
+        weight = float(np.max((BM25_K1 + 1) * tf / (tf + norms[np.asarray(rows)])))
+        # Rounded up so the bound survives the JSON round trip
+        lexicon[term] = [offset, len(rows), float(np.nextafter(np.float32(weight), np.float32(np.inf)))]
+        offset += len(rows)
+        row_parts.append(np.asarray(rows, dtype="<u4"))
+        tf_parts.append(tfs)
+
+    np.save(os.path.join(path, "postings_row.npy"),
+            np.concatenate(row_parts) if row_parts else np.zeros(0, dtype="<u4"))
+    np.save(os.path.join(path, "postings_tf.npy"),
+            np.concatenate(tf_parts) if tf_parts else np.zeros(0, dtype="<u2"))
+    np.save(os.path.join(path, "docs.npy"), docs)
+    with open(os.path.join(path, "lexicon.json"), "w", encoding="utf-8") as f:
+        json.dump(lexicon, f, separators=(",", ":"))
+    with open(os.path.join(path, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump({
+            "categories": categories,
+            "num_docs": int(len(docs)),
+            "total_length": int(docs["length"].sum()) if len(docs) else 0,
+        }, f)
+    os.rename(path, final_path)
+
+
+def _kth_best(scores: np.ndarray, k: int) -> float:
+    """k-th largest value of scores (0.0 when there are fewer than k)."""
+    if len(scores) < k:
+        return 0.0
+    return float(np.partition(scores, len(scores) - k)[len(scores) - k])
+
+
+def _lookup(rows: np.ndarray, targets: np.ndarray):
+    """
+    Finds sorted target rows in a sorted posting list. Returns the
+    positions of those present and a mask of which targets they are.
+    """
+    pos = np.minimum(np.searchsorted(rows, targets.astype(rows.dtype)), len(rows) - 1)
+    found = rows[pos] == targets
+    return pos[found], found
+
+
+def _top_rows(seg: _Segment, idf: Dict[str, float], avg_length: float, k: int,
+              mask: Optional[np.ndarray]) -> List[Tuple[float, int]]:
+    """
+    BM25 top k rows of one segment as (score, row), with MaxScore pruning
+    (see the module docstring). mask limits the rows that may be returned.
+    """
+    terms = [t for t in idf if t in seg.lexicon]
+    if not terms:
+        return []
+    norms = seg.norms(avg_length)
+
+    def weight(term: str, tfs, at_rows) -> np.ndarray:
+        tf = tfs.astype(np.float64)
+        denominator = norms[at_rows]
+        denominator += tf
+        tf *= idf[term] * (BM25_K1 + 1)
+        tf /= denominator
+        return tf
+
+    bounds = sorted(((idf[t] * seg.max_weight(t, avg_length), t) for t in terms), reverse=True)
+    scores = np.zeros(len(seg.docs))
+    # rests[i]: the most the terms after term i can still add
+    rests = [0.0] * len(bounds)
+    for i in range(len(bounds) - 2, -1, -1):
+        rests[i] = rests[i + 1] + bounds[i + 1][0]
+    # theta: a lower bound of the final k-th best score. live: once no
+    # other row can reach theta, the rows that still can
+    theta, live = 0.0, None
+    for i, (rest, (_, term)) in enumerate(zip(rests, bounds)):
+        rows, tfs = seg.postings(term)
+        if live is None:
+            scores[rows] += weight(term, tfs, rows)
+            if i == 0:
+                theta = _seed_theta(scores, rows, mask, [
+                    seg.postings(t) + (t,) for _, t in bounds[1:]], weight, k)
+            if rest < theta:
+                reachable = scores >= theta - rest
+                live = np.flatnonzero(reachable if mask is None else reachable & mask)
+        else:
+            if len(live) * 4 > len(rows):
+                # Scanning the postings is cheaper than looking up this many rows
+                scores[rows] += weight(term, tfs, rows)
+            else:
+                pos, found = _lookup(rows, live)
+                scores[live[found]] += weight(term, tfs[pos], live[found])
+            theta = max(theta, _kth_best(scores[live], k))
+            live = live[scores[live] >= theta - rest]
+
+    if live is None:
+        live = np.flatnonzero(scores if mask is None else (scores > 0) & mask)
+    live = live[scores[live] > 0]
+    if len(live) > k:
+        live = live[np.argpartition(-scores[live], k - 1)[:k]]
+    return [(float(scores[row]), int(row)) for row in live]
+
+
+def _seed_theta(scores: np.ndarray, rows: np.ndarray, mask: Optional[np.ndarray],
+                remaining: List[Tuple], weight, k: int) -> float:
+    """
+    Completes the scores of the SEED_ROWS best rows among those just
+    scored by looking them up in the remaining (rows, tfs, term) postings.
+    Their k-th best full score is a lower bound of the final k-th best,
+    usually close to it, so pruning can start early.
+    """
+    pool = np.asarray(rows, dtype=np.int64)
+    if mask is not None:
+        pool = pool[mask[pool]]
+    if len(pool) > SEED_ROWS:
+        pool = np.sort(pool[np.argpartition(-scores[pool], SEED_ROWS - 1)[:SEED_ROWS]])
+    full = scores[pool]
+    for term_rows, tfs, term in remaining:
+        pos, found = _lookup(term_rows, pool)
+        full[found] += weight(term, tfs[pos], pool[found])
+    return _kth_best(full, k)
+
+
+class IndexBusyError(RuntimeError):
+    """Another process or session is writing to the search index."""
+
+    def __init__(self, path: str) -> None:
+        super().__init__(f"The search index at {path} is being updated by another writer")
+
+
+class SearchIndex:
+    """
+    Segmented BM25 index over stored clauses.
+
+    Usage:
+        index = SearchIndex()
+        with AnalysisStore() as store:
+            index.update_from_store(store)
+            hits = index.search("indemnify the client for losses", k=10,
+                                label="Risky", category="Indemnity")
+            clauses = store.get_clauses([h["store_id"] for h in hits])
+    """
+
+    def __init__(self, path: Optional[str] = None) -> None:
+        self.path = path or SEARCH_INDEX_DIR
+        os.makedirs(self.path, exist_ok=True)
+        self._locked = False
+        self._lock_lost = False
+        self._load()
+
+    # ------------------------------------------------------------------
+    # Manifest / loading
+    # ------------------------------------------------------------------
+    def _manifest_path(self) -> str:
+        return os.path.join(self.path, "manifest.json")
+
+    def _load(self, attempts: int = 3) -> None:
+        manifest_path = self._manifest_path()
+        for attempt in range(attempts):
+            if os.path.exists(manifest_path):
+                with open(manifest_path, "r", encoding="utf-8") as f:
+                    self.manifest = json.load(f)
+            else:
+                self.manifest = {"segments": [], "last_store_id": 0, "next_segment": 1}
+            try:
+                self.segments = [
+                    _Segment(os.path.join(self.path, name)) for name in self.manifest["segments"]
+                ]
+                break
+            except FileNotFoundError:
+                # A concurrent compaction replaced the segments: re-read the manifest
+                if attempt == attempts - 1:
+                    raise
+        self.num_docs = sum(s.meta["num_docs"] for s in self.segments)
+        total_length = sum(s.meta["total_length"] for s in self.segments)
+        self.avg_length = total_length / self.num_docs if self.num_docs else 0.0
+
+    def _save_manifest(self) -> None:
+        if self._lock_lost:
+            # Taken over as stale: the new holder owns the manifest now
+            raise IndexBusyError(self.path)
+        # Write-then-rename so readers never see a half-written manifest
+        tmp = f"{self._manifest_path()}.{uuid.uuid4().hex[:8]}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.manifest, f)
+        os.replace(tmp, self._manifest_path())
+
+    @property
+    def last_store_id(self) -> int:
+        return self.manifest["last_store_id"]
+
+    @contextmanager
+    def _write_lock(self):
+        """
+        Holds the index's write lock for the block and reloads the latest
+        manifest. Yields False (and does not lock) if another writer holds it.
+
+        The lock file holds a token unique to this acquisition. A lock that
+        has not been touched for LOCK_STALE_SECONDS is taken over by whoever
+        first creates its break marker (write.lock.break-<token>); a holder
+        whose token has a break marker has lost the lock and must not write.
+        """
+        if self._locked:
+            yield True
+            return
+        lock_path = os.path.join(self.path, "write.lock")
+        token = uuid.uuid4().hex
+        if not self._acquire_lock(lock_path, token):
+            yield False
+            return
+
+        stop = threading.Event()
+
+        def heartbeat():
+            while not stop.wait(LOCK_STALE_SECONDS / 3):
+                if not self._lock_held(lock_path, token):
+                    self._lock_lost = True
+                    return
+                try:
+                    os.utime(lock_path)
+                except FileNotFoundError:
+                    pass
+
+        thread = threading.Thread(target=heartbeat, name="search-index-lock", daemon=True)
+        thread.start()
+        self._locked, self._lock_lost = True, False
+        try:
+            self._load()
+            yield True
+        finally:
+            self._locked = False
+            stop.set()
+            thread.join()
+            if self._lock_held(lock_path, token):
+                try:
+                    os.remove(lock_path)
+                except FileNotFoundError:
+                    pass
+
+    @staticmethod
+    def _acquire_lock(lock_path: str, token: str) -> bool:
+        for _ in range(2):
+            if _create_lock(lock_path, token):
+                return True
+            current = _read_lock(lock_path)
+            if current is None:
+                # Released between the two calls
+                continue
+            try:
+                stale = time.time() - os.path.getmtime(lock_path) > LOCK_STALE_SECONDS
+            except FileNotFoundError:
+                continue
+            if not stale or not _create_marker(f"{lock_path}.break-{current}"):
+                return False
+            os.replace(_write_lock_temp(lock_path, token), lock_path)
+            return True
+        return False
+
+    @staticmethod
+    def _lock_held(lock_path: str, token: str) -> bool:
+        return (_read_lock(lock_path) == token
+                and not os.path.exists(f"{lock_path}.break-{token}"))
+
+    # ------------------------------------------------------------------
+    # Building
+    # ------------------------------------------------------------------
+    def add_clauses(self, clauses: List[Dict]) -> int:
+        """
+        Indexes a batch of stored clauses as a new segment.
+
+        Args:
+            clauses: Clause dicts from AnalysisStore (must carry store_id
+                and document_id), in increasing store_id order.
+
+        Returns:
+            Number of clauses indexed.
+
+        Raises:
+            IndexBusyError: If another writer is updating the index.
+        """
+        if not clauses:
+            return 0
+        with self._write_lock() as locked:
+            if not locked:
+                raise IndexBusyError(self.path)
+            return self._add_clauses(clauses)
+
+    def _add_clauses(self, clauses: List[Dict]) -> int:
+        # Clauses the latest manifest already covers were indexed by another writer
+        clauses = [c for c in clauses if c["store_id"] > self.last_store_id]
+        if not clauses:
+            return 0
+
+        categories = sorted({cat for c in clauses for cat in c["categories"]})[:64]
+        bits = {cat: i for i, cat in enumerate(categories)}
+        docs = np.zeros(len(clauses), dtype=_DOCS_DTYPE)
+        postings: Dict[str, List] = {}
+
+        for row, clause in enumerate(clauses):
+            tokens = tokenize(clause["text"])
+            counts: Dict[str, int] = {}
+            for tok in tokens:
+                counts[tok] = counts.get(tok, 0) + 1
+            for term, tf in counts.items():
+                entry = postings.get(term)
+                if entry is None:
+                    entry = postings[term] = ([], [])
+                entry[0].append(row)
+                entry[1].append(tf)
+
+            mask = 0
+            for cat in clause["categories"]:
+                if cat in bits:
+                    mask |= 1 << bits[cat]
+            docs[row] = (
+                clause["store_id"], clause["document_id"], len(tokens),
+                _LABEL_CODES.get(clause["label"], 0), mask,
+            )
+
+        name = f"seg_{self.manifest['next_segment']:06d}"
+        _write_segment(os.path.join(self.path, name), docs, categories, postings)
+
+        self.manifest["segments"].append(name)
+        self.manifest["next_segment"] += 1
+        self.manifest["last_store_id"] = max(
+            self.manifest["last_store_id"], max(c["store_id"] for c in clauses)
+        )
+        self._save_manifest()
+        self._load()
+        return len(clauses)
+
+    def update_from_store(self, store, batch_size: int = 50_000) -> int:
+        """
+        Indexes every stored clause newer than the last indexed one.
+
+        Returns:
+            Number of clauses added (0 when another writer holds the lock;
+            it indexes the same store).
+        """
+        with self._write_lock() as locked:
+            if not locked:
+                return 0
+            added = 0
+            try:
+                for batch in store.iter_clauses_after(self.last_store_id, batch_size=batch_size):
+                    added += self._add_clauses(batch)
+            except IndexBusyError:
+                # The lock was taken over as stale; its new holder indexes the rest
+                return added
+            if len(self.segments) > MAX_SEGMENTS:
+                self.compact()
+            return added
+
+    def compact(self) -> None:
+        """Merges all segments into one (skipped while another writer holds the lock)."""
+        with self._write_lock() as locked:
+            if locked:
+                try:
+                    self._compact()
+                except IndexBusyError:
+                    pass
+
+    def _compact(self) -> None:
+        if len(self.segments) <= 1:
+            return
+
+        categories = sorted({cat for s in self.segments for cat in s.meta["categories"]})[:64]
+        bits = {cat: i for i, cat in enumerate(categories)}
+
+        doc_parts, row_offsets = [], []
+        offset = 0
+        for seg in self.segments:
+            docs = np.array(seg.docs)
+            # Remap category bits into the merged bit order
+            remapped = np.zeros(len(docs), dtype="<u8")
+            for cat, old_bit in seg.category_bits.items():
+                if cat in bits:
+                    has = (docs["categories"] & np.uint64(1 << old_bit)) != 0
+                    remapped[has] |= np.uint64(1 << bits[cat])
+            docs["categories"] = remapped
+            doc_parts.append(docs)
+            row_offsets.append(offset)
+            offset += len(docs)
+
+        postings: Dict[str, List] = {}
+        for term in sorted({t for s in self.segments for t in s.lexicon}):
+            rows, tfs = [], []
+            for seg, row_offset in zip(self.segments, row_offsets):
+                seg_rows, seg_tfs = seg.postings(term)
+                if seg_rows is not None:
+                    rows.append(np.asarray(seg_rows, dtype=np.int64) + row_offset)
+                    tfs.append(np.asarray(seg_tfs))
+            postings[term] = (np.concatenate(rows), np.concatenate(tfs))
+
+        name = f"seg_{self.manifest['next_segment']:06d}"
+        _write_segment(os.path.join(self.path, name), np.concatenate(doc_parts),
+                       categories, postings)
+
+        old = list(self.manifest["segments"])
+        self.manifest["segments"] = [name]
+        self.manifest["next_segment"] += 1
+        self._save_manifest()
+        self.segments = []
+        for seg_name in old:
+            shutil.rmtree(os.path.join(self.path, seg_name), ignore_errors=True)
+        self._load()
+
+    def rebuild_from_store(self, store) -> int:
+        """
+        Drops the index and re-indexes every stored clause.
+
+        Raises:
+            IndexBusyError: If another writer is updating the index.
+        """
+        with self._write_lock() as locked:
+            if not locked:
+                raise IndexBusyError(self.path)
+            added = self._rebuild_from_store(store)
+            if self._lock_lost:
+                raise IndexBusyError(self.path)
+            return added
+
+    def _rebuild_from_store(self, store) -> int:
+        for name in self.manifest["segments"]:
+            shutil.rmtree(os.path.join(self.path, name), ignore_errors=True)
+        self.manifest = {"segments": [], "last_store_id": 0,
+                         "next_segment": self.manifest["next_segment"]}
+        self._save_manifest()
+        self._load()
+        added = self.update_from_store(store)
+        self.compact()
+        return added
+
+    # ------------------------------------------------------------------
+    # Querying
+    # ------------------------------------------------------------------
+    def search(
+        self,
+        query: str,
+        k: int = 10,
+        label: Optional[str] = None,
+        category: Optional[str] = None,
+    ) -> List[Dict]:
+        """
+        Ranks indexed clauses against a free-text query with BM25.
+
+        Args:
+            query: Query text (a few words or a whole clause).
+            k: Number of hits to return.
+            label: Only return clauses with this label ("Risky" / "Safe").
+            category: Only return clauses in this risk category.
+
+        Returns:
+            List of hits (store_id, document_id, score), best first.
+        """
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms or self.num_docs == 0:
+            return []
+
+        # Global document frequencies across segments
+        df = {t: sum(s.lexicon[t][1] for s in self.segments if t in s.lexicon) for t in terms}
+        ranked = sorted((t for t in terms if df[t] > 0), key=lambda t: df[t])
+        selected = [t for t in ranked if df[t] <= QUERY_MAX_DF_SHARE * self.num_docs] or ranked[:1]
+        idf = {
+            t: np.log(1.0 + (self.num_docs - df[t] + 0.5) / (df[t] + 0.5))
+            for t in selected[:QUERY_MAX_TERMS]
+        }
+
+        candidates = []
+        for seg in self.segments:
+            mask = seg.filter_mask(label, category)
+            for score, row in _top_rows(seg, idf, self.avg_length, k, mask):
+                candidates.append((score, seg, row))
+
+        candidates.sort(key=lambda c: (-c[0], int(c[1].docs["store_id"][c[2]])))
+        return [
+            {
+                "store_id": int(seg.docs["store_id"][row]),
+                "document_id": int(seg.docs["document_id"][row]),
+                "score": round(score, 4),
+            }
+            for score, seg, row in candidates[:k]
+        ]
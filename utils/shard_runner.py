@@ -0,0 +1,447 @@
+"""
+utils/shard_runner.py
+----------------------
+Sharded batch analysis coordinated only through a shared directory.
+
+A run directory on storage that every node mounts holds:
+
+    manifest.json                    documents, their shards, shard count
+    leases/shard-0003.lease          current owner of shard 3 (JSON)
+    leases/shard-0003.break-<token>  lease generation <token> was taken over
+    parts/shard-0003/<token>.jsonl   documents finished under that lease
+    shards/shard-0003.json           the finished shard
+
+plan_run() writes the manifest. A document's shard is a hash of its path
+relative to the common input directory, so the assignment is the same on
+every node and on every run. Any number of ShardWorkers, on any number of
+nodes, then repeatedly claim an unfinished shard whose lease is free or
+expired, analyze its documents, append each result to the lease's part
+file and finally write the shard output:
+
+  - a lease expires SHARD_LEASE_SECONDS after its last renewal; a worker
+    renews its lease from a background thread while it works;
+  - an expired lease is taken over by whichever worker first creates its
+    break marker (O_EXCL), so each lease is taken over at most once;
+  - a worker taking over a shard (its owner crashed or stalled) skips the
+    documents already in earlier part files;
+  - results do not depend on who ran what: a stalled owner that wakes up
+    and finishes writes the same documents. Leases only keep workers from
+    duplicating work.
+
+merge_run() combines the shard outputs in manifest order and merges the
+documents' SummaryAggregators into the portfolio stats, so the result
+matches a single-machine batch_analyze.py run.
+"""
+
+import hashlib
+import json
+import os
+import socket
+import threading
+import time
+import uuid
+from typing import Callable, Dict, List, Optional
+
+from app_config import SHARD_COUNT, SHARD_LEASE_SECONDS
+from utils.batch_analyzer import analyze_path, document_keys
+from utils.clause_table import as_dicts
+from utils.stats_aggregator import SummaryAggregator
+
+MANIFEST_FILE = "manifest.json"
+
+# Callback signature: (shard, document record)
+DocumentCallback = Callable[[int, Dict], None]
+
+
+# ---------------------------------------------------------------------------
+# Files
+# ---------------------------------------------------------------------------
+def _shard_name(shard: int) -> str:
+    return f"shard-{shard:04d}"
+
+
+def _lease_path(run_dir: str, shard: int) -> str:
+    return os.path.join(run_dir, "leases", f"{_shard_name(shard)}.lease")
+
+
+def _parts_dir(run_dir: str, shard: int) -> str:
+    return os.path.join(run_dir, "parts", _shard_name(shard))
+
+
+def _output_path(run_dir: str, shard: int) -> str:
+    return os.path.join(run_dir, "shards", f"{_shard_name(shard)}.json")
+
+
+def _read_json(path: str) -> Optional[Dict]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def _write_temp(path: str, data: Dict) -> str:
+    tmp = f"{path}.{uuid.uuid4().hex}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+        f.flush()
+        os.fsync(f.fileno())
+    return tmp
+
+
+def _write_json_atomic(path: str, data: Dict) -> None:
+    """Writes data to path so readers see the old file or the new one, never a partial one."""
+    os.replace(_write_temp(path, data), path)
+
+
+def _create_json(path: str, data: Dict) -> bool:
+    """Like _write_json_atomic(), but only if path does not exist yet. Returns whether it was created."""
+    tmp = _write_temp(path, data)
+    try:
+        os.link(tmp, path)
+        return True
+    except FileExistsError:
+        return False
+    finally:
+        os.remove(tmp)
+
+
+def _create_marker(path: str) -> bool:
+    try:
+        os.close(os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+        return True
+    except FileExistsError:
+        return False
+
+
+# ---------------------------------------------------------------------------
+# Planning
+# ---------------------------------------------------------------------------
+def shard_of(key: str, n_shards: int) -> int:
+    """The shard of a document key; unlike hash(), the same in every process."""
+    digest = hashlib.sha1(key.encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big") % n_shards
+
+
+def plan_run(run_dir: str, paths: List[str], n_shards: int = SHARD_COUNT) -> Dict:
+    """
+    Creates a run: assigns each document to a shard and writes the manifest.
+
+    Args:
+        run_dir: Run directory, on storage shared by all worker nodes.
+        paths: Document paths, as every node can open them.
+        n_shards: Number of shards (units of work claimed by workers).
+
+    Returns:
+        The manifest dict.
+
+    Raises:
+        FileExistsError: If run_dir already holds a run.
+    """
+    if n_shards < 1:
+        raise ValueError("n_shards must be at least 1")
+    for sub in ("leases", "parts", "shards"):
+        os.makedirs(os.path.join(run_dir, sub), exist_ok=True)
+    manifest = {
+        "created_at": time.time(),
+        "n_shards": n_shards,
+        "documents": [
+            {"key": key, "path": os.path.abspath(path), "shard": shard_of(key, n_shards)}
+            for key, path in zip(document_keys(paths), paths)
+        ],
+    }
+    if not _create_json(os.path.join(run_dir, MANIFEST_FILE), manifest):
+        raise FileExistsError(f"{run_dir} already holds a run")
+    return manifest
+
+
+def load_manifest(run_dir: str) -> Dict:
+    manifest = _read_json(os.path.join(run_dir, MANIFEST_FILE))
+    if manifest is None:
+        raise FileNotFoundError(f"No run in {run_dir} (plan one first)")
+    return manifest
+
+
+def shard_documents(manifest: Dict, shard: int) -> List[Dict]:
+    """The manifest entries of one shard, in manifest order."""
+    return [doc for doc in manifest["documents"] if doc["shard"] == shard]
+
+
+def shard_done(run_dir: str, shard: int) -> bool:
+    return os.path.exists(_output_path(run_dir, shard))
+
+
+# ---------------------------------------------------------------------------
+# Analysis
+# ---------------------------------------------------------------------------
+def analyze_record(doc: Dict) -> Dict:
+    """
+    Analyzes one manifest document into a JSON-safe record: name, key,
+    path, error, elapsed, stats, clauses and aggregator (raw totals).
+    """
+    try:
+        result = analyze_path(doc["path"], compact=True)
+    except Exception as e:
+        result = {"error": str(e), "elapsed": 0.0}
+    aggregator = result.get("aggregator")
+    return {
+        "key": doc["key"],
+        "name": os.path.basename(doc["path"]),
+        "path": doc["path"],
+        "error": result.get("error"),
+        "elapsed": result.get("elapsed"),
+        "stats": result.get("stats"),
+        "clauses": as_dicts(result.get("analyzed")),
+        "aggregator": aggregator.to_dict() if aggregator is not None else None,
+    }
+
+
+def _load_parts(run_dir: str, shard: int) -> Dict[str, Dict]:
+    """Records already written to the shard's part files, by document key."""
+    done: Dict[str, Dict] = {}
+    parts_dir = _parts_dir(run_dir, shard)
+    if not os.path.isdir(parts_dir):
+        return done
+    for name in sorted(os.listdir(parts_dir)):
+        if not name.endswith(".jsonl"):
+            continue
+        with open(os.path.join(parts_dir, name), "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # Last line of a worker that died mid-write
+                    continue
+                done.setdefault(record["key"], record)
+    return done
+
+
+# ---------------------------------------------------------------------------
+# Worker
+# ---------------------------------------------------------------------------
+class ShardWorker:
+    """
+    Claims shards of a run and analyzes them until every shard is done.
+    Start one per node (or several, one per process).
+
+    Args:
+        run_dir: Run directory created by plan_run().
+        lease_seconds: Lease length; renewed every third of it.
+        poll_interval: Seconds between checks while every unfinished
+            shard is leased by another worker.
+    """
+
+    def __init__(self, run_dir: str, lease_seconds: float = SHARD_LEASE_SECONDS,
+                 poll_interval: Optional[float] = None) -> None:
+        self.run_dir = run_dir
+        self.manifest = load_manifest(run_dir)
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval or max(1.0, lease_seconds / 4)
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+
+    def run(self, wait: bool = True, on_document: Optional[DocumentCallback] = None) -> List[int]:
+        """
+        Processes shards until all are done. With wait=False, returns as
+        soon as nothing is left to claim instead of waiting for shards
+        leased by other workers (or for their leases to expire).
+
+        Returns:
+            The shards this worker finished.
+        """
+        finished = []
+        while True:
+            pending = [s for s in self._shard_order() if not shard_done(self.run_dir, s)]
+            if not pending:
+                return finished
+            for shard in pending:
+                token = self.acquire(shard)
+                if token is None:
+                    continue
+                if self.process(shard, token, on_document):
+                    finished.append(shard)
+                break
+            else:
+                if not wait:
+                    return finished
+                time.sleep(self.poll_interval)
+
+    def _shard_order(self) -> List[int]:
+        # Start at a different shard per worker so they do not all race for shard 0
+        n = self.manifest["n_shards"]
+        first = shard_of(self.worker_id, n)
+        return [(first + i) % n for i in range(n)]
+
+    # ------------------------------------------------------------------
+    # Leases
+    # ------------------------------------------------------------------
+    def acquire(self, shard: int) -> Optional[str]:
+        """Leases a free or expired shard. Returns the lease token, or None."""
+        path = _lease_path(self.run_dir, shard)
+        token = uuid.uuid4().hex
+        lease = {"owner": self.worker_id, "token": token,
+                 "acquired_at": time.time(), "expires": time.time() + self.lease_seconds}
+        current = _read_json(path)
+        if current is None:
+            if not _create_json(path, lease):
+                return None
+        elif current["expires"] > time.time():
+            return None
+        elif _create_marker(f"{path}.break-{current['token']}"):
+            _write_json_atomic(path, lease)
+        else:
+            return None
+
+        if shard_done(self.run_dir, shard):
+            # Finished between the scan and the claim
+            self.release(shard, token)
+            return None
+        return token
+
+    def renew(self, shard: int, token: str) -> bool:
+        """Extends the lease. Returns False if it has been taken over."""
+        path = _lease_path(self.run_dir, shard)
+        current = _read_json(path)
+        if (current is None or current["token"] != token
+                or os.path.exists(f"{path}.break-{token}")):
+            return False
+        _write_json_atomic(path, {**current, "expires": time.time() + self.lease_seconds})
+        return True
+
+    def release(self, shard: int, token: str) -> None:
+        path = _lease_path(self.run_dir, shard)
+        current = _read_json(path)
+        if current is not None and current["token"] == token:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    # ------------------------------------------------------------------
+    # Processing
+    # ------------------------------------------------------------------
+    def process(self, shard: int, token: str, on_document: Optional[DocumentCallback] = None) -> bool:
+        """
+        Analyzes a leased shard's remaining documents and writes its output.
+        Returns False if the lease was lost before the shard was finished.
+        """
+        documents = shard_documents(self.manifest, shard)
+        done = _load_parts(self.run_dir, shard)
+        parts_dir = _parts_dir(self.run_dir, shard)
+        os.makedirs(parts_dir, exist_ok=True)
+
+        stop, lost = threading.Event(), threading.Event()
+
+        def heartbeat():
+            while not stop.wait(self.lease_seconds / 3):
+                if not self.renew(shard, token):
+                    lost.set()
+                    return
+
+        thread = threading.Thread(target=heartbeat, name=f"lease-{_shard_name(shard)}", daemon=True)
+        thread.start()
+        try:
+            with open(os.path.join(parts_dir, f"{token}.jsonl"), "a", encoding="utf-8") as part:
+                for doc in documents:
+                    if doc["key"] in done:
+                        continue
+                    if lost.is_set():
+                        return False
+                    record = analyze_record(doc)
+                    part.write(json.dumps(record) + "\n")
+                    part.flush()
+                    os.fsync(part.fileno())
+                    done[doc["key"]] = record
+                    if on_document:
+                        on_document(shard, record)
+            if lost.is_set():
+                return False
+            _write_json_atomic(_output_path(self.run_dir, shard), {
+                "shard": shard,
+                "worker": self.worker_id,
+                "finished_at": time.time(),
+                "documents": [done[doc["key"]] for doc in documents],
+            })
+            return True
+        finally:
+            stop.set()
+            thread.join()
+            self.release(shard, token)
+
+
+# ---------------------------------------------------------------------------
+# Status and merge
+# ---------------------------------------------------------------------------
+def run_status(run_dir: str) -> List[Dict]:
+    """
+    One row per shard: shard, documents, finished (documents written so
+    far), state ("done", "running", "expired" or "pending") and owner.
+    """
+    manifest = load_manifest(run_dir)
+    rows = []
+    for shard in range(manifest["n_shards"]):
+        n_docs = len(shard_documents(manifest, shard))
+        lease = _read_json(_lease_path(run_dir, shard))
+        if shard_done(run_dir, shard):
+            state, finished = "done", n_docs
+        else:
+            finished = len(_load_parts(run_dir, shard))
+            if lease is None:
+                state = "pending"
+            else:
+                state = "running" if lease["expires"] > time.time() else "expired"
+        rows.append({
+            "shard": shard,
+            "documents": n_docs,
+            "finished": finished,
+            "state": state,
+            "owner": lease["owner"] if lease and state != "done" else None,
+        })
+    return rows
+
+
+def merge_run(run_dir: str, allow_partial: bool = False) -> Dict:
+    """
+    Combines the shard outputs of a run.
+
+    Args:
+        allow_partial: Merge the finished shards even if some are not done.
+
+    Returns:
+        dict with results (one per document in manifest order, shaped like
+        batch_analyzer.analyze_path() results with analyzed as dicts),
+        portfolio (SummaryAggregator of all documents) and missing (shards
+        without output).
+
+    Raises:
+        ValueError: If shards are missing and allow_partial is False.
+    """
+    manifest = load_manifest(run_dir)
+    records, missing = {}, []
+    for shard in range(manifest["n_shards"]):
+        output = _read_json(_output_path(run_dir, shard))
+        if output is None:
+            missing.append(shard)
+            continue
+        for record in output["documents"]:
+            records[record["key"]] = record
+    if missing and not allow_partial:
+        raise ValueError(f"{len(missing)} of {manifest['n_shards']} shards are not finished: "
+                         + ", ".join(map(str, missing)))
+
+    results = []
+    portfolio = SummaryAggregator()
+    for doc in manifest["documents"]:
+        record = records.get(doc["key"])
+        if record is None:
+            continue
+        if not record["error"]:
+            portfolio.merge(SummaryAggregator.from_dict(record["aggregator"]))
+        results.append({
+            "name": record["name"],
+            "path": record["path"],
+            "error": record["error"],
+            "elapsed": record["elapsed"],
+            "stats": record["stats"],
+            "analyzed": record["clauses"],
+        })
+    return {"results": results, "portfolio": portfolio, "missing": missing}
@@ -0,0 +1,108 @@
+"""
+utils/spacy_segmenter.py
+-------------------------
+Sentence-aware clause segmentation for unnumbered prose, using spaCy.
+
+Only the components needed for sentence boundaries are loaded: the trained
+pipeline's "senter" (everything else excluded), or spaCy's rule-based
+"sentencizer" on a blank English pipeline when the model package is not
+installed. The pipeline is loaded once per process and paragraphs go
+through nlp.pipe in batches; sentences are then merged into clauses so
+short fragments ("Time is of the essence.") stay attached to a neighbour.
+
+spaCy is optional: spacy_available() reports whether it is installed
+without importing it (the import alone takes about a second).
+"""
+
+import importlib.util
+from functools import lru_cache
+from typing import Iterable, List
+
+from app_config import SPACY_BATCH_SIZE, SPACY_MIN_CLAUSE_WORDS, SPACY_MODEL, SPACY_N_PROCESS
+
+# Trained-pipeline components that sentence segmentation does not need
+_UNUSED_COMPONENTS = ["tok2vec", "tagger", "morphologizer", "attribute_ruler",
+                      "lemmatizer", "parser", "ner"]
+
+
+@lru_cache(maxsize=1)
+def spacy_available() -> bool:
+    """True if spaCy is installed (checked without importing it)."""
+    return importlib.util.find_spec("spacy") is not None
+
+
+@lru_cache(maxsize=None)
+def load_sentence_pipeline(model: str = SPACY_MODEL):
+    """
+    Loads a spaCy pipeline trimmed to sentence segmentation (cached per
+    process).
+
+    Raises:
+        ImportError: If spaCy is not installed.
+    """
+    import spacy
+
+    try:
+        nlp = spacy.load(model, exclude=_UNUSED_COMPONENTS)
+    except OSError:
+        # Model package not downloaded: rule-based punctuation splitting
+        nlp = spacy.blank("en")
+    if "senter" in nlp.component_names:
+        nlp.enable_pipe("senter")
+    else:
+        nlp.add_pipe("sentencizer")
+    return nlp
+
+
+def merge_sentences(sentences: Iterable[str], min_words: int = SPACY_MIN_CLAUSE_WORDS) -> List[str]:
+    """
+    Groups sentences into clauses: each sentence starts a new clause unless
+    the current one is still shorter than min_words; a short trailing
+    sentence joins the clause before it.
+    """
+    clauses: List[str] = []
+    current: List[str] = []
+    words = 0
+    for sentence in sentences:
+        sentence = sentence.strip()
+        if not sentence:
+            continue
+        if current and words >= min_words:
+            clauses.append(" ".join(current))
+            current, words = [], 0
+        current.append(sentence)
+        words += len(sentence.split())
+    if current:
+        if clauses and words < min_words:
+            clauses[-1] += " " + " ".join(current)
+        else:
+            clauses.append(" ".join(current))
+    return clauses
+
+
+def segment_paragraphs(
+    paragraphs: List[str],
+    batch_size: int = SPACY_BATCH_SIZE,
+    n_process: int = SPACY_N_PROCESS,
+    model: str = SPACY_MODEL,
+) -> List[List[str]]:
+    """
+    Splits each paragraph into clauses along spaCy sentence boundaries.
+
+    Args:
+        paragraphs: Paragraph texts (internal line breaks are collapsed).
+        batch_size: Paragraphs per nlp.pipe batch.
+        n_process: spaCy worker processes (1 = in-process).
+        model: Trained pipeline name.
+
+    Returns:
+        One list of clause strings per input paragraph, in input order.
+    """
+    if not paragraphs:
+        return []
+    nlp = load_sentence_pipeline(model)
+    texts = (" ".join(p.split()) for p in paragraphs)
+    return [
+        merge_sentences(sent.text for sent in doc.sents)
+        for doc in nlp.pipe(texts, batch_size=batch_size, n_process=max(1, n_process))
+    ]
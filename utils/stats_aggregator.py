@@ -0,0 +1,182 @@
+"""
+utils/stats_aggregator.py
+--------------------------
+Incremental, mergeable summary statistics for analyzed clauses.
+
+A SummaryAggregator is updated once per clause as it is scored, so the
+KPI tiles never need a second pass over the analyzed list. Aggregators
+built over different documents or worker processes can be merged, which
+lets batch runs combine partial results without keeping every clause
+in memory.
+"""
+
+from typing import Dict, List, Optional
+
+# Confidence histogram: CONFIDENCE_BINS equal-width bins over [0, 1]
+CONFIDENCE_BINS = 20
+
+# Word-count distribution bucket upper bounds (last bucket is open-ended)
+WORD_COUNT_BUCKETS: List[int] = [10, 25, 50, 100, 200, 500]
+
+
+class SummaryAggregator:
+    """
+    Running totals for a stream of analyzed clause dicts.
+
+    Tracks label counts, per-category and per-keyword counts over all
+    clauses, a confidence histogram per label, and word-count
+    distribution statistics.
+    """
+
+    def __init__(self) -> None:
+        self.total = 0
+        self.risky_count = 0
+        self.category_counts: Dict[str, int] = {}
+        self.keyword_counts: Dict[str, int] = {}
+        self.confidence_hist: Dict[str, List[int]] = {
+            "Risky": [0] * CONFIDENCE_BINS,
+            "Safe": [0] * CONFIDENCE_BINS,
+        }
+        self.word_count_hist: List[int] = [0] * (len(WORD_COUNT_BUCKETS) + 1)
+        self.word_count_sum = 0
+        self.word_count_sq_sum = 0
+        self.word_count_min: Optional[int] = None
+        self.word_count_max: Optional[int] = None
+
+    # ------------------------------------------------------------------
+    # Updating
+    # ------------------------------------------------------------------
+    def update(self, clause: Dict) -> None:
+        """Adds a single analyzed clause to the running totals."""
+        self.total += 1
+        label = clause["label"]
+        if label == "Risky":
+            self.risky_count += 1
+
+        for cat in clause["categories"]:
+            self.category_counts[cat] = self.category_counts.get(cat, 0) + 1
+        for kw in clause["matched_keywords"]:
+            self.keyword_counts[kw] = self.keyword_counts.get(kw, 0) + 1
+
+        bin_idx = min(int(clause["confidence"] * CONFIDENCE_BINS), CONFIDENCE_BINS - 1)
+        hist = self.confidence_hist.setdefault(label, [0] * CONFIDENCE_BINS)
+        hist[bin_idx] += 1
+
+        words = clause.get("word_count")
+        if words is None:
+            words = len(clause["text"].split())
+        self.word_count_hist[_word_bucket(words)] += 1
+        self.word_count_sum += words
+        self.word_count_sq_sum += words * words
+        if self.word_count_min is None or words < self.word_count_min:
+            self.word_count_min = words
+        if self.word_count_max is None or words > self.word_count_max:
+            self.word_count_max = words
+
+    def merge(self, other: "SummaryAggregator") -> "SummaryAggregator":
+        """Folds another aggregator into this one and returns self."""
+        self.total += other.total
+        self.risky_count += other.risky_count
+        for cat, n in other.category_counts.items():
+            self.category_counts[cat] = self.category_counts.get(cat, 0) + n
+        for kw, n in other.keyword_counts.items():
+            self.keyword_counts[kw] = self.keyword_counts.get(kw, 0) + n
+        for label, hist in other.confidence_hist.items():
+            mine = self.confidence_hist.setdefault(label, [0] * CONFIDENCE_BINS)
+            for i, n in enumerate(hist):
+                mine[i] += n
+        for i, n in enumerate(other.word_count_hist):
+            self.word_count_hist[i] += n
+        self.word_count_sum += other.word_count_sum
+        self.word_count_sq_sum += other.word_count_sq_sum
+        if other.word_count_min is not None:
+            if self.word_count_min is None or other.word_count_min < self.word_count_min:
+                self.word_count_min = other.word_count_min
+        if other.word_count_max is not None:
+            if self.word_count_max is None or other.word_count_max > self.word_count_max:
+                self.word_count_max = other.word_count_max
+        return self
+
+    # ------------------------------------------------------------------
+    # Reporting
+    # ------------------------------------------------------------------
+    def summary(self) -> Dict:
+        """
+        Returns the summary dict shown in the KPI tiles.
+
+        The first four keys match compute_summary_stats(); the remaining
+        keys carry the per-category, per-keyword and distribution data.
+        """
+        total = self.total
+        risky = self.risky_count
+        risk_pct = round((risky / total * 100) if total > 0 else 0.0, 1)
+
+        if total > 0:
+            mean = self.word_count_sum / total
+            variance = max(self.word_count_sq_sum / total - mean * mean, 0.0)
+        else:
+            mean = variance = 0.0
+
+        return {
+            "total": total,
+            "risky_count": risky,
+            "safe_count": total - risky,
+            "risk_percentage": risk_pct,
+            "by_category": dict(
+                sorted(self.category_counts.items(), key=lambda kv: (-kv[1], kv[0]))
+            ),
+            "by_keyword": dict(
+                sorted(self.keyword_counts.items(), key=lambda kv: (-kv[1], kv[0]))
+            ),
+            "confidence_histogram": {
+                "bin_width": 1 / CONFIDENCE_BINS,
+                "counts": {label: list(h) for label, h in self.confidence_hist.items()},
+            },
+            "word_count": {
+                "buckets": WORD_COUNT_BUCKETS,
+                "counts": list(self.word_count_hist),
+                "min": self.word_count_min or 0,
+                "max": self.word_count_max or 0,
+                "mean": round(mean, 2),
+                "std": round(variance ** 0.5, 2),
+            },
+        }
+
+    def to_dict(self) -> Dict:
+        """Serialises the raw running totals (JSON-safe)."""
+        return {
+            "total": self.total,
+            "risky_count": self.risky_count,
+            "category_counts": dict(self.category_counts),
+            "keyword_counts": dict(self.keyword_counts),
+            "confidence_hist": {k: list(v) for k, v in self.confidence_hist.items()},
+            "word_count_hist": list(self.word_count_hist),
+            "word_count_sum": self.word_count_sum,
+            "word_count_sq_sum": self.word_count_sq_sum,
+            "word_count_min": self.word_count_min,
+            "word_count_max": self.word_count_max,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "SummaryAggregator":
+        """Rebuilds an aggregator from the output of to_dict()."""
+        agg = cls()
+        agg.total = data["total"]
+        agg.risky_count = data["risky_count"]
+        agg.category_counts = dict(data["category_counts"])
+        agg.keyword_counts = dict(data["keyword_counts"])
+        agg.confidence_hist = {k: list(v) for k, v in data["confidence_hist"].items()}
+        agg.word_count_hist = list(data["word_count_hist"])
+        agg.word_count_sum = data["word_count_sum"]
+        agg.word_count_sq_sum = data["word_count_sq_sum"]
+        agg.word_count_min = data["word_count_min"]
+        agg.word_count_max = data["word_count_max"]
+        return agg
+
+
+def _word_bucket(words: int) -> int:
+    """Returns the index of the word-count bucket for a clause length."""
+    for i, upper in enumerate(WORD_COUNT_BUCKETS):
+        if words <= upper:
+            return i
+    return len(WORD_COUNT_BUCKETS)
@@ -0,0 +1,148 @@
+"""
+utils/tokenizer.py
+-------------------
+One tokenization per clause, shared by every pipeline stage.
+
+tokenize() turns a clause into a TokenizedClause: the lowercased text,
+its word tokens (maximal \\w runs, lowercased) and the whitespace word
+count, with token offsets computed on first use. segment_document()
+attaches one to each clause under "tokens". Then:
+
+    word counts      TokenizedClause.word_count (segment filter, word_count)
+    keyword matching risk_predictor matches RISK_KEYWORDS against tokens
+    cleaning         text_cleaner.clean_text accepts a TokenizedClause
+    featurization    feature_extractor.build_vectorizer() uses
+                     vectorizer_features(), which reads the tokens
+                     instead of re-tokenizing
+
+Token boundaries are the same as those of the r"\\b...\\b" keyword
+patterns and of TfidfVectorizer's default token_pattern, so results
+match the per-stage tokenizers they replace.
+"""
+
+import re
+import unicodedata
+from typing import List, Optional, Sequence, Tuple, Union
+
+_WORD = re.compile(r"\w+")
+
+
+class TokenizedClause:
+    """
+    A clause tokenized once.
+
+    Attributes:
+        text: The clause text as given.
+        lower: text.lower().
+        tokens: Word tokens of lower (maximal \\w runs), in order.
+        word_count: Whitespace-separated words in text (len(text.split())).
+    """
+
+    __slots__ = ("text", "lower", "tokens", "word_count", "_spans", "_token_set")
+
+    def __init__(self, text: str) -> None:
+        self.text = text
+        self.lower = text.lower()
+        self.tokens: List[str] = _WORD.findall(self.lower)
+        self.word_count = len(text.split())
+        self._spans: Optional[List[Tuple[int, int]]] = None
+        self._token_set: Optional[frozenset] = None
+
+    @property
+    def spans(self) -> List[Tuple[int, int]]:
+        """(start, end) offset of each token in lower (and in text, for most scripts)."""
+        if self._spans is None:
+            self._spans = [m.span() for m in _WORD.finditer(self.lower)]
+        return self._spans
+
+    @property
+    def token_set(self) -> frozenset:
+        if self._token_set is None:
+            self._token_set = frozenset(self.tokens)
+        return self._token_set
+
+    def has_phrase(self, words: Sequence[str], separators: Sequence[str]) -> bool:
+        """
+        True if words occur as consecutive tokens with exactly separators
+        between them (e.g. ("hold", "harmless") and (" ",)).
+        """
+        tokens, n = self.tokens, len(words)
+        start = 0
+        while True:
+            try:
+                i = tokens.index(words[0], start)
+            except ValueError:
+                return False
+            if tokens[i + 1:i + n] == list(words[1:]):
+                spans = self.spans
+                if all(self.lower[spans[i + k][1]:spans[i + k + 1][0]] == sep
+                       for k, sep in enumerate(separators)):
+                    return True
+            start = i + 1
+
+    def __len__(self) -> int:
+        return len(self.tokens)
+
+    def __repr__(self) -> str:
+        return f"TokenizedClause({self.text[:40]!r}, {len(self.tokens)} tokens)"
+
+    def __reduce__(self):
+        # Pickle as text: smaller to send between processes, re-tokenized on load
+        return tokenize, (self.text,)
+
+
+def tokenize(text: str) -> TokenizedClause:
+    return TokenizedClause(text)
+
+
+def tokens_of(clause: Union[dict, str, TokenizedClause]) -> TokenizedClause:
+    """The TokenizedClause of a clause dict (reused when attached), text or TokenizedClause."""
+    if isinstance(clause, TokenizedClause):
+        return clause
+    if isinstance(clause, str):
+        return TokenizedClause(clause)
+    tokenized = clause.get("tokens")
+    return tokenized if tokenized is not None else TokenizedClause(clause["text"])
+
+
+def split_phrase(phrase: str) -> Tuple[Tuple[str, ...], Tuple[str, ...]]:
+    """Words and the separators between them: "non-compete" → (("non", "compete"), ("-",))."""
+    phrase = phrase.lower()
+    spans = [m.span() for m in _WORD.finditer(phrase)]
+    words = tuple(phrase[a:b] for a, b in spans)
+    separators = tuple(phrase[spans[k][1]:spans[k + 1][0]] for k in range(len(spans) - 1))
+    return words, separators
+
+
+# ---------------------------------------------------------------------------
+# Featurization
+# ---------------------------------------------------------------------------
+def _strip_accents(text: str) -> str:
+    return "".join(c for c in unicodedata.normalize("NFKD", text) if not unicodedata.combining(c))
+
+
+def vectorizer_features(doc: Union[str, TokenizedClause]) -> List[str]:
+    """
+    TF-IDF analyzer over the shared tokens: tokens of two or more
+    characters, then their bigrams (the features of a word analyzer with
+    strip_accents="unicode" and ngram_range=(1, 2)). Accepts a
+    TokenizedClause or plain text. Non-ASCII text is accent-stripped and
+    re-tokenized, since stripping can join tokens ("i\\u0307stanbul").
+    """
+    tokenized = doc if isinstance(doc, TokenizedClause) else TokenizedClause(doc)
+    tokens = tokenized.tokens if tokenized.lower.isascii() else _WORD.findall(_strip_accents(tokenized.lower))
+    unigrams = [t for t in tokens if len(t) >= 2]
+    features = list(unigrams)
+    features.extend(map(" ".join, zip(unigrams, unigrams[1:])))
+    return features
+
+
+def vectorizer_inputs(vectorizer, docs: Sequence[Union[str, TokenizedClause]]) -> list:
+    """
+    docs as a vectorizer can take them: TokenizedClauses pass through to
+    one built on vectorizer_features(); other vectorizers (e.g. older
+    published models) get their text.
+    """
+    if getattr(vectorizer, "analyzer", None) is vectorizer_features:
+        return list(docs)
+    return [d.text if isinstance(d, TokenizedClause) else d for d in docs]
@@ -0,0 +1,138 @@
+"""
+utils/version_diff.py
+----------------------
+Version-aware re-analysis of revised contracts.
+
+The clauses of a new revision are aligned against the analyzed clauses
+of the previous version by clause hashing plus sequence alignment.
+Unchanged clauses reuse their previous prediction; only inserted or
+modified clauses are re-scored. The alignment doubles as a redline-style
+diff of risk changes between the two versions.
+"""
+
+import difflib
+import hashlib
+from typing import Dict, List, Optional, Tuple
+
+from utils.risk_predictor import analyze_clauses
+from utils.stats_aggregator import SummaryAggregator
+
+# Within a replaced block, clause pairs at least this similar are reported
+# as "modified"; less similar pairs become a deletion plus an insertion.
+MODIFIED_SIMILARITY = 0.5
+
+
+def clause_hash(text: str) -> str:
+    """
+    Returns a hash of a clause's exact text.
+
+    Whitespace is not normalized: keyword matching is whitespace-sensitive,
+    so only byte-identical clauses may safely reuse a previous prediction.
+    """
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def reanalyze_revision(
+    clauses: List[Dict],
+    previous_analyzed: List[Dict],
+    aggregator: Optional[SummaryAggregator] = None,
+    model=None,
+) -> Tuple[List[Dict], List[Dict]]:
+    """
+    Analyzes a revised document, re-scoring only changed clauses.
+
+    Args:
+        clauses: Output of segment_document() for the new revision.
+        previous_analyzed: Output of analyze_clauses() for the previous version.
+        aggregator: Optional SummaryAggregator updated with every clause of
+            the new revision, reused or re-scored.
+        model: Optional PublishedModel used to re-score changed clauses.
+
+    Returns:
+        Tuple of (analyzed, diff). analyzed matches what analyze_clauses()
+        would return for the new revision. diff is a list of entries, each
+        with op ("unchanged", "modified", "inserted", "deleted"), old and
+        new clause dicts (None where absent) and risk_change.
+    """
+    old_hashes = [clause_hash(c["text"]) for c in previous_analyzed]
+    new_hashes = [clause_hash(c["text"]) for c in clauses]
+    matcher = difflib.SequenceMatcher(None, old_hashes, new_hashes, autojunk=False)
+
+    analyzed: List[Optional[Dict]] = [None] * len(clauses)
+    diff: List[Dict] = []
+    to_score: List[int] = []
+
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            for i, j in zip(range(i1, i2), range(j1, j2)):
+                analyzed[j] = {**previous_analyzed[i], "id": clauses[j]["id"]}
+                diff.append({"op": "unchanged", "old": previous_analyzed[i], "new_pos": j})
+            continue
+
+        old_block = list(range(i1, i2))
+        new_block = list(range(j1, j2))
+        for k in range(max(len(old_block), len(new_block))):
+            i = old_block[k] if k < len(old_block) else None
+            j = new_block[k] if k < len(new_block) else None
+            if j is not None:
+                to_score.append(j)
+            if i is not None and j is not None:
+                ratio = difflib.SequenceMatcher(
+                    None, previous_analyzed[i]["text"], clauses[j]["text"]
+                ).quick_ratio()
+                if ratio >= MODIFIED_SIMILARITY:
+                    diff.append({"op": "modified", "old": previous_analyzed[i], "new_pos": j})
+                    continue
+                diff.append({"op": "deleted", "old": previous_analyzed[i], "new_pos": None})
+                diff.append({"op": "inserted", "old": None, "new_pos": j})
+            elif i is not None:
+                diff.append({"op": "deleted", "old": previous_analyzed[i], "new_pos": None})
+            else:
+                diff.append({"op": "inserted", "old": None, "new_pos": j})
+
+    # Re-score all changed clauses in one batch
+    for j, result in zip(to_score, analyze_clauses([clauses[j] for j in to_score], model=model)):
+        analyzed[j] = result
+
+    if aggregator is not None:
+        for clause in analyzed:
+            aggregator.update(clause)
+
+    for entry in diff:
+        j = entry.pop("new_pos")
+        entry["new"] = analyzed[j] if j is not None else None
+        entry["risk_change"] = _risk_change(entry["old"], entry["new"])
+
+    return analyzed, diff
+
+
+def _risk_change(old: Optional[Dict], new: Optional[Dict]) -> str:
+    """Classifies how a clause's risk moved between versions."""
+    if new is None:
+        return "removed_risk" if old["label"] == "Risky" else "none"
+    if old is None:
+        return "added_risk" if new["label"] == "Risky" else "none"
+    if old["label"] != new["label"]:
+        return "newly_risky" if new["label"] == "Risky" else "no_longer_risky"
+    if old["categories"] != new["categories"] or old["matched_keywords"] != new["matched_keywords"]:
+        return "risk_changed"
+    return "none"
+
+
+def summarize_diff(diff: List[Dict]) -> Dict:
+    """
+    Counts diff entries by operation and by risk change.
+
+    Returns:
+        dict with unchanged, modified, inserted, deleted, rescored and
+        risk_changes (risk_change -> count, excluding "none").
+    """
+    counts = {"unchanged": 0, "modified": 0, "inserted": 0, "deleted": 0}
+    risk_changes: Dict[str, int] = {}
+    for entry in diff:
+        counts[entry["op"]] += 1
+        if entry["risk_change"] != "none":
+            risk_changes[entry["risk_change"]] = risk_changes.get(entry["risk_change"], 0) + 1
+    counts["rescored"] = counts["modified"] + counts["inserted"]
+    counts["risk_changes"] = risk_changes
+    return counts